@@ -11,12 +11,16 @@ import time
 import datetime
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from backend.auth import MaximoTokenManager
 from backend.api import init_api, init_sync_routes
 from backend.services import EnhancedProfileService, EnhancedWorkOrderService
 from backend.services.site_access_service import SiteAccessService
 from backend.services.labor_search_service import LaborSearchService
 from backend.services.labor_request_service import LaborRequestService
+from backend.services.workorder_lookup_cache import WorkOrderLookupCache
+from backend.services.offline_workorder_service import OfflineWorkOrderService
+from backend.api.sync_routes import get_offline_db, request_background_sync
 
 import logging
 import json
@@ -60,12 +64,22 @@ token_manager = MaximoTokenManager(DEFAULT_MAXIMO_URL)
 # Initialize enhanced profile service
 enhanced_profile_service = EnhancedProfileService(token_manager)
 
+# Shared wonum -> work order cache for detail, labor and material lookups
+workorder_lookup_cache = WorkOrderLookupCache(token_manager)
+
 # Initialize enhanced work order service
-enhanced_workorder_service = EnhancedWorkOrderService(token_manager, enhanced_profile_service)
+enhanced_workorder_service = EnhancedWorkOrderService(token_manager, enhanced_profile_service,
+                                                      workorder_cache=workorder_lookup_cache)
+
+# Offline-first work order search and detail, refreshed in the background when stale
+offline_workorder_service = OfflineWorkOrderService(get_offline_db,
+                                                    refresh=lambda site: request_background_sync('wodetail', site))
 
 # Initialize labor services
-labor_search_service = LaborSearchService(token_manager)
-labor_request_service = LaborRequestService(token_manager, enhanced_profile_service)
+labor_search_service = LaborSearchService(token_manager, enable_directory=True)
+labor_request_service = LaborRequestService(token_manager, enhanced_profile_service,
+                                            workorder_cache=workorder_lookup_cache,
+                                            offline_store=offline_workorder_service)
 
 
 
@@ -74,7 +88,7 @@ labor_request_service = LaborRequestService(token_manager, enhanced_profile_serv
 init_api(app, token_manager)
 
 # Initialize sync routes
-init_sync_routes(app)
+init_sync_routes(app, token_manager)
 
 # Background authentication flag
 background_auth_in_progress = False
@@ -405,8 +419,8 @@ def enhanced_workorders():
         flash('Please login first', 'error')
         return redirect(url_for('index'))
 
-    # Verify session using enhanced service (with caching)
-    if not enhanced_workorder_service.is_session_valid():
+    # Verify session using enhanced service (with caching); offline-first searches do not need Maximo
+    if not offline_workorder_service.enabled and not enhanced_workorder_service.is_session_valid():
         flash('Your session has expired. Please login again.', 'warning')
         session.clear()
         return redirect(url_for('index'))
@@ -419,7 +433,7 @@ def enhanced_workorders():
 
         # Get user's site ID for display (no work order fetching for lazy loading)
         try:
-            user_site_id = enhanced_workorder_service._get_user_site_id()
+            user_site_id = session.get('default_site') or enhanced_workorder_service._get_user_site_id()
         except:
             user_site_id = "Unknown"
 
@@ -681,6 +695,163 @@ def test_fresh_workorders():
     except Exception as e:
         return f"<h1>Fresh Test Error: {str(e)}</h1><p><a href='/welcome'>Back to Welcome</a></p>"
 
+def fetch_workorder_tasks(wonum):
+    """
+    Fetch the tasks of a work order (parent = wonum and istask = 1) from Maximo.
+
+    Args:
+        wonum (str): Parent work order number
+
+    Returns:
+        list: Cleaned task data, empty if the session expired or the request failed
+    """
+    tasks = []
+    try:
+        # Verify session is still valid before making tasks API call
+        if not enhanced_workorder_service.is_session_valid():
+            logger.warning("Session expired before tasks API call")
+            tasks = []
+        else:
+            # Define API URL for tasks
+            tasks_api_url = f"{token_manager.base_url}/oslc/os/mxapiwodetail"
+
+            # Fetch tasks for this work order (tasks have parent = wonum and istask = 1)
+            task_filter_clause = f'parent="{wonum}" and istask=1 and historyflag=0'
+            logger.info(f"🔍 TASK DEBUG: Task filter: {task_filter_clause}")
+
+            task_params = {
+                "oslc.select": "wonum,description,owner,siteid,parent,taskid,status,siteid,priority,worktype,location,assetnum,targstartdate,schedstart,schedfinish,assignedto,lead,supervisor,crew,persongroup,parent,istask,statusdate,reportdate,estdur,status_description",
+                "oslc.where": task_filter_clause,
+                "oslc.pageSize": "50"
+            }
+
+            task_response = token_manager.session.get(
+                tasks_api_url,
+                params=task_params,
+                timeout=(5.0, 30),
+                headers={"Accept": "application/json"},
+                allow_redirects=True
+            )
+
+            # Check for session expiration in task response
+            if 'login' in task_response.url.lower():
+                logger.warning("Session expired during task fetch")
+                tasks = []
+            elif task_response.status_code == 200:
+                try:
+                    content_type = task_response.headers.get('content-type', '').lower()
+                    if 'application/json' in content_type:
+                        task_data = task_response.json()
+                        logger.info(f"🔍 TASK DEBUG: Response data type: {type(task_data)}")
+                        logger.info(f"🔍 TASK DEBUG: Response keys: {list(task_data.keys()) if isinstance(task_data, dict) else 'Not a dict'}")
+
+                        if isinstance(task_data, dict):
+                            # Check for both 'member' and 'rdfs:member' fields
+                            if 'member' in task_data:
+                                tasks = task_data['member']
+                            elif 'rdfs:member' in task_data:
+                                tasks = task_data['rdfs:member']
+                            else:
+                                tasks = []
+
+                            if tasks:
+                                logger.info(f"🎉 WO TASKS: Found {len(tasks)} tasks for work order {wonum}")
+                                # Log first task for debugging
+                                first_task = tasks[0]
+                                logger.info(f"🔍 TASK DEBUG: First task wonum: {first_task.get('wonum', first_task.get('spi:wonum', 'N/A'))}")
+                                logger.info(f"🔍 TASK DEBUG: First task description: {first_task.get('description', first_task.get('spi:description', 'N/A'))}")
+                                logger.info(f"🔍 TASK DEBUG: First task keys: {list(first_task.keys()) if isinstance(first_task, dict) else 'Not a dict'}")
+                                logger.info(f"🔍 TASK DEBUG: First task full data: {str(first_task)[:300]}")
+
+                                # Clean and normalize task data - handle both spi: prefixed and direct field names
+                                cleaned_tasks = []
+                                for task_data in tasks:
+                                    if isinstance(task_data, dict):
+                                        # Helper function to get field value (try both spi: prefix and direct)
+                                        def get_field(field_name):
+                                            return task_data.get(field_name, task_data.get(f'spi:{field_name}', ''))
+
+                                        cleaned_task = {
+                                            'wonum': get_field('wonum'),
+                                            'description': get_field('description'),
+                                            'status': get_field('status'),
+                                            'worktype': get_field('worktype'),
+                                            'priority': get_field('priority'),
+                                            'worktype': get_field('worktype'),
+                                            'assignedto': get_field('assignedto'),
+                                            'owner': get_field('owner'),
+                                            'parent': get_field('parent'),
+                                            'istask': get_field('istask'),
+                                            'owner_group': get_field('ownergroup'),
+                                            'lead': get_field('lead'),
+                                            'supervisor': get_field('supervisor'),
+                                            'crew': get_field('crew'),
+                                            'persongroup': get_field('persongroup'),
+                                            'location': get_field('location'),
+                                            'assetnum': get_field('assetnum'),
+                                            'targstartdate': get_field('targstartdate'),
+                                            'schedstart': get_field('schedstart'),
+                                            'schedfinish': get_field('schedfinish'),
+                                            'estdur': get_field('estdur') or 0,
+                                            'parent': get_field('parent'),
+                                            'istask': get_field('istask') or 1,
+                                            'statusdate': get_field('statusdate'),
+                                            'reportdate': get_field('reportdate'),
+                                            'status_description': get_field('status_description'),
+                                            'siteid': get_field('siteid'),
+                                            'taskid': get_field('taskid'),
+                                            'lead': get_field('lead'),
+                                            'supervisor': get_field('supervisor'),
+                                            'crew': get_field('crew'),
+                                            'persongroup': get_field('persongroup'),
+                                            'location': get_field('location'),
+                                            'assetnum': get_field('assetnum'),
+                                            'targstartdate': get_field('targstartdate'),
+                                            'schedstart': get_field('schedstart'),
+                                            'schedfinish': get_field('schedfinish'),
+                                            'estdur': get_field('estdur') or 0,
+                                            'parent': get_field('parent'),
+                                            'istask': get_field('istask') or 1,
+                                            'statusdate': get_field('statusdate'),
+                                            'reportdate': get_field('reportdate'),
+                                            'status_description': get_field('status_description')
+                                        }
+                                        cleaned_tasks.append(cleaned_task)
+
+                                tasks = cleaned_tasks
+                                logger.info(f"🔧 TASK DEBUG: Cleaned {len(tasks)} tasks")
+                                if tasks:
+                                    logger.info(f"🔧 TASK DEBUG: First cleaned task: {tasks[0].get('wonum', 'N/A')} - {tasks[0].get('description', 'N/A')[:50]}")
+                                    logger.info(f"🔧 TASK DEBUG: First task assignedto: '{tasks[0].get('assignedto', 'N/A')}'")
+                                    logger.info(f"🔧 TASK DEBUG: First task lead: '{tasks[0].get('lead', 'N/A')}'")
+                                    logger.info(f"🔧 TASK DEBUG: First task supervisor: '{tasks[0].get('supervisor', 'N/A')}'")
+                                    logger.info(f"🔧 TASK DEBUG: First task crew: '{tasks[0].get('crew', 'N/A')}'")
+                                    logger.info(f"🔧 TASK DEBUG: First task persongroup: '{tasks[0].get('persongroup', 'N/A')}'")
+                            else:
+                                logger.info(f"🔍 TASK DEBUG: No tasks in member field")
+                                logger.info(f"🔍 TASK DEBUG: Response content: {str(task_data)[:200]}")
+                                logger.info(f"No tasks found for work order {wonum}")
+                        else:
+                            logger.info(f"🔍 TASK DEBUG: Response is not a dict")
+                            logger.info(f"No tasks found for work order {wonum}")
+                    else:
+                        logger.warning(f"Got HTML response for tasks - session may have expired")
+                        logger.info(f"🔍 TASK DEBUG: Content type: {content_type}")
+                        tasks = []
+                except Exception as e:
+                    logger.error(f"Error parsing task response: {e}")
+                    logger.info(f"🔍 TASK DEBUG: Raw response: {task_response.text[:200]}")
+                    tasks = []
+            else:
+                logger.warning(f"Task API call failed: {task_response.status_code}")
+                logger.info(f"🔍 TASK DEBUG: Error response: {task_response.text[:200]}")
+                tasks = []
+
+    except Exception as e:
+        logger.error(f"Error fetching tasks: {e}")
+
+    return tasks
+
 @app.route('/workorder/<wonum>')
 def workorder_detail(wonum):
     """Work order detail page with robust session handling and error recovery."""
@@ -689,16 +860,35 @@ def workorder_detail(wonum):
         flash('Please login first', 'error')
         return redirect(url_for('index'))
 
-    # Verify session is still valid
-    if not enhanced_workorder_service.is_session_valid():
-        flash('Your session has expired. Please login again.', 'warning')
-        session.clear()
-        return redirect(url_for('index'))
-
     try:
         # Record start time for performance
         start_time = time.time()
 
+        # Offline first: answered from the local database without waiting for Maximo
+        if offline_workorder_service.enabled:
+            workorder = offline_workorder_service.get_workorder_by_wonum(wonum, session.get('default_site'))
+            if workorder:
+                tasks = offline_workorder_service.get_workorder_tasks(wonum, workorder['siteid'])
+                if tasks is None:
+                    tasks = fetch_workorder_tasks(wonum)
+                load_time = time.time() - start_time
+                logger.info(f"📴 WO DETAIL: Work order {wonum} served from the offline database ({load_time:.3f}s)")
+                return render_template(
+                    'workorder_detail.html',
+                    workorder=workorder,
+                    tasks=tasks,
+                    user_site_id=session.get('default_site') or workorder.get('siteid'),
+                    load_time=load_time,
+                    auth_method="Offline Database",
+                    freshness=workorder.get('freshness')
+                )
+
+        # Verify session is still valid
+        if not enhanced_workorder_service.is_session_valid():
+            flash('Your session has expired. Please login again.', 'warning')
+            session.clear()
+            return redirect(url_for('index'))
+
         # Step 1: Get user profile with session validation
         try:
             user_profile = enhanced_profile_service.get_user_profile()
@@ -723,150 +913,7 @@ def workorder_detail(wonum):
             return redirect(url_for('enhanced_workorders'))
 
         # Step 3: Get work order tasks with robust session handling
-        tasks = []
-        try:
-            # Verify session is still valid before making tasks API call
-            if not enhanced_workorder_service.is_session_valid():
-                logger.warning("Session expired before tasks API call")
-                tasks = []
-            else:
-                # Define API URL for tasks
-                tasks_api_url = f"{token_manager.base_url}/oslc/os/mxapiwodetail"
-
-                # Fetch tasks for this work order (tasks have parent = wonum and istask = 1)
-                task_filter_clause = f'parent="{wonum}" and istask=1 and historyflag=0'
-                logger.info(f"🔍 TASK DEBUG: Task filter: {task_filter_clause}")
-
-                task_params = {
-                    "oslc.select": "wonum,description,owner,siteid,parent,taskid,status,siteid,priority,worktype,location,assetnum,targstartdate,schedstart,schedfinish,assignedto,lead,supervisor,crew,persongroup,parent,istask,statusdate,reportdate,estdur,status_description",
-                    "oslc.where": task_filter_clause,
-                    "oslc.pageSize": "50"
-                }
-
-                task_response = token_manager.session.get(
-                    tasks_api_url,
-                    params=task_params,
-                    timeout=(5.0, 30),
-                    headers={"Accept": "application/json"},
-                    allow_redirects=True
-                )
-
-                # Check for session expiration in task response
-                if 'login' in task_response.url.lower():
-                    logger.warning("Session expired during task fetch")
-                    tasks = []
-                elif task_response.status_code == 200:
-                    try:
-                        content_type = task_response.headers.get('content-type', '').lower()
-                        if 'application/json' in content_type:
-                            task_data = task_response.json()
-                            logger.info(f"🔍 TASK DEBUG: Response data type: {type(task_data)}")
-                            logger.info(f"🔍 TASK DEBUG: Response keys: {list(task_data.keys()) if isinstance(task_data, dict) else 'Not a dict'}")
-
-                            if isinstance(task_data, dict):
-                                # Check for both 'member' and 'rdfs:member' fields
-                                if 'member' in task_data:
-                                    tasks = task_data['member']
-                                elif 'rdfs:member' in task_data:
-                                    tasks = task_data['rdfs:member']
-                                else:
-                                    tasks = []
-
-                                if tasks:
-                                    logger.info(f"🎉 WO TASKS: Found {len(tasks)} tasks for work order {wonum}")
-                                    # Log first task for debugging
-                                    first_task = tasks[0]
-                                    logger.info(f"🔍 TASK DEBUG: First task wonum: {first_task.get('wonum', first_task.get('spi:wonum', 'N/A'))}")
-                                    logger.info(f"🔍 TASK DEBUG: First task description: {first_task.get('description', first_task.get('spi:description', 'N/A'))}")
-                                    logger.info(f"🔍 TASK DEBUG: First task keys: {list(first_task.keys()) if isinstance(first_task, dict) else 'Not a dict'}")
-                                    logger.info(f"🔍 TASK DEBUG: First task full data: {str(first_task)[:300]}")
-
-                                    # Clean and normalize task data - handle both spi: prefixed and direct field names
-                                    cleaned_tasks = []
-                                    for task_data in tasks:
-                                        if isinstance(task_data, dict):
-                                            # Helper function to get field value (try both spi: prefix and direct)
-                                            def get_field(field_name):
-                                                return task_data.get(field_name, task_data.get(f'spi:{field_name}', ''))
-
-                                            cleaned_task = {
-                                                'wonum': get_field('wonum'),
-                                                'description': get_field('description'),
-                                                'status': get_field('status'),
-                                                'worktype': get_field('worktype'),
-                                                'priority': get_field('priority'),
-                                                'worktype': get_field('worktype'),
-                                                'assignedto': get_field('assignedto'),
-                                                'owner': get_field('owner'),
-                                                'parent': get_field('parent'),
-                                                'istask': get_field('istask'),
-                                                'owner_group': get_field('ownergroup'),
-                                                'lead': get_field('lead'),
-                                                'supervisor': get_field('supervisor'),
-                                                'crew': get_field('crew'),
-                                                'persongroup': get_field('persongroup'),
-                                                'location': get_field('location'),
-                                                'assetnum': get_field('assetnum'),
-                                                'targstartdate': get_field('targstartdate'),
-                                                'schedstart': get_field('schedstart'),
-                                                'schedfinish': get_field('schedfinish'),
-                                                'estdur': get_field('estdur') or 0,
-                                                'parent': get_field('parent'),
-                                                'istask': get_field('istask') or 1,
-                                                'statusdate': get_field('statusdate'),
-                                                'reportdate': get_field('reportdate'),
-                                                'status_description': get_field('status_description'),
-                                                'siteid': get_field('siteid'),
-                                                'taskid': get_field('taskid'),
-                                                'lead': get_field('lead'),
-                                                'supervisor': get_field('supervisor'),
-                                                'crew': get_field('crew'),
-                                                'persongroup': get_field('persongroup'),
-                                                'location': get_field('location'),
-                                                'assetnum': get_field('assetnum'),
-                                                'targstartdate': get_field('targstartdate'),
-                                                'schedstart': get_field('schedstart'),
-                                                'schedfinish': get_field('schedfinish'),
-                                                'estdur': get_field('estdur') or 0,
-                                                'parent': get_field('parent'),
-                                                'istask': get_field('istask') or 1,
-                                                'statusdate': get_field('statusdate'),
-                                                'reportdate': get_field('reportdate'),
-                                                'status_description': get_field('status_description')
-                                            }
-                                            cleaned_tasks.append(cleaned_task)
-
-                                    tasks = cleaned_tasks
-                                    logger.info(f"🔧 TASK DEBUG: Cleaned {len(tasks)} tasks")
-                                    if tasks:
-                                        logger.info(f"🔧 TASK DEBUG: First cleaned task: {tasks[0].get('wonum', 'N/A')} - {tasks[0].get('description', 'N/A')[:50]}")
-                                        logger.info(f"🔧 TASK DEBUG: First task assignedto: '{tasks[0].get('assignedto', 'N/A')}'")
-                                        logger.info(f"🔧 TASK DEBUG: First task lead: '{tasks[0].get('lead', 'N/A')}'")
-                                        logger.info(f"🔧 TASK DEBUG: First task supervisor: '{tasks[0].get('supervisor', 'N/A')}'")
-                                        logger.info(f"🔧 TASK DEBUG: First task crew: '{tasks[0].get('crew', 'N/A')}'")
-                                        logger.info(f"🔧 TASK DEBUG: First task persongroup: '{tasks[0].get('persongroup', 'N/A')}'")
-                                else:
-                                    logger.info(f"🔍 TASK DEBUG: No tasks in member field")
-                                    logger.info(f"🔍 TASK DEBUG: Response content: {str(task_data)[:200]}")
-                                    logger.info(f"No tasks found for work order {wonum}")
-                            else:
-                                logger.info(f"🔍 TASK DEBUG: Response is not a dict")
-                                logger.info(f"No tasks found for work order {wonum}")
-                        else:
-                            logger.warning(f"Got HTML response for tasks - session may have expired")
-                            logger.info(f"🔍 TASK DEBUG: Content type: {content_type}")
-                            tasks = []
-                    except Exception as e:
-                        logger.error(f"Error parsing task response: {e}")
-                        logger.info(f"🔍 TASK DEBUG: Raw response: {task_response.text[:200]}")
-                        tasks = []
-                else:
-                    logger.warning(f"Task API call failed: {task_response.status_code}")
-                    logger.info(f"🔍 TASK DEBUG: Error response: {task_response.text[:200]}")
-                    tasks = []
-
-        except Exception as e:
-            logger.error(f"Error fetching tasks: {e}")
+        tasks = fetch_workorder_tasks(wonum)
 
         load_time = time.time() - start_time
         logger.info(f"🚀 WO DETAIL: Total load time: {load_time:.3f}s")
@@ -889,8 +936,13 @@ def workorder_detail(wonum):
 class MXAPIWODetailService:
     """Complete implementation of all MXAPIWODETAIL API methods and actions"""
 
-    def __init__(self, token_manager):
+    # Status a work order is left in by the status wsmethods other than changeStatus
+    METHOD_STATUSES = {'approve': 'APPR', 'start': 'INPRG', 'complete': 'COMP', 'close': 'CLOSE', 'cancel': 'CAN'}
+
+    def __init__(self, token_manager, workorder_cache=None, offline_store=None):
         self.token_manager = token_manager
+        self.workorder_cache = workorder_cache
+        self.offline_store = offline_store
         self.logger = logging.getLogger(__name__)
 
         # Standard Maximo Work Order Status Transitions
@@ -1100,7 +1152,23 @@ class MXAPIWODetailService:
                 timeout=(5.0, 30)
             )
 
-            return self._process_response(response, method_name)
+            result = self._process_response(response, method_name)
+
+            # Written work orders must be looked up fresh next time, and read live until synced again
+            if result.get('success'):
+                if bulk and isinstance(data, list):
+                    written = [(item.get('wonum'), item.get('status')) for item in data if isinstance(item, dict)]
+                else:
+                    written = [(wonum, data.get('status') if isinstance(data, dict) else None)]
+                for written_wonum, status in written:
+                    if not written_wonum:
+                        continue
+                    if self.workorder_cache:
+                        self.workorder_cache.evict(written_wonum)
+                    if self.offline_store:
+                        self.offline_store.mark_dirty(written_wonum, status=status or self.METHOD_STATUSES.get(method_name))
+
+            return result
 
         except Exception as e:
             self.logger.error(f"Error executing {method_name}: {str(e)}")
@@ -1167,7 +1235,8 @@ class MXAPIWODetailService:
             return {'success': False, 'error': f'Response processing error: {str(e)}'}
 
 # Initialize the complete MXAPIWODETAIL service
-mxapi_service = MXAPIWODetailService(token_manager)
+mxapi_service = MXAPIWODetailService(token_manager, workorder_cache=workorder_lookup_cache,
+                                     offline_store=offline_workorder_service)
 
 @app.route('/api/task/<task_wonum>/status', methods=['POST'])
 def update_task_status(task_wonum):
@@ -1242,6 +1311,8 @@ def update_task_status(task_wonum):
         logger.info(f"🔍 TASK STATUS: Response content: {response.text[:500]}")
 
         if response.status_code in [200, 201, 204]:
+            workorder_lookup_cache.evict(task_wonum)
+            offline_workorder_service.mark_dirty(task_wonum, status=new_status)
             try:
                 response_json = response.json()
                 logger.info(f"✅ TASK STATUS: Successfully updated via direct API")
@@ -1434,6 +1505,18 @@ def get_workorder_tasks(wonum):
 
         logger.info(f"🔍 TASKS: Fetching tasks for work order {wonum}")
 
+        # Offline first: the tasks are synced with their parent work order
+        if offline_workorder_service.enabled:
+            tasks = offline_workorder_service.get_workorder_tasks(wonum, session.get('default_site'))
+            if tasks is not None:
+                return jsonify({
+                    'success': True,
+                    'tasks': tasks,
+                    'count': len(tasks),
+                    'parent_wonum': wonum,
+                    'source': 'offline'
+                })
+
         # Get tasks using the enhanced service
         base_url = getattr(enhanced_workorder_service.token_manager, 'base_url', '')
         api_url = f"{base_url}/oslc/os/mxapiwodetail"
@@ -1947,10 +2030,6 @@ def api_search_workorders():
     if 'username' not in session:
         return jsonify({'error': 'Not authenticated'}), 401
 
-    # Verify session
-    if not enhanced_workorder_service.is_session_valid():
-        return jsonify({'error': 'Session expired'}), 401
-
     try:
         data = request.get_json() or {}
 
@@ -1964,12 +2043,29 @@ def api_search_workorders():
 
         logger.info(f"🔍 API SEARCH: Criteria: {search_criteria}, Page: {page}, Size: {page_size}")
 
+        # Offline first unless the client asks for live data ('source': 'live')
+        if offline_workorder_service.enabled and data.get('source') != 'live':
+            result = offline_workorder_service.search_workorders(
+                search_criteria=search_criteria,
+                page=page,
+                page_size=page_size,
+                site_id=session.get('default_site'),
+                cursor=data.get('cursor')
+            )
+            if result is not None:
+                return jsonify(result)
+
+        # Verify session
+        if not enhanced_workorder_service.is_session_valid():
+            return jsonify({'error': 'Session expired'}), 401
+
         # Execute search
         result = enhanced_workorder_service.search_workorders(
             search_criteria=search_criteria,
             page=page,
             page_size=page_size
         )
+        result['source'] = 'live'
 
         return jsonify(result)
 
@@ -2576,7 +2672,9 @@ inventory_search_service = InventorySearchService(token_manager)
 
 # Initialize the Material Request service
 from backend.services.material_request_service import MaterialRequestService
-material_request_service = MaterialRequestService(token_manager, task_materials_service, enhanced_profile_service, inventory_search_service)
+material_request_service = MaterialRequestService(token_manager, task_materials_service, enhanced_profile_service, inventory_search_service,
+                                                  workorder_cache=workorder_lookup_cache,
+                                                  offline_store=offline_workorder_service)
 
 
 
@@ -3713,8 +3811,17 @@ def get_task_planned_materials(task_wonum):
 
         logger.info(f"📦 MATERIALS API: Fetching materials for task {task_wonum}, site {user_site_id}")
 
+        # Offline first: planned materials are synced with the task (a refresh reads them live)
+        materials = None
+        refresh = request.args.get('refresh', '').lower() in ('1', 'true')
+        if offline_workorder_service.enabled and not refresh:
+            start_time = time.time()
+            materials = offline_workorder_service.get_task_planned_materials(task_wonum, user_site_id)
+            metadata = {'load_time': time.time() - start_time, 'source': 'offline', 'count': len(materials or [])}
+
         # Fetch planned materials
-        materials, metadata = task_materials_service.get_task_planned_materials(task_wonum, user_site_id)
+        if materials is None:
+            materials, metadata = task_materials_service.get_task_planned_materials(task_wonum, user_site_id)
 
         return jsonify({
             'success': True,
@@ -3788,8 +3895,11 @@ def get_task_labor_records(task_wonum):
 
         logger.info(f"👷 LABOR API: Fetching labor records for task {task_wonum}, site {user_site_id}")
 
+        # Offline first: labor transactions are synced with the task
+        labor = offline_workorder_service.get_task_labor(task_wonum, user_site_id) if offline_workorder_service.enabled else None
+
         # Fetch labor records
-        result = task_labor_service.get_task_labor(task_wonum, user_site_id, task_status)
+        result = task_labor_service.get_task_labor(task_wonum, user_site_id, task_status, records=labor)
 
         return jsonify(result)
 
@@ -4138,6 +4248,35 @@ def get_inventory_cache_stats():
 
 
 # Labor Search API Endpoints
+@app.route('/api/workorder/lookup-cache/clear', methods=['POST'])
+def clear_workorder_lookup_cache():
+    """Clear the shared work order lookup cache."""
+    try:
+        # Check if user is logged in
+        if not hasattr(token_manager, 'username') or not token_manager.username:
+            return jsonify({'success': False, 'error': 'Not logged in'})
+
+        cleared = workorder_lookup_cache.clear()
+        return jsonify({'success': True, 'message': f'Cleared {cleared} cache entries'})
+
+    except Exception as e:
+        logger.error(f"Error clearing work order lookup cache: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/workorder/lookup-cache/stats', methods=['GET'])
+def get_workorder_lookup_cache_stats():
+    """Get shared work order lookup cache statistics."""
+    try:
+        # Check if user is logged in
+        if not hasattr(token_manager, 'username') or not token_manager.username:
+            return jsonify({'success': False, 'error': 'Not logged in'})
+
+        return jsonify({'success': True, 'stats': workorder_lookup_cache.get_stats()})
+
+    except Exception as e:
+        logger.error(f"Error getting work order lookup cache stats: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)})
+
 @app.route('/api/labor/search', methods=['GET'])
 def search_labor_codes():
     """Search labor codes by labor code or description."""
@@ -4203,6 +4342,28 @@ def clear_labor_cache():
         logger.error(f"Error clearing labor cache: {str(e)}")
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/labor/directory/preload', methods=['POST'])
+def preload_labor_directory():
+    """Start loading the labor-code directory for a site in the background."""
+    try:
+        # Check if user is logged in
+        if not hasattr(token_manager, 'username') or not token_manager.username:
+            return jsonify({'success': False, 'error': 'Not logged in'})
+
+        data = request.get_json(silent=True) or {}
+        site_id = (data.get('site_id') or request.args.get('site_id', '')).strip()
+        force = bool(data.get('force', False))
+
+        if not site_id:
+            return jsonify({'success': False, 'error': 'Site ID is required'})
+
+        started = labor_search_service.preload_labor_directory(site_id, force=force)
+        return jsonify({'success': True, 'started': started, 'site_id': site_id})
+
+    except Exception as e:
+        logger.error(f"Error preloading labor directory: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)})
+
 @app.route('/api/labor/cache/stats', methods=['GET'])
 def get_labor_cache_stats():
     """Get labor search cache statistics."""
@@ -4280,12 +4441,60 @@ def add_labor_to_task(task_wonum):
             transtype=transtype
         )
 
+        # The task's labor list changed, so drop its cached copy
+        if result.get('success'):
+            invalidate_task_labor_cache(task_wonum)
+
         return jsonify(result)
 
     except Exception as e:
         logger.error(f"Error adding labor to task {task_wonum}: {str(e)}")
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/labor/batch', methods=['POST'])
+def add_labor_batch():
+    """Add many labor lines across tasks and work orders in one request."""
+    try:
+        # Check if user is logged in
+        if not hasattr(token_manager, 'username') or not token_manager.username:
+            return jsonify({'success': False, 'error': 'Not logged in'})
+
+        data = request.get_json()
+        if not data or not isinstance(data.get('lines'), list) or not data['lines']:
+            return jsonify({'success': False, 'error': 'No labor lines provided'})
+
+        # Accept the same field names as the single add-labor endpoint
+        lines = []
+        for line in data['lines']:
+            line = line or {}
+            lines.append({
+                'wonum': line.get('parent_wonum') or line.get('wonum'),
+                'siteid': line.get('siteid'),
+                'laborcode': line.get('laborcode'),
+                'regularhrs': line.get('regularhrs'),
+                'taskid': line.get('taskid'),
+                'task_wonum': line.get('task_wonum'),
+                'startdate': line.get('startdate'),
+                'starttime': line.get('starttime'),
+                'finishtime': line.get('finishtime'),
+                'transtype': line.get('transtype')
+            })
+
+        logger.info(f"🔧 LABOR API: Adding batch of {len(lines)} labor lines")
+
+        result = labor_request_service.add_labor_batch(lines)
+
+        # Drop the cached labor list of every task that received labor
+        for line_result in result.get('results', []):
+            if line_result and line_result.get('success') and line_result.get('task_wonum'):
+                invalidate_task_labor_cache(line_result['task_wonum'])
+
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"Error adding labor batch: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)})
+
 @app.route('/api/labor/performance-stats', methods=['GET'])
 def get_labor_performance_stats():
     """Get labor request performance statistics."""
@@ -4301,6 +4510,35 @@ def get_labor_performance_stats():
         logger.error(f"Error getting labor performance stats: {str(e)}")
         return jsonify({'success': False, 'error': str(e)})
 
+# Labor transaction loading configuration
+LABOR_LOCALREF_MAX_WORKERS = 8  # Bounded pool for localref follow-up requests
+TASK_LABOR_CACHE_TTL = 300  # 5 minutes, invalidated early when labor is added
+
+# Per-task labor transaction cache keyed by (task_wonum, site_id)
+task_labor_cache = {}
+task_labor_cache_lock = threading.Lock()
+
+def get_cached_task_labor(task_wonum, site_id):
+    """Return cached processed labor for a task, or None if missing or expired."""
+    with task_labor_cache_lock:
+        entry = task_labor_cache.get((task_wonum, site_id))
+        if entry and time.time() - entry['timestamp'] < TASK_LABOR_CACHE_TTL:
+            return entry['labor']
+        task_labor_cache.pop((task_wonum, site_id), None)
+        return None
+
+def cache_task_labor(task_wonum, site_id, labor):
+    """Store processed labor for a task."""
+    with task_labor_cache_lock:
+        task_labor_cache[(task_wonum, site_id)] = {'labor': labor, 'timestamp': time.time()}
+
+def invalidate_task_labor_cache(task_wonum):
+    """Evict every cached labor entry for a task, whatever the site."""
+    with task_labor_cache_lock:
+        for key in [key for key in task_labor_cache if key[0] == task_wonum]:
+            del task_labor_cache[key]
+    logger.info(f"🧹 LABOR API: Invalidated cached labor for task {task_wonum}")
+
 def extract_labor_records_from_data(raw_labor_data, source_type):
     """Extract labor records from various data structures"""
     logger.info(f"👷 LABOR EXTRACT: Processing {source_type} data type: {type(raw_labor_data)}")
@@ -4337,6 +4575,42 @@ def extract_labor_records_from_data(raw_labor_data, source_type):
         logger.error(f"❌ LABOR EXTRACT: Unexpected data type: {type(raw_labor_data)}")
         return []
 
+def fetch_labor_localref(localref):
+    """
+    Fetch a single labor transaction from its localref URL.
+
+    Args:
+        localref: The localref URL of the labtrans record
+
+    Returns:
+        The labor dictionary, or None if it could not be fetched
+    """
+    # Fix hostname in localref if needed
+    base_url = getattr(token_manager, 'base_url', '')
+    if base_url and 'vectrus-mea.manage.v2x.maximotest.gov2x.com' in localref:
+        import re
+        hostname_match = re.search(r'https://([^/]+)', base_url)
+        if hostname_match:
+            correct_hostname = hostname_match.group(1)
+            localref = re.sub(r'https://[^/]+', f'https://{correct_hostname}', localref)
+
+    try:
+        localref_response = token_manager.session.get(
+            localref,
+            timeout=(5.0, 30),
+            headers={"Accept": "application/json"},
+            allow_redirects=True
+        )
+
+        if localref_response.status_code == 200:
+            return localref_response.json()
+
+        logger.warning(f"👷 LABOR API: Failed to fetch localref data, status: {localref_response.status_code}")
+        return None
+    except Exception as e:
+        logger.warning(f"👷 LABOR API: Error fetching localref data: {str(e)}")
+        return None
+
 def fetch_labor_from_collection_ref(collection_ref_url):
     """
     Fetch labor records from a collection reference URL (same pattern as materials).
@@ -4369,50 +4643,28 @@ def fetch_labor_from_collection_ref(collection_ref_url):
                 labor_records = data.get('member', data.get('rdfs:member', []))
                 logger.info(f"👷 LABOR API: Found {len(labor_records)} labor records in collection ref")
 
-                # Process each labor record to handle localref if needed
-                processed_records = []
+                # Resolve localref-only records concurrently, keeping the original order
+                processed_records = [None] * len(labor_records)
+                localref_jobs = {}
                 for i, labor_data in enumerate(labor_records):
-                    logger.info(f"👷 LABOR API: Raw labor {i+1} data: {labor_data}")
-                    if isinstance(labor_data, dict):
-                        logger.info(f"👷 LABOR API: Labor {i+1} keys: {list(labor_data.keys())}")
-
-                        # Check if this is just a localref - if so, fetch the actual labor data
-                        if 'localref' in labor_data and len(labor_data.keys()) == 1:
-                            localref = labor_data['localref']
-                            logger.info(f"👷 LABOR API: Labor {i+1} is a localref, fetching actual data from: {localref}")
-
-                            # Fix hostname in localref if needed
-                            base_url = getattr(token_manager, 'base_url', '')
-                            if base_url and 'vectrus-mea.manage.v2x.maximotest.gov2x.com' in localref:
-                                import re
-                                hostname_match = re.search(r'https://([^/]+)', base_url)
-                                if hostname_match:
-                                    correct_hostname = hostname_match.group(1)
-                                    localref = re.sub(r'https://[^/]+', f'https://{correct_hostname}', localref)
-                                    logger.info(f"👷 LABOR API: Fixed localref URL: {localref}")
-
-                            # Fetch the actual labor data
-                            try:
-                                localref_response = token_manager.session.get(
-                                    localref,
-                                    timeout=(5.0, 30),
-                                    headers={"Accept": "application/json"},
-                                    allow_redirects=True
-                                )
-
-                                if localref_response.status_code == 200:
-                                    actual_labor_data = localref_response.json()
-                                    logger.info(f"👷 LABOR API: Fetched actual labor data: {actual_labor_data}")
-                                    labor_data = actual_labor_data
-                                else:
-                                    logger.warning(f"👷 LABOR API: Failed to fetch localref data, status: {localref_response.status_code}")
-                                    continue
-                            except Exception as e:
-                                logger.warning(f"👷 LABOR API: Error fetching localref data: {str(e)}")
-                                continue
-
-                        processed_records.append(labor_data)
+                    if isinstance(labor_data, dict) and 'localref' in labor_data and len(labor_data.keys()) == 1:
+                        localref_jobs[i] = labor_data['localref']
+                    else:
+                        processed_records[i] = labor_data
+
+                if localref_jobs:
+                    logger.info(f"👷 LABOR API: Resolving {len(localref_jobs)} localref records in parallel")
+                    max_workers = min(LABOR_LOCALREF_MAX_WORKERS, len(localref_jobs))
+                    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                        futures = {
+                            executor.submit(fetch_labor_localref, localref): i
+                            for i, localref in localref_jobs.items()
+                        }
+                        for future in as_completed(futures):
+                            processed_records[futures[future]] = future.result()
 
+                # Drop localrefs that could not be resolved
+                processed_records = [record for record in processed_records if record is not None]
                 return processed_records
             else:
                 logger.warning(f"👷 LABOR API: Collection ref response is not a dict")
@@ -4544,6 +4796,21 @@ def get_task_labor(task_wonum):
             except:
                 pass
 
+        # Serve from the per-task cache unless a refresh was requested
+        if request.args.get('refresh', '').lower() not in ('1', 'true'):
+            cached_labor = get_cached_task_labor(task_wonum, user_site_id)
+            if cached_labor is not None:
+                logger.info(f"🎯 LABOR API: Cache hit for task {task_wonum}")
+                return jsonify({
+                    'success': True,
+                    'show_labor': True,
+                    'labor': cached_labor,
+                    'task_wonum': task_wonum,
+                    'task_status': task_status,
+                    'cached': True,
+                    'message': f'Found {len(cached_labor)} labor transaction records'
+                })
+
         # Use MXAPIWODETAIL to get labor data using collection reference approach (same as materials)
         base_url = getattr(token_manager, 'base_url', '')
         api_url = f"{base_url}/oslc/os/mxapiwodetail"
@@ -4666,6 +4933,8 @@ def get_task_labor(task_wonum):
 
                 logger.info(f"✅ LABOR API: Successfully processed {len(processed_labor)} labor transaction records for task {task_wonum}")
 
+                cache_task_labor(task_wonum, user_site_id, processed_labor)
+
                 return jsonify({
                     'success': True,
                     'show_labor': True,
@@ -4719,8 +4988,14 @@ def check_workorder_materials_availability(wonum):
 
         logger.info(f"📦 WO MATERIALS API: Checking availability for WO {wonum}, site {user_site_id}")
 
+        # Offline first: one local query instead of a request per task
+        availability = None
+        if offline_workorder_service.enabled:
+            availability = offline_workorder_service.get_materials_availability(wonum, user_site_id)
+
         # Check materials availability
-        availability = task_materials_service.check_workorder_materials_availability(wonum, user_site_id)
+        if availability is None:
+            availability = task_materials_service.check_workorder_materials_availability(wonum, user_site_id)
 
         return jsonify({
             'success': True,
@@ -4851,6 +5126,39 @@ def add_material_request():
         logger.error(f"Error adding material request: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/workorder/material-cart', methods=['POST'])
+def submit_material_cart():
+    """Add a cart of material requests across tasks and work orders in one transaction."""
+    try:
+        # Check if user is logged in
+        if 'username' not in session:
+            return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+
+        # Verify session is still valid
+        if not enhanced_workorder_service.is_session_valid():
+            return jsonify({'success': False, 'error': 'Session expired'}), 401
+
+        data = request.get_json()
+        if not data or not isinstance(data.get('lines'), list) or not data['lines']:
+            return jsonify({'success': False, 'error': 'No material lines provided'}), 400
+
+        lines = [line or {} for line in data['lines']]
+        for line in lines:
+            if not line.get('requestby') or not isinstance(line.get('requestby'), str):
+                return jsonify({'success': False, 'error': 'requestby field is required and cannot be empty'}), 400
+
+        logger.info(f"🛒 MATERIAL CART API: Submitting {len(lines)} material lines")
+
+        result = material_request_service.add_material_cart(lines)
+
+        if result.get('results') is not None:
+            return jsonify(result)
+        return jsonify(result), 400
+
+    except Exception as e:
+        logger.error(f"Error submitting material cart: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 # Payload test page
 @app.route('/payload-test')
 def payload_test():
@@ -6,12 +6,12 @@ import sys
 import time
 import json
 import uuid
-import sqlite3
 import logging
 import threading
 import datetime
+import collections
 import requests
-from flask import Blueprint, jsonify, request, session
+from flask import Blueprint, Response, jsonify, request, session
 import importlib.util
 
 # Configure logging
@@ -25,9 +25,48 @@ sync_bp = Blueprint('sync', __name__)
 # Default database path
 DEFAULT_DB_PATH = os.path.expanduser('~/.maximo_offline/maximo.db')
 
-# Dictionary to store sync tasks
+# Running and recently finished sync tasks; older ones are only in the history (see sync/sync_history.py)
 sync_tasks = {}
 
+# Finished sync tasks kept in memory, oldest first
+finished_task_ids = collections.deque()
+RECENT_TASK_LIMIT = 20
+
+# Messages kept per sync task; older ones are dropped (see TaskMessages)
+TASK_MESSAGE_LIMIT = 500
+
+# Seconds between keep-alive comments on an idle sync event stream
+SYNC_EVENTS_KEEPALIVE = 15
+
+# Statuses after which a sync task no longer changes
+FINISHED_TASK_STATUSES = ('completed', 'failed', 'cancelled')
+
+# Notified whenever a sync task changes, to wake its event streams
+sync_task_changed = threading.Condition()
+sync_task_version = 0
+
+# Worker processes running the sync jobs (see sync/sync_pool.py), started on first use
+sync_pool = None
+sync_pool_lock = threading.Lock()
+
+# Shared offline database access (see sync/sync_db.py), loaded on first use
+sync_db = None
+
+# Sync task history in the offline database, opened on first use
+sync_history = None
+sync_history_lock = threading.Lock()
+
+# Token manager of the app, set by init_sync_routes
+sync_token_manager = None
+
+# Background incremental syncs (see sync/sync_scheduler.py), started with the first request
+sync_scheduler = None
+sync_scheduler_lock = threading.Lock()
+sync_traffic = None
+
+# Requests that do not count as interactive traffic for the scheduler
+SCHEDULER_IGNORED_PATHS = ('/static/', '/api/sync-task-events/', '/api/sync-task-status/', '/api/sync-scheduler')
+
 def load_sync_module(module_name):
     """
     Dynamically load a sync module.
@@ -88,6 +127,19 @@ def load_sync_module(module_name):
         logger.error(f"Error loading module {module_name}: {e}")
         return None
 
+def get_offline_db(db_path=DEFAULT_DB_PATH):
+    """
+    Get the shared access to the offline database (see sync/sync_db.py).
+
+    Returns:
+        OfflineDatabase: Pooled read connections and the single writer for db_path
+    """
+    global sync_db
+
+    if sync_db is None:
+        sync_db = load_sync_module('sync_db')
+    return sync_db.get_database(db_path)
+
 def get_sync_status(db_path=DEFAULT_DB_PATH):
     """
     Get the current sync status from the database.
@@ -100,15 +152,15 @@ def get_sync_status(db_path=DEFAULT_DB_PATH):
     """
     try:
         # Connect to the database
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        # Query the sync_status table
-        cursor.execute("SELECT endpoint, last_sync, record_count, status, message FROM sync_status")
-        results = cursor.fetchall()
+        conn = get_offline_db(db_path).read()
+        try:
+            cursor = conn.cursor()
 
-        # Close the connection
-        conn.close()
+            # Query the sync_status table
+            cursor.execute("SELECT endpoint, last_sync, record_count, status, message FROM sync_status")
+            results = cursor.fetchall()
+        finally:
+            conn.close()
 
         # Format the results
         status = {}
@@ -138,65 +190,63 @@ def get_default_site(db_path=DEFAULT_DB_PATH, username=None):
         str: Default site ID, or None if not found
     """
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        conn = get_offline_db(db_path).read()
+        try:
+            cursor = conn.cursor()
 
-        # Get the current user's ID from the session or parameter
-        if not username:
-            try:
-                username = session.get('username', '')
-            except RuntimeError:
-                # Handle case when running outside request context
-                logger.warning("Running outside request context, trying to find a default site")
-                # Check if any default site exists in the database
+            # Get the current user's ID from the session or parameter
+            if not username:
+                try:
+                    username = session.get('username', '')
+                except RuntimeError:
+                    # Handle case when running outside request context
+                    logger.warning("Running outside request context, trying to find a default site")
+                    # Check if any default site exists in the database
+                    cursor.execute("""
+                        SELECT siteid FROM person_site WHERE isdefault = 1 LIMIT 1
+                    """)
+                    result = cursor.fetchone()
+                    if result:
+                        logger.info(f"Using first available default site: {result[0]}")
+                        return result[0]
+                    else:
+                        # If no default site exists, return None
+                        logger.warning("No default sites found in database")
+                        return None
+
+            if not username:
+                logger.warning("Username not found in session")
+                return None
+
+            # Query the database for the user's default site
+            cursor.execute("""
+                SELECT ps.siteid
+                FROM person p
+                JOIN maxuser mu ON p.personid = mu.personid
+                JOIN person_site ps ON p.personid = ps.personid
+                WHERE mu.userid = ? AND ps.isdefault = 1
+            """, (username,))
+
+            result = cursor.fetchone()
+
+            if result:
+                logger.info(f"Found default site {result[0]} for user {username}")
+                return result[0]
+            else:
+                # Try to find any default site
                 cursor.execute("""
                     SELECT siteid FROM person_site WHERE isdefault = 1 LIMIT 1
                 """)
                 result = cursor.fetchone()
+
                 if result:
-                    logger.info(f"Using first available default site: {result[0]}")
-                    conn.close()
+                    logger.info(f"No default site for user {username}, using first available: {result[0]}")
                     return result[0]
                 else:
-                    # If no default site exists, return None
-                    logger.warning("No default sites found in database")
-                    conn.close()
+                    logger.warning(f"No default site found for user {username} or any other user")
                     return None
-
-        if not username:
-            logger.warning("Username not found in session")
+        finally:
             conn.close()
-            return None
-
-        # Query the database for the user's default site
-        cursor.execute("""
-            SELECT ps.siteid
-            FROM person p
-            JOIN maxuser mu ON p.personid = mu.personid
-            JOIN person_site ps ON p.personid = ps.personid
-            WHERE mu.userid = ? AND ps.isdefault = 1
-        """, (username,))
-
-        result = cursor.fetchone()
-
-        if result:
-            logger.info(f"Found default site {result[0]} for user {username}")
-            conn.close()
-            return result[0]
-        else:
-            # Try to find any default site
-            cursor.execute("""
-                SELECT siteid FROM person_site WHERE isdefault = 1 LIMIT 1
-            """)
-            result = cursor.fetchone()
-            conn.close()
-
-            if result:
-                logger.info(f"No default site for user {username}, using first available: {result[0]}")
-                return result[0]
-            else:
-                logger.warning(f"No default site found for user {username} or any other user")
-                return None
 
     except Exception as e:
         logger.error(f"Error getting default site: {e}")
@@ -313,20 +363,22 @@ def get_user_specific_site(db_path=DEFAULT_DB_PATH, task_id=None):
         if username:
             log_message('info', f'🔍 Database check for user: {username}')
 
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
+            conn = get_offline_db(db_path).read()
+            try:
+                cursor = conn.cursor()
 
-            # Query the database for the user's default site
-            cursor.execute("""
-                SELECT ps.siteid
-                FROM person p
-                JOIN maxuser mu ON p.personid = mu.personid
-                JOIN person_site ps ON p.personid = ps.personid
-                WHERE mu.userid = ? AND ps.isdefault = 1
-            """, (username,))
+                # Query the database for the user's default site
+                cursor.execute("""
+                    SELECT ps.siteid
+                    FROM person p
+                    JOIN maxuser mu ON p.personid = mu.personid
+                    JOIN person_site ps ON p.personid = ps.personid
+                    WHERE mu.userid = ? AND ps.isdefault = 1
+                """, (username,))
 
-            result = cursor.fetchone()
-            conn.close()
+                result = cursor.fetchone()
+            finally:
+                conn.close()
 
             if result:
                 log_message('info', f'✅ Found user site from database: {result[0]} for user {username}')
@@ -390,173 +442,513 @@ def get_user_specific_site(db_path=DEFAULT_DB_PATH, task_id=None):
 
     return None
 
-def run_sync_task(task_id, endpoint, db_path, force_full=False):
+class TaskMessages:
+    """
+    Bounded log of a sync task's messages.
+
+    Each message gets a sequence number, so event streams and status requests
+    only send the messages after the last one the browser has seen.
     """
-    Run a sync task in a background thread.
+
+    def __init__(self, limit=TASK_MESSAGE_LIMIT):
+        self.entries = collections.deque(maxlen=limit)
+        self.unsaved = collections.deque(maxlen=limit)
+        self.last_seq = 0
+
+    def append(self, message):
+        """Add a message ({'level', 'text'}) and wake the task's event streams."""
+        with sync_task_changed:
+            self.last_seq += 1
+            message = dict(message, seq=self.last_seq)
+            self.entries.append(message)
+            self.unsaved.append(message)
+            notify_task_changed()
+
+    def take_unsaved(self):
+        """Get the messages not saved to the history yet."""
+        with sync_task_changed:
+            messages = list(self.unsaved)
+            self.unsaved.clear()
+        return messages
+
+    def since(self, seq):
+        """
+        Get the messages after a sequence number.
+
+        Returns:
+            tuple: (messages, number of messages after seq that were already dropped)
+        """
+        with sync_task_changed:
+            messages = [message for message in self.entries if message['seq'] > seq]
+            first_seq = messages[0]['seq'] if messages else self.last_seq + 1
+        return messages, max(0, first_seq - seq - 1)
+
+    def __iter__(self):
+        return iter(list(self.entries))
+
+    def __len__(self):
+        return len(self.entries)
+
+def notify_task_changed():
+    """Wake the event streams after a sync task changed."""
+    global sync_task_version
+    with sync_task_changed:
+        sync_task_version += 1
+        sync_task_changed.notify_all()
+
+def get_task_state(task):
+    """Get the part of a sync task's status that is sent as progress events."""
+    return {
+        'status': task['status'],
+        'progress': task['progress'],
+        'error': task['error'],
+        'endpoint': task['endpoint'],
+        'endpoints': {name: dict(state) for name, state in task.get('endpoints', {}).items()}
+    }
+
+def format_sse(event, data, event_id=None):
+    """Format one server-sent event."""
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, default=str)}')
+    return '\n'.join(lines) + '\n\n'
+
+def stream_sync_task(task_id, after=0):
+    """
+    Generate the server-sent events of a sync task until it finishes.
+
+    Events:
+        log       One new message ({'level', 'text'}); its id is the message's sequence number
+        progress  The task's status, progress and per-endpoint pages and rows, when they change
+        done      The final status; the stream ends after it
+
+    Args:
+        task_id (str): Unique ID for the task
+        after (int): Sequence number of the last message the browser has (Last-Event-ID)
+    """
+    sent_state = None
+    yield 'retry: 2000\n\n'
+
+    while True:
+        with sync_task_changed:
+            seen_version = sync_task_version
+
+        task = sync_tasks.get(task_id)
+        if task is None:
+            # Finished and no longer in memory
+            history = get_sync_history()
+            recorded = history.get_task(task_id) if history else None
+            if recorded:
+                recorded['progress'] = 100 if recorded['status'] == 'completed' else 0
+            yield format_sse('done', recorded or {'status': 'failed', 'error': f'Task not found: {task_id}', 'progress': 0})
+            return
+
+        messages, dropped = task['messages'].since(after)
+        if dropped:
+            yield format_sse('log', {'level': 'warning', 'text': f'{dropped} older messages were dropped'})
+        for message in messages:
+            after = message['seq']
+            yield format_sse('log', {'level': message['level'], 'text': message['text']}, event_id=after)
+
+        state = get_task_state(task)
+        if state['status'] in FINISHED_TASK_STATUSES:
+            yield format_sse('done', state)
+            return
+        if state != sent_state:
+            yield format_sse('progress', state)
+            sent_state = state
+
+        with sync_task_changed:
+            changed = sync_task_changed.wait_for(lambda: sync_task_version != seen_version,
+                                                 timeout=SYNC_EVENTS_KEEPALIVE)
+        if not changed:
+            # Keeps proxies from closing an idle connection
+            yield ': keep-alive\n\n'
+
+def get_sync_history():
+    """
+    Get the sync task history, opening it on first use.
+
+    Returns:
+        SyncTaskHistory: The history, or None if it could not be opened
+    """
+    global sync_history
+
+    with sync_history_lock:
+        if sync_history is None:
+            history_module = load_sync_module('sync_history')
+            if not history_module:
+                return None
+
+            try:
+                sync_history = history_module.SyncTaskHistory(
+                    DEFAULT_DB_PATH,
+                    max_tasks=int(os.getenv('MAXIMO_SYNC_HISTORY_TASKS', '200')),
+                    max_age_days=int(os.getenv('MAXIMO_SYNC_HISTORY_DAYS', '30')),
+                    max_log_lines=int(os.getenv('MAXIMO_SYNC_HISTORY_LOG_LINES', '2000'))
+                )
+            except Exception as e:
+                logger.error(f"Could not open the sync task history: {e}")
+                return None
+
+        return sync_history
+
+def save_sync_task(task_id):
+    """Record a sync task's state and its new messages in the history."""
+    history = get_sync_history()
+    task = sync_tasks.get(task_id)
+    if not history or not task:
+        return
+
+    endpoints = task.get('endpoints', {})
+    rows_written = sum(state.get('rows_written') or 0 for state in endpoints.values())
+    duration = task.get('duration_seconds')
+
+    try:
+        history.save_task(task_id, {
+            'endpoint': task['endpoint'],
+            'status': task['status'],
+            'username': task.get('session_data', {}).get('username'),
+            'start_time': task['start_time'],
+            'end_time': task.get('end_time'),
+            'duration_seconds': duration,
+            'rows_written': rows_written,
+            'rows_per_second': rows_written / duration if duration else None,
+            'error': task['error'],
+            'last_seq': task['messages'].last_seq
+        }, messages=task['messages'].take_unsaved(), endpoints=endpoints)
+    except Exception as e:
+        logger.warning(f"Could not record sync task {task_id} in the history: {e}")
+
+def complete_sync_task(task_id, result=None):
+    """
+    Record a finished sync task in the history and drop old finished tasks from memory.
+
+    Args:
+        task_id (str): Unique ID for the task
+        result (dict): Result of the sync job, for the per-endpoint metrics
+    """
+    task = sync_tasks.get(task_id)
+    if not task:
+        return
+
+    end_time = datetime.datetime.now()
+    task['end_time'] = end_time.isoformat()
+    task['duration_seconds'] = (end_time - datetime.datetime.fromisoformat(task['start_time'])).total_seconds()
+
+    history_module = load_sync_module('sync_history') if result else None
+    if history_module:
+        task['endpoints'] = history_module.summarize_task_result(task['endpoint'], result, task.get('endpoints'))
+
+    save_sync_task(task_id)
+
+    finished_task_ids.append(task_id)
+    while len(finished_task_ids) > RECENT_TASK_LIMIT:
+        sync_tasks.pop(finished_task_ids.popleft(), None)
+
+    on_finished = task.pop('on_finished', None)
+    if on_finished:
+        try:
+            on_finished(task['status'] == 'completed')
+        except Exception as e:
+            logger.warning(f"Sync task callback failed for {task_id}: {e}")
+
+    history = get_sync_history()
+    if history:
+        try:
+            history.prune()
+        except Exception as e:
+            logger.warning(f"Could not prune the sync task history: {e}")
+
+def add_task_message(task_id, level, text):
+    """Add a message to a sync task."""
+    messages = sync_tasks[task_id]['messages']
+    messages.append({
+        'level': level,
+        'text': text
+    })
+
+    # Save long runs of messages before the buffer drops any of them
+    if len(messages.unsaved) >= messages.unsaved.maxlen // 2:
+        save_sync_task(task_id)
+
+def get_sync_pool():
+    """
+    Get the sync worker pool, starting it on first use.
+
+    Returns:
+        SyncWorkerPool: The pool, or None if the sync_pool module could not be loaded
+    """
+    global sync_pool
+
+    with sync_pool_lock:
+        if sync_pool is None:
+            pool_module = load_sync_module('sync_pool')
+            if not pool_module:
+                return None
+
+            sync_pool = pool_module.SyncWorkerPool(
+                max_workers=int(os.getenv('MAXIMO_SYNC_WORKERS', '2')),
+                max_queued=int(os.getenv('MAXIMO_SYNC_QUEUE_SIZE', '8')),
+                on_event=handle_sync_event
+            )
+
+        return sync_pool
+
+def get_sync_api_key(task_id):
+    """
+    Get the API key sync jobs use, from the environment or the token manager.
+
+    Returns:
+        str: API key, or None if it could not be obtained
+    """
+    api_key = os.getenv('MAXIMO_API_KEY')
+    if api_key:
+        return api_key
+
+    try:
+        token_manager = sync_token_manager
+        if token_manager is None:
+            from backend.auth import token_manager
+        api_key = token_manager.get_api_key()
+        if api_key:
+            add_task_message(task_id, 'info', 'Successfully obtained API key')
+            return api_key
+    except Exception as e:
+        logger.error(f"Error getting API key: {e}")
+
+    return None
+
+def prepare_sync_job(task_id, endpoint, db_path, force_full=False, shadow=False, site=None):
+    """
+    Build the parameters of a sync job.
+
+    Everything a worker needs (sites, API key, flags) is resolved here and
+    passed to it explicitly, so concurrent jobs never share process state.
 
     Args:
         task_id (str): Unique ID for the task
         endpoint (str): Endpoint to sync
         db_path (str): Path to the SQLite database
         force_full (bool): Whether to force a full sync
-    """
-    try:
-        # Update task status
-        sync_tasks[task_id]['status'] = 'in_progress'
-        sync_tasks[task_id]['progress'] = 5
-        sync_tasks[task_id]['messages'].append({
-            'level': 'info',
-            'text': f'Starting sync for {endpoint}'
-        })
+        shadow (bool): Run a full sync into a shadow database, swapped in when it completes
+        site (str): Site to sync the endpoint for, instead of the user's site
 
-        # Define a function to update the UI with current endpoint status
-        def update_endpoint_status(current_endpoint, status_text):
-            sync_tasks[task_id]['messages'].append({
-                'level': 'info',
-                'text': f'Syncing {current_endpoint}: {status_text}'
-            })
-            logger.info(f"Task {task_id}: Syncing {current_endpoint} - {status_text}")
-
-        # Get default site for endpoints that need it
-        default_site = None
-        if endpoint in ['locations', 'assets', 'wodetail', 'inventory']:
-            if endpoint == 'wodetail':
-                # For work orders, use user-specific site with no fallback
-                user_site = get_user_specific_site(db_path, task_id)
-                if user_site:
-                    default_site = user_site
-                    sync_tasks[task_id]['messages'].append({
-                        'level': 'info',
-                        'text': f'✅ Using logged-in user\'s site: {default_site}'
-                    })
-                else:
-                    # FAIL THE SYNC - Do not use any fallback site
-                    sync_tasks[task_id]['status'] = 'failed'
-                    sync_tasks[task_id]['error'] = 'Cannot determine logged-in user\'s site ID'
-                    sync_tasks[task_id]['messages'].append({
-                        'level': 'error',
-                        'text': '❌ SYNC FAILED: Cannot determine logged-in user\'s site ID'
-                    })
-                    return
-            else:
-                # For other endpoints, use the existing logic
-                default_site = get_default_site(db_path)
-                # We'll always get a default site now, even if it's a fallback value
-                sync_tasks[task_id]['messages'].append({
-                    'level': 'info',
-                    'text': f'Using site: {default_site}'
-                })
-
-        # Set environment variables for the sync process
-        os.environ['MAXIMO_DB_PATH'] = db_path
-        if force_full:
-            os.environ['MAXIMO_FORCE_FULL'] = 'true'
+    Returns:
+        dict: Job parameters for sync_worker, or None if the task failed
+    """
+    task = sync_tasks[task_id]
+    add_task_message(task_id, 'info', f'Starting sync for {endpoint}')
+
+    sites = {}
+    endpoints_to_sync = None
+
+    if site and endpoint != 'all':
+        sites[endpoint] = site
+        add_task_message(task_id, 'info', f'Using site: {site}')
+    elif endpoint == 'all':
+        endpoints_to_sync = ['peruser', 'locations', 'assets', 'domain', 'wodetail', 'inventory']
+
+        # For work orders, use the logged-in user's site with no fallback
+        wodetail_site = get_user_specific_site(db_path, task_id)
+        if wodetail_site:
+            sites['wodetail'] = wodetail_site
+            add_task_message(task_id, 'info', f"Syncing wodetail: Using user's site: {wodetail_site}")
         else:
-            os.environ.pop('MAXIMO_FORCE_FULL', None)
+            add_task_message(task_id, 'info', "Syncing wodetail: FAILED: Cannot determine user's site")
+            endpoints_to_sync.remove('wodetail')
+
+        # Other endpoints use the default site once peruser has refreshed person_site
+    elif endpoint == 'wodetail':
+        # For work orders, use user-specific site with no fallback
+        user_site = get_user_specific_site(db_path, task_id)
+        if not user_site:
+            # FAIL THE SYNC - Do not use any fallback site
+            task['status'] = 'failed'
+            task['error'] = 'Cannot determine logged-in user\'s site ID'
+            add_task_message(task_id, 'error', '❌ SYNC FAILED: Cannot determine logged-in user\'s site ID')
+            return None
 
-        if default_site:
-            os.environ['MAXIMO_DEFAULT_SITE'] = default_site
+        sites['wodetail'] = user_site
+        add_task_message(task_id, 'info', f'✅ Using logged-in user\'s site: {user_site}')
+    elif endpoint in ['locations', 'assets', 'inventory']:
+        sites[endpoint] = get_default_site(db_path)
+        add_task_message(task_id, 'info', f'Using site: {sites[endpoint]}')
+
+    api_key = get_sync_api_key(task_id)
+    if not api_key:
+        task['status'] = 'failed'
+        task['error'] = 'Failed to get API key'
+        add_task_message(task_id, 'error', 'Failed to get API key. Please login again.')
+        return None
 
-        # Load the appropriate sync module
-        if endpoint == 'all':
-            # Load the sync_all module
-            sync_module = load_sync_module('sync_all')
-            if not sync_module:
-                sync_tasks[task_id]['status'] = 'failed'
-                sync_tasks[task_id]['error'] = 'Failed to load sync_all module'
-                return
+    task['endpoints_to_sync'] = endpoints_to_sync or [endpoint]
 
-            # Run the sync_all main function
-            sync_tasks[task_id]['messages'].append({
-                'level': 'info',
-                'text': 'Starting sync for all endpoints'
-            })
+    return {
+        'endpoint': endpoint,
+        'endpoints': endpoints_to_sync,
+        'db_path': db_path,
+        'force_full': force_full or shadow,
+        'shadow': shadow,
+        'sites': sites,
+        'api_key': api_key,
+        'base_url': os.getenv('MAXIMO_BASE_URL'),
+        'username': os.getenv('MAXIMO_USERNAME')
+    }
 
-            # Define the endpoints to sync in order
-            endpoints_to_sync = ['peruser', 'locations', 'assets', 'domain', 'wodetail', 'inventory']
+def handle_sync_event(task_id, event):
+    """
+    Apply an event from a sync worker to its task.
 
-            # Instead of calling sync_all.main(), we'll handle each endpoint individually
-            # to provide better progress updates
-            try:
-                # Set up progress tracking
-                total_endpoints = len(endpoints_to_sync)
-                progress_per_endpoint = 90 / total_endpoints  # Reserve 5% for start and 5% for end
-                current_progress = 5  # Starting progress
-
-                # Process each endpoint
-                for i, current_endpoint in enumerate(endpoints_to_sync):
-                    # Update status to show which endpoint is being synced
-                    update_endpoint_status(current_endpoint, "Starting")
-
-                    # Load the specific sync module
-                    current_module_name = f'sync_{current_endpoint}'
-                    current_sync_module = load_sync_module(current_module_name)
-
-                    if not current_sync_module:
-                        update_endpoint_status(current_endpoint, "Failed to load module")
-                        continue
-
-                    # Prepare arguments
-                    current_args = ['--db-path', db_path]
-                    if force_full:
-                        current_args.append('--force-full')
-
-                    # Add site parameter for endpoints that need it
-                    if current_endpoint in ['locations', 'assets', 'wodetail', 'inventory']:
-                        if current_endpoint == 'wodetail':
-                            # For work orders, get user-specific site
-                            user_site = get_user_specific_site(db_path, task_id)
-                            if user_site:
-                                current_args.extend(['--site', user_site])
-                                update_endpoint_status(current_endpoint, f"Using user's site: {user_site}")
-                            else:
-                                update_endpoint_status(current_endpoint, "FAILED: Cannot determine user's site")
-                                continue  # Skip this endpoint
-                        elif default_site:
-                            current_args.extend(['--site', default_site])
-
-                    # Run the sync for this endpoint
-                    try:
-                        # Try to call with args directly
-                        try:
-                            current_sync_module.main(current_args)
-                        except TypeError as e:
-                            logger.info(f"main() doesn't accept arguments directly, trying with sys.argv: {e}")
-
-                            # If that fails, try with sys.argv
-                            original_argv = sys.argv
-                            try:
-                                # Create new argv with our arguments
-                                sys.argv = [f'{current_module_name}.py'] + current_args
-
-                                # Call main with no arguments
-                                current_sync_module.main()
-                            finally:
-                                # Restore original argv
-                                sys.argv = original_argv
-
-                        # Update status to show endpoint completed
-                        update_endpoint_status(current_endpoint, "Completed")
-                    except Exception as e:
-                        logger.error(f"Error syncing {current_endpoint}: {e}")
-                        update_endpoint_status(current_endpoint, f"Error: {str(e)}")
-
-                    # Update progress
-                    current_progress += progress_per_endpoint
-                    sync_tasks[task_id]['progress'] = int(current_progress)
-            except Exception as e:
-                logger.error(f"Error running sync_all: {e}")
-                sync_tasks[task_id]['status'] = 'failed'
-                sync_tasks[task_id]['error'] = str(e)
-                sync_tasks[task_id]['messages'].append({
-                    'level': 'error',
-                    'text': f'Error: {str(e)}'
-                })
-                return
-
-            # Update the overall sync status in the database
+    Called on the pool's reader threads.
+
+    Args:
+        task_id (str): Unique ID for the task
+        event (dict): Worker or pool event (see sync_worker and sync_pool)
+    """
+    task = sync_tasks.get(task_id)
+    if not task:
+        return
+
+    kind = event.get('event')
+
+    if kind == 'queued':
+        add_task_message(task_id, 'info', f"Waiting for a free sync worker (position {event['position']})")
+
+    elif kind == 'started':
+        task['status'] = 'in_progress'
+        task['progress'] = 5
+        add_task_message(task_id, 'info', f"Sync worker started (pid {event.get('pid')})")
+        save_sync_task(task_id)
+
+    elif kind == 'log':
+        # Page-by-page logs stay in the worker's log; problems are shown to the user
+        if event.get('level') in ('warning', 'error', 'critical'):
+            add_task_message(task_id, 'error' if event['level'] == 'critical' else event['level'], event.get('text', ''))
+
+    elif kind == 'progress':
+        current_endpoint = event['endpoint']
+        progress = event['progress']
+        endpoints = task.setdefault('endpoints', {})
+        previous = endpoints.get(current_endpoint, {}).get('status')
+        endpoints[current_endpoint] = progress
+
+        if progress['status'] != previous:
+            status_text = {
+                'running': 'Fetching data from Maximo API',
+                'completed': 'Completed',
+                'failed': f"Error: {progress.get('message')}"
+            }.get(progress['status'])
+            if status_text:
+                add_task_message(task_id, 'info', f'Syncing {current_endpoint}: {status_text}')
+                logger.info(f"Task {task_id}: Syncing {current_endpoint} - {status_text}")
+            save_sync_task(task_id)
+
+        total = len(task.get('endpoints_to_sync') or [current_endpoint])
+        finished = sum(1 for state in endpoints.values() if state['status'] in ('completed', 'failed'))
+        running_pages = sum(state.get('pages', 0) for state in endpoints.values() if state['status'] == 'running')
+        task['progress'] = max(task['progress'], min(95, 5 + int(90 * finished / total) + min(running_pages, 20)))
+
+    elif kind == 'finished':
+        finish_sync_task(task_id, event)
+        complete_sync_task(task_id, event.get('result'))
+
+    notify_task_changed()
+
+def finish_sync_task(task_id, event):
+    """Record a sync task's final status once its worker has exited."""
+    task = sync_tasks[task_id]
+    endpoint = task['endpoint']
+    result = event.get('result') or {}
+
+    if event.get('cancelled'):
+        task['status'] = 'cancelled'
+        task['error'] = 'Cancelled'
+        if task.get('shadow'):
+            discard_sync_shadow(task['db_path'])
+            add_task_message(task_id, 'warning', f'Sync cancelled for {endpoint}; the current data is kept')
+            return
+        add_task_message(task_id, 'warning', f'Sync cancelled for {endpoint}; the next sync resumes from the last saved page')
+        return
+
+    if not result.get('success'):
+        error = result.get('error')
+        if not error and endpoint == 'all' and result.get('results'):
+            failed = [name for name, endpoint_result in result['results'].items() if not endpoint_result.get('success')]
+            error = f"Failed endpoints: {', '.join(failed)}"
+        error = error or f"Sync worker exited with code {event.get('returncode')}"
+
+        # A full sync still completes with the endpoints that succeeded (a shadow sync is all or nothing)
+        if endpoint != 'all' or not result.get('results') or task.get('shadow'):
+            task['status'] = 'failed'
+            task['error'] = error
+            add_task_message(task_id, 'error', f'Error: {error}')
+            return
+        add_task_message(task_id, 'warning', error)
+
+    if result.get('shadow_path') and not swap_in_sync_shadow(task_id, task['db_path'], result):
+        return
+
+    if endpoint == 'all':
+        add_task_message(task_id, 'info',
+                         f"Synced {len(task.get('endpoints_to_sync') or [])} endpoints in {result.get('elapsed_seconds', 0):.1f}s")
+
+    record_sync_summary(task_id, endpoint, task['db_path'])
+
+    # Update progress
+    task['progress'] = 100
+    task['status'] = 'completed'
+    if endpoint == 'all':
+        add_task_message(task_id, 'success', 'Sync completed for all endpoints')
+    else:
+        add_task_message(task_id, 'info', f'Syncing {endpoint}: Completed successfully')
+        add_task_message(task_id, 'success', f'Sync completed for {endpoint}')
+
+def swap_in_sync_shadow(task_id, db_path, result):
+    """
+    Replace the offline database with the shadow database a sync completed.
+
+    Pooled connections are closed for the swap and re-opened on the new file;
+    readers wait for the swap instead of seeing a half-written sync.
+
+    Returns:
+        bool: True if the new data was swapped in
+    """
+    task = sync_tasks[task_id]
+    sync_shadow = load_sync_module('sync_shadow')
+    if not sync_shadow:
+        task['status'] = 'failed'
+        task['error'] = 'Failed to load sync_shadow module'
+        return False
+
+    try:
+        sync_shadow.swap_in_shadow(db_path, result['shadow_path'], set(result.get('shadow_tables') or []))
+    except Exception as e:
+        logger.error(f"Could not swap in the shadow database: {e}")
+        task['status'] = 'failed'
+        task['error'] = f'Could not swap in the new data: {e}'
+        add_task_message(task_id, 'error', f'❌ Could not swap in the new data, the current data is kept: {e}')
+        return False
+
+    add_task_message(task_id, 'info', '✅ Swapped in the newly synced database')
+    return True
+
+def discard_sync_shadow(db_path):
+    """Remove the shadow database left by a cancelled sync."""
+    sync_shadow = load_sync_module('sync_shadow')
+    if sync_shadow:
+        try:
+            sync_shadow.discard_shadow(sync_shadow.get_shadow_path(db_path))
+        except OSError as e:
+            logger.warning(f"Could not remove the shadow database: {e}")
+
+def record_sync_summary(task_id, endpoint, db_path):
+    """Add the record counts of a finished sync to its task (and the overall status after a full sync)."""
+    if endpoint == 'all':
+        # Update the overall sync status in the database
+        try:
+            conn = get_offline_db(db_path).write()
             try:
-                conn = sqlite3.connect(db_path)
                 cursor = conn.cursor()
 
                 # Get the latest sync time for each endpoint
@@ -581,24 +973,18 @@ def run_sync_task(task_id, endpoint, db_path, force_full=False):
                 )
 
                 conn.commit()
+            finally:
                 conn.close()
 
-                logger.info(f"Updated overall sync status: {endpoints_synced} endpoints, {total_records} total records")
-
-            except Exception as e:
-                logger.error(f"Error updating overall sync status: {e}")
+            logger.info(f"Updated overall sync status: {endpoints_synced} endpoints, {total_records} total records")
 
-            # Update progress
-            sync_tasks[task_id]['progress'] = 100
-            sync_tasks[task_id]['status'] = 'completed'
-            sync_tasks[task_id]['messages'].append({
-                'level': 'success',
-                'text': 'Sync completed for all endpoints'
-            })
+        except Exception as e:
+            logger.error(f"Error updating overall sync status: {e}")
 
-            # Get the record count from the database
+        # Get the record count from the database
+        try:
+            conn = get_offline_db(db_path).read()
             try:
-                conn = sqlite3.connect(db_path)
                 cursor = conn.cursor()
 
                 # Get the total record count from the sync_status table
@@ -622,128 +1008,16 @@ def run_sync_task(task_id, endpoint, db_path, force_full=False):
                             'level': 'info',
                             'text': f'{endpoint}: {count} records'
                         })
-
+            finally:
                 conn.close()
-            except Exception as e:
-                logger.error(f"Error getting record counts: {e}")
-                # Continue without record count
-        else:
-            # Load the specific sync module
-            sync_module = load_sync_module(f'sync_{endpoint}')
-            if not sync_module:
-                sync_tasks[task_id]['status'] = 'failed'
-                sync_tasks[task_id]['error'] = f'Failed to load sync_{endpoint} module'
-                return
-
-            # Run the sync
-            update_endpoint_status(endpoint, "Fetching data from Maximo API")
-            sync_tasks[task_id]['progress'] = 20
-
-            # Run the sync
-            try:
-                # First check if API key is available
-                api_key = os.getenv('MAXIMO_API_KEY')
-                if not api_key:
-                    # Try to get API key from token manager
-                    try:
-                        from backend.auth import token_manager
-                        api_key = token_manager.get_api_key()
-                        if api_key:
-                            os.environ['MAXIMO_API_KEY'] = api_key
-                            update_endpoint_status(endpoint, "Successfully obtained API key")
-                        else:
-                            sync_tasks[task_id]['status'] = 'failed'
-                            sync_tasks[task_id]['error'] = 'Failed to get API key'
-                            sync_tasks[task_id]['messages'].append({
-                                'level': 'error',
-                                'text': 'Failed to get API key. Please login again.'
-                            })
-                            return
-                    except Exception as e:
-                        logger.error(f"Error getting API key: {e}")
-                        sync_tasks[task_id]['status'] = 'failed'
-                        sync_tasks[task_id]['error'] = f'Failed to get API key: {str(e)}'
-                        sync_tasks[task_id]['messages'].append({
-                            'level': 'error',
-                            'text': f'Failed to get API key: {str(e)}'
-                        })
-                        return
-
-                # Try to call main() with arguments directly
-                try:
-                    # Prepare arguments
-                    args = []
-                    if force_full:
-                        args.append('--force-full')
-                    args.extend(['--db-path', db_path])
-                    if default_site:
-                        args.extend(['--site', default_site])
-
-                    # Try to call with args
-                    sync_module.main(args)
-                except TypeError as e:
-                    logger.info(f"main() doesn't accept arguments, trying without: {e}")
-
-                    # If that fails, try with no arguments but set sys.argv
-                    import sys
-                    original_argv = sys.argv
-                    try:
-                        # Create new argv with our arguments
-                        sys.argv = [f'sync_{endpoint}.py']
-                        if force_full:
-                            sys.argv.append('--force-full')
-                        sys.argv.extend(['--db-path', db_path])
-                        if default_site:
-                            sys.argv.extend(['--site', default_site])
-
-                        # Call main with no arguments
-                        sync_module.main()
-                    except requests.exceptions.RequestException as e2:
-                        logger.error(f"Network error during sync: {e2}")
-                        sync_tasks[task_id]['status'] = 'failed'
-                        sync_tasks[task_id]['error'] = f'Network error: {str(e2)}'
-                        sync_tasks[task_id]['messages'].append({
-                            'level': 'error',
-                            'text': f'Network error: {str(e2)}'
-                        })
-                        return
-                    except Exception as e2:
-                        logger.error(f"Error calling main() with sys.argv: {e2}")
-                        raise
-                    finally:
-                        # Restore original argv
-                        sys.argv = original_argv
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Network error during sync: {e}")
-                sync_tasks[task_id]['status'] = 'failed'
-                sync_tasks[task_id]['error'] = f'Network error: {str(e)}'
-                sync_tasks[task_id]['messages'].append({
-                    'level': 'error',
-                    'text': f'Network error: {str(e)}'
-                })
-                return
-            except Exception as e:
-                logger.error(f"Error running sync_{endpoint}: {e}")
-                sync_tasks[task_id]['status'] = 'failed'
-                sync_tasks[task_id]['error'] = str(e)
-                sync_tasks[task_id]['messages'].append({
-                    'level': 'error',
-                    'text': f'Error: {str(e)}'
-                })
-                return
-
-            # Update progress
-            sync_tasks[task_id]['progress'] = 100
-            sync_tasks[task_id]['status'] = 'completed'
-            update_endpoint_status(endpoint, "Completed successfully")
-            sync_tasks[task_id]['messages'].append({
-                'level': 'success',
-                'text': f'Sync completed for {endpoint}'
-            })
-
-            # Get the record count from the database
+        except Exception as e:
+            logger.error(f"Error getting record counts: {e}")
+            # Continue without record count
+    else:
+        # Get the record count from the database
+        try:
+            conn = get_offline_db(db_path).read()
             try:
-                conn = sqlite3.connect(db_path)
                 cursor = conn.cursor()
 
                 # Map endpoint to table name
@@ -897,20 +1171,11 @@ def run_sync_task(task_id, endpoint, db_path, force_full=False):
                         except Exception as e:
                             logger.error(f"Error creating detailed message: {e}")
                             # Continue without detailed message
-
+            finally:
                 conn.close()
-            except Exception as e:
-                logger.error(f"Error getting record count: {e}")
-                # Continue without record count
-
-    except Exception as e:
-        logger.error(f"Error in sync task: {e}")
-        sync_tasks[task_id]['status'] = 'failed'
-        sync_tasks[task_id]['error'] = str(e)
-        sync_tasks[task_id]['messages'].append({
-            'level': 'error',
-            'text': f'Error: {str(e)}'
-        })
+        except Exception as e:
+            logger.error(f"Error getting record count: {e}")
+            # Continue without record count
 
 @sync_bp.route('/sync-status', methods=['GET'])
 def api_sync_status():
@@ -937,9 +1202,6 @@ def api_sync_endpoint(endpoint):
     if endpoint not in valid_endpoints:
         return jsonify({'success': False, 'message': f'Invalid endpoint: {endpoint}'})
 
-    # Generate a task ID
-    task_id = str(uuid.uuid4())
-
     # Capture session data for background thread
     session_data = {}
     try:
@@ -952,33 +1214,203 @@ def api_sync_endpoint(endpoint):
         # Outside request context
         pass
 
+    # Get force_full and shadow parameters
+    force_full = request.json.get('force_full', False) if request.is_json else False
+    shadow = bool(request.json.get('shadow', False)) if request.is_json else False
+
+    return jsonify(start_sync_task(endpoint, session_data, force_full, shadow))
+
+def fail_unstarted_sync_task(task_id, error):
+    """Finish a sync task that could not be queued, without calling its on_finished callback."""
+    task = sync_tasks[task_id]
+    task['status'] = 'failed'
+    task['error'] = error
+    # The caller learns from start_sync_task's response that nothing started
+    task.pop('on_finished', None)
+    complete_sync_task(task_id)
+    notify_task_changed()
+
+def start_sync_task(endpoint, session_data, force_full=False, shadow=False, site=None, on_finished=None):
+    """
+    Create a sync task and queue its job in the worker pool.
+
+    Args:
+        endpoint (str): Endpoint to sync, or 'all'
+        session_data (dict): username, default_site and insert_site of the user
+        force_full (bool): Whether to force a full sync
+        shadow (bool): Run a full sync into a shadow database
+        site (str): Site to sync the endpoint for, instead of the user's site
+        on_finished (callable): Called as on_finished(success) when the task ends;
+            not called when the response has success False
+
+    Returns:
+        dict: Response with success, task_id and message
+    """
+    # Generate a task ID
+    task_id = str(uuid.uuid4())
+
     # Initialize task
     sync_tasks[task_id] = {
         'endpoint': endpoint,
         'status': 'pending',
         'progress': 0,
-        'messages': [],
+        'messages': TaskMessages(),
         'error': None,
         'start_time': datetime.datetime.now().isoformat(),
-        'session_data': session_data
+        'session_data': session_data,
+        'db_path': DEFAULT_DB_PATH,
+        'shadow': shadow,
+        'on_finished': on_finished
     }
 
-    # Get force_full parameter
-    force_full = request.json.get('force_full', False) if request.is_json else False
+    # Each shadow sync copies the live database when it starts, so a second one would undo the first
+    if shadow and any(other_id != task_id and task.get('shadow') and task['status'] not in FINISHED_TASK_STATUSES
+                      for other_id, task in list(sync_tasks.items())):
+        fail_unstarted_sync_task(task_id, 'Another shadow sync is running')
+        return {'success': False, 'message': 'Another shadow sync is running, please try again when it finishes'}
+
+    # Resolve the job's parameters here and run it in a worker process
+    job = prepare_sync_job(task_id, endpoint, DEFAULT_DB_PATH, force_full, shadow, site)
+    if not job:
+        complete_sync_task(task_id)
+        return {
+            'success': True,
+            'task_id': task_id,
+            'message': f'Sync failed to start for {endpoint}'
+        }
 
-    # Start the sync task in a background thread
-    thread = threading.Thread(
-        target=run_sync_task,
-        args=(task_id, endpoint, DEFAULT_DB_PATH, force_full)
-    )
-    thread.daemon = True
-    thread.start()
+    pool = get_sync_pool()
+    if not pool:
+        fail_unstarted_sync_task(task_id, 'Failed to load sync_pool module')
+        return {'success': False, 'message': 'Sync workers are not available'}
 
-    return jsonify({
+    save_sync_task(task_id)
+
+    try:
+        pool.submit(task_id, job)
+    except Exception as e:
+        logger.warning(f"Could not queue sync for {endpoint}: {e}")
+        fail_unstarted_sync_task(task_id, str(e))
+        return {'success': False, 'message': f'Too many syncs waiting, please try again later ({e})'}
+
+    return {
         'success': True,
         'task_id': task_id,
         'message': f'Sync started for {endpoint}'
-    })
+    }
+
+def submit_scheduled_sync(endpoint, site, on_finished):
+    """
+    Start a sync for the scheduler (see sync/sync_scheduler.py).
+
+    Returns:
+        bool: False if the sync cannot start now (no credentials, the endpoint is already syncing
+            or the workers are busy); on_finished is then never called
+    """
+    token_manager = sync_token_manager
+    logged_in = bool(token_manager and token_manager.is_logged_in())
+    if not os.getenv('MAXIMO_API_KEY') and not logged_in:
+        return False
+
+    for task in list(sync_tasks.values()):
+        if task['endpoint'] in (endpoint, 'all') and task['status'] not in FINISHED_TASK_STATUSES:
+            return False
+
+    username = (getattr(token_manager, 'username', None) if logged_in else None) or os.getenv('MAXIMO_USERNAME', '')
+    session_data = {'username': username, 'default_site': site or '', 'insert_site': '', 'scheduled': True}
+
+    return start_sync_task(endpoint, session_data, site=site, on_finished=on_finished)['success']
+
+def request_background_sync(endpoint, site=None):
+    """
+    Ask for a sync of stale offline data for its readers (see backend/services/offline_workorder_service.py).
+
+    The sync goes through the scheduler, so it waits for a free slot and for
+    heavy interactive traffic to drop like a scheduled one.
+
+    Args:
+        endpoint (str): Endpoint to sync
+        site (str): Site to sync, instead of the user's site
+
+    Returns:
+        bool: False if background syncs are disabled
+    """
+    scheduler = get_sync_scheduler()
+    if not scheduler:
+        return False
+
+    scheduler.request(endpoint, site)
+    return True
+
+def is_interactive_traffic_heavy():
+    """Check whether users made more requests in the last minute than scheduled syncs should compete with."""
+    return sync_traffic is not None and sync_traffic.count() > int(os.getenv('MAXIMO_SYNC_BUSY_REQUESTS', '30'))
+
+def get_sync_scheduler():
+    """
+    Get the background sync scheduler, starting it on first use.
+
+    Disabled with MAXIMO_SYNC_SCHEDULER=0. MAXIMO_SYNC_SCHEDULE sets the intervals
+    (endpoint[@site]=seconds, comma-separated) and MAXIMO_SYNC_SCHEDULER_WORKERS
+    the number of scheduled syncs running at once.
+
+    Returns:
+        SyncScheduler: The scheduler, or None if it is disabled or could not be loaded
+    """
+    global sync_scheduler
+
+    if os.getenv('MAXIMO_SYNC_SCHEDULER', '1') == '0':
+        return None
+
+    with sync_scheduler_lock:
+        if sync_scheduler is None:
+            scheduler_module = load_sync_module('sync_scheduler')
+            if not scheduler_module:
+                return None
+
+            try:
+                schedules = scheduler_module.parse_schedule(os.getenv('MAXIMO_SYNC_SCHEDULE', ''))
+            except ValueError as e:
+                logger.error(f"Sync scheduler not started: {e}")
+                return None
+
+            sync_scheduler = scheduler_module.SyncScheduler(
+                schedules,
+                submit_scheduled_sync,
+                max_concurrent=int(os.getenv('MAXIMO_SYNC_SCHEDULER_WORKERS', '1')),
+                is_busy=is_interactive_traffic_heavy
+            )
+            sync_scheduler.start()
+        return sync_scheduler
+
+def record_interactive_request():
+    """Count a user request for the scheduler's traffic check, starting the scheduler on the first one."""
+    global sync_traffic
+
+    if request.path.startswith(SCHEDULER_IGNORED_PATHS):
+        return
+
+    if sync_traffic is None:
+        scheduler_module = load_sync_module('sync_scheduler')
+        if not scheduler_module:
+            return
+        sync_traffic = scheduler_module.TrafficMeter()
+        # Started here rather than at import, so the reloader's parent process never runs syncs
+        get_sync_scheduler()
+
+    sync_traffic.record()
+
+@sync_bp.route('/sync-scheduler', methods=['GET'])
+def api_sync_scheduler():
+    """API endpoint to get the background sync schedule and the state of each entry."""
+    if 'username' not in session:
+        return jsonify({'success': False, 'message': 'Not logged in'})
+
+    scheduler = get_sync_scheduler()
+    if not scheduler:
+        return jsonify({'success': True, 'enabled': False})
+
+    return jsonify({'success': True, 'enabled': True, 'scheduler': scheduler.get_state()})
 
 @sync_bp.route('/sync-task-status/<task_id>', methods=['GET'])
 def api_sync_task_status(task_id):
@@ -986,22 +1418,126 @@ def api_sync_task_status(task_id):
     if 'username' not in session:
         return jsonify({'success': False, 'message': 'Not logged in'})
 
-    # Check if task exists
+    after = request.args.get('after', 0, type=int)
+
+    # Finished tasks no longer in memory come from the history
     if task_id not in sync_tasks:
-        return jsonify({'success': False, 'message': f'Task not found: {task_id}'})
+        history = get_sync_history()
+        task = history.get_task(task_id) if history else None
+        if not task:
+            return jsonify({'success': False, 'message': f'Task not found: {task_id}'})
+
+        return jsonify({
+            'success': True,
+            'status': task['status'],
+            'progress': 100 if task['status'] == 'completed' else 0,
+            'messages': history.get_messages(task_id, after),
+            'messages_dropped': 0,
+            'last_seq': task['last_seq'],
+            'error': task['error'],
+            'endpoint': task['endpoint'],
+            'endpoints': task['endpoints']
+        })
 
     # Get task status
     task = sync_tasks[task_id]
 
+    # Only the messages after ?after=<seq> (all buffered messages by default)
+    messages, dropped = task['messages'].since(after)
+
     return jsonify({
         'success': True,
         'status': task['status'],
         'progress': task['progress'],
-        'messages': task['messages'],
+        'messages': messages,
+        'messages_dropped': dropped,
+        'last_seq': task['messages'].last_seq,
         'error': task['error'],
-        'endpoint': task['endpoint']
+        'endpoint': task['endpoint'],
+        'endpoints': task.get('endpoints', {})
+    })
+
+@sync_bp.route('/sync-task-events/<task_id>', methods=['GET'])
+def api_sync_task_events(task_id):
+    """API endpoint streaming a sync task's progress and new messages as server-sent events."""
+    if 'username' not in session:
+        return jsonify({'success': False, 'message': 'Not logged in'})
+
+    if task_id not in sync_tasks and not get_sync_history():
+        return jsonify({'success': False, 'message': f'Task not found: {task_id}'})
+
+    # EventSource sends the id of the last message it received when it reconnects
+    after = request.headers.get('Last-Event-ID', type=int)
+    if after is None:
+        after = request.args.get('after', 0, type=int)
+
+    return Response(
+        stream_sync_task(task_id, after),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@sync_bp.route('/sync-task/<task_id>/cancel', methods=['POST'])
+def api_cancel_sync_task(task_id):
+    """API endpoint to cancel a queued or running sync task."""
+    if 'username' not in session:
+        return jsonify({'success': False, 'message': 'Not logged in'})
+
+    if task_id not in sync_tasks:
+        return jsonify({'success': False, 'message': f'Task not found: {task_id}'})
+
+    pool = get_sync_pool()
+    if not pool or not pool.cancel(task_id):
+        return jsonify({'success': False, 'message': 'Task is not queued or running'})
+
+    return jsonify({'success': True, 'message': 'Cancelling sync'})
+
+@sync_bp.route('/sync-task/<task_id>/messages', methods=['GET'])
+def api_sync_task_messages(task_id):
+    """API endpoint to read a sync task's messages page by page from the history."""
+    if 'username' not in session:
+        return jsonify({'success': False, 'message': 'Not logged in'})
+
+    history = get_sync_history()
+    if not history:
+        return jsonify({'success': False, 'message': 'Sync history is not available'})
+
+    # Messages of a running task are saved on status changes; save the rest first
+    if task_id in sync_tasks:
+        save_sync_task(task_id)
+
+    after = request.args.get('after', 0, type=int)
+    limit = min(request.args.get('limit', 200, type=int), 1000)
+    messages = history.get_messages(task_id, after, limit)
+
+    return jsonify({
+        'success': True,
+        'messages': messages,
+        'next_after': messages[-1]['seq'] if len(messages) == limit else None
     })
 
-def init_sync_routes(app):
+@sync_bp.route('/sync-history', methods=['GET'])
+def api_sync_history():
+    """API endpoint to list past sync tasks with their duration and rows/sec per endpoint."""
+    if 'username' not in session:
+        return jsonify({'success': False, 'message': 'Not logged in'})
+
+    history = get_sync_history()
+    if not history:
+        return jsonify({'success': False, 'message': 'Sync history is not available'})
+
+    limit = min(request.args.get('limit', 50, type=int), 200)
+    offset = request.args.get('offset', 0, type=int)
+
+    return jsonify({
+        'success': True,
+        'tasks': history.get_history(request.args.get('endpoint'), limit, offset)
+    })
+
+def init_sync_routes(app, token_manager=None):
     """Initialize the sync routes blueprint with the app."""
+    global sync_token_manager
+
+    sync_token_manager = token_manager
     app.register_blueprint(sync_bp, url_prefix='/api')
+    app.before_request(record_interactive_request)
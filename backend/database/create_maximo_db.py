@@ -5,6 +5,10 @@ This script will:
 1. Create a SQLite database
 2. Create tables for each Maximo API endpoint
 3. Set up indexes for efficient querying
+
+With --bulk-load the secondary indexes are deferred: the first sync of each
+endpoint loads its tables without them and builds them at the end (see
+sync/sync_bulkload.py). --build-indexes builds any that are still deferred.
 """
 import os
 import sys
@@ -13,6 +17,13 @@ import logging
 import argparse
 from pathlib import Path
 
+# The bulk-load helpers live with the sync scripts in the top-level sync/ directory
+SYNC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'sync')
+if SYNC_DIR not in sys.path:
+    sys.path.append(SYNC_DIR)
+
+from sync_bulkload import ensure_deferred_index_table, defer_indexes, build_deferred_indexes
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -20,13 +31,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger('create_maximo_db')
 
-def create_database(db_path, schema_dir=None):
+def create_database(db_path, schema_dir=None, bulk_load=False):
     """
     Create a SQLite database with tables for Maximo data.
 
     Args:
         db_path (str): Path to the SQLite database file
         schema_dir (str): Directory containing schema SQL files
+        bulk_load (bool): Defer the secondary indexes until each table's first sync has loaded it
     """
     # Ensure the directory exists
     os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
@@ -35,6 +47,9 @@ def create_database(db_path, schema_dir=None):
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
+    # Readers never wait for a sync's writes (the mode is stored in the file)
+    cursor.execute("PRAGMA journal_mode=WAL")
+
     logger.info(f"Creating database at {db_path}")
 
     try:
@@ -126,10 +141,113 @@ def create_database(db_path, schema_dir=None):
         );
         ''')
 
+        # Create a table for resuming interrupted syncs (see sync/sync_checkpoints.py)
+        logger.info("Creating sync_checkpoint table")
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_checkpoint (
+            endpoint TEXT NOT NULL,
+            site TEXT NOT NULL DEFAULT '',
+            query_fingerprint TEXT NOT NULL,
+            query TEXT,
+            next_page_url TEXT,
+            page_number INTEGER NOT NULL DEFAULT 0,
+            high_water_changedate TEXT,
+            rows_written INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (endpoint, site, query_fingerprint)
+        );
+        ''')
+
+        # Create a table for incremental sync watermarks (see sync/sync_watermarks.py)
+        logger.info("Creating sync_watermark table")
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_watermark (
+            endpoint TEXT NOT NULL,
+            site TEXT NOT NULL DEFAULT '',
+            filter TEXT NOT NULL DEFAULT '',
+            changedate TEXT NOT NULL,
+            updated_at TIMESTAMP NOT NULL,
+            full_read_at TIMESTAMP,
+            PRIMARY KEY (endpoint, site, filter)
+        );
+        ''')
+
+        # Create a table recording rows removed because Maximo stopped returning them (see sync/sync_reconcile.py)
+        logger.info("Creating sync_tombstone table")
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_tombstone (
+            table_name TEXT NOT NULL,
+            row_key TEXT NOT NULL,
+            endpoint TEXT NOT NULL,
+            site TEXT NOT NULL DEFAULT '',
+            action TEXT NOT NULL,
+            detected_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (table_name, row_key)
+        );
+        ''')
+
+        # Create the sync task history tables (see sync/sync_history.py)
+        logger.info("Creating sync task history tables")
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_task (
+            task_id TEXT PRIMARY KEY,
+            endpoint TEXT NOT NULL,
+            status TEXT NOT NULL,
+            username TEXT,
+            start_time TIMESTAMP NOT NULL,
+            end_time TIMESTAMP,
+            duration_seconds REAL,
+            rows_written INTEGER,
+            rows_per_second REAL,
+            error TEXT,
+            last_seq INTEGER NOT NULL DEFAULT 0
+        );
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sync_task_start_time ON sync_task (start_time);')
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_task_endpoint (
+            task_id TEXT NOT NULL,
+            endpoint TEXT NOT NULL,
+            status TEXT NOT NULL,
+            pages INTEGER,
+            records_received INTEGER,
+            rows_written INTEGER,
+            elapsed_seconds REAL,
+            rows_per_second REAL,
+            message TEXT,
+            PRIMARY KEY (task_id, endpoint)
+        );
+        ''')
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_task_log (
+            task_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            level TEXT NOT NULL,
+            text TEXT NOT NULL,
+            PRIMARY KEY (task_id, seq)
+        );
+        ''')
+
+        # Create a table for indexes deferred during an initial load (see sync/sync_bulkload.py)
+        logger.info("Creating sync_deferred_index table")
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_deferred_index (
+            name TEXT PRIMARY KEY,
+            table_name TEXT NOT NULL,
+            sql TEXT NOT NULL
+        );
+        ''')
+
         # Commit the changes
         conn.commit()
         logger.info("Database created successfully")
 
+        if bulk_load:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")
+            tables = [row[0] for row in cursor.fetchall()]
+            deferred = defer_indexes(conn, tables)
+            logger.info(f"Bulk-load mode: deferred {deferred} indexes until the first sync of their tables")
+
     except Exception as e:
         logger.error(f"Error creating database: {e}")
         conn.rollback()
@@ -566,14 +684,28 @@ def main():
                         help='Path to the SQLite database file')
     parser.add_argument('--schema-dir', type=str, default=None,
                         help='Directory containing schema SQL files')
+    parser.add_argument('--bulk-load', action='store_true',
+                        help='Defer secondary indexes until the initial sync has loaded each table')
+    parser.add_argument('--build-indexes', action='store_true',
+                        help='Build the indexes still deferred in an existing database and exit')
 
     args = parser.parse_args()
 
     # Expand the path
     db_path = os.path.expanduser(args.db_path)
 
+    if args.build_indexes:
+        conn = sqlite3.connect(db_path)
+        try:
+            ensure_deferred_index_table(conn)
+            built = build_deferred_indexes(conn)
+            logger.info(f"Built {built} deferred indexes")
+        finally:
+            conn.close()
+        return
+
     # Create the database
-    create_database(db_path, args.schema_dir)
+    create_database(db_path, args.schema_dir, bulk_load=args.bulk_load)
 
 if __name__ == "__main__":
     main()
@@ -46,6 +46,7 @@ CREATE TABLE IF NOT EXISTS workorder (
     actfinish TEXT,
     statusdate TEXT,
     wogroup TEXT,
+    description_longdescription TEXT,
     _rowstamp TEXT,
     _last_sync TIMESTAMP,
     _sync_status TEXT,
@@ -64,6 +65,10 @@ CREATE INDEX IF NOT EXISTS idx_workorder_owner ON workorder(owner);
 CREATE INDEX IF NOT EXISTS idx_workorder_assignedownergroup ON workorder(assignedownergroup);
 CREATE INDEX IF NOT EXISTS idx_workorder_historyflag ON workorder(historyflag);
 CREATE INDEX IF NOT EXISTS idx_workorder_wogroup ON workorder(wogroup);
+CREATE INDEX IF NOT EXISTS idx_workorder_site_reportdate ON workorder(siteid, reportdate, wonum, workorderid);
+CREATE INDEX IF NOT EXISTS idx_workorder_site_filters ON workorder(siteid, istask, historyflag, status, woclass, wopriority, wonum, workorderid);
+CREATE INDEX IF NOT EXISTS idx_workorder_wopriority ON workorder(wopriority);
+CREATE INDEX IF NOT EXISTS idx_workorder_workorderid ON workorder(workorderid);
 
 -- Work order service address table
 CREATE TABLE IF NOT EXISTS woserviceaddress (
@@ -164,3 +169,78 @@ CREATE INDEX IF NOT EXISTS idx_wotool_wonum ON wotool(wonum);
 CREATE INDEX IF NOT EXISTS idx_wotool_workorderid ON wotool(workorderid);
 CREATE INDEX IF NOT EXISTS idx_wotool_toolnum ON wotool(toolnum);
 
+-- Work order planned material table
+CREATE TABLE IF NOT EXISTS wpmaterial (
+    wpitemid INTEGER PRIMARY KEY,
+    wonum TEXT NOT NULL,
+    workorderid INTEGER NOT NULL,
+    siteid TEXT,
+    orgid TEXT,
+    itemnum TEXT,
+    itemsetid TEXT,
+    description TEXT,
+    itemqty REAL,
+    orderunit TEXT,
+    unitcost REAL,
+    linecost REAL,
+    rate REAL,
+    storeloc TEXT,
+    location TEXT,
+    vendor TEXT,
+    directreq INTEGER,
+    requestby TEXT,
+    requiredate TEXT,
+    restype TEXT,
+    restype_description TEXT,
+    linetype TEXT,
+    linetype_description TEXT,
+    conditioncode TEXT,
+    hours REAL,
+    _rowstamp TEXT,
+    _last_sync TIMESTAMP,
+    _sync_status TEXT,
+    FOREIGN KEY (wonum, workorderid) REFERENCES workorder(wonum, workorderid)
+);
+
+-- Indexes for wpmaterial table
+CREATE INDEX IF NOT EXISTS idx_wpmaterial_workorderid ON wpmaterial(workorderid);
+CREATE INDEX IF NOT EXISTS idx_wpmaterial_wonum_siteid ON wpmaterial(wonum, siteid);
+CREATE INDEX IF NOT EXISTS idx_wpmaterial_itemnum ON wpmaterial(itemnum);
+
+-- Labor transaction table
+CREATE TABLE IF NOT EXISTS labtrans (
+    labtransid INTEGER PRIMARY KEY,
+    wonum TEXT NOT NULL,
+    workorderid INTEGER NOT NULL,
+    refwo TEXT,
+    siteid TEXT,
+    orgid TEXT,
+    laborcode TEXT,
+    craft TEXT,
+    skilllevel TEXT,
+    taskid INTEGER,
+    laborhrs REAL,
+    regularhrs REAL,
+    premiumpayhours REAL,
+    startdate TEXT,
+    starttime TEXT,
+    finishdate TEXT,
+    finishtime TEXT,
+    transdate TEXT,
+    transtype TEXT,
+    payrate REAL,
+    linecost REAL,
+    vendor TEXT,
+    contractnum TEXT,
+    genapprservreceipt INTEGER,
+    enterby TEXT,
+    _rowstamp TEXT,
+    _last_sync TIMESTAMP,
+    _sync_status TEXT,
+    FOREIGN KEY (wonum, workorderid) REFERENCES workorder(wonum, workorderid)
+);
+
+-- Indexes for labtrans table
+CREATE INDEX IF NOT EXISTS idx_labtrans_workorderid ON labtrans(workorderid);
+CREATE INDEX IF NOT EXISTS idx_labtrans_wonum_siteid ON labtrans(wonum, siteid);
+CREATE INDEX IF NOT EXISTS idx_labtrans_laborcode ON labtrans(laborcode);
@@ -11,6 +11,8 @@ import threading
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Any, List, Tuple
 
+from .workorder_lookup_cache import WorkOrderLookupCache
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -44,7 +46,7 @@ class EnhancedWorkOrderService:
         'last_reset': time.time()
     }
 
-    def __init__(self, token_manager, enhanced_profile_service, cache_dir=None):
+    def __init__(self, token_manager, enhanced_profile_service, cache_dir=None, workorder_cache=None):
         """
         Initialize the enhanced work order service.
 
@@ -52,9 +54,11 @@ class EnhancedWorkOrderService:
             token_manager: The Maximo token manager instance
             enhanced_profile_service: Enhanced profile service for user site retrieval
             cache_dir: Directory for disk cache (optional)
+            workorder_cache: Shared WorkOrderLookupCache for single work order lookups (optional)
         """
         self.token_manager = token_manager
         self.enhanced_profile_service = enhanced_profile_service
+        self.workorder_cache = workorder_cache or WorkOrderLookupCache(token_manager)
         self.cache_dir = cache_dir or os.path.expanduser('~/.maximo_enhanced_cache')
         self._ensure_cache_dir()
         self._lock = threading.RLock()  # Thread-safe operations
@@ -881,8 +885,9 @@ class EnhancedWorkOrderService:
     def get_workorder_by_wonum(self, wonum: str):
         """
         Get a specific work order by work order number.
-        This method bypasses pagination and cache limitations to find any work order.
-        It searches across all accessible sites, not just the user's default site.
+        This method bypasses pagination and list cache limitations to find any work order.
+        It searches across all accessible sites, not just the user's default site, and
+        is served from the shared work order lookup cache.
 
         Args:
             wonum (str): Work order number to search for
@@ -900,117 +905,22 @@ class EnhancedWorkOrderService:
         logger.info(f"🔍 ENHANCED WO: Looking up specific work order: {wonum}")
 
         try:
-            base_url = getattr(self.token_manager, 'base_url', '')
-            api_url = f"{base_url}/oslc/os/mxapiwodetail"
-
-            # First try: Search without site restriction to find the work order in any site
-            # This is more flexible and matches how work orders are displayed in search results
-            oslc_filter = f'wonum="{wonum}"'
-
-            params = {
-                "oslc.select": "*",
-                "oslc.where": oslc_filter,
-                "oslc.pageSize": "1",  # Only need one result
-                "lean": "1"
-            }
-
-            logger.info(f"🔍 ENHANCED WO: Direct lookup filter (any site): {oslc_filter}")
-            logger.info(f"🔍 ENHANCED WO: Full URL: {api_url}?{self._build_query_string(params)}")
-
-            response = self.token_manager.session.get(
-                api_url,
-                params=params,
-                timeout=(3.0, 15),
-                headers={"Accept": "application/json"},
-                allow_redirects=True
-            )
-
-            # Validate response and handle session expiration
-            if 'login' in response.url.lower():
-                logger.warning(f"Session expired during work order lookup: {wonum}")
-                # Try to refresh session once
-                if hasattr(self.token_manager, 'force_session_refresh'):
-                    logger.info(f"🔄 ENHANCED WO: Attempting session refresh for lookup: {wonum}")
-                    if self.token_manager.force_session_refresh():
-                        logger.info(f"✅ ENHANCED WO: Session refreshed, retrying lookup: {wonum}")
-                        # Retry the lookup once with refreshed session
-                        try:
-                            response = self.token_manager.session.get(
-                                api_url,
-                                params=params,
-                                timeout=(3.0, 15),
-                                headers={"Accept": "application/json"},
-                                allow_redirects=True
-                            )
-                            if response.status_code == 200 and 'login' not in response.url.lower():
-                                logger.info(f"✅ ENHANCED WO: Retry lookup after session refresh successful: {wonum}")
-                                # Continue with processing the response
-                            else:
-                                logger.warning(f"❌ ENHANCED WO: Retry lookup after session refresh failed: {wonum}")
-                                return None
-                        except Exception as retry_e:
-                            logger.error(f"Error during retry lookup after session refresh: {retry_e}")
-                            return None
-                    else:
-                        logger.warning(f"❌ ENHANCED WO: Session refresh failed for lookup: {wonum}")
-                        return None
-                else:
-                    return None
+            # One any-site query returns the work order for every site it exists in
+            records = self.workorder_cache.get_records(wonum)
+            lookup_time = time.time() - start_time
 
-            if response.status_code != 200:
-                logger.error(f"Work order lookup failed for {wonum}. Status: {response.status_code}")
-                logger.error(f"Response content: {response.text[:500]}")
+            if not records:
+                logger.warning(f"❌ ENHANCED WO: Work order {wonum} not found in any accessible site ({lookup_time:.3f}s)")
                 return None
 
-            # Process successful response
-            response_data = response.json()
-            workorders_raw = []
+            # Prefer the user's default site when the wonum exists in more than one site
+            preferred_site = self._get_user_site_id() if len(records) > 1 else None
+            workorder_raw = self.workorder_cache.get(wonum, preferred_siteid=preferred_site)
 
-            # Handle different response formats
-            if isinstance(response_data, dict):
-                if 'member' in response_data:
-                    workorders_raw = response_data['member']
-                elif 'workorder' in response_data:
-                    workorders_raw = response_data['workorder']
-                else:
-                    workorders_raw = [response_data] if response_data else []
-            elif isinstance(response_data, list):
-                workorders_raw = response_data
-
-            # Process the work order if found
-            if workorders_raw:
-                workorder = self._clean_workorder_data(workorders_raw[0])
-                lookup_time = time.time() - start_time
-                found_site = workorder.get('siteid', 'Unknown')
-                logger.info(f"✅ ENHANCED WO: Found work order {wonum} in site {found_site} ({lookup_time:.3f}s)")
-                return workorder
-            else:
-                # If not found without site restriction, try with user's default site as fallback
-                site_id = self._get_user_site_id()
-                if site_id:
-                    logger.info(f"🔍 ENHANCED WO: Retrying lookup with user's default site: {site_id}")
-                    oslc_filter_with_site = f'wonum="{wonum}" and siteid="{site_id}"'
-                    params['oslc.where'] = oslc_filter_with_site
-
-                    response = self.token_manager.session.get(
-                        api_url,
-                        params=params,
-                        timeout=(3.0, 15),
-                        headers={"Accept": "application/json"},
-                        allow_redirects=True
-                    )
-
-                    if response.status_code == 200 and 'login' not in response.url.lower():
-                        response_data = response.json()
-                        if isinstance(response_data, dict) and 'member' in response_data and response_data['member']:
-                            workorder = self._clean_workorder_data(response_data['member'][0])
-                            lookup_time = time.time() - start_time
-                            logger.info(f"✅ ENHANCED WO: Found work order {wonum} in default site {site_id} ({lookup_time:.3f}s)")
-                            return workorder
-
-                lookup_time = time.time() - start_time
-                logger.warning(f"❌ ENHANCED WO: Work order {wonum} not found in any accessible site ({lookup_time:.3f}s)")
-                return None
+            workorder = self._clean_workorder_data(workorder_raw)
+            found_site = workorder.get('siteid', 'Unknown')
+            logger.info(f"✅ ENHANCED WO: Found work order {wonum} in site {found_site} ({lookup_time:.3f}s)")
+            return workorder
 
         except Exception as e:
             lookup_time = time.time() - start_time
@@ -10,6 +10,8 @@ import json
 from typing import Dict, Optional, Any, List
 from datetime import datetime
 
+from .wodetail_bulk_request import post_addchange_bulk
+
 logger = logging.getLogger(__name__)
 
 class LaborRequestService:
@@ -23,10 +25,12 @@ class LaborRequestService:
     - Proper payload construction following Maximo API requirements
     """
     
-    def __init__(self, token_manager, enhanced_profile_service=None):
+    def __init__(self, token_manager, enhanced_profile_service=None, workorder_cache=None, offline_store=None):
         """Initialize the labor request service."""
         self.token_manager = token_manager
         self.enhanced_profile_service = enhanced_profile_service
+        self.workorder_cache = workorder_cache  # Shared WorkOrderLookupCache (optional)
+        self.offline_store = offline_store  # OfflineWorkOrderService, local rows marked changed after a write (optional)
         self.logger = logging.getLogger(f'{__name__}.{self.__class__.__name__}')
         
         # Performance tracking
@@ -144,6 +148,137 @@ class LaborRequestService:
             self.logger.error(f"Exception in add_labor_request: {e}")
             return {'success': False, 'error': f'Unexpected error: {str(e)}'}
     
+    def add_labor_batch(self, lines: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Add many labor lines across work orders in a single BULK request.
+
+        Each line carries the same fields as add_labor_request (wonum, siteid,
+        laborcode, regularhrs, taskid and the optional dates/times/transtype).
+        Parent work orders are verified with one query per site, lines are
+        grouped into one AddChange entry per work order, and all entries are
+        sent in one BULK POST.
+
+        Args:
+            lines: List of labor line dictionaries
+
+        Returns:
+            Dict with overall success, per-line results and summary counts
+        """
+        start_time = time.time()
+
+        if not self.is_session_valid():
+            self.logger.error("Cannot add labor batch: Not logged in")
+            return {'success': False, 'error': 'Not logged in'}
+
+        if not lines:
+            return {'success': False, 'error': 'No labor lines provided'}
+
+        results = [None] * len(lines)
+
+        # Validate every line up front so bad lines never reach Maximo
+        groups = {}
+        for index, line in enumerate(lines):
+            wonum = (line.get('wonum') or '').strip()
+            siteid = (line.get('siteid') or '').strip()
+            laborcode = (line.get('laborcode') or '').strip()
+            regularhrs = line.get('regularhrs')
+            taskid = line.get('taskid')
+
+            missing = [param for param, value in [
+                ('wonum', wonum), ('siteid', siteid), ('laborcode', laborcode),
+                ('regularhrs', regularhrs), ('taskid', taskid)
+            ] if not value]
+            if missing:
+                results[index] = {'index': index, 'success': False,
+                                  'error': f'Missing required parameters: {missing}'}
+                continue
+
+            try:
+                regularhrs = float(regularhrs)
+            except (ValueError, TypeError):
+                results[index] = {'index': index, 'success': False, 'error': 'Invalid regular hours value'}
+                continue
+            if regularhrs <= 0:
+                results[index] = {'index': index, 'success': False,
+                                  'error': 'Regular hours must be greater than 0'}
+                continue
+
+            groups.setdefault((wonum, siteid), []).append((index, line, laborcode))
+
+        # Verify each parent work order exactly once (one query per site)
+        wonums_by_site = {}
+        for wonum, siteid in groups:
+            wonums_by_site.setdefault(siteid, []).append(wonum)
+
+        found_work_orders = set()
+        for siteid, wonums in wonums_by_site.items():
+            found_work_orders.update((wonum, siteid) for wonum in self._get_existing_work_orders(wonums, siteid))
+
+        # Build one AddChange entry per work order
+        payload = []
+        payload_lines = []
+        for (wonum, siteid), group_lines in groups.items():
+            if (wonum, siteid) not in found_work_orders:
+                for index, _, _ in group_lines:
+                    results[index] = {'index': index, 'success': False,
+                                      'error': f'Work order {wonum} not found or not accessible'}
+                continue
+
+            labtrans = [
+                self._build_labtrans_entry(
+                    laborcode=laborcode,
+                    taskid=line.get('taskid'),
+                    startdate=line.get('startdate') or None,
+                    starttime=line.get('starttime') or None,
+                    finishtime=line.get('finishtime') or None,
+                    transtype=line.get('transtype') or None
+                )
+                for _, line, laborcode in group_lines
+            ]
+            payload.append({
+                "_action": "AddChange",
+                "wonum": wonum,
+                "siteid": siteid,
+                "labtrans": labtrans
+            })
+            payload_lines.append((wonum, group_lines))
+
+        if payload:
+            self.logger.info(f"🔧 LABOR BATCH: Sending {sum(len(g) for _, g in payload_lines)} labor lines "
+                             f"across {len(payload)} work orders in one BULK request")
+            entry_results = post_addchange_bulk(self.token_manager, payload,
+                                                'Labor successfully added to work order {wonum}')
+
+            for (wonum, group_lines), entry_result in zip(payload_lines, entry_results):
+                if entry_result['success']:
+                    self._clear_labor_cache(wonum)
+                for index, line, laborcode in group_lines:
+                    results[index] = {
+                        'index': index,
+                        'wonum': wonum,
+                        'task_wonum': line.get('task_wonum'),
+                        'laborcode': laborcode,
+                        **entry_result
+                    }
+
+        succeeded = sum(1 for result in results if result and result.get('success'))
+        request_time = time.time() - start_time
+        self._update_performance_stats(request_time, succeeded == len(lines))
+
+        self.logger.info(f"✅ LABOR BATCH: {succeeded}/{len(lines)} lines added in {request_time:.2f}s")
+
+        return {
+            'success': succeeded == len(lines),
+            'results': results,
+            'summary': {
+                'total_lines': len(lines),
+                'succeeded': succeeded,
+                'failed': len(lines) - succeeded,
+                'work_orders': len(payload),
+                'request_time': request_time
+            }
+        }
+
     def is_session_valid(self) -> bool:
         """Check if the current session is valid."""
         return (hasattr(self.token_manager, 'username') and 
@@ -177,6 +312,53 @@ class LaborRequestService:
         wonum = wo_data.get('wonum')
         siteid = wo_data.get('siteid')
 
+        new_labor = self._build_labtrans_entry(
+            laborcode=laborcode,
+            taskid=taskid,
+            startdate=startdate,
+            starttime=starttime,
+            finishtime=finishtime,
+            transtype=transtype
+        )
+
+        # Create AddChange payload with ONLY wonum and siteid (like MxLoader)
+        addchange_payload = [{
+            "_action": "AddChange",
+            "wonum": wonum,  # Parent work order number
+            "siteid": siteid,
+            "labtrans": [new_labor]
+        }]
+
+        # LOG THE ENTIRE PAYLOAD STRUCTURE
+        self.logger.info("🎯 COMPLETE LABOR PAYLOAD BEING SENT TO MAXIMO:")
+        self.logger.info("="*60)
+        self.logger.info(f"👷 FULL ADDCHANGE PAYLOAD:")
+        self.logger.info(json.dumps(addchange_payload, indent=2))
+        self.logger.info("="*60)
+        self.logger.info(f"👷 LABOR PAYLOAD ONLY:")
+        self.logger.info(json.dumps(new_labor, indent=2))
+        self.logger.info("="*60)
+
+        return addchange_payload
+    
+    def _build_labtrans_entry(self, laborcode: str, taskid: int,
+                              startdate: Optional[str] = None, starttime: Optional[str] = None,
+                              finishtime: Optional[str] = None,
+                              transtype: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Build a single labtrans entry in MxLoader format.
+
+        Args:
+            laborcode: Labor code
+            taskid: Task ID
+            startdate: Optional start date (YYYY-MM-DD)
+            starttime: Optional start time (HH:MM)
+            finishtime: Optional finish time (HH:MM)
+            transtype: Optional transaction type
+
+        Returns:
+            labtrans dictionary for an AddChange payload
+        """
         # Create new labor entry following EXACT MxLoader pattern
         new_labor = {
             "laborcode": laborcode,
@@ -200,26 +382,8 @@ class LaborRequestService:
         if transtype:
             new_labor["transtype"] = transtype
 
-        # Create AddChange payload with ONLY wonum and siteid (like MxLoader)
-        addchange_payload = [{
-            "_action": "AddChange",
-            "wonum": wonum,  # Parent work order number
-            "siteid": siteid,
-            "labtrans": [new_labor]
-        }]
+        return new_labor
 
-        # LOG THE ENTIRE PAYLOAD STRUCTURE
-        self.logger.info("🎯 COMPLETE LABOR PAYLOAD BEING SENT TO MAXIMO:")
-        self.logger.info("="*60)
-        self.logger.info(f"👷 FULL ADDCHANGE PAYLOAD:")
-        self.logger.info(json.dumps(addchange_payload, indent=2))
-        self.logger.info("="*60)
-        self.logger.info(f"👷 LABOR PAYLOAD ONLY:")
-        self.logger.info(json.dumps(new_labor, indent=2))
-        self.logger.info("="*60)
-
-        return addchange_payload
-    
     def _make_labor_request(self, wonum: str, payload: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Make the actual labor request to the MXAPIWODETAIL API following MaterialRequestService pattern.
@@ -307,6 +471,45 @@ class LaborRequestService:
                 'error': f'Request failed: {str(e)}'
             }
 
+    def _get_existing_work_orders(self, wonums: List[str], siteid: str) -> List[str]:
+        """
+        Check which of the given work orders exist in a site with a single query.
+
+        Args:
+            wonums: Work order numbers to verify
+            siteid: Site ID
+
+        Returns:
+            List of work order numbers that were found
+        """
+        try:
+            base_url = getattr(self.token_manager, 'base_url', '')
+            api_url = f"{base_url}/oslc/os/mxapiwodetail"
+
+            wonum_list = ','.join(f'"{wonum}"' for wonum in wonums)
+            params = {
+                'oslc.where': f'wonum in [{wonum_list}] and siteid="{siteid}"',
+                'oslc.select': 'wonum,siteid',
+                'oslc.pageSize': str(len(wonums)),
+                'lean': '1'
+            }
+
+            response = self.token_manager.session.get(
+                api_url,
+                params=params,
+                timeout=(3.05, 30),
+                headers={"Accept": "application/json"}
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+                return [wo.get('wonum') for wo in data.get('member', []) if wo.get('wonum')]
+            return []
+
+        except Exception as e:
+            self.logger.error(f"Exception checking work orders {wonums} in {siteid}: {e}")
+            return []
+
     def _format_datetime_for_maximo(self, date_str: str, time_str: str) -> str:
         """
         Format date and time strings to Maximo-compatible datetime format.
@@ -366,6 +569,9 @@ class LaborRequestService:
 
     def _get_work_order_full(self, wonum: str, siteid: str) -> Optional[Dict]:
         """Get complete work order data (following MaterialRequestService pattern)."""
+        if self.workorder_cache:
+            return self.workorder_cache.get(wonum, siteid=siteid)
+
         try:
             base_url = getattr(self.token_manager, 'base_url', '')
             api_url = f"{base_url}/oslc/os/mxapiwodetail"
@@ -392,6 +598,13 @@ class LaborRequestService:
         except Exception as e:
             return None
 
+    def _evict_work_order(self, wonum: str):
+        """Drop a work order from the shared lookup cache and read it live until synced again, after writing to it."""
+        if self.workorder_cache:
+            self.workorder_cache.evict(wonum)
+        if self.offline_store:
+            self.offline_store.mark_dirty(wonum)
+
     def _clear_labor_cache(self, wonum: str):
         """
         Clear labor cache after successful labor addition.
@@ -403,4 +616,5 @@ class LaborRequestService:
         # Note: This would need to be injected if we want to clear the cache
         # For now, just log that we would clear it
         self.logger.info(f"🔄 CACHE: Would clear labor cache after adding labor to WO {wonum}")
+        self._evict_work_order(wonum)
         # TODO: Implement cache clearing when task_labor_service is available
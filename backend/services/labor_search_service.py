@@ -7,6 +7,8 @@ Provides labor code search functionality using MXAPILABOR endpoint
 import logging
 import time
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Any, Tuple
 
 logger = logging.getLogger(__name__)
@@ -20,10 +22,20 @@ class LaborSearchService:
     - Caching for performance optimization
     - Session-based authentication using token manager
     - Proper error handling and logging
+    - Optional per-site labor directory answered from memory
     """
+
+    LABOR_SELECT_FIELDS = "laborcode,personid,worksite,status,status_description,laborcraftrate,orgid,laborid,reportedhrs,availfactor,assigned"
     
-    def __init__(self, token_manager):
-        """Initialize the labor search service."""
+    def __init__(self, token_manager, enable_directory: bool = False):
+        """
+        Initialize the labor search service.
+
+        Args:
+            token_manager: The Maximo token manager instance
+            enable_directory: Load a per-site labor directory in the background
+                and answer typeahead searches from it when it is fresh
+        """
         self.token_manager = token_manager
         self.logger = logging.getLogger(f'{__name__}.{self.__class__.__name__}')
         
@@ -32,12 +44,22 @@ class LaborSearchService:
         self._cache_timestamps = {}
         self._cache_ttl = 300  # 5 minutes cache TTL
         self._max_cache_size = 100
+        self._max_parallel_filters = 3
+
+        # Per-site labor directory (laborcode, craft, rate, status)
+        self._directory_enabled = enable_directory
+        self._labor_directory = {}
+        self._directory_loading = set()
+        self._directory_lock = threading.Lock()
+        self._directory_ttl = 1800  # 30 minutes before a reload is needed
+        self._directory_page_size = 500
         
         # Performance tracking
         self._performance_stats = {
             'total_searches': 0,
             'cache_hits': 0,
             'cache_misses': 0,
+            'directory_hits': 0,
             'avg_response_time': 0,
             'last_search_time': None
         }
@@ -168,6 +190,30 @@ class LaborSearchService:
                 'search_time': time.time() - start_time
             }
         
+        # Answer from the preloaded labor directory when possible
+        directory_result = None
+        if use_cache:
+            directory_result = self._search_labor_directory(search_term, site_id, limit, craft, skill_level)
+        if directory_result is not None:
+            search_time = time.time() - start_time
+            self._performance_stats['directory_hits'] += 1
+            self._update_performance_stats(search_time, True)
+            return directory_result, {
+                'total_found': len(directory_result),
+                'search_term': search_term,
+                'site_id': site_id,
+                'craft': craft,
+                'skill_level': skill_level,
+                'limit': limit,
+                'source': 'directory',
+                'cache_hit': True,
+                'search_time': search_time
+            }
+
+        # Warm the directory for the next keystrokes while this one goes upstream
+        if self._directory_enabled:
+            self.preload_labor_directory(site_id)
+
         # Perform API search
         try:
             labor_list, metadata = self._perform_labor_search(
@@ -202,11 +248,122 @@ class LaborSearchService:
                 'cache_hit': False
             }
 
+    def _build_search_filters(self, search_term: str, site_id: str,
+                              craft: Optional[str] = None, skill_level: Optional[str] = None) -> List[str]:
+        """
+        Build the OSLC where-clause variants used for a labor search.
+
+        The order of the returned filters is the priority order used when
+        merging results (partial laborcode, exact laborcode, personid).
+        """
+        # Clean search term to prevent injection
+        search_term_clean = search_term.replace('"', '\\"')
+        has_site = site_id and site_id != 'UNKNOWN'
+
+        search_filters = []
+
+        # Strategy 1: Partial match on laborcode with worksite filter
+        if has_site:
+            search_filters.append(f'laborcode="%{search_term_clean}%" and worksite="{site_id}"')
+        else:
+            search_filters.append(f'laborcode="%{search_term_clean}%"')
+
+        # Strategy 2: Exact match on laborcode with worksite filter
+        if has_site:
+            search_filters.append(f'laborcode="{search_term_clean}" and worksite="{site_id}"')
+        else:
+            search_filters.append(f'laborcode="{search_term_clean}"')
+
+        # Strategy 3: Search by personid (often same as laborcode)
+        if has_site:
+            search_filters.append(f'personid="%{search_term_clean}%" and worksite="{site_id}"')
+        else:
+            search_filters.append(f'personid="%{search_term_clean}%"')
+
+        # Add craft and skill level filters to each strategy if provided
+        if craft or skill_level:
+            updated_filters = []
+            for base_filter in search_filters:
+                filter_with_extras = base_filter
+                if craft:
+                    filter_with_extras += f' and craft="{craft}"'
+                if skill_level:
+                    filter_with_extras += f' and skilllevel="{skill_level}"'
+                updated_filters.append(filter_with_extras)
+            search_filters = updated_filters
+
+        return search_filters
+
+    def _fetch_labor_records(self, api_url: str, oslc_filter: str, limit: int,
+                             strategy_number: int) -> List[Dict[str, Any]]:
+        """
+        Run a single MXAPILABOR query and return its raw member records.
+
+        Errors are logged and reported as an empty result so that one failing
+        filter variant does not sink the whole search.
+        """
+        self.logger.info(f"🔍 LABOR SEARCH: Try #{strategy_number} - Filter: {oslc_filter}")
+
+        params = {
+            "oslc.select": self.LABOR_SELECT_FIELDS,
+            "oslc.where": oslc_filter,
+            "oslc.pageSize": str(limit),
+            "lean": "1"
+        }
+
+        try:
+            response = self.token_manager.session.get(
+                api_url,
+                params=params,
+                timeout=(5.0, 30),
+                headers={"Accept": "application/json"},
+                allow_redirects=True
+            )
+
+            self.logger.info(f"🔍 LABOR SEARCH: Strategy #{strategy_number} response status: {response.status_code}")
+
+            if response.status_code != 200:
+                self.logger.error(f"API request failed for strategy #{strategy_number} with status {response.status_code}")
+                self.logger.error(f"Response: {response.text[:500]}")
+                return []
+
+            if len(response.text) == 0:
+                self.logger.info(f"🔍 LABOR SEARCH: Empty response - no labor records found for strategy #{strategy_number}")
+                return []
+
+            try:
+                data = response.json()
+            except json.JSONDecodeError as e:
+                self.logger.error(f"Failed to parse JSON response for strategy #{strategy_number}: {e}")
+                self.logger.error(f"Response text (first 200 chars): {response.text[:200]}")
+                return []
+
+            labor_records = self._extract_members(data)
+            self.logger.info(f"✅ LABOR SEARCH: Strategy #{strategy_number} found {len(labor_records)} records")
+            return labor_records
+
+        except Exception as e:
+            self.logger.error(f"Exception during strategy #{strategy_number}: {e}")
+            return []
+
+    def _extract_members(self, data: Any) -> List[Dict[str, Any]]:
+        """Extract the member list from an OSLC collection response."""
+        if not isinstance(data, dict):
+            return []
+        if 'member' in data:
+            return data['member'] or []
+        if 'rdfs:member' in data:
+            return data['rdfs:member'] or []
+        return []
+
     def _perform_labor_search(self, search_term: str, site_id: str, limit: int,
                              craft: Optional[str] = None, skill_level: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
         """
         Perform the actual labor search using MXAPILABOR API.
 
+        All filter variants are issued concurrently; results are merged in
+        strategy order and deduplicated by laborcode.
+
         Args:
             search_term: Labor code or description to search for
             site_id: Site ID to filter labor codes
@@ -223,131 +380,36 @@ class LaborSearchService:
             base_url = getattr(self.token_manager, 'base_url', '')
             api_url = f"{base_url}/oslc/os/mxapilabor"
 
-            # Build search filters for MXAPILABOR endpoint using correct field names
-            # Clean search term to prevent injection
-            search_term_clean = search_term.replace('"', '\\"')
-
-            # MXAPILABOR endpoint search strategies using correct fields
-            search_filters = []
-
-            # Strategy 1: Partial match on laborcode with worksite filter
-            if site_id and site_id != 'UNKNOWN':
-                search_filters.append(f'laborcode="%{search_term_clean}%" and worksite="{site_id}"')
-            else:
-                search_filters.append(f'laborcode="%{search_term_clean}%"')
-
-            # Strategy 2: Exact match on laborcode with worksite filter
-            if site_id and site_id != 'UNKNOWN':
-                search_filters.append(f'laborcode="{search_term_clean}" and worksite="{site_id}"')
-            else:
-                search_filters.append(f'laborcode="{search_term_clean}"')
-
-            # Strategy 3: Search by personid (often same as laborcode)
-            if site_id and site_id != 'UNKNOWN':
-                search_filters.append(f'personid="%{search_term_clean}%" and worksite="{site_id}"')
-            else:
-                search_filters.append(f'personid="%{search_term_clean}%"')
-
-            # Add craft and skill level filters to each strategy if provided
-            if craft or skill_level:
-                updated_filters = []
-                for base_filter in search_filters:
-                    filter_with_extras = base_filter
-                    if craft:
-                        filter_with_extras += f' and craft="{craft}"'
-                    if skill_level:
-                        filter_with_extras += f' and skilllevel="{skill_level}"'
-                    updated_filters.append(filter_with_extras)
-                search_filters = updated_filters
-
-            # Try each search filter and combine results
+            search_filters = self._build_search_filters(search_term, site_id, craft, skill_level)
+
+            # Issue every filter variant at once; the slowest one bounds the latency
+            with ThreadPoolExecutor(max_workers=min(len(search_filters), self._max_parallel_filters)) as executor:
+                futures = [
+                    executor.submit(self._fetch_labor_records, api_url, oslc_filter, limit, i + 1)
+                    for i, oslc_filter in enumerate(search_filters)
+                ]
+                results_by_strategy = [future.result() for future in futures]
+
+            # Merge in strategy order, deduplicating by laborcode
             all_labor = []
-            found_labor_codes = set()  # Track found labor codes to avoid duplicates
+            found_labor_codes = set()
 
-            for i, oslc_filter in enumerate(search_filters):
-                self.logger.info(f"🔍 LABOR SEARCH: Try #{i+1} - Filter: {oslc_filter}")
+            for labor_records in results_by_strategy:
+                for labor in labor_records:
+                    labor_code = labor.get('laborcode', '')
+                    if labor_code and labor_code not in found_labor_codes:
+                        found_labor_codes.add(labor_code)
+                        all_labor.append(self._process_labor_record(labor))
 
-                # Use correct MXAPILABOR fields based on discovered schema
-                params = {
-                    "oslc.select": "laborcode,personid,worksite,status,status_description,laborcraftrate,orgid,laborid,reportedhrs,availfactor,assigned",
-                    "oslc.where": oslc_filter,
-                    "oslc.pageSize": str(limit),
-                    "lean": "1"
-                }
+                        if len(all_labor) >= limit:
+                            break
 
-                try:
-                    # Make API request
-                    response = self.token_manager.session.get(
-                        api_url,
-                        params=params,
-                        timeout=(5.0, 30),
-                        headers={"Accept": "application/json"},
-                        allow_redirects=True
-                    )
-
-                    self.logger.info(f"🔍 LABOR SEARCH: Response status: {response.status_code}")
-
-                    if response.status_code == 200:
-                        try:
-                            # Log the raw response content for debugging
-                            response_text = response.text
-                            self.logger.info(f"🔍 LABOR SEARCH: Raw response length: {len(response_text)}")
-                            if len(response_text) == 0:
-                                self.logger.info(f"🔍 LABOR SEARCH: Empty response - no labor records found for this filter")
-                                continue
-
-                            data = response.json()
-                            self.logger.info(f"🔍 LABOR SEARCH: Response data keys: {list(data.keys()) if isinstance(data, dict) else 'Not a dict'}")
-
-                            # Extract labor records
-                            labor_records = []
-                            if 'member' in data:
-                                labor_records = data['member']
-                            elif 'rdfs:member' in data:
-                                labor_records = data['rdfs:member']
-
-                            # Process labor records from MXAPILABOR
-                            if labor_records and len(labor_records) > 0:
-                                self.logger.info(f"🔍 LABOR SEARCH: Sample record structure: {labor_records[0]}")
-
-                            # Process and add unique labor records
-                            for labor in labor_records:
-                                labor_code = labor.get('laborcode', '')
-                                if labor_code and labor_code not in found_labor_codes:
-                                    found_labor_codes.add(labor_code)
-                                    processed_labor = self._process_labor_record(labor)
-                                    all_labor.append(processed_labor)
-
-                                    # Stop if we've reached the limit
-                                    if len(all_labor) >= limit:
-                                        break
-
-                            self.logger.info(f"✅ LABOR SEARCH: Strategy #{i+1} found {len(labor_records)} records")
-
-                        except json.JSONDecodeError as e:
-                            self.logger.error(f"Failed to parse JSON response for strategy #{i+1}: {e}")
-                            self.logger.error(f"Response text (first 200 chars): {response.text[:200]}")
-                            continue
-                    else:
-                        self.logger.error(f"API request failed for strategy #{i+1} with status {response.status_code}")
-                        self.logger.error(f"Response: {response.text[:500]}")
-                        continue
-
-                except Exception as e:
-                    self.logger.error(f"Exception during strategy #{i+1}: {e}")
-                    continue
-
-                # Stop if we've reached the limit
                 if len(all_labor) >= limit:
                     break
 
             api_time = time.time() - api_start_time
             self.logger.info(f"✅ LABOR SEARCH: Total found {len(all_labor)} unique labor records")
 
-            # Log the final processed response for debugging
-            if all_labor:
-                self.logger.info(f"🔍 LABOR SEARCH: Sample processed record: {all_labor[0]}")
-
             metadata = {
                 'total_found': len(all_labor),
                 'api_response_time': api_time,
@@ -356,7 +418,8 @@ class LaborSearchService:
                 'craft': craft,
                 'skill_level': skill_level,
                 'limit': limit,
-                'strategies_used': len(search_filters)
+                'strategies_used': len(search_filters),
+                'source': 'api'
             }
 
             return all_labor[:limit], metadata
@@ -371,6 +434,144 @@ class LaborSearchService:
                 'site_id': site_id
             }
 
+    def preload_labor_directory(self, site_id: str, force: bool = False) -> bool:
+        """
+        Start loading the labor-code directory for a site in the background.
+
+        Args:
+            site_id: Site (worksite) whose labor codes should be loaded
+            force: Reload even if a fresh directory is already present
+
+        Returns:
+            bool: True if a background load was started
+        """
+        site_id = site_id.strip() if site_id else ""
+        if not site_id or site_id == 'UNKNOWN' or not self.is_session_valid():
+            return False
+
+        with self._directory_lock:
+            if site_id in self._directory_loading:
+                return False
+            if not force and self._is_directory_fresh(site_id):
+                return False
+            self._directory_loading.add(site_id)
+
+        thread = threading.Thread(
+            target=self._load_labor_directory,
+            args=(site_id,),
+            name=f"labor-directory-{site_id}",
+            daemon=True
+        )
+        thread.start()
+        self.logger.info(f"📚 LABOR DIRECTORY: Background load started for site {site_id}")
+        return True
+
+    def _load_labor_directory(self, site_id: str):
+        """Fetch every labor code for a site page by page and store it in memory."""
+        load_start = time.time()
+        try:
+            base_url = getattr(self.token_manager, 'base_url', '')
+            next_url = f"{base_url}/oslc/os/mxapilabor"
+            params = {
+                "oslc.select": self.LABOR_SELECT_FIELDS,
+                "oslc.where": f'worksite="{site_id}"',
+                "oslc.pageSize": str(self._directory_page_size),
+                "lean": "1"
+            }
+
+            records = []
+            crafts = []
+            while next_url:
+                response = self.token_manager.session.get(
+                    next_url,
+                    params=params,
+                    timeout=(5.0, 60),
+                    headers={"Accept": "application/json"},
+                    allow_redirects=True
+                )
+                if response.status_code != 200:
+                    self.logger.error(f"❌ LABOR DIRECTORY: Load for {site_id} failed with status {response.status_code}")
+                    return
+
+                data = response.json() if response.text else {}
+                for labor in self._extract_members(data):
+                    if labor.get('laborcode'):
+                        records.append(self._process_labor_record(labor))
+                        crafts.append(self._labor_crafts(labor))
+
+                # The nextPage href already carries the original query parameters
+                next_page = (data.get('responseInfo') or {}).get('nextPage') or {}
+                next_url = next_page.get('href')
+                params = None
+
+            with self._directory_lock:
+                self._labor_directory[site_id] = {
+                    'records': records,
+                    'crafts': crafts,  # Every craft of each record, in record order
+                    'loaded_at': time.time()
+                }
+
+            self.logger.info(f"✅ LABOR DIRECTORY: Loaded {len(records)} labor codes for {site_id} "
+                             f"in {time.time() - load_start:.2f}s")
+
+        except Exception as e:
+            self.logger.error(f"❌ LABOR DIRECTORY: Error loading directory for {site_id}: {e}")
+        finally:
+            with self._directory_lock:
+                self._directory_loading.discard(site_id)
+
+    def _is_directory_fresh(self, site_id: str) -> bool:
+        """Check whether a loaded directory exists for the site and is within its TTL."""
+        entry = self._labor_directory.get(site_id)
+        return bool(entry) and time.time() - entry['loaded_at'] < self._directory_ttl
+
+    def _search_labor_directory(self, search_term: str, site_id: str, limit: int,
+                                craft: Optional[str] = None,
+                                skill_level: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Answer a labor search from the in-memory directory.
+
+        Returns None when the directory cannot answer the query (not loaded,
+        stale, or a skill level filter MXAPILABOR does not expose), so that
+        the caller falls back to the live API.
+        """
+        if not self._directory_enabled or skill_level:
+            return None
+
+        with self._directory_lock:
+            if not self._is_directory_fresh(site_id):
+                return None
+            records = self._labor_directory[site_id]['records']
+            crafts = self._labor_directory[site_id]['crafts']
+
+        term = search_term.lower()
+        craft_filter = craft.lower() if craft else None
+
+        # Same priority as the live strategies: partial laborcode (exact first), then personid
+        exact, partial, by_person = [], [], []
+        for labor, labor_crafts in zip(records, crafts):
+            if craft_filter and craft_filter not in labor_crafts:
+                continue
+            labor_code = labor.get('laborcode', '').lower()
+            if labor_code == term:
+                exact.append(labor)
+            elif term in labor_code:
+                partial.append(labor)
+            elif term in (labor.get('personid') or '').lower():
+                by_person.append(labor)
+
+        return (exact + partial + by_person)[:limit]
+
+    def _labor_crafts(self, labor: Dict[str, Any]) -> frozenset:
+        """Get every craft of a raw labor record from its laborcraftrate array, lowercased."""
+        laborcraftrate = labor.get('laborcraftrate', [])
+        if not isinstance(laborcraftrate, list):
+            return frozenset()
+        return frozenset(
+            craft_rate['craft'].lower() for craft_rate in laborcraftrate
+            if isinstance(craft_rate, dict) and craft_rate.get('craft')
+        )
+
     def _process_labor_record(self, labor: Dict[str, Any]) -> Dict[str, Any]:
         """
         Process and clean a labor record from the MXAPILABOR API response.
@@ -480,6 +681,8 @@ class LaborSearchService:
         cache_size = len(self._search_cache)
         self._search_cache.clear()
         self._cache_timestamps.clear()
+        with self._directory_lock:
+            self._labor_directory.clear()
 
         self.logger.info(f"🧹 LABOR SEARCH: Cleared cache ({cache_size} entries)")
 
@@ -497,5 +700,17 @@ class LaborSearchService:
                 'cache_ttl_seconds': self._cache_ttl,
                 'max_cache_size': self._max_cache_size
             },
+            'directory_stats': {
+                'enabled': self._directory_enabled,
+                'sites': {
+                    site: {
+                        'labor_codes': len(entry['records']),
+                        'age_seconds': time.time() - entry['loaded_at']
+                    }
+                    for site, entry in list(self._labor_directory.items())
+                },
+                'loading': sorted(self._directory_loading),
+                'ttl_seconds': self._directory_ttl
+            },
             'performance_stats': self._performance_stats.copy()
         }
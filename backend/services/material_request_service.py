@@ -7,7 +7,9 @@ Based on successful_material_addition.py model, adapted for Flask app session ma
 import logging
 import time
 import json
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, List
+
+from .wodetail_bulk_request import post_addchange_bulk
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +24,8 @@ class MaterialRequestService:
     - Proper payload construction following Maximo API requirements
     """
     
-    def __init__(self, token_manager, task_materials_service=None, enhanced_profile_service=None, inventory_search_service=None):
+    def __init__(self, token_manager, task_materials_service=None, enhanced_profile_service=None, inventory_search_service=None,
+                 workorder_cache=None, offline_store=None):
         """
         Initialize the material request service.
 
@@ -31,11 +34,15 @@ class MaterialRequestService:
             task_materials_service: The TaskPlannedMaterialsService instance for cache management
             enhanced_profile_service: The EnhancedProfileService instance for getting PersonID
             inventory_search_service: The InventorySearchService instance for inventory cache management
+            workorder_cache: The shared WorkOrderLookupCache instance for work order lookups
+            offline_store: The OfflineWorkOrderService whose local work orders are marked changed after a write
         """
         self.token_manager = token_manager
         self.task_materials_service = task_materials_service
         self.enhanced_profile_service = enhanced_profile_service
         self.inventory_search_service = inventory_search_service
+        self.workorder_cache = workorder_cache
+        self.offline_store = offline_store
         self.logger = logger
 
         # Debug logging for service initialization
@@ -104,25 +111,269 @@ class MaterialRequestService:
                 'error': f'Failed to add material request: {str(e)}'
             }
     
+    def add_material_cart(self, lines: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Add many material lines across work orders in one validated transaction.
+
+        Work orders and items are each verified with one batched query per
+        site, lines are grouped into a single wpmaterial array per work order,
+        and all work orders are sent in one BULK AddChange request.
+
+        Args:
+            lines: List of dicts with wonum, siteid, itemnum, quantity, taskid and
+                optional location, directreq, notes, requestby, task_wonum
+
+        Returns:
+            Dict with overall success, per-line results and summary counts
+        """
+        start_time = time.time()
+
+        if not lines:
+            return {'success': False, 'error': 'No material lines provided'}
+
+        results = [None] * len(lines)
+
+        # Validate every line before touching Maximo
+        groups = {}
+        for index, line in enumerate(lines):
+            wonum = (line.get('wonum') or '').strip()
+            siteid = (line.get('siteid') or '').strip()
+            itemnum = (line.get('itemnum') or '').strip()
+
+            missing = [field for field, value in [
+                ('wonum', wonum), ('siteid', siteid), ('itemnum', itemnum),
+                ('quantity', line.get('quantity')), ('taskid', line.get('taskid'))
+            ] if value is None or value == '']
+            if missing:
+                results[index] = {'index': index, 'success': False,
+                                  'error': f'Missing required fields: {missing}'}
+                continue
+
+            try:
+                quantity = float(line['quantity'])
+                taskid = int(line['taskid'])
+            except (ValueError, TypeError):
+                results[index] = {'index': index, 'success': False,
+                                  'error': 'quantity must be a number and taskid an integer'}
+                continue
+            if quantity <= 0:
+                results[index] = {'index': index, 'success': False, 'error': 'Quantity must be greater than 0'}
+                continue
+
+            groups.setdefault((wonum, siteid), []).append({
+                'index': index,
+                'itemnum': itemnum,
+                'quantity': quantity,
+                'taskid': taskid,
+                'location': line.get('location') or None,
+                'directreq': line.get('directreq', True),
+                'notes': line.get('notes') or None,
+                'requestby': line.get('requestby'),
+                'task_wonum': line.get('task_wonum')
+            })
+
+        # One work order query and one item validation per site
+        wonums_by_site = {}
+        itemnums_by_site = {}
+        for (wonum, siteid), group_lines in groups.items():
+            wonums_by_site.setdefault(siteid, set()).add(wonum)
+            itemnums_by_site.setdefault(siteid, set()).update(l['itemnum'] for l in group_lines)
+
+        work_orders = {}
+        valid_items = set()
+        for siteid, wonums in wonums_by_site.items():
+            for wo in self._get_work_orders(sorted(wonums), siteid):
+                work_orders[(wo.get('wonum'), siteid)] = wo
+            valid_items.update((itemnum, siteid) for itemnum in
+                               self._validate_items_for_site(sorted(itemnums_by_site[siteid]), siteid))
+
+        # Build a single wpmaterial array per work order
+        payload = []
+        payload_lines = []
+        for (wonum, siteid), group_lines in groups.items():
+            wo_data = work_orders.get((wonum, siteid))
+            if not wo_data:
+                for l in group_lines:
+                    results[l['index']] = {'index': l['index'], 'success': False,
+                                           'error': f'Work order {wonum} not found or not accessible'}
+                continue
+
+            accepted = []
+            for l in group_lines:
+                if (l['itemnum'], siteid) not in valid_items:
+                    results[l['index']] = {'index': l['index'], 'success': False,
+                                           'error': f"Item {l['itemnum']} is not valid for site {siteid}"}
+                else:
+                    accepted.append(l)
+            if not accepted:
+                continue
+
+            payload.append({
+                "_action": "AddChange",
+                "wonum": wonum,
+                "siteid": siteid,
+                "description": wo_data.get('description'),
+                "status": wo_data.get('status'),
+                "assetnum": wo_data.get('assetnum'),
+                "location": wo_data.get('location'),
+                "wpmaterial": [
+                    self._build_wpmaterial_entry(l['itemnum'], l['quantity'], l['taskid'], l['location'],
+                                                 l['directreq'], l['notes'], l['requestby'])
+                    for l in accepted
+                ]
+            })
+            payload_lines.append((wonum, siteid, accepted))
+
+        if payload:
+            self.logger.info(f"🛒 MATERIAL CART: Sending {sum(len(a) for _, _, a in payload_lines)} material lines "
+                             f"across {len(payload)} work orders in one BULK request")
+            entry_results = post_addchange_bulk(self.token_manager, payload,
+                                                'Materials added successfully to work order {wonum}')
+
+            for (wonum, siteid, accepted), entry_result in zip(payload_lines, entry_results):
+                if entry_result['success']:
+                    self._clear_materials_cache(wonum, siteid)
+                    self._evict_work_order(wonum, siteid)
+                for l in accepted:
+                    results[l['index']] = {
+                        'index': l['index'],
+                        'wonum': wonum,
+                        'task_wonum': l['task_wonum'],
+                        'itemnum': l['itemnum'],
+                        **entry_result
+                    }
+
+        succeeded = sum(1 for result in results if result and result.get('success'))
+        request_time = time.time() - start_time
+        self.logger.info(f"✅ MATERIAL CART: {succeeded}/{len(lines)} lines added in {request_time:.2f}s")
+
+        return {
+            'success': succeeded == len(lines),
+            'results': results,
+            'summary': {
+                'total_lines': len(lines),
+                'succeeded': succeeded,
+                'failed': len(lines) - succeeded,
+                'work_orders': len(payload),
+                'request_time': request_time
+            }
+        }
+
+    def _get_work_orders(self, wonums: List[str], siteid: str) -> List[Dict]:
+        """Get the work orders needed for AddChange payloads with a single query."""
+        try:
+            base_url = getattr(self.token_manager, 'base_url', '')
+            api_url = f"{base_url}/oslc/os/mxapiwodetail"
+
+            wonum_list = ','.join(f'"{wonum}"' for wonum in wonums)
+            params = {
+                'oslc.where': f'wonum in [{wonum_list}] and siteid="{siteid}"',
+                'oslc.select': 'wonum,siteid,description,status,assetnum,location,istask,taskid',
+                'oslc.pageSize': str(len(wonums)),
+                'lean': '1'
+            }
+
+            response = self.token_manager.session.get(
+                api_url,
+                params=params,
+                timeout=(3.05, 30),
+                headers={"Accept": "application/json"}
+            )
+
+            if response.status_code == 200:
+                return response.json().get('member', [])
+            return []
+
+        except Exception as e:
+            self.logger.error(f"Failed to fetch work orders {wonums} for site {siteid}: {e}")
+            return []
+
+    def _validate_items_for_site(self, itemnums: List[str], siteid: str) -> List[str]:
+        """
+        Batched version of _validate_item_for_site.
+
+        Items stocked in the site's inventory are valid; the remainder are
+        checked against the item master and accepted if ACTIVE.
+
+        Returns:
+            List of valid item numbers
+        """
+        try:
+            base_url = getattr(self.token_manager, 'base_url', '')
+            valid = set()
+
+            # An item has a row per storeroom, so the inventory query can span several pages
+            item_list = ','.join(f'"{itemnum}"' for itemnum in itemnums)
+            next_url = f"{base_url}/oslc/os/mxapiinventory"
+            params = {
+                'oslc.where': f'itemnum in [{item_list}] and siteid="{siteid}"',
+                'oslc.select': 'itemnum,siteid,status',
+                'oslc.pageSize': '1000',
+                'lean': '1'
+            }
+            while next_url:
+                response = self.token_manager.session.get(
+                    next_url,
+                    params=params,
+                    timeout=(3.05, 10),
+                    headers={"Accept": "application/json"}
+                )
+                if response.status_code != 200:
+                    break
+                data = response.json()
+                valid.update(inv.get('itemnum') for inv in data.get('member', []))
+
+                # The nextPage href already carries the original query parameters
+                next_page = (data.get('responseInfo') or {}).get('nextPage') or {}
+                next_url = next_page.get('href')
+                params = None
+
+            remaining = [itemnum for itemnum in itemnums if itemnum not in valid]
+            if remaining:
+                item_list = ','.join(f'"{itemnum}"' for itemnum in remaining)
+                response = self.token_manager.session.get(
+                    f"{base_url}/oslc/os/mxapiitem",
+                    params={
+                        'oslc.where': f'itemnum in [{item_list}]',
+                        'oslc.select': 'itemnum,status',
+                        'oslc.pageSize': str(len(remaining)),
+                        'lean': '1'
+                    },
+                    timeout=(3.05, 10),
+                    headers={"Accept": "application/json"}
+                )
+                if response.status_code == 200:
+                    valid.update(item.get('itemnum') for item in response.json().get('member', [])
+                                 if item.get('status', '').upper() == 'ACTIVE')
+
+            return [itemnum for itemnum in itemnums if itemnum in valid]
+
+        except Exception as e:
+            self.logger.error(f"Failed to validate items {itemnums} for site {siteid}: {e}")
+            return []
+
     def _get_work_order_full(self, wonum: str, siteid: str) -> Optional[Dict]:
         """Get complete work order data."""
+        if self.workorder_cache:
+            return self.workorder_cache.get(wonum, siteid=siteid)
+
         try:
             base_url = getattr(self.token_manager, 'base_url', '')
             api_url = f"{base_url}/oslc/os/mxapiwodetail"
-            
+
             params = {
                 'oslc.where': f'wonum="{wonum}" and siteid="{siteid}"',
                 'oslc.select': '*',
                 'lean': '1'
             }
-            
+
             response = self.token_manager.session.get(
                 api_url,
                 params=params,
                 timeout=(3.05, 30),
                 headers={"Accept": "application/json"}
             )
-            
+
             if response.status_code == 200:
                 data = response.json()
                 if 'member' in data and data['member']:
@@ -131,6 +382,13 @@ class MaterialRequestService:
 
         except Exception as e:
             return None
+
+    def _evict_work_order(self, wonum: str, siteid: Optional[str] = None):
+        """Drop a work order from the shared lookup cache and read it live until synced again, after writing to it."""
+        if self.workorder_cache:
+            self.workorder_cache.evict(wonum)
+        if self.offline_store:
+            self.offline_store.mark_dirty(wonum, siteid)
     
     def _validate_item_for_site(self, itemnum: str, siteid: str) -> bool:
         """
@@ -199,25 +457,8 @@ class MaterialRequestService:
             wonum = wo_data.get('wonum')
             siteid = wo_data.get('siteid')
 
-            # Create new material entry EXACTLY like successful_material_addition.py
-            new_material = {
-                "itemnum": itemnum,
-                "itemqty": quantity,
-                "directreq": directreq,
-                "requestby": self._get_validated_requestby(requestby, directreq)  # Use validated requestby
-            }
-
-            # Add taskid (MANDATORY - this is the key fix for adding to specific task)
-            new_material["taskid"] = taskid
-
-            # Add location if provided (exactly like successful_material_addition.py)
-            if location:
-                new_material["location"] = location
+            new_material = self._build_wpmaterial_entry(itemnum, quantity, taskid, location, directreq, notes, requestby)
 
-            # Add notes as remarks if provided
-            if notes:
-                new_material["remarks"] = notes
-            
             # Create AddChange payload EXACTLY like successful_material_addition.py
             addchange_payload = [{
                 "_action": "AddChange",
@@ -287,6 +528,7 @@ class MaterialRequestService:
                 elif '_responsemeta' in response_data and response_data['_responsemeta'].get('status') == '204':
                     # Clear materials cache after successful addition
                     self._clear_materials_cache(wonum, siteid)
+                    self._evict_work_order(wonum, siteid)
                     return {
                         'success': True,
                         'message': f'Material {itemnum} added successfully to work order {wonum}',
@@ -295,6 +537,7 @@ class MaterialRequestService:
 
             # Clear materials cache after successful addition
             self._clear_materials_cache(wonum, siteid)
+            self._evict_work_order(wonum, siteid)
             return {
                 'success': True,
                 'message': f'Material {itemnum} added successfully to work order {wonum}',
@@ -319,6 +562,33 @@ class MaterialRequestService:
                 'error': f'Failed to add material: {error_msg}'
             }
 
+    def _build_wpmaterial_entry(self, itemnum: str, quantity: float, taskid: int,
+                                location: Optional[str], directreq: bool, notes: Optional[str],
+                                requestby: Optional[str]) -> Dict[str, Any]:
+        """
+        Build a single wpmaterial entry for an AddChange payload.
+        """
+        # Create new material entry EXACTLY like successful_material_addition.py
+        new_material = {
+            "itemnum": itemnum,
+            "itemqty": quantity,
+            "directreq": directreq,
+            "requestby": self._get_validated_requestby(requestby, directreq)  # Use validated requestby
+        }
+
+        # Add taskid (MANDATORY - this is the key fix for adding to specific task)
+        new_material["taskid"] = taskid
+
+        # Add location if provided (exactly like successful_material_addition.py)
+        if location:
+            new_material["location"] = location
+
+        # Add notes as remarks if provided
+        if notes:
+            new_material["remarks"] = notes
+
+        return new_material
+
     def _get_validated_requestby(self, requestby: str, directreq: bool) -> str:
         """
         Get validated requestby value based on request type.
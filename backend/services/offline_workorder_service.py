@@ -0,0 +1,716 @@
+"""
+Offline-first work order reads for Maximo OAuth.
+
+Answers work order search and detail requests, and the detail page's task,
+planned material and labor panels, from the wodetail tables of the offline
+database (workorder with its tasks, wolabor, womaterial, wotool, wpmaterial and
+labtrans, see sync/sync_wodetail.py), so the pages render in milliseconds even
+when Maximo is slow or unreachable. Every answer carries the freshness of the local data, and
+data older than max_age starts a sync of MXAPIWODETAIL in the background; the
+next request sees the refreshed rows.
+
+Searches match description words in the workorder_search full-text index
+(description and long description, see sync/sync_search.py) and page with a
+keyset cursor on (reportdate, wonum, workorderid), so the next page is an
+index range read rather than an offset that re-reads every earlier row.
+
+When the offline database has no work orders for the requested site (never
+synced), or the work order's tasks were not synced, the methods return None and
+the caller falls back to live Maximo.
+
+Work orders this app changes in Maximo (status changes, added materials and
+labor) are marked dirty: their detail, task, material and labor reads go to live
+Maximo until the next sync writes the rows again, so the user sees their own
+edit right away.
+"""
+import os
+import re
+import json
+import time
+import base64
+import sqlite3
+import logging
+import datetime
+import threading
+from typing import Dict, Optional, Any, List, Callable
+
+logger = logging.getLogger('offline_workorder_service')
+
+# sync_status endpoint of the work order sync
+SYNC_ENDPOINT = 'MXAPIWODETAIL'
+
+# Work order statuses the sync stores (sync/sync_mappings.py WODETAIL_STATUSES);
+# searches for any other status go to live Maximo
+SYNCED_STATUSES = ('WAPPR', 'APPR', 'INPRG', 'ASSIGN', 'WMATL')
+
+# Full-text index over workorder description and long description (rowid = workorderid)
+SEARCH_TABLE = 'workorder_search'
+
+# Search results order; also the keyset of the page cursors
+SEARCH_ORDER = ('reportdate', 'wonum', 'workorderid')
+
+# _sync_status of rows changed in Maximo by this app since they were synced
+DIRTY_STATUS = 'dirty'
+
+# Up to this many full-text matches the rows are looked up by workorderid; more
+# are checked while scanning the site's rows in reportdate order instead
+SEARCH_LOOKUP_LIMIT = 2000
+
+class OfflineWorkOrderService:
+    """
+    Work order search and detail served from the offline database.
+
+    MAXIMO_WORKORDER_READS=live turns the offline-first reads off,
+    MAXIMO_OFFLINE_MAX_AGE sets the seconds after which the data counts as stale.
+    """
+
+    # Default seconds before the local data counts as stale (the wodetail schedule interval)
+    DEFAULT_MAX_AGE = 15 * 60
+
+    # Seconds between background refreshes started for the same site
+    REFRESH_INTERVAL = 60
+
+    def __init__(self, get_database: Callable, refresh: Optional[Callable] = None, max_age: Optional[int] = None):
+        """
+        Initialize the offline work order service.
+
+        Args:
+            get_database: Returns the shared OfflineDatabase (see sync/sync_db.py)
+            refresh: Called as refresh(site) to ask for a background work order sync;
+                returns False if none will run (optional)
+            max_age: Seconds before the local data counts as stale (optional)
+        """
+        self.get_database = get_database
+        self.refresh = refresh
+        self.max_age = max_age if max_age is not None else int(os.getenv('MAXIMO_OFFLINE_MAX_AGE', self.DEFAULT_MAX_AGE))
+        self.enabled = os.getenv('MAXIMO_WORKORDER_READS', 'offline').lower() != 'live'
+
+        self._last_refresh = {}
+        self._lock = threading.Lock()
+
+    def search_workorders(self, search_criteria=None, page=1, page_size=20, site_id=None, cursor=None):
+        """
+        Search the local work orders with the filters of EnhancedWorkOrderService.search_workorders.
+
+        Args:
+            search_criteria (dict): Search filters {status, priority, description, woclass, wonum, site_ids}
+            page (int): Page number (1-based)
+            page_size (int): Records per page
+            site_id (str): User's default site, used when no site_ids are selected
+            cursor (str): next_cursor or prev_cursor of the previous result; the page
+                is read from there instead of skipping (page - 1) * page_size rows, and
+                has_next/has_prev come from the rows around it, whatever page says
+
+        Returns:
+            dict: Same structure as the live search plus 'source', 'freshness',
+                'next_cursor' and 'prev_cursor', or None if the offline database
+                has no work orders for the sites or a requested status is not synced.
+                Without a status filter only the synced statuses are searched,
+                listed in freshness['statuses']
+        """
+        start_time = time.time()
+        search_criteria = search_criteria or {}
+
+        site_ids = search_criteria.get('site_ids') or ([site_id] if site_id else [])
+        if isinstance(site_ids, str):
+            site_ids = [site_ids]
+        if not site_ids:
+            return None
+
+        conditions = [f"siteid IN ({', '.join('?' * len(site_ids))})", 'istask = 0', 'historyflag = 0']
+        params = list(site_ids)
+
+        # Work order class filter
+        woclass = search_criteria.get('woclass', 'WORKORDER')
+        if woclass and woclass != 'ALL':
+            if woclass == 'BOTH':
+                conditions.append("woclass IN ('WORKORDER', 'ACTIVITY')")
+            else:
+                conditions.append('woclass = ?')
+                params.append(woclass)
+
+        # Status filter: statuses that are not synced are only in live Maximo
+        status = search_criteria.get('status')
+        restricted = not status or status == 'ALL'
+        if not restricted:
+            statuses = status if isinstance(status, list) else [status]
+            if not set(statuses) <= set(SYNCED_STATUSES):
+                logger.info(f"📴 OFFLINE WO: Status {status} is not synced, using live Maximo")
+                return None
+            conditions.append(f"status IN ({', '.join('?' * len(statuses))})")
+            params.extend(statuses)
+
+        # Priority filter
+        priority = search_criteria.get('priority')
+        if priority and priority != 'ALL':
+            conditions.append('wopriority = ?')
+            params.append(priority)
+
+        # Work order number filter (partial match)
+        wonum = (search_criteria.get('wonum') or '').strip()
+        if wonum:
+            conditions.append("wonum LIKE ? ESCAPE '\\'")
+            params.append(self._like_pattern(wonum))
+
+        description = (search_criteria.get('description') or '').strip()
+        position = self._decode_cursor(cursor)
+
+        def read(db_cursor):
+            if not self._has_site_data(db_cursor, site_ids):
+                logger.info(f"📴 OFFLINE WO: No local work orders for {site_ids}, using live Maximo")
+                return None
+
+            search_conditions, search_params = list(conditions), list(params)
+
+            # Description words are matched in the full-text index, partial text without one
+            match = self._match_query(description) if description else None
+            if match and self._has_search_index(db_cursor):
+                matches = db_cursor.execute(
+                    f"SELECT COUNT(*) FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH ?", (match,)
+                ).fetchone()[0]
+                # The unary + keeps SQLite from driving the query from the matches
+                key = 'workorderid' if matches <= SEARCH_LOOKUP_LIMIT else '+workorderid'
+                search_conditions.append(f"{key} IN (SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH ?)")
+                search_params.append(match)
+            elif description:
+                search_conditions.append("description LIKE ? ESCAPE '\\'")
+                search_params.append(self._like_pattern(description))
+
+            where = ' AND '.join(search_conditions)
+            total_count = db_cursor.execute(f"SELECT COUNT(*) FROM workorder WHERE {where}", search_params).fetchone()[0]
+
+            # Keyset page from the cursor, backwards for the previous page; an offset page otherwise
+            before = bool(position) and position[0] == 'before'
+            page_where, page_params, offset = where, list(search_params), (page - 1) * page_size
+            if position:
+                keyset, keyset_params = self._keyset_condition('<' if before else '>', position[1:])
+                page_where, offset = f"{where} AND {keyset}", 0
+                page_params.extend(keyset_params)
+
+            # One row past the page tells whether there is another page in the reading direction
+            order = ', '.join(f"{column} {'DESC' if before else 'ASC'}" for column in SEARCH_ORDER)
+            rows = db_cursor.execute(
+                f"SELECT * FROM workorder WHERE {page_where} ORDER BY {order} LIMIT ? OFFSET ?",
+                page_params + [page_size + 1, offset]
+            ).fetchall()
+            more = len(rows) > page_size
+            rows = rows[:page_size]
+
+            if before:
+                # Reading back from a cursor: the cursor's row and the ones after it follow the page
+                rows.reverse()
+                has_prev, has_next = more, True
+            else:
+                has_prev, has_next = bool(position) or offset > 0, more
+
+            return total_count, rows, has_prev, has_next, self._read_freshness(db_cursor)
+
+        found = self._query(read, 'Search')
+        if found is None:
+            return None
+        total_count, rows, has_prev, has_next, freshness = found
+        if restricted:
+            freshness['statuses'] = list(SYNCED_STATUSES)
+
+        workorders = [self._clean_workorder_row(row) for row in rows]
+        total_pages = max(1, (total_count + page_size - 1) // page_size)
+        search_time = time.time() - start_time
+
+        logger.info(f"📴 OFFLINE WO: Search completed ({len(workorders)} of {total_count} WOs, {search_time:.3f}s)")
+
+        return {
+            'workorders': workorders,
+            'total_count': total_count,
+            'page': page,
+            'page_size': page_size,
+            'total_pages': total_pages,
+            'has_next': has_next,
+            'has_prev': has_prev,
+            'next_cursor': self._encode_cursor('after', rows[-1]) if rows and has_next else None,
+            'prev_cursor': self._encode_cursor('before', rows[0]) if rows and has_prev else None,
+            'performance_stats': {'search_time': search_time},
+            'source': 'offline',
+            'freshness': self._refresh_if_stale(freshness, site_ids[0] if len(site_ids) == 1 else None)
+        }
+
+    def get_workorder_by_wonum(self, wonum: str, preferred_site: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get a work order with its labor, materials and tools from the offline database.
+
+        Args:
+            wonum (str): Work order number
+            preferred_site (str): Site to prefer when the wonum exists in more than one site
+
+        Returns:
+            dict: Work order data as returned by the live lookup, plus 'labor',
+                'materials', 'tools', 'source' and 'freshness'; None if not stored locally
+        """
+        start_time = time.time()
+
+        try:
+            conn = self._read()
+            if conn is None:
+                return None
+            try:
+                conn.row_factory = sqlite3.Row
+                cursor = conn.cursor()
+
+                row = self._find_workorder(cursor, wonum, preferred_site)
+                if row is None:
+                    logger.info(f"📴 OFFLINE WO: Work order {wonum} not stored locally, using live Maximo")
+                    return None
+
+                keys = (row['wonum'], row['workorderid'])
+                workorder = self._clean_workorder_row(row)
+                workorder['labor'] = self._fetch_children(cursor, 'wolabor', keys, 'startdate')
+                workorder['materials'] = self._fetch_children(cursor, 'womaterial', keys, 'itemnum')
+                workorder['tools'] = self._fetch_children(cursor, 'wotool', keys, 'toolnum')
+                workorder['synced_at'] = row['_last_sync']
+                freshness = self._read_freshness(cursor)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"📴 OFFLINE WO: Lookup of {wonum} failed, using live Maximo: {e}")
+            return None
+
+        workorder['source'] = 'offline'
+        workorder['freshness'] = self._refresh_if_stale(freshness, workorder['siteid'])
+        logger.info(f"📴 OFFLINE WO: Found work order {wonum} in site {workorder['siteid']} "
+                    f"({time.time() - start_time:.3f}s)")
+        return workorder
+
+    def get_workorder_tasks(self, wonum: str, site_id: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get the tasks of a work order from the offline database.
+
+        Args:
+            wonum (str): Parent work order number
+            site_id (str): Site to prefer when the wonum exists in more than one site
+
+        Returns:
+            list: Task data in the structure of the live task fetch, or None if
+                the work order or its tasks are not stored locally
+        """
+        def read(cursor):
+            parent = self._find_workorder(cursor, wonum, site_id)
+            if parent is None:
+                return None
+
+            rows = cursor.execute(
+                "SELECT * FROM workorder WHERE parent = ? AND siteid = ? AND istask = 1 AND historyflag = 0 "
+                "ORDER BY taskid, wonum",
+                (wonum, parent['siteid'])
+            ).fetchall()
+            if any(row['_sync_status'] == DIRTY_STATUS for row in rows):
+                return None
+
+            # A parent with children but no local tasks was synced without them
+            if not rows and parent['haschildren']:
+                return None
+            return [self._clean_task_row(row) for row in rows]
+
+        tasks = self._query(read, f"Task lookup of {wonum}")
+        if tasks is not None:
+            logger.info(f"📴 OFFLINE WO: {len(tasks)} tasks of {wonum} served locally")
+        return tasks
+
+    def get_task_planned_materials(self, task_wonum: str, site_id: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get the planned materials (wpmaterial) of a task from the offline database.
+
+        Args:
+            task_wonum (str): Work order number of the task
+            site_id (str): Site to prefer when the wonum exists in more than one site
+
+        Returns:
+            list: Materials in the structure of TaskPlannedMaterialsService, or None
+                if the task is not stored locally
+        """
+        def read(cursor):
+            task = self._find_workorder(cursor, task_wonum, site_id)
+            if task is None:
+                return None
+            rows = cursor.execute(
+                "SELECT * FROM wpmaterial WHERE workorderid = ? AND itemnum IS NOT NULL ORDER BY itemnum, wpitemid",
+                (task['workorderid'],)
+            ).fetchall()
+            return [self._clean_material_row(row) for row in rows]
+
+        return self._query(read, f"Planned material lookup of {task_wonum}")
+
+    def get_task_labor(self, task_wonum: str, site_id: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get the labor transactions (labtrans) of a task from the offline database.
+
+        Args:
+            task_wonum (str): Work order number of the task
+            site_id (str): Site to prefer when the wonum exists in more than one site
+
+        Returns:
+            list: Labor records in the structure of TaskLaborService, or None if
+                the task is not stored locally
+        """
+        def read(cursor):
+            task = self._find_workorder(cursor, task_wonum, site_id)
+            if task is None:
+                return None
+            rows = cursor.execute(
+                "SELECT * FROM labtrans WHERE workorderid = ? ORDER BY startdate, labtransid",
+                (task['workorderid'],)
+            ).fetchall()
+            return [self._clean_labor_row(row) for row in rows]
+
+        return self._query(read, f"Labor lookup of {task_wonum}")
+
+    def get_materials_availability(self, wonum: str, site_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Count the planned materials across the tasks of a work order, in one local query.
+
+        Args:
+            wonum (str): Parent work order number
+            site_id (str): Site to prefer when the wonum exists in more than one site
+
+        Returns:
+            dict: {'has_materials', 'total_materials', 'tasks_with_materials', 'cache_hit'},
+                or None if the work order or its tasks are not stored locally
+        """
+        def read(cursor):
+            parent = self._find_workorder(cursor, wonum, site_id)
+            if parent is None:
+                return None
+
+            task_count, total_materials, tasks_with_materials = cursor.execute(
+                "SELECT COUNT(DISTINCT t.workorderid), COUNT(m.wpitemid), COUNT(DISTINCT m.workorderid) "
+                "FROM workorder t LEFT JOIN wpmaterial m ON m.workorderid = t.workorderid AND m.itemnum IS NOT NULL "
+                "WHERE t.parent = ? AND t.siteid = ? AND t.istask = 1",
+                (wonum, parent['siteid'])
+            ).fetchone()
+            if not task_count and parent['haschildren']:
+                return None
+
+            return {
+                'has_materials': total_materials > 0,
+                'total_materials': total_materials,
+                'tasks_with_materials': tasks_with_materials,
+                'cache_hit': False
+            }
+
+        return self._query(read, f"Material availability of {wonum}")
+
+    def mark_dirty(self, wonum: str, site_id: Optional[str] = None, status: Optional[str] = None) -> int:
+        """
+        Record that this app changed a work order in Maximo.
+
+        The work order and its tasks are served from live Maximo until a sync
+        writes them again (their content hash is cleared so it always does).
+        A new status is applied to the local row, so searches list the work
+        order under it meanwhile.
+
+        Args:
+            wonum (str): Work order or task number
+            site_id (str): Site of the work order (None for every site with the wonum)
+            status (str): New status of the work order (optional)
+
+        Returns:
+            int: Number of local rows marked
+        """
+        site_condition, params = ('AND siteid = ?', [site_id]) if site_id else ('', [])
+        try:
+            database = self.get_database()
+            if not os.path.exists(database.db_path):
+                return 0
+            conn = database.write()
+            try:
+                if status:
+                    conn.execute(f"UPDATE workorder SET status = ? WHERE wonum = ? {site_condition}",
+                                 [status, wonum] + params)
+                marked = conn.execute(
+                    f"UPDATE workorder SET _sync_status = ?, _content_hash = NULL "
+                    f"WHERE (wonum = ? OR parent = ?) {site_condition}",
+                    [DIRTY_STATUS, wonum, wonum] + params
+                ).rowcount
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"📴 OFFLINE WO: Could not mark {wonum} as changed: {e}")
+            return 0
+
+        if marked:
+            logger.info(f"📴 OFFLINE WO: {wonum} changed in Maximo, reading it live until the next sync")
+        return marked
+
+    def get_freshness(self) -> Dict[str, Any]:
+        """
+        Get how fresh the local work orders are.
+
+        Returns:
+            dict: {'last_sync', 'age_seconds', 'stale', 'status', 'refreshing'}
+        """
+        empty = {'last_sync': None, 'age_seconds': None, 'stale': True, 'status': None, 'refreshing': False}
+        try:
+            conn = self._read()
+            if conn is None:
+                return empty
+            try:
+                return self._read_freshness(conn.cursor())
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"📴 OFFLINE WO: Could not read the sync status: {e}")
+            return empty
+
+    def _read(self):
+        """Get a read connection, or None if the offline database was never created."""
+        database = self.get_database()
+        if not os.path.exists(database.db_path):
+            return None
+        return database.read()
+
+    def _query(self, read: Callable, description: str):
+        """
+        Run read(cursor) on a pooled read connection (rows as sqlite3.Row).
+
+        Returns:
+            The result of read, or None if the offline database does not exist or the query failed
+        """
+        try:
+            conn = self._read()
+            if conn is None:
+                return None
+            try:
+                conn.row_factory = sqlite3.Row
+                return read(conn.cursor())
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"📴 OFFLINE WO: {description} failed, using live Maximo: {e}")
+            return None
+
+    def _find_workorder(self, cursor, wonum: str, site_id: Optional[str]):
+        """
+        Get the workorder row of a wonum, preferring site_id.
+
+        Returns None if it is not stored locally or was changed by this app since
+        it was synced (see mark_dirty).
+        """
+        row = cursor.execute(
+            "SELECT * FROM workorder WHERE wonum = ? ORDER BY siteid = ? DESC, historyflag LIMIT 1",
+            (wonum, site_id or '')
+        ).fetchone()
+        if row is not None and row['_sync_status'] == DIRTY_STATUS:
+            logger.info(f"📴 OFFLINE WO: {wonum} was changed since the last sync, using live Maximo")
+            return None
+        return row
+
+    def _has_search_index(self, cursor) -> bool:
+        """Check whether the full-text search index exists (it is created by the work order sync)."""
+        return cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SEARCH_TABLE,)
+        ).fetchone() is not None
+
+    def _match_query(self, text: str) -> Optional[str]:
+        """
+        Build the FTS5 query for the words of a search box entry.
+
+        Every word must appear, as a word or the start of one ("pump le" finds
+        "Pump leaking"). Returns None if the text has no words.
+        """
+        words = re.findall(r'\w+', text)
+        return ' '.join(f'"{word}"*' for word in words) or None
+
+    def _like_pattern(self, text: str) -> str:
+        """Build a LIKE pattern matching text anywhere (with ESCAPE '\\')."""
+        return '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+    def _keyset_condition(self, operator: str, key) -> tuple:
+        """
+        Build the condition selecting the rows after ('>') or before ('<') a key in SEARCH_ORDER.
+
+        Rows without a reportdate sort first, as in SQLite's ORDER BY.
+
+        Returns:
+            tuple: (SQL condition, parameters)
+        """
+        reportdate, wonum, workorderid = key
+        if reportdate is None:
+            condition = f"(reportdate IS NULL AND (wonum, workorderid) {operator} (?, ?))"
+            if operator == '>':
+                condition = f"({condition} OR reportdate IS NOT NULL)"
+            return condition, [wonum, workorderid]
+
+        condition = f"(reportdate, wonum, workorderid) {operator} (?, ?, ?)"
+        if operator == '<':
+            condition = f"({condition} OR reportdate IS NULL)"
+        return condition, [reportdate, wonum, workorderid]
+
+    def _encode_cursor(self, direction: str, row) -> str:
+        """Encode the position of a result row as a page cursor."""
+        position = [direction] + [row[column] for column in SEARCH_ORDER]
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def _decode_cursor(self, cursor: Optional[str]) -> Optional[list]:
+        """Decode a page cursor to [direction, reportdate, wonum, workorderid], or None if missing or invalid."""
+        if not cursor:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            logger.warning("📴 OFFLINE WO: Ignoring an invalid search cursor")
+            return None
+        if not isinstance(position, list) or len(position) != 4 or position[0] not in ('after', 'before'):
+            logger.warning("📴 OFFLINE WO: Ignoring an invalid search cursor")
+            return None
+        return position
+
+    def _has_site_data(self, cursor, site_ids: List[str]) -> bool:
+        """Check whether any work order of the sites is stored locally."""
+        return cursor.execute(
+            f"SELECT 1 FROM workorder WHERE siteid IN ({', '.join('?' * len(site_ids))}) LIMIT 1", site_ids
+        ).fetchone() is not None
+
+    def _read_freshness(self, cursor) -> Dict[str, Any]:
+        """Read the last work order sync from sync_status."""
+        row = cursor.execute("SELECT last_sync, status FROM sync_status WHERE endpoint = ?", (SYNC_ENDPOINT,)).fetchone()
+        last_sync, status = (row[0], row[1]) if row else (None, None)
+
+        age_seconds = None
+        if last_sync:
+            try:
+                age_seconds = max(0, int((datetime.datetime.now() - datetime.datetime.fromisoformat(last_sync)).total_seconds()))
+            except ValueError:
+                pass
+
+        return {
+            'last_sync': last_sync,
+            'age_seconds': age_seconds,
+            'stale': age_seconds is None or age_seconds > self.max_age,
+            'status': status,
+            'refreshing': False
+        }
+
+    def _refresh_if_stale(self, freshness: Dict[str, Any], site: Optional[str]) -> Dict[str, Any]:
+        """Start a background sync when the data is stale, at most once per REFRESH_INTERVAL and site."""
+        if not freshness['stale'] or not self.refresh:
+            return freshness
+
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_refresh.get(site)
+            if last is not None and now - last < self.REFRESH_INTERVAL:
+                return freshness
+            self._last_refresh[site] = now
+
+        # Starting a sync checks the Maximo session, which must not hold up the page
+        threading.Thread(target=self._start_refresh, args=(site,), name='workorder-refresh', daemon=True).start()
+        freshness['refreshing'] = True
+        return freshness
+
+    def _start_refresh(self, site: Optional[str]):
+        """Start the background work order sync."""
+        try:
+            if self.refresh(site):
+                logger.info(f"🔄 OFFLINE WO: Requested a background refresh of stale work orders{' for ' + site if site else ''}")
+        except Exception as e:
+            logger.warning(f"🔄 OFFLINE WO: Could not start the background refresh: {e}")
+
+    def _fetch_children(self, cursor, table: str, keys, order_by: str) -> List[Dict[str, Any]]:
+        """Get the rows of a work order child table, without the sync columns."""
+        rows = cursor.execute(
+            f"SELECT * FROM {table} WHERE wonum = ? AND workorderid = ? ORDER BY {order_by}", keys
+        ).fetchall()
+        return [{key: row[key] for key in row.keys() if not key.startswith('_')} for row in rows]
+
+    def _clean_workorder_row(self, row) -> Dict[str, Any]:
+        """
+        Convert a workorder row to the structure of EnhancedWorkOrderService._clean_workorder_data.
+
+        Args:
+            row: sqlite3.Row of the workorder table
+
+        Returns:
+            dict: Cleaned work order data
+        """
+        def text(column):
+            return row[column] if row[column] is not None else ''
+
+        def number(column):
+            return row[column] if row[column] is not None else 0
+
+        return {
+            'wonum': text('wonum'),
+            'description': text('description'),
+            'status': text('status'),
+            'siteid': text('siteid'),
+            'priority': text('wopriority'),
+            'worktype': text('worktype'),
+            'assignedto': '',
+            'targetstart': text('targstartdate'),
+            'targetfinish': text('targcompdate'),
+            'schedstart': '',
+            'schedfinish': '',
+            'location': text('location'),
+            'assetnum': text('assetnum'),
+            'istask': number('istask'),
+            'historyflag': number('historyflag'),
+            'statusdate': text('statusdate'),
+            'reportdate': text('reportdate'),
+            'actstart': text('actstart'),
+            'actfinish': text('actfinish'),
+            'estdur': number('estdur'),
+            'actlabcost': number('actlabcost'),
+            'actmatcost': number('actmatcost'),
+            'acttoolcost': number('acttoolcost'),
+            'acttotalcost': number('acttotalcost')
+        }
+
+    def _clean_task_row(self, row) -> Dict[str, Any]:
+        """Convert a task's workorder row to the structure of the live task fetch."""
+        def text(column):
+            return row[column] if row[column] is not None else ''
+
+        return {
+            'wonum': text('wonum'),
+            'description': text('description'),
+            'status': text('status'),
+            'status_description': text('status_description'),
+            'siteid': text('siteid'),
+            'parent': text('parent'),
+            'taskid': row['taskid'] if row['taskid'] is not None else 0,
+            'istask': 1,
+            'priority': text('wopriority'),
+            'worktype': text('worktype'),
+            'assignedto': '',
+            'owner': text('owner'),
+            'owner_group': text('assignedownergroup'),
+            'lead': '',
+            'supervisor': '',
+            'crew': '',
+            'persongroup': '',
+            'location': text('location'),
+            'assetnum': text('assetnum'),
+            'targstartdate': text('targstartdate'),
+            'schedstart': '',
+            'schedfinish': '',
+            'estdur': row['estdur'] or 0,
+            'statusdate': text('statusdate'),
+            'reportdate': text('reportdate')
+        }
+
+    def _clean_material_row(self, row) -> Dict[str, Any]:
+        """Convert a wpmaterial row to the structure of TaskPlannedMaterialsService._clean_material_data."""
+        material = {key: row[key] if row[key] is not None else '' for key in row.keys() if not key.startswith('_')}
+        for field in ('itemqty', 'unitcost', 'linecost', 'rate', 'hours'):
+            material[field] = float(row[field] or 0)
+        material['directreq'] = bool(row['directreq'])
+        material['orderunit'] = row['orderunit'] or 'EA'
+        material['unit'] = material['orderunit']
+        return material
+
+    def _clean_labor_row(self, row) -> Dict[str, Any]:
+        """Convert a labtrans row to the structure of TaskLaborService._process_labor_record."""
+        record = {key: row[key] for key in row.keys() if not key.startswith('_')}
+        for field in ('laborhrs', 'regularhrs', 'premiumpayhours', 'linecost', 'payrate', 'taskid'):
+            if record[field] is not None:
+                record[field] = float(record[field])
+        return record
@@ -43,7 +43,8 @@ class TaskLaborService:
         self.logger.info("🔧 TASK LABOR SERVICE: Initialized")
     
     def get_task_labor(self, task_wonum: str, site_id: str = None, 
-                      task_status: str = None, use_cache: bool = True) -> Dict[str, Any]:
+                      task_status: str = None, use_cache: bool = True,
+                      records: Optional[List[Dict]] = None) -> Dict[str, Any]:
         """
         Get labor records for a specific task.
         
@@ -52,6 +53,8 @@ class TaskLaborService:
             site_id: Site ID for filtering (optional)
             task_status: Task status for access control
             use_cache: Whether to use cached results
+            records: Labor records already read elsewhere (e.g. the offline
+                database); used instead of the cache and the API
             
         Returns:
             Dictionary with success status, labor records, and metadata
@@ -67,6 +70,14 @@ class TaskLaborService:
                     'metadata': {'status_restricted': True}
                 }
             
+            if records is not None:
+                return {
+                    'success': True,
+                    'show_labor': True,
+                    'labor': records,
+                    'metadata': {'cached': False, 'source': 'offline', 'count': len(records)}
+                }
+            
             # Check cache first
             cache_key = f"{task_wonum}_{site_id or 'UNKNOWN'}"
             if use_cache and self._is_cache_valid(cache_key):
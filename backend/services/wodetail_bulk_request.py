@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+MXAPIWODETAIL BULK AddChange Request
+Shared multi-work-order POST used by the labor and material batch requests
+"""
+
+import json
+import logging
+from typing import Dict, List, Any
+
+logger = logging.getLogger(__name__)
+
+def parse_bulk_response_entry(response_data: Any, success_message: str) -> Dict[str, Any]:
+    """
+    Interpret one element of a BULK AddChange response.
+
+    Args:
+        response_data: Response element for a single work order
+        success_message: Message returned when the element holds no error
+
+    Returns:
+        Dict with success flag and either a message or an error
+    """
+    if isinstance(response_data, dict) and 'Error' in response_data.get('_responsedata', {}):
+        error = response_data['_responsedata']['Error']
+        error_code = error.get('reasonCode', 'Unknown code')
+        return {
+            'success': False,
+            'error': f"Maximo Error [{error_code}]: {error.get('message', 'Unknown error')}",
+            'error_code': error_code
+        }
+
+    return {
+        'success': True,
+        'message': success_message
+    }
+
+def post_addchange_bulk(token_manager, payload: List[Dict[str, Any]], success_message: str) -> List[Dict[str, Any]]:
+    """
+    Send a multi-work-order AddChange payload as one BULK request.
+
+    Args:
+        token_manager: Authenticated token manager with session and base_url
+        payload: List of AddChange entries, one per work order
+        success_message: Message of successful entries, formatted with the entry's {wonum}
+
+    Returns:
+        List of per-entry results in payload order
+    """
+    try:
+        base_url = getattr(token_manager, 'base_url', '')
+        api_url = f"{base_url}/oslc/os/mxapiwodetail"
+
+        params = {
+            'lean': '1',
+            'ignorecollectionref': '1',
+            'ignorekeyref': '1',
+            'ignorers': '1',
+            'mxlaction': 'addchange'
+        }
+
+        headers = {
+            'x-method-override': 'BULK',
+            'Content-Type': 'application/json',
+            'Accept': 'application/json'
+        }
+
+        logger.debug(f"📦 BULK ADDCHANGE: Payload: {json.dumps(payload, indent=2)}")
+
+        response = token_manager.session.post(
+            api_url,
+            json=payload,
+            params=params,
+            headers=headers,
+            timeout=(3.05, 60)
+        )
+
+        logger.info(f"🔍 BULK ADDCHANGE: Response status: {response.status_code} for {len(payload)} work orders")
+
+        if response.status_code >= 400:
+            error = f'API call failed with status {response.status_code}: {response.text}'
+            return [{'success': False, 'error': error} for _ in payload]
+
+        result_data = response.json() if response.content else []
+        if not isinstance(result_data, list):
+            result_data = [result_data]
+
+        return [
+            parse_bulk_response_entry(result_data[position] if position < len(result_data) else {},
+                                      success_message.format(wonum=entry['wonum']))
+            for position, entry in enumerate(payload)
+        ]
+
+    except Exception as e:
+        logger.error(f"Exception in post_addchange_bulk: {e}")
+        return [{'success': False, 'error': f'Request failed: {str(e)}'} for _ in payload]
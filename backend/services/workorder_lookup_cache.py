@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Work Order Lookup Cache
+Shared, bounded wonum -> work order cache for MXAPIWODETAIL lookups
+"""
+
+import logging
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+class WorkOrderLookupCache:
+    """
+    Bounded LRU cache of raw MXAPIWODETAIL work order records keyed by wonum.
+
+    This cache handles:
+    - One any-site query per wonum, returning the record for every site
+    - Negative caching of wonums that were not found
+    - Targeted eviction when a work order is written to
+    - Sharing lookups between the detail page, labor and material requests
+    """
+
+    def __init__(self, token_manager, max_entries: int = 500, ttl: int = 120, negative_ttl: int = 30):
+        """
+        Initialize the work order lookup cache.
+
+        Args:
+            token_manager: The Maximo token manager instance
+            max_entries: Maximum number of wonums kept (least recently used are dropped)
+            ttl: Seconds a found work order stays valid
+            negative_ttl: Seconds a not-found wonum stays valid
+        """
+        self.token_manager = token_manager
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        self._entries = OrderedDict()  # wonum -> {'records': [...], 'timestamp': float}
+        self._lock = threading.RLock()
+
+        self._stats = {
+            'hits': 0,
+            'negative_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'api_calls': 0
+        }
+
+    def get(self, wonum: str, siteid: Optional[str] = None,
+            preferred_siteid: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get a raw work order record.
+
+        Args:
+            wonum: Work order number
+            siteid: Only return the work order from this site
+            preferred_siteid: When the wonum exists in several sites and no siteid
+                is given, prefer this site (e.g. the user's default site)
+
+        Returns:
+            dict: Raw work order record or None if not found
+        """
+        records = self.get_records(wonum)
+        if not records:
+            return None
+
+        if siteid:
+            return next((record for record in records if record.get('siteid') == siteid), None)
+
+        if preferred_siteid:
+            for record in records:
+                if record.get('siteid') == preferred_siteid:
+                    return record
+
+        return records[0]
+
+    def get_records(self, wonum: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get every site's record for a wonum, from cache or with a single query.
+
+        Returns:
+            list: Raw records (empty if the wonum does not exist), or None if the
+            lookup failed and nothing could be determined
+        """
+        with self._lock:
+            entry = self._entries.get(wonum)
+            if entry is not None:
+                ttl = self.ttl if entry['records'] else self.negative_ttl
+                if time.time() - entry['timestamp'] < ttl:
+                    self._entries.move_to_end(wonum)
+                    if entry['records']:
+                        self._stats['hits'] += 1
+                    else:
+                        self._stats['negative_hits'] += 1
+                    return entry['records']
+                del self._entries[wonum]
+            self._stats['misses'] += 1
+
+        records = self._fetch(wonum)
+        if records is None:
+            # Errors are not cached so that the next request retries
+            return None
+
+        with self._lock:
+            self._entries[wonum] = {'records': records, 'timestamp': time.time()}
+            self._entries.move_to_end(wonum)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return records
+
+    def evict(self, wonum: str):
+        """Drop a work order from the cache after it has been written to."""
+        with self._lock:
+            if self._entries.pop(wonum, None) is not None:
+                self._stats['evictions'] += 1
+                logger.info(f"🧹 WO CACHE: Evicted work order {wonum}")
+
+    def clear(self) -> int:
+        """Clear the whole cache and return the number of entries removed."""
+        with self._lock:
+            size = len(self._entries)
+            self._entries.clear()
+            return size
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self._lock:
+            stats = self._stats.copy()
+            stats['entries'] = len(self._entries)
+            stats['max_entries'] = self.max_entries
+            stats['ttl_seconds'] = self.ttl
+            stats['negative_ttl_seconds'] = self.negative_ttl
+            return stats
+
+    def _fetch(self, wonum: str) -> Optional[List[Dict[str, Any]]]:
+        """Query MXAPIWODETAIL once for a wonum across all accessible sites."""
+        base_url = getattr(self.token_manager, 'base_url', '')
+        api_url = f"{base_url}/oslc/os/mxapiwodetail"
+
+        params = {
+            "oslc.select": "*",
+            "oslc.where": f'wonum="{wonum}"',
+            "oslc.pageSize": "10",  # A wonum can exist in more than one site
+            "lean": "1"
+        }
+
+        try:
+            with self._lock:
+                self._stats['api_calls'] += 1
+
+            response = self._get(api_url, params)
+
+            # Session expired: refresh once and retry
+            if 'login' in response.url.lower():
+                logger.warning(f"Session expired during work order lookup: {wonum}")
+                if not hasattr(self.token_manager, 'force_session_refresh') or \
+                        not self.token_manager.force_session_refresh():
+                    return None
+                response = self._get(api_url, params)
+                if 'login' in response.url.lower():
+                    return None
+
+            if response.status_code != 200:
+                logger.error(f"Work order lookup failed for {wonum}. Status: {response.status_code}")
+                return None
+
+            response_data = response.json()
+            if isinstance(response_data, dict):
+                records = response_data.get('member', response_data.get('rdfs:member', []))
+            elif isinstance(response_data, list):
+                records = response_data
+            else:
+                records = []
+
+            return [record for record in records if isinstance(record, dict)]
+
+        except Exception as e:
+            logger.error(f"Error looking up work order {wonum}: {e}")
+            return None
+
+    def _get(self, api_url: str, params: Dict[str, str]):
+        """Issue the lookup request."""
+        return self.token_manager.session.get(
+            api_url,
+            params=params,
+            timeout=(3.0, 15),
+            headers={"Accept": "application/json"},
+            allow_redirects=True
+        )
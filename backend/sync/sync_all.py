@@ -10,13 +10,14 @@ import logging
 import datetime
 from dotenv import load_dotenv
 
-# Import individual sync modules
-import sync_peruser
-import sync_locations
-import sync_assets
-import sync_domain
-import sync_wodetail
-import sync_inventory
+# The sync engine and orchestrator live with the sync scripts in the top-level sync/ directory
+SYNC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'sync')
+if SYNC_DIR not in sys.path:
+    sys.path.append(SYNC_DIR)
+
+from sync_mappings import MAPPINGS
+from sync_orchestrator import SyncOrchestrator, ENDPOINT_ORDER
+from sync_shadow import create_shadow, discard_shadow, get_mapping_tables, swap_in_shadow
 
 # Configure logging
 logging.basicConfig(
@@ -122,9 +123,14 @@ def main():
     parser.add_argument('--force-full', action='store_true',
                         help='Force a full sync instead of incremental')
     parser.add_argument('--endpoints', type=str, nargs='+',
-                        choices=['peruser', 'locations', 'assets', 'domain', 'wodetail', 'inventory', 'all'],
+                        choices=ENDPOINT_ORDER + ['all'],
                         default=['all'],
                         help='Specific endpoints to sync (default: all)')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Maximum number of endpoints synced at the same time')
+    parser.add_argument('--shadow', action='store_true',
+                        help='Full sync into a shadow database, swapped in when every endpoint completed '
+                             '(readers keep seeing the current data until then)')
     args = parser.parse_args()
 
     # Expand the database path
@@ -136,97 +142,73 @@ def main():
         logger.error("Please run create_maximo_db.py first")
         return
 
-    # Get user's default site
-    default_site = get_default_site(db_path)
-    logger.info(f"Using default site: {default_site}")
-
     # Determine which endpoints to sync
-    endpoints_to_sync = []
     if 'all' in args.endpoints:
-        endpoints_to_sync = ['peruser', 'locations', 'assets', 'domain', 'wodetail', 'inventory']
+        endpoints_to_sync = list(ENDPOINT_ORDER)
     else:
         endpoints_to_sync = args.endpoints
 
     logger.info(f"Syncing endpoints: {', '.join(endpoints_to_sync)}")
 
-    # Sync each endpoint using a safe approach that handles different function signatures
-    def run_sync_module(module, module_name, args_list):
-        """Run a sync module safely, handling different function signatures."""
-        logger.info(f"Syncing {module_name} endpoint")
+    # With --shadow every write goes to the shadow database until the swap
+    shadow_path = None
+    target_path = db_path
+    if args.shadow:
+        shadow_tables = set()
+        for endpoint in endpoints_to_sync:
+            shadow_tables |= get_mapping_tables(MAPPINGS[endpoint])
+        shadow_path = target_path = create_shadow(db_path, shadow_tables)
+
+    def site_for(endpoint):
+        """Look up the user's default site when the endpoint starts (after peruser has synced)."""
+        if not MAPPINGS[endpoint].get('site_filter'):
+            return None
+        default_site = get_default_site(target_path)
+        logger.info(f"Using default site {default_site} for {endpoint}")
+        return default_site
+
+    def log_progress(endpoint, progress):
+        """Log status changes of each endpoint."""
+        if progress['status'] != 'running' or progress['pages'] == 0:
+            logger.info(f"{endpoint}: {progress['status']}" + (f" - {progress['message']}" if progress['message'] else ""))
+
+    # Independent endpoints run concurrently; writes go through one connection
+    orchestrator = SyncOrchestrator(
+        target_path,
+        endpoints=endpoints_to_sync,
+        force_full=args.force_full or args.shadow,
+        site=site_for,
+        max_workers=args.workers,
+        on_progress=log_progress
+    )
+    result = orchestrator.run()
+
+    if shadow_path and result['success']:
         try:
-            # First try to call with args directly
-            try:
-                module.main(args_list)
-                return True
-            except TypeError as e:
-                logger.info(f"main() doesn't accept arguments directly, trying with sys.argv: {e}")
-
-                # If that fails, try with sys.argv
-                original_argv = sys.argv
-                try:
-                    # Create new argv with our arguments
-                    sys.argv = [f'sync_{module_name}.py'] + args_list
-
-                    # Call main with no arguments
-                    module.main()
-                    return True
-                except Exception as e2:
-                    logger.error(f"Error running {module_name} sync: {e2}")
-                    return False
-                finally:
-                    # Restore original argv
-                    sys.argv = original_argv
+            swap_in_shadow(db_path, shadow_path, shadow_tables)
+            logger.info("Swapped the shadow database in")
         except Exception as e:
-            logger.error(f"Error running {module_name} sync: {e}")
-            return False
-
-    # Process each endpoint
-    if 'peruser' in endpoints_to_sync:
-        run_sync_module(
-            sync_peruser,
-            "MXAPIPERUSER",
-            ['--db-path', db_path] + (['--force-full'] if args.force_full else [])
-        )
-
-    if 'locations' in endpoints_to_sync:
-        run_sync_module(
-            sync_locations,
-            "MXAPILOCATIONS",
-            ['--db-path', db_path, '--site', default_site] + (['--force-full'] if args.force_full else [])
-        )
-
-    if 'assets' in endpoints_to_sync:
-        run_sync_module(
-            sync_assets,
-            "MXAPIASSET",
-            ['--db-path', db_path, '--site', default_site] + (['--force-full'] if args.force_full else [])
-        )
-
-    if 'domain' in endpoints_to_sync:
-        run_sync_module(
-            sync_domain,
-            "MXAPIDOMAIN",
-            ['--db-path', db_path] + (['--force-full'] if args.force_full else [])
-        )
-
-    if 'wodetail' in endpoints_to_sync:
-        run_sync_module(
-            sync_wodetail,
-            "MXAPIWODETAIL",
-            ['--db-path', db_path, '--site', default_site] + (['--force-full'] if args.force_full else [])
-        )
-
-    if 'inventory' in endpoints_to_sync:
-        run_sync_module(
-            sync_inventory,
-            "MXAPIINVENTORY",
-            ['--db-path', db_path, '--site', default_site] + (['--force-full'] if args.force_full else [])
-        )
+            logger.error(f"Could not swap in the shadow database, the current data is kept: {e}")
+            result['success'] = False
+    elif shadow_path:
+        logger.warning("Sync failed, the shadow database is discarded and the current data is kept")
+        discard_shadow(shadow_path)
 
     # Update overall sync status
     update_sync_status(db_path)
 
-    logger.info("All data synchronized successfully!")
+    print("\n=== SYNC ALL SUMMARY ===\n")
+    for endpoint, progress in result['progress'].items():
+        elapsed = progress.get('elapsed_seconds')
+        print(f"{endpoint}: {progress['status']}, {progress['rows_written']} rows"
+              + (f" in {elapsed:.1f}s" if elapsed is not None else ""))
+    print(f"\nTotal time: {result['elapsed_seconds']:.1f}s")
+
+    if result['success']:
+        logger.info("All data synchronized successfully!")
+    else:
+        failed = [endpoint for endpoint, progress in result['progress'].items() if progress['status'] != 'completed']
+        logger.error(f"Sync finished with failures: {', '.join(failed)}")
 
 if __name__ == "__main__":
     main()
@@ -384,6 +384,7 @@ class MaterialRequestManager {
         this.currentParentWonum = null;  // Parent work order number (e.g. 2021-1744762)
         this.currentTaskWonum = null;    // Task work order number (e.g. 2021-1835482)
         this.currentTaskId = null;       // Actual numeric task ID (e.g. 10, 20, 30)
+        this.cart = [];                  // Pending material lines submitted together
 
         this.initializeEventListeners();
     }
@@ -401,6 +402,14 @@ class MaterialRequestManager {
             this.submitMaterialRequest();
         });
 
+        // Cart buttons
+        document.getElementById('addToMaterialCart')?.addEventListener('click', () => {
+            this.addToCart();
+        });
+        document.getElementById('submitMaterialCart')?.addEventListener('click', () => {
+            this.submitCart();
+        });
+
         // Direct request checkbox change
         document.getElementById('directRequest')?.addEventListener('change', ((e) => {
             const locationInput = document.getElementById('requestLocation');
@@ -512,14 +521,12 @@ class MaterialRequestManager {
         return null;
     }
 
-    async submitMaterialRequest() {
-        if (this.isSubmitting) return;
-
+    collectRequestData() {
         // Validate form
         const form = document.getElementById('materialRequestForm');
         if (!form.checkValidity()) {
             form.reportValidity();
-            return;
+            return null;
         }
 
         const quantity = parseFloat(document.getElementById('requestQuantity').value);
@@ -530,46 +537,128 @@ class MaterialRequestManager {
 
         if (quantity <= 0) {
             alert('Please enter a valid quantity greater than 0');
-            return;
+            return null;
         }
 
         if (!requestBy || requestBy === '') {
             alert('Please enter the person ID who is requesting this material');
             document.getElementById('requestBy').focus();
-            return;
+            return null;
         }
 
         // Validate location for non-direct requests
         if (!directRequest && (!location || location.trim() === '')) {
             alert('Please enter a location for location-based requests, or check "Direct Request"');
             document.getElementById('requestLocation').focus();
-            return;
+            return null;
         }
 
-        // Set loading state
-        this.setSubmitButtonLoading(true);
+        // Validate that we have task context (MANDATORY)
+        if (this.currentTaskId === null || this.currentParentWonum === null || this.currentTaskWonum === null) {
+            alert('Error: Task context not available. Please try again from the task section.');
+            return null;
+        }
+
+        return {
+            wonum: this.currentParentWonum,  // Use PARENT work order number for top-level payload
+            siteid: this.currentSiteId,
+            itemnum: this.selectedItem.itemnum,
+            quantity: quantity,
+            taskid: this.currentTaskId,  // Use numeric task ID for Maximo API (MANDATORY)
+            task_wonum: this.currentTaskWonum,  // Pass task wonum for backend validation
+            location: directRequest ? null : (location ? location.trim() : null),
+            directreq: directRequest,
+            notes: notes ? notes.trim() : null,
+            requestby: requestBy.trim()
+        };
+    }
+
+    addToCart() {
+        const requestData = this.collectRequestData();
+        if (!requestData) return;
+
+        this.cart.push(requestData);
+        this.updateCartButton();
+        this.showSuccess(`Added ${requestData.itemnum} to cart (${this.cart.length} item${this.cart.length === 1 ? '' : 's'})`);
+
+        setTimeout(() => {
+            const modal = bootstrap.Modal.getInstance(document.getElementById('materialRequestModal'));
+            modal.hide();
+        }, 800);
+    }
+
+    updateCartButton() {
+        const button = document.getElementById('submitMaterialCart');
+        if (!button) return;
+
+        button.classList.toggle('d-none', this.cart.length === 0);
+        button.innerHTML = `<i class="fas fa-shopping-cart me-1"></i>Submit Cart (${this.cart.length})`;
+    }
+
+    async submitCart() {
+        if (this.isSubmitting || this.cart.length === 0) return;
+
         this.isSubmitting = true;
+        const button = document.getElementById('submitMaterialCart');
+        if (button) button.disabled = true;
 
         try {
-            // Validate that we have task context (MANDATORY)
-            if (this.currentTaskId === null || this.currentParentWonum === null || this.currentTaskWonum === null) {
-                alert('Error: Task context not available. Please try again from the task section.');
+            console.log('Submitting material cart:', this.cart);
+
+            const response = await fetch('/api/workorder/material-cart', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({ lines: this.cart })
+            });
+
+            const result = await response.json();
+
+            if (!result.results) {
+                this.showError(result.error || 'Failed to submit material cart');
                 return;
             }
 
-            const requestData = {
-                wonum: this.currentParentWonum,  // Use PARENT work order number for top-level payload
-                siteid: this.currentSiteId,
-                itemnum: this.selectedItem.itemnum,
-                quantity: quantity,
-                taskid: this.currentTaskId,  // Use numeric task ID for Maximo API (MANDATORY)
-                task_wonum: this.currentTaskWonum,  // Pass task wonum for backend validation
-                location: directRequest ? null : (location ? location.trim() : null),
-                directreq: directRequest,
-                notes: notes ? notes.trim() : null,
-                requestby: requestBy.trim()
-            };
+            // Keep only the lines that failed so they can be corrected and resubmitted
+            const failed = result.results.filter(r => !r.success);
+            this.cart = failed.map(r => this.cart[r.index]);
+            this.updateCartButton();
+
+            if (failed.length === 0) {
+                this.showSuccess(`Submitted ${result.summary.succeeded} material requests`);
+            } else {
+                this.showError(`${result.summary.succeeded} submitted, ${failed.length} failed: ${failed[0].error}`);
+            }
+
+            if (result.summary.succeeded > 0) {
+                if (typeof refreshMaterials === 'function') {
+                    refreshMaterials();
+                }
+                if (typeof refreshAllMaterialsChecks === 'function') {
+                    refreshAllMaterialsChecks();
+                }
+            }
+        } catch (error) {
+            console.error('Material cart submission error:', error);
+            this.showError('Network error occurred while submitting cart');
+        } finally {
+            if (button) button.disabled = false;
+            this.isSubmitting = false;
+        }
+    }
+
+    async submitMaterialRequest() {
+        if (this.isSubmitting) return;
+
+        const requestData = this.collectRequestData();
+        if (!requestData) return;
 
+        // Set loading state
+        this.setSubmitButtonLoading(true);
+        this.isSubmitting = true;
+
+        try {
             console.log('Submitting material request:', requestData);
 
             const response = await fetch('/api/workorder/add-material-request', {
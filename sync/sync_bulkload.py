@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Bulk-load mode for the initial population of the offline database.
+
+Maintaining every secondary index row by row makes the first full sync into a
+new database many times slower than the data alone. When an engine finds its
+tables empty (or created by create_maximo_db.py --bulk-load), it:
+1. Moves the tables' non-unique indexes into sync_deferred_index and drops them
+   (unique indexes stay: the upserts' ON CONFLICT clauses need them)
+2. Loads with relaxed pragmas (synchronous=OFF, a large cache) and commits
+   many pages per transaction
+3. Recreates the indexes, runs ANALYZE on the tables and restores the pragmas
+
+The definitions are stored in the database, so a load that is interrupted is
+resumed in bulk-load mode and the indexes are still built at its end.
+"""
+import time
+import logging
+
+logger = logging.getLogger('sync_bulkload')
+
+# Rows written per transaction while bulk loading
+BULK_TRANSACTION_ROWS = 50000
+
+DEFERRED_INDEX_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sync_deferred_index (
+    name TEXT PRIMARY KEY,
+    table_name TEXT NOT NULL,
+    sql TEXT NOT NULL
+)
+'''
+
+BULK_PRAGMAS = [
+    ('synchronous', 'OFF'),
+    ('cache_size', -262144),        # KiB (about 256 MB)
+    ('foreign_keys', 'OFF')
+]
+
+# Restored after the load (the defaults applied by sync_db.connect)
+NORMAL_PRAGMAS = [
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -16000)
+]
+
+def ensure_deferred_index_table(conn):
+    """Create the sync_deferred_index table in databases created before it existed."""
+    conn.execute(DEFERRED_INDEX_SCHEMA)
+    conn.commit()
+
+def get_secondary_indexes(cursor, table):
+    """
+    Get the indexes of a table that can be built after loading.
+
+    Returns:
+        list: (name, sql) of the non-unique indexes created with CREATE INDEX
+    """
+    indexes = []
+    for _, name, unique, origin, _ in cursor.execute(f"PRAGMA index_list({table})").fetchall():
+        if unique or origin != 'c':
+            continue
+        row = cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)).fetchone()
+        if row and row[0]:
+            indexes.append((name, row[0]))
+    return indexes
+
+def is_empty(cursor, table):
+    """Check whether a table has no rows."""
+    return cursor.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None
+
+def has_deferred_indexes(cursor, tables):
+    """Check whether any of the tables still has indexes waiting to be built."""
+    placeholders = ', '.join('?' * len(tables))
+    return cursor.execute(
+        f"SELECT 1 FROM sync_deferred_index WHERE table_name IN ({placeholders}) LIMIT 1", list(tables)
+    ).fetchone() is not None
+
+def defer_indexes(conn, tables):
+    """
+    Drop the secondary indexes of tables, keeping their definitions to build them later.
+
+    Args:
+        conn: SQLite connection
+        tables (list): Tables to defer the indexes of
+
+    Returns:
+        int: Number of indexes deferred
+    """
+    cursor = conn.cursor()
+    deferred = 0
+    try:
+        for table in tables:
+            for name, sql in get_secondary_indexes(cursor, table):
+                cursor.execute("INSERT OR REPLACE INTO sync_deferred_index (name, table_name, sql) VALUES (?, ?, ?)",
+                               (name, table, sql))
+                cursor.execute(f"DROP INDEX IF EXISTS {name}")
+                deferred += 1
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return deferred
+
+def start_bulk_load(conn, tables):
+    """
+    Enter bulk-load mode if the tables are empty or an earlier load did not finish.
+
+    Args:
+        conn: SQLite connection
+        tables (list): Tables the sync writes to
+
+    Returns:
+        bool: True if the sync should load in bulk-load mode
+    """
+    ensure_deferred_index_table(conn)
+    cursor = conn.cursor()
+    tables = list(tables)
+
+    if not has_deferred_indexes(cursor, tables) and not all(is_empty(cursor, table) for table in tables):
+        return False
+
+    deferred = defer_indexes(conn, tables)
+    for name, value in BULK_PRAGMAS:
+        conn.execute(f"PRAGMA {name}={value}")
+
+    logger.info(f"Initial load: bulk-load mode for {', '.join(tables)}"
+                + (f" ({deferred} indexes deferred)" if deferred else ""))
+    return True
+
+def build_deferred_indexes(conn, tables=None):
+    """
+    Build the deferred indexes of tables and update their statistics.
+
+    Args:
+        conn: SQLite connection
+        tables (list): Tables to build the indexes of (every deferred index if None)
+
+    Returns:
+        int: Number of indexes built
+    """
+    cursor = conn.cursor()
+    started = time.perf_counter()
+
+    if tables is None:
+        rows = cursor.execute("SELECT name, table_name, sql FROM sync_deferred_index").fetchall()
+    else:
+        tables = list(tables)
+        rows = cursor.execute(
+            f"SELECT name, table_name, sql FROM sync_deferred_index WHERE table_name IN ({', '.join('?' * len(tables))})",
+            tables
+        ).fetchall()
+
+    built_tables = set(tables or [])
+    try:
+        for name, table, sql in rows:
+            exists = cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)).fetchone()
+            if not exists:
+                cursor.execute(sql)
+            cursor.execute("DELETE FROM sync_deferred_index WHERE name = ?", (name,))
+            built_tables.add(table)
+
+        for table in sorted(built_tables):
+            cursor.execute(f"ANALYZE {table}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    if rows:
+        logger.info(f"Built {len(rows)} deferred indexes and analyzed {len(built_tables)} tables "
+                    f"in {time.perf_counter() - started:.1f}s")
+    return len(rows)
+
+def finish_bulk_load(conn, tables, build_indexes=True):
+    """
+    Leave bulk-load mode: build the tables' indexes, analyze them and restore the pragmas.
+
+    Args:
+        conn: SQLite connection
+        tables (list): Tables the sync wrote to
+        build_indexes (bool): False if the load is incomplete; its indexes stay
+            deferred until the load that finishes it
+    """
+    try:
+        if build_indexes:
+            build_deferred_indexes(conn, tables)
+    finally:
+        for name, value in NORMAL_PRAGMAS:
+            conn.execute(f"PRAGMA {name}={value}")
+
+    # Fold the large WAL written by the load back into the database file
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Page-level checkpoints for resumable syncs.
+
+After every committed page the sync engine stores, in the same transaction as
+the page's rows:
+- The endpoint, site and a fingerprint of the query being paged through
+- The link to the next page and the number of pages committed so far
+- The highest changedate received so far
+
+When a sync dies halfway (timeout, sleep, killed process) the next run of the
+same query finds the checkpoint and continues from the next page instead of
+starting again from the top. The checkpoint is removed once the query has been
+read to the end.
+"""
+import json
+import hashlib
+import logging
+import datetime
+
+logger = logging.getLogger('sync_checkpoints')
+
+# Checkpoints older than this are ignored: the pages behind a stale link may have shifted
+CHECKPOINT_MAX_AGE = datetime.timedelta(hours=24)
+
+CHECKPOINT_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sync_checkpoint (
+    endpoint TEXT NOT NULL,
+    site TEXT NOT NULL DEFAULT '',
+    query_fingerprint TEXT NOT NULL,
+    query TEXT,
+    next_page_url TEXT,
+    page_number INTEGER NOT NULL DEFAULT 0,
+    high_water_changedate TEXT,
+    rows_written INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (endpoint, site, query_fingerprint)
+)
+'''
+
+def ensure_checkpoint_table(conn):
+    """Create the sync_checkpoint table in databases created before it existed."""
+    conn.execute(CHECKPOINT_SCHEMA)
+    conn.commit()
+
+def query_fingerprint(object_structure, query_params):
+    """
+    Fingerprint a query, so a checkpoint is only resumed by the same query.
+
+    Args:
+        object_structure (str): Object structure being paged through (e.g. mxapiwodetail)
+        query_params (dict): Query parameters of the first page
+
+    Returns:
+        str: Hex digest identifying the query
+    """
+    query = json.dumps({'object_structure': object_structure, 'params': query_params}, sort_keys=True)
+    return hashlib.sha1(query.encode('utf-8')).hexdigest()
+
+def load_checkpoint(conn, endpoint, site, fingerprint):
+    """
+    Get the checkpoint of an unfinished sync of a query.
+
+    Args:
+        conn: SQLite connection
+        endpoint (str): API endpoint name
+        site (str): Site ID (None for endpoints not filtered by site)
+        fingerprint (str): Query fingerprint
+
+    Returns:
+        dict: Checkpoint with next_page_url, page_number, high_water_changedate and
+        rows_written, or None if there is nothing to resume
+    """
+    try:
+        row = conn.execute(
+            "SELECT next_page_url, page_number, high_water_changedate, rows_written, updated_at "
+            "FROM sync_checkpoint WHERE endpoint = ? AND site = ? AND query_fingerprint = ?",
+            (endpoint, site or '', fingerprint)
+        ).fetchone()
+    except Exception as e:
+        logger.warning(f"Could not read sync checkpoint for {endpoint}: {e}")
+        return None
+
+    if not row or not row[0]:
+        return None
+
+    updated_at = datetime.datetime.fromisoformat(row[4])
+    if datetime.datetime.now() - updated_at > CHECKPOINT_MAX_AGE:
+        logger.info(f"Ignoring {endpoint} checkpoint from {row[4]}, it is older than {CHECKPOINT_MAX_AGE}")
+        return None
+
+    return {
+        'next_page_url': row[0],
+        'page_number': row[1],
+        'high_water_changedate': row[2],
+        'rows_written': row[3]
+    }
+
+def save_checkpoint(cursor, endpoint, checkpoint):
+    """
+    Store the checkpoint for the page just written (the caller commits it with the page).
+
+    Args:
+        cursor: SQLite cursor of the page's transaction
+        endpoint (str): API endpoint name
+        checkpoint (dict): site, query_fingerprint, query, next_page_url, page_number,
+            high_water_changedate and rows_written
+    """
+    cursor.execute(
+        "INSERT INTO sync_checkpoint (endpoint, site, query_fingerprint, query, next_page_url, page_number, "
+        "high_water_changedate, rows_written, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (endpoint, site, query_fingerprint) DO UPDATE SET "
+        "next_page_url = excluded.next_page_url, page_number = excluded.page_number, "
+        "high_water_changedate = excluded.high_water_changedate, rows_written = excluded.rows_written, "
+        "updated_at = excluded.updated_at",
+        (endpoint, checkpoint['site'] or '', checkpoint['query_fingerprint'], checkpoint['query'],
+         checkpoint['next_page_url'], checkpoint['page_number'], checkpoint['high_water_changedate'],
+         checkpoint['rows_written'], datetime.datetime.now().isoformat())
+    )
+
+def clear_checkpoint(cursor, endpoint, site, fingerprint):
+    """Remove the checkpoint of a query that has been read to the end (the caller commits)."""
+    cursor.execute(
+        "DELETE FROM sync_checkpoint WHERE endpoint = ? AND site = ? AND query_fingerprint = ?",
+        (endpoint, site or '', fingerprint)
+    )
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Shared access to the offline SQLite database.
+
+Every connection to the offline database is opened through connect(), which
+applies the same pragmas:
+- journal_mode=WAL: readers never wait for a sync's write transaction, and a
+  sync never waits for readers
+- synchronous=NORMAL: safe with WAL; commits no longer wait for an fsync
+- cache_size and mmap_size: hot pages stay in memory instead of being re-read
+- busy timeout: writers from other processes wait instead of failing
+
+Within one process, OfflineDatabase (from get_database) adds:
+- A small pool of read connections. Each connection keeps its cache of
+  prepared statements, so repeated UI queries are not parsed again
+- A single writer connection, handed to one caller at a time
+
+Connections from the pool are normal sqlite3 connections; close() hands them
+back to the pool instead of closing them, so existing code that opens and
+closes a connection for each query keeps working unchanged.
+
+OfflineDatabase.swap_in replaces the database file with another one (a shadow
+database built by a full sync, see sync_shadow): it waits for the borrowed
+connections to come back, closes them, renames the new file over the old one
+and lets the next read() or write() open the new file.
+"""
+import os
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger('sync_db')
+
+# Seconds a connection waits for another process's write lock
+BUSY_TIMEOUT = 30
+
+# Prepared statements cached per connection
+STATEMENT_CACHE_SIZE = 256
+
+PRAGMAS = [
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -16000),         # KiB (about 16 MB per connection)
+    ('mmap_size', 268435456),       # 256 MB of the file mapped into memory
+    ('temp_store', 'MEMORY')
+]
+
+def apply_pragmas(conn, readonly=False):
+    """
+    Apply the offline database pragmas to a connection.
+
+    Args:
+        conn: SQLite connection
+        readonly (bool): Also refuse writes on this connection (PRAGMA query_only)
+    """
+    try:
+        # Persistent: once the file is in WAL mode, every later connection uses it
+        conn.execute("PRAGMA journal_mode=WAL")
+    except sqlite3.OperationalError as e:
+        # Another connection holds a lock; the next one switches the mode
+        logger.debug(f"Could not enable WAL mode yet: {e}")
+
+    for name, value in PRAGMAS:
+        conn.execute(f"PRAGMA {name}={value}")
+
+    if readonly:
+        conn.execute("PRAGMA query_only=1")
+
+def connect(db_path, readonly=False, factory=sqlite3.Connection):
+    """
+    Open a connection to the offline database with the shared pragmas.
+
+    Args:
+        db_path (str): Path to the SQLite database
+        readonly (bool): Refuse writes on this connection
+        factory: sqlite3.Connection subclass to create
+
+    Returns:
+        sqlite3.Connection: The connection
+    """
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT, check_same_thread=False,
+                           cached_statements=STATEMENT_CACHE_SIZE, factory=factory)
+    apply_pragmas(conn, readonly)
+    return conn
+
+class PooledConnection(sqlite3.Connection):
+    """Connection whose close() hands it back to its OfflineDatabase."""
+
+    release = None
+
+    def close(self):
+        release, self.release = self.release, None
+        if release:
+            release(self)
+        else:
+            super().close()
+
+class OfflineDatabase:
+    """
+    Pooled read connections and a single writer for one database file.
+
+    read() and write() return a connection; closing it gives it back. Readers
+    are created as needed and at most max_idle_readers are kept open between
+    uses. The writer is held by one caller at a time, from write() until close().
+    """
+
+    def __init__(self, db_path, max_idle_readers=4):
+        """
+        Initialize the pool (connections are opened on first use).
+
+        Args:
+            db_path (str): Path to the SQLite database
+            max_idle_readers (int): Read connections kept open between uses
+        """
+        self.db_path = db_path
+        self.max_idle_readers = max_idle_readers
+
+        self._idle_readers = []
+        self._borrowed_readers = 0
+        self._swapping = False
+        self._lock = threading.Condition()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+    def read(self):
+        """
+        Get a read-only connection from the pool.
+
+        Returns:
+            PooledConnection: Connection; close() returns it to the pool
+        """
+        with self._lock:
+            # New readers wait while the file is being swapped
+            self._lock.wait_for(lambda: not self._swapping)
+            conn = self._idle_readers.pop() if self._idle_readers else None
+            self._borrowed_readers += 1
+
+        if conn is None:
+            try:
+                conn = connect(self.db_path, readonly=True, factory=PooledConnection)
+            except Exception:
+                self._return_reader()
+                raise
+
+        conn.release = self._release_reader
+        return conn
+
+    def write(self):
+        """
+        Get the writer connection, waiting while another caller holds it.
+
+        Returns:
+            PooledConnection: Connection; close() releases it (uncommitted changes are rolled back)
+        """
+        self._writer_lock.acquire()
+        try:
+            if self._writer is None:
+                self._writer = connect(self.db_path, factory=PooledConnection)
+        except Exception:
+            self._writer_lock.release()
+            raise
+
+        self._writer.release = self._release_writer
+        return self._writer
+
+    def swap_in(self, new_path, prepare=None, timeout=30):
+        """
+        Replace the database file with another one.
+
+        Holds the writer and stops handing out readers, waits for the borrowed
+        readers to be closed, then renames new_path over the database file.
+        Readers see either the old file or the new one, never a mix.
+
+        Args:
+            new_path (str): Complete database file to swap in
+            prepare (callable): Called as prepare(writer connection) just before the
+                swap, e.g. to copy rows written to the old file meanwhile
+            timeout (float): Seconds to wait for borrowed readers
+
+        Raises:
+            TimeoutError: If readers were not returned in time (nothing is swapped)
+            sqlite3.OperationalError: If another process has a database open
+        """
+        writer = self.write()
+        try:
+            with self._lock:
+                self._swapping = True
+                if not self._lock.wait_for(lambda: self._borrowed_readers == 0, timeout):
+                    raise TimeoutError(f"Readers of {self.db_path} still open after {timeout}s")
+                readers, self._idle_readers = self._idle_readers, []
+
+            if prepare:
+                prepare(writer)
+                writer.commit()
+
+            for conn in readers:
+                sqlite3.Connection.close(conn)
+            sqlite3.Connection.close(writer)
+            self._writer = None
+
+            replace_database_file(new_path, self.db_path)
+            logger.info(f"Swapped {new_path} in as {self.db_path}")
+        finally:
+            with self._lock:
+                self._swapping = False
+                self._lock.notify_all()
+            if self._writer is None:
+                self._writer_lock.release()
+            else:
+                writer.close()
+
+    def close(self):
+        """Close the idle readers and the writer."""
+        with self._lock:
+            readers, self._idle_readers = self._idle_readers, []
+        for conn in readers:
+            sqlite3.Connection.close(conn)
+
+        with self._writer_lock:
+            if self._writer is not None:
+                sqlite3.Connection.close(self._writer)
+                self._writer = None
+
+    def _return_reader(self):
+        """Count a borrowed reader as returned."""
+        with self._lock:
+            self._borrowed_readers -= 1
+            self._lock.notify_all()
+
+    def _release_reader(self, conn):
+        """Return a read connection to the pool, or close it if enough are idle."""
+        keep = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = None
+        except sqlite3.Error:
+            keep = False
+
+        with self._lock:
+            self._borrowed_readers -= 1
+            self._lock.notify_all()
+            if keep and not self._swapping and len(self._idle_readers) < self.max_idle_readers:
+                self._idle_readers.append(conn)
+                return
+
+        sqlite3.Connection.close(conn)
+
+    def _release_writer(self, conn):
+        """Release the writer for the next caller."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = None
+        finally:
+            self._writer_lock.release()
+
+def replace_database_file(new_path, db_path):
+    """
+    Rename a database file over another one.
+
+    Both files are first checkpointed and taken out of WAL mode, so neither
+    leaves a -wal file that SQLite would replay onto the other. The next
+    connection opened with connect() turns WAL mode back on.
+
+    Raises:
+        sqlite3.OperationalError: If either file is still open in another process
+    """
+    for path in (new_path, db_path):
+        if not os.path.exists(path):
+            continue
+        conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            mode = conn.execute("PRAGMA journal_mode=DELETE").fetchone()[0]
+        finally:
+            conn.close()
+        if mode.lower() != 'delete':
+            raise sqlite3.OperationalError(f"{path} is still open in another process")
+
+    os.replace(new_path, db_path)
+
+    for suffix in ('-wal', '-shm'):
+        for path in (new_path + suffix, db_path + suffix):
+            if os.path.exists(path):
+                os.remove(path)
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+def get_database(db_path):
+    """
+    Get the shared OfflineDatabase of a database file.
+
+    Args:
+        db_path (str): Path to the SQLite database
+
+    Returns:
+        OfflineDatabase: The same instance for every caller in this process
+    """
+    with _databases_lock:
+        database = _databases.get(db_path)
+        if database is None:
+            database = _databases[db_path] = OfflineDatabase(db_path)
+        return database
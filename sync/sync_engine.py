@@ -0,0 +1,1255 @@
+#!/usr/bin/env python3
+"""
+Schema-driven sync engine shared by every Maximo endpoint.
+
+A mapping from sync_mappings describes the object structure, its query and the
+tables its records are written to. For any mapping the engine:
+1. Fetches every page of the object structure (sync_paging), only asking for
+   records changed since the query's changedate watermark on incremental
+   mappings (sync_watermarks)
+2. Turns each record and its child collections into row tuples with field maps
+   compiled once per run (raw API key -> column index)
+3. Writes each page with batched upserts in one transaction (sync_writer), together
+   with a checkpoint so an interrupted sync resumes at the next page (sync_checkpoints)
+4. Once the query is read to the end, removes local rows a full read no longer
+   returns (sync_reconcile), moves the watermark up to the highest changedate
+   received, and records the sync_status row with page/row/timing metrics
+5. Brings the mapping's full-text search index up to date with the rows
+   written (sync_search)
+
+Each sync_<endpoint>.py script is a thin wrapper around run_cli with its mapping.
+"""
+import os
+import json
+import time
+import logging
+import argparse
+import datetime
+from collections import defaultdict
+from dotenv import load_dotenv
+from sync_paging import (iter_pages, iter_pages_parallel, sync_pages, new_sync_results, merge_sync_results,
+                         summarize_sync_results, record_sync_status, record_sync_failure,
+                         get_next_page_url, PageFetchError)
+from sync_checkpoints import (ensure_checkpoint_table, query_fingerprint, load_checkpoint,
+                              save_checkpoint, clear_checkpoint)
+from sync_watermarks import ensure_watermark_table, load_watermark, save_watermark
+from sync_reconcile import ensure_tombstone_table, find_missing_rows, find_rows, remove_rows, record_tombstones
+from sync_writer import upsert_rows, replace_child_rows, ensure_content_hash_columns, ensure_mapping_tables, CONTENT_HASH_COLUMN
+from sync_db import connect
+from sync_bulkload import BULK_TRANSACTION_ROWS, start_bulk_load, finish_bulk_load
+from sync_shadow import create_shadow, discard_shadow, get_mapping_tables, swap_in_shadow
+from sync_search import ensure_search_index, update_search_index
+
+logger = logging.getLogger('sync_engine')
+
+# Load environment variables from .env file
+load_dotenv()
+
+DEFAULT_BASE_URL = 'https://vectrustst01.manage.v2x.maximotest.gov2x.com/maximo'
+
+# Default database path
+DEFAULT_DB_PATH = '~/.maximo_offline/maximo.db'
+
+# Prefixes Maximo puts on field names in non-lean responses
+FIELD_PREFIXES = ('spi:', 'rdf:', 'oslc:', 'rdfs:')
+
+# Keys the record's change date can have in a response
+CHANGEDATE_KEYS = ('changedate', 'spi:changedate')
+
+# Columns every synced row carries, when the table has them (_content_hash is filled in by sync_writer)
+SYNC_METADATA_COLUMNS = ('_last_sync', '_sync_status', CONTENT_HASH_COLUMN)
+
+def raw_keys(field):
+    """Get the keys a field can have in an API response: plain and with each prefix."""
+    return (field,) + tuple(prefix + field for prefix in FIELD_PREFIXES)
+
+def raw_value(record, field):
+    """Get a field's value from a raw record, whatever prefix it has."""
+    for key in raw_keys(field):
+        if key in record:
+            return record[key]
+    return None
+
+def get_table_columns(cursor, table):
+    """Get the column names of a table, or an empty list if it does not exist."""
+    return [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")]
+
+def get_default_site(db_path):
+    """
+    Get the default site for the current user from the database.
+
+    Args:
+        db_path (str): Path to the SQLite database file
+
+    Returns:
+        str: Default site ID or None if not found
+    """
+    try:
+        conn = connect(db_path, readonly=True)
+        cursor = conn.cursor()
+        cursor.execute("SELECT siteid FROM person_site WHERE isdefault = 1 LIMIT 1")
+        result = cursor.fetchone()
+        conn.close()
+
+        if result:
+            return result[0]
+
+        logger.warning("No default site found in database")
+        return None
+    except Exception as e:
+        logger.error(f"Error getting default site: {str(e)}")
+        return None
+
+class SyncEngine:
+    """
+    Sync one Maximo object structure into the local database using its mapping.
+
+    The engine handles:
+    - Building the OSLC query (site, partition, changedate and fixed filters)
+    - Walking the parent table and its child collections, at any depth
+    - Resolving the columns written for each table against the local schema
+    - Writing each page in one transaction and collecting sync metrics
+    """
+
+    def __init__(self, mapping, db_path, api_key=None, base_url=None, http=None,
+                 writer=None, on_progress=None, username=None):
+        """
+        Initialize the engine.
+
+        Args:
+            mapping (dict): Endpoint mapping (see sync_mappings)
+            db_path (str): Path to the SQLite database
+            api_key (str): Maximo API key (defaults to MAXIMO_API_KEY)
+            base_url (str): Maximo base URL (defaults to MAXIMO_BASE_URL)
+            http: Object with a requests-compatible get() (defaults to the requests module)
+            writer: Shared serialized writer (see sync_orchestrator); pages are
+                written on the engine's own connection when not given
+            on_progress (callable): Called as on_progress(endpoint, progress) after each committed page
+            username (str): User sent as the user context (defaults to MAXIMO_USERNAME)
+        """
+        self.mapping = mapping
+        self.endpoint = mapping['endpoint']
+        self.label = mapping.get('label', 'record')
+        self.db_path = os.path.expanduser(db_path)
+        self.api_key = api_key or os.getenv('MAXIMO_API_KEY')
+        self.base_url = base_url or os.getenv('MAXIMO_BASE_URL', DEFAULT_BASE_URL)
+        self.username = username or os.getenv('MAXIMO_USERNAME', '')
+        self.http = http
+        self.writer = writer
+        self.on_progress = on_progress
+
+        self.checkpoint = None     # Progress through the query being synced (see sync_checkpoints)
+        self.full_read = False     # The query being synced is read from its first page without a changedate filter
+        self.seen_keys = None      # Parent keys received by a full read, for reconciliation (see sync_reconcile)
+        self.left_keys = None      # Parent keys an incremental read returned outside the partition values
+        self.root = None           # Compiled table spec of the parent table
+        self.tables = {}           # table -> {'columns', 'keys', 'write': 'upsert'|'replace', 'parent_field', 'parent'}
+        self.skip_rules = []
+        self.include_tasks = False # Sync task records too (mappings with a tasks option)
+        self.bulk_load = False     # Initial load: deferred indexes and several pages per transaction (see sync_bulkload)
+        self.pending_pages = []    # Processed pages waiting for the next bulk transaction
+        self.conn = None
+        self.metrics = None
+
+    # Query building
+
+    def build_filter(self, partition_value=None, partitioned=True):
+        """
+        Build the where clauses of the query other than the site and changedate.
+
+        Args:
+            partition_value (str): Value of the partition field (e.g. a work order status);
+                a combined partition asks for all of its values at once without one
+            partitioned (bool): Filter on the partition field (False for an incremental
+                read that looks for records which left the partition)
+
+        Returns:
+            list: Where clauses
+        """
+        where = list(self.mapping.get('where', []))
+
+        tasks = self.mapping.get('tasks')
+        if tasks and self.include_tasks and tasks['where'] in where:
+            where.remove(tasks['where'])
+
+        partition = self.mapping.get('partition') if partitioned else None
+        if partition and partition_value:
+            where.append(f'{partition["field"]}="{partition_value}"')
+        elif partition and partition.get('combine'):
+            values = ','.join(f'"{value}"' for value in partition['values'])
+            where.append(f'{partition["field"]} in [{values}]')
+
+        return where
+
+    def build_query(self, site=None, changed_since=None, page_size=None, partition_value=None):
+        """
+        Build the query parameters for the first page.
+
+        Args:
+            site (str): Site ID to filter by
+            changed_since (str): Only fetch records with a changedate from this watermark on
+                (incremental mappings)
+            page_size (int): Number of records per page
+            partition_value (str): Value of the partition field (e.g. a work order status)
+
+        Returns:
+            dict: Query parameters
+        """
+        query_params = dict(self.mapping.get('params', {}))
+        query_params['oslc.pageSize'] = str(page_size or self.mapping.get('page_size', 100))
+
+        where = self.build_filter(partition_value, partitioned=not self.reads_leavers(changed_since))
+        if site:
+            where.insert(0, f'siteid="{site}"')
+
+        if changed_since and self.mapping.get('incremental'):
+            where.append(f'changedate>="{changed_since}"')
+
+        if where:
+            query_params['oslc.where'] = ' and '.join(where)
+
+        return query_params
+
+    def reads_leavers(self, changed_since):
+        """
+        Check whether an incremental read leaves out the partition filter.
+
+        An incremental read filtered on the partition values never returns a
+        record that left them (e.g. a work order that was completed), so its
+        local row would keep the old value until the next full read. Without
+        the filter such records are returned with their new value, and the
+        local rows are removed as a full read would (see remove_leavers).
+        """
+        return bool(changed_since and self.mapping.get('incremental') and self.mapping.get('reconcile')
+                    and self.mapping.get('partition'))
+
+    def build_headers(self):
+        """Build the request headers (API key, and the user context when the mapping asks for it)."""
+        headers = {
+            "Accept": "application/json",
+            "apikey": self.api_key
+        }
+
+        if self.username and self.mapping.get('user_context'):
+            headers["x-user-context"] = self.username
+
+        return headers
+
+    def fetch_pages(self, query_params, resume=None):
+        """
+        Fetch every page of the object structure.
+
+        When resuming, paging continues after the checkpoint's last page; if
+        that no longer works the query starts again from the first page.
+        When the mapping lists several paths, the next path is tried if the
+        first page of a path cannot be fetched.
+
+        Args:
+            query_params (dict): Query parameters for the first page
+            resume (dict): Checkpoint to continue from, or None
+
+        Yields:
+            dict: JSON response for each page
+
+        Raises:
+            PageFetchError: If a page could not be fetched from any path
+        """
+        headers = self.build_headers()
+        timeout = self.mapping.get('timeout', (3.05, 30))
+        paths = self.mapping.get('paths') or [f"/api/os/{self.mapping['object_structure']}"]
+
+        if resume:
+            logger.info(f"Resuming {self.label} sync after page {resume['page_number']}")
+            if self.mapping.get('parallel_pages'):
+                # Page numbers are requested on the collection the checkpoint's link points to
+                pages = self.iter_pages(resume['next_page_url'].split('?')[0], query_params,
+                                        headers, timeout, pages_done=resume['page_number'])
+            else:
+                pages = iter_pages(resume['next_page_url'], None, headers, label=self.label,
+                                   timeout=timeout, http=self.http, pages_done=resume['page_number'])
+            try:
+                first_page = next(pages, None)
+            except PageFetchError as e:
+                logger.warning(f"{e}, restarting {self.label} sync from the first page")
+                self.reset_checkpoint()
+            else:
+                if first_page is not None:
+                    yield first_page
+                    yield from pages
+                return
+
+        for index, path in enumerate(paths):
+            endpoint = f"{self.base_url}{path}"
+            logger.info(f"Fetching {self.label} data from {endpoint}")
+            logger.info(f"Query parameters: {json.dumps(query_params, indent=2)}")
+
+            pages = self.iter_pages(endpoint, query_params, headers, timeout)
+            try:
+                first_page = next(pages, None)
+            except PageFetchError as e:
+                if index == len(paths) - 1:
+                    raise
+                logger.warning(f"{e}, trying next endpoint")
+                continue
+
+            if first_page is not None:
+                yield first_page
+                yield from pages
+            return
+
+    def iter_pages(self, endpoint, query_params, headers, timeout, pages_done=0):
+        """Page through a collection, by page number in parallel when the mapping sets parallel_pages."""
+        parallel_pages = self.mapping.get('parallel_pages')
+        if parallel_pages:
+            return iter_pages_parallel(endpoint, query_params, headers, label=self.label, timeout=timeout,
+                                       http=self.http, pages_done=pages_done, max_workers=parallel_pages)
+        return iter_pages(endpoint, query_params, headers, label=self.label, timeout=timeout,
+                          http=self.http, pages_done=pages_done)
+
+    # Checkpoints
+
+    def start_checkpoint(self, site, query_params):
+        """
+        Set up the checkpoint for one query and load any unfinished run of it.
+
+        Returns:
+            dict: Saved checkpoint to resume from, or None to start from the first page
+        """
+        fingerprint = query_fingerprint(self.mapping['object_structure'], query_params)
+        self.checkpoint = {
+            'site': site,
+            'query_fingerprint': fingerprint,
+            'query': json.dumps(query_params, sort_keys=True),
+            'next_page_url': None,
+            'page_number': 0,
+            'high_water_changedate': None,
+            'rows_written': 0
+        }
+
+        saved = load_checkpoint(self.conn, self.endpoint, site, fingerprint)
+        if saved:
+            self.checkpoint.update(saved)
+            logger.info(f"Found {self.label} checkpoint: {saved['page_number']} pages "
+                        f"({saved['rows_written']} rows) already synced")
+        return saved
+
+    def reset_checkpoint(self):
+        """Forget the pages of a checkpoint that could not be resumed."""
+        self.checkpoint.update({'next_page_url': None, 'page_number': 0,
+                                'high_water_changedate': None, 'rows_written': 0})
+        # Starting over from the first page makes it a full read again
+        if self.full_read and self.mapping.get('reconcile'):
+            self.seen_keys = set()
+
+    def advance_checkpoint(self, page):
+        """Move the checkpoint past a page: its nextPage link and the highest changedate on it."""
+        if self.checkpoint is None:
+            return
+
+        self.checkpoint['next_page_url'] = get_next_page_url(page)
+        self.checkpoint['page_number'] += 1
+
+        high_water = self.checkpoint['high_water_changedate']
+        for record in page.get('member', []):
+            for key in CHANGEDATE_KEYS:
+                changedate = record.get(key)
+                if changedate:
+                    if high_water is None or changedate > high_water:
+                        high_water = changedate
+                    break
+        self.checkpoint['high_water_changedate'] = high_water
+
+    def get_watermark(self, site, query_filter, force_full=False):
+        """
+        Get the changedate an incremental sync of a query starts from.
+
+        Returns:
+            str: Watermark of the endpoint, site and filter, or None for a full sync
+        """
+        if not self.mapping.get('incremental') or force_full:
+            return None
+
+        watermark = load_watermark(self.conn, self.endpoint, site, query_filter,
+                                   self.mapping.get('full_sync_interval'))
+        where = f" for site {site}" if site else ""
+        if watermark:
+            logger.info(f"Performing incremental sync{where} of records changed since {watermark}")
+        else:
+            logger.info(f"No previous sync{where} with this filter, performing full sync")
+        return watermark
+
+    def complete_query(self, conn, site, query_filter, partition_value=None):
+        """
+        Finish a query that has been read to the end, in one transaction:
+        reconcile the local rows against a full read (or remove the rows that
+        an incremental read found outside the partition), move the watermark up to
+        the highest changedate received and remove the checkpoint.
+
+        Returns:
+            int: Number of local rows purged or marked deleted
+        """
+        cursor = conn.cursor()
+        try:
+            removed = self.reconcile(cursor, site, partition_value)
+            removed += self.remove_leavers(cursor, site)
+
+            high_water = self.checkpoint['high_water_changedate']
+            if high_water and self.mapping.get('incremental'):
+                # A resumed read saw only part of the keys and was not reconciled
+                reconciled = self.seen_keys is not None or not self.mapping.get('reconcile')
+                save_watermark(cursor, self.endpoint, site, query_filter, high_water,
+                               full_read=self.full_read and reconciled)
+            clear_checkpoint(cursor, self.endpoint, site, self.checkpoint['query_fingerprint'])
+
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        return removed
+
+    # Reconciliation
+
+    def build_scope(self, site, partition_value=None):
+        """
+        Build the conditions selecting the local parent rows a query covers.
+
+        Returns:
+            list: (SQL condition, parameters) pairs
+        """
+        columns = self.root['columns']
+        scope = []
+
+        if site and self.mapping.get('site_filter') and 'siteid' in columns:
+            scope.append(('siteid = ?', [site]))
+
+        partition = self.mapping.get('partition')
+        if partition and partition['field'] in columns:
+            if partition_value:
+                scope.append((f"{partition['field']} = ?", [partition_value]))
+            elif partition.get('combine'):
+                placeholders = ', '.join('?' * len(partition['values']))
+                scope.append((f"{partition['field']} IN ({placeholders})", list(partition['values'])))
+
+        tasks = self.mapping.get('tasks')
+        if tasks and not self.include_tasks and tasks['field'] in columns:
+            scope.append((f"COALESCE({tasks['field']}, 0) = 0", []))
+
+        if self.mapping['reconcile'] == 'mark' and '_sync_status' in columns:
+            scope.append(("COALESCE(_sync_status, '') != 'deleted'", []))
+
+        return scope
+
+    def reconcile(self, cursor, site, partition_value=None):
+        """
+        Purge or mark the local parent rows a full read did not return, and record tombstones.
+
+        Nothing is removed after an incremental or resumed read (not every key
+        was seen), or when the read returned no records at all.
+
+        Returns:
+            int: Number of rows purged or marked deleted
+        """
+        mode = self.mapping.get('reconcile')
+        if not mode or self.seen_keys is None:
+            return 0
+        if not self.seen_keys:
+            logger.warning(f"No {self.label} records received, not reconciling local rows")
+            return 0
+
+        spec = self.mapping['table']
+        table = spec['name']
+        keys = self.tables[table]['keys']
+        children = [(child['name'], child['parent_fields']) for child in spec.get('children', [])
+                    if child.get('parent_fields')]
+        parent_columns = {column for _, parent_fields in children for column in parent_fields.values()}
+
+        missing = find_missing_rows(cursor, table, keys, sorted(parent_columns),
+                                    self.build_scope(site, partition_value), self.seen_keys)
+        if not missing:
+            return 0
+
+        remove_rows(cursor, table, missing, children, mode)
+        record_tombstones(cursor, self.endpoint, table, keys, missing, site,
+                          action='marked' if mode == 'mark' else 'purged')
+
+        action = 'Marked as deleted' if mode == 'mark' else 'Purged'
+        logger.info(f"{action} {len(missing)} local {table} rows no longer returned by Maximo")
+        return len(missing)
+
+    def remove_leavers(self, cursor, site):
+        """
+        Purge or mark the local parent rows an incremental read returned
+        outside the partition values, and record tombstones.
+
+        Leavers seen on the pages of a read that failed are left to the next full read.
+
+        Returns:
+            int: Number of rows purged or marked deleted
+        """
+        if not self.left_keys:
+            return 0
+
+        mode = self.mapping['reconcile']
+        spec = self.mapping['table']
+        table = spec['name']
+        keys = self.tables[table]['keys']
+        children = [(child['name'], child['parent_fields']) for child in spec.get('children', [])
+                    if child.get('parent_fields')]
+        parent_columns = {column for _, parent_fields in children for column in parent_fields.values()}
+
+        leavers = find_rows(cursor, table, keys, sorted(parent_columns), self.left_keys)
+        if not leavers:
+            return 0
+
+        remove_rows(cursor, table, leavers, children, mode)
+        record_tombstones(cursor, self.endpoint, table, keys, leavers, site,
+                          action='marked' if mode == 'mark' else 'purged')
+
+        action = 'Marked as deleted' if mode == 'mark' else 'Purged'
+        logger.info(f"{action} {len(leavers)} local {table} rows that left the synced "
+                    f"{self.mapping['partition']['field']} values")
+        return len(leavers)
+
+    def write(self, function, *args):
+        """Run a write function(connection, *args) on the shared writer, or on the engine's connection."""
+        if self.writer:
+            return self.writer.submit(function, *args)
+        return function(self.conn, *args)
+
+    # Field maps
+
+    def compile(self, cursor):
+        """
+        Compile the mapping into field maps against the database schema.
+
+        Every table gets one fixed column order, shared by all the specs writing
+        to it. Every spec gets a lookup from raw API key (with and without the
+        spi:/rdf:/oslc:/rdfs: prefixes) to column index, so a record is turned
+        into a row tuple in a single pass over its keys. Fields the local table
+        does not have are left out, so a mapping can list fields a particular
+        schema version lacks.
+
+        Returns:
+            bool: True if every table exists
+        """
+        self.tables = {}
+        if not self._collect_columns(self.mapping['table'], cursor):
+            return False
+
+        self.root = self._compile_spec(self.mapping['table'])
+        tasks = self.mapping.get('tasks')
+        skip_values = dict(self.mapping.get('skip_values', {}))
+        if tasks and self.include_tasks:
+            skip_values.pop(tasks['field'], None)
+
+        self.skip_rules = [
+            (raw_keys(field), set(values), field, False)
+            for field, values in skip_values.items()
+        ] + [
+            (raw_keys(field), set(values), field, True)
+            for field, values in self.mapping.get('keep_values', {}).items()
+        ]
+        return True
+
+    def _collect_columns(self, spec, cursor, parent=None):
+        """Resolve the column order of every table the spec and its children write to."""
+        table = spec['name']
+        table_columns = get_table_columns(cursor, table)
+        if not table_columns:
+            logger.error(f"Table {table} not found in database, please run create_maximo_db.py first")
+            return False
+
+        if spec.get('fields') == '*':
+            exclude = set(spec.get('exclude', []))
+            wanted = [column for column in table_columns if column not in exclude]
+        else:
+            wanted = (list(spec['fields']) + list(spec.get('parent_fields', {})) +
+                      list(spec.get('constants', {})) + list(SYNC_METADATA_COLUMNS))
+
+        parent_fields = spec.get('parent_fields', {})
+        target = self.tables.setdefault(table, {
+            'columns': [],
+            'keys': list(spec.get('keys', [])),
+            'write': spec.get('write', 'upsert'),
+            'parent_field': next(iter(parent_fields), None),
+            # (parent table, parent column) of the parent_field, for replacing emptied collections
+            'parent': (parent['name'], parent_fields[next(iter(parent_fields))]) if parent and parent_fields else None
+        })
+        self._add_columns(target, table, wanted, table_columns)
+
+        for derived in spec.get('derived', []):
+            derived_columns = get_table_columns(cursor, derived['table'])
+            if not derived_columns:
+                logger.error(f"Table {derived['table']} not found in database, please run create_maximo_db.py first")
+                return False
+            target = self.tables.setdefault(derived['table'], {
+                'columns': [], 'keys': list(derived['keys']), 'write': 'upsert', 'parent_field': None
+            })
+            self._add_columns(target, derived['table'], list(derived['fields']) + list(SYNC_METADATA_COLUMNS),
+                              derived_columns)
+
+        return all(self._collect_columns(child, cursor, spec) for child in spec.get('children', []))
+
+    def _add_columns(self, target, table, wanted, table_columns):
+        """Add the wanted columns that exist in the table to its column order."""
+        for column in wanted:
+            if column in target['columns']:
+                continue
+            if column in table_columns:
+                target['columns'].append(column)
+            elif column not in SYNC_METADATA_COLUMNS:
+                logger.debug(f"Column {column} not in {table} table, not synced")
+
+    def _compile_spec(self, spec, parent=None):
+        """Compile one table spec and its children into field maps and column indexes."""
+        table = spec['name']
+        columns = self.tables[table]['columns']
+        index = {column: position for position, column in enumerate(columns)}
+        parent_fields = spec.get('parent_fields', {})
+        constants = spec.get('constants', {})
+
+        # Columns not filled from the record: parent keys, constants and sync metadata
+        fixed = set(parent_fields) | set(constants) | set(SYNC_METADATA_COLUMNS)
+        if spec.get('fields') == '*':
+            fields = [column for column in columns if column not in fixed]
+        else:
+            fields = [field for field in spec['fields'] if field in index and field not in fixed]
+
+        field_map = {}
+        for field in fields:
+            for key in raw_keys(field):
+                field_map[key] = index[field]
+
+        template = [None] * len(columns)
+        for column, value in constants.items():
+            if column in index:
+                template[index[column]] = value
+
+        compiled = {
+            'name': table,
+            'columns': columns,
+            'field_map': field_map,
+            'template': template,
+            'metadata_indexes': [(index[column], column) for column in SYNC_METADATA_COLUMNS if column in index],
+            'parent_indexes': [(index[column], parent['columns'].index(parent_column))
+                               for column, parent_column in parent_fields.items()
+                               if column in index and parent_column in parent['columns']] if parent else [],
+            'required_indexes': [index[field] for field in spec.get('required', spec.get('keys', []))
+                                 if field in index and field not in parent_fields],
+            'key_indexes': [index[field] for field in spec.get('keys', []) if field in index],
+            'defaults': [(index[column], value) for column, value in spec.get('defaults', {}).items() if column in index],
+            'transforms': [(index[column], transform) for column, transform in spec.get('transforms', {}).items()
+                           if column in index],
+            'raw_json': spec.get('fields') == '*',
+            'dedupe': spec.get('write', 'upsert') == 'upsert',
+            'parent_columns': parent['columns'] if parent else [],
+            'metadata': {},
+            'derived': [],
+            'collection_map': {}
+        }
+
+        for derived in spec.get('derived', []):
+            derived_columns = self.tables[derived['table']]['columns']
+            compiled['derived'].append({
+                'table': derived['table'],
+                'columns': derived_columns,
+                'key_indexes': [derived_columns.index(field) for field in derived['keys']],
+                'build': derived['build']
+            })
+
+        for child in spec.get('children', []):
+            compiled_child = self._compile_spec(child, parent=compiled)
+            for key in raw_keys(child['collection']):
+                compiled['collection_map'][key] = compiled_child
+
+        return compiled
+
+    def _set_page_metadata(self, spec, metadata):
+        """Put the sync metadata for the current page into the row templates."""
+        for position, column in spec['metadata_indexes']:
+            spec['template'][position] = metadata[column]
+        spec['metadata'] = metadata
+        for child in {id(child): child for child in spec['collection_map'].values()}.values():
+            self._set_page_metadata(child, metadata)
+
+    # Record processing
+
+    def should_skip(self, record):
+        """
+        Check the mapping's skip/keep rules against a raw record.
+
+        Returns:
+            str: Name of the field that caused the skip, or None to keep the record
+        """
+        for keys, values, field, keep in self.skip_rules:
+            value = None
+            for key in keys:
+                if key in record:
+                    value = record[key]
+                    break
+
+            if (value in values) != keep:
+                return field
+
+        return None
+
+    def left_partition(self, record):
+        """
+        Check whether a record an incremental read returned is outside the
+        partition values, and remember its key if so.
+
+        Returns:
+            bool: True if the record left the partition
+        """
+        partition = self.mapping['partition']
+        if raw_value(record, partition['field']) in partition['values']:
+            return False
+
+        self.left_keys.add(tuple(raw_value(record, key) for key in self.tables[self.root['name']]['keys']))
+        return True
+
+    def process_page(self, page):
+        """
+        Turn one page of records into row tuples for every table in the mapping.
+
+        Args:
+            page (dict): JSON response for one page
+
+        Returns:
+            dict: Processed data, table -> list of row tuples in the table's column order
+        """
+        processed_data = {table: [] for table in self.tables}
+        seen_keys = defaultdict(set)
+        stats = defaultdict(int)
+        self.advance_checkpoint(page)
+        self._set_page_metadata(self.root, {
+            '_last_sync': datetime.datetime.now().isoformat(),
+            '_sync_status': 'synced',
+            CONTENT_HASH_COLUMN: None
+        })
+
+        for record in page.get('member', []):
+            stats['received'] += 1
+
+            # Checked before the skip rules: a cancelled or closed work order must still be removed
+            if self.left_keys is not None and self.left_partition(record):
+                stats[f"left_{self.mapping['partition']['field']}"] += 1
+                continue
+
+            skip_field = self.should_skip(record) if self.skip_rules else None
+            if skip_field:
+                stats[f'skipped_{skip_field}'] += 1
+                continue
+
+            if self._process_record(self.root, record, None, processed_data, seen_keys, stats):
+                stats['processed'] += 1
+
+        self.metrics['records_received'] += stats['received']
+        self.metrics['records_skipped'] += stats['received'] - stats['processed']
+
+        if self.seen_keys is not None:
+            key_indexes = self.root['key_indexes']
+            self.seen_keys.update(tuple(row[index] for index in key_indexes)
+                                  for row in processed_data[self.root['name']])
+
+        logger.info(f"Processed {stats['processed']} of {stats['received']} {self.label} records")
+        for stat, count in stats.items():
+            if stat.startswith(('skipped_', 'missing_', 'left_')):
+                logger.info(f"  {stat.replace('_', ' ', 1).capitalize()}: {count}")
+        for table, rows in processed_data.items():
+            logger.info(f"  {table}: {len(rows)} rows")
+
+        return processed_data
+
+    def _process_record(self, spec, record, parent_row, processed_data, seen_keys, stats):
+        """
+        Add the row for a raw record and, recursively, the rows of its child collections.
+
+        Returns:
+            bool: True if the record produced a row
+        """
+        table = spec['name']
+        values = spec['template'][:]
+        field_map = spec['field_map']
+        collection_map = spec['collection_map']
+        collections = []
+
+        # One pass over the record: fields go straight to their column, child collections are kept for later
+        for key, value in record.items():
+            position = field_map.get(key)
+            if position is not None:
+                values[position] = value
+            elif key in collection_map and value:
+                collections.append((collection_map[key], value))
+
+        for position, parent_position in spec['parent_indexes']:
+            values[position] = parent_row[parent_position]
+
+        for position in spec['required_indexes']:
+            if values[position] is None:
+                stats[f'missing_{table}'] += 1
+                return False
+
+        for position, default in spec['defaults']:
+            if values[position] is None:
+                values[position] = default
+        for position, transform in spec['transforms']:
+            values[position] = transform(values[position])
+        if spec['raw_json']:
+            values = [json.dumps(value) if isinstance(value, (dict, list)) else value for value in values]
+
+        row = tuple(values)
+
+        if spec['derived']:
+            self._add_derived_rows(spec, row, parent_row, processed_data, seen_keys)
+
+        if spec['dedupe']:
+            key = tuple(row[position] for position in spec['key_indexes'])
+            if key in seen_keys[table]:
+                return False
+            seen_keys[table].add(key)
+
+        processed_data[table].append(row)
+
+        for child, value in collections:
+            # Children are only stored when the parent row has the columns they are keyed by
+            if any(row[parent_position] is None for _, parent_position in child['parent_indexes']):
+                continue
+            for child_record in ([value] if isinstance(value, dict) else value):
+                if isinstance(child_record, dict):
+                    self._process_record(child, child_record, row, processed_data, seen_keys, stats)
+
+        return True
+
+    def _add_derived_rows(self, spec, row, parent_row, processed_data, seen_keys):
+        """Add the rows built from a row by the spec's derived builders (e.g. person_site)."""
+        row_dict = dict(zip(spec['columns'], row))
+        parent_dict = dict(zip(spec['parent_columns'], parent_row)) if parent_row else {}
+        metadata = spec['metadata']
+
+        for derived in spec['derived']:
+            for built in derived['build'](row_dict, parent_dict):
+                derived_row = tuple(built.get(column, metadata.get(column)) for column in derived['columns'])
+                key = tuple(derived_row[position] for position in derived['key_indexes'])
+                if key not in seen_keys[derived['table']]:
+                    seen_keys[derived['table']].add(key)
+                    processed_data[derived['table']].append(derived_row)
+
+    # Database writes
+
+    def write_page(self, processed_data):
+        """
+        Write one page of processed data in a single transaction.
+
+        In bulk-load mode pages are collected until BULK_TRANSACTION_ROWS rows
+        are waiting and then written together; the returned results are marked
+        pending until then. With a shared writer the transaction runs on the writer's connection,
+        so several engines can fetch at once while their writes are serialized.
+
+        Args:
+            processed_data (dict): Tables and row tuples from process_page
+
+        Returns:
+            dict: Sync results with counts of inserted/updated records, or None on error
+        """
+        page_rows = sum(len(rows) for rows in processed_data.values())
+        if self.checkpoint is not None:
+            self.checkpoint['rows_written'] += page_rows
+
+        self.pending_pages.append(processed_data)
+        if self.bulk_load and sum(len(rows) for page in self.pending_pages for rows in page.values()) < BULK_TRANSACTION_ROWS:
+            # Written with the next pages, in one transaction
+            return dict(new_sync_results(), pending=True)
+
+        return self.flush_pages()
+
+    def flush_pages(self):
+        """
+        Write the pages waiting for a transaction, with the latest checkpoint.
+
+        Returns:
+            dict: Sync results of the pages, or None on error
+        """
+        pages, self.pending_pages = self.pending_pages, []
+        if not pages:
+            return new_sync_results()
+
+        checkpoint = dict(self.checkpoint) if self.checkpoint is not None else None
+
+        try:
+            sync_results = self.write(self.write_transaction, pages, checkpoint)
+        except Exception as e:
+            logger.error(f"Error syncing {self.label} data to database: {str(e)}")
+            return None
+
+        self.metrics['rows_written'] += sum(sync_results['total'].values())
+        self.report_progress('running')
+        return sync_results
+
+    def write_transaction(self, conn, pages, checkpoint=None):
+        """
+        Write every table of one or more pages on a connection and commit (rolled back on error).
+
+        Pages are written one after another, as if each had its own transaction.
+        The checkpoint is saved in the same transaction, so it never points past
+        rows that were not committed.
+        """
+        sync_results = new_sync_results()
+        cursor = conn.cursor()
+
+        try:
+            for processed_data in pages:
+                for table, target in self.tables.items():
+                    rows = processed_data.get(table)
+                    if target['write'] == 'replace':
+                        replace_child_rows(cursor, table, target['columns'], rows, target['parent_field'], sync_results,
+                                           parent_ids=self._parent_ids(processed_data, target))
+                    else:
+                        upsert_rows(cursor, table, target['columns'], rows, target['keys'], sync_results)
+
+            if checkpoint:
+                save_checkpoint(cursor, self.endpoint, checkpoint)
+
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        return sync_results
+
+    def _parent_ids(self, processed_data, target):
+        """
+        Get the keys of every parent row of a page that a replaced child table hangs off.
+
+        A parent whose collection came back empty has no child rows on the page;
+        its key must still be replaced so its stored rows are deleted.
+        """
+        if not target.get('parent'):
+            return None
+        parent_table, parent_column = target['parent']
+        position = self.tables[parent_table]['columns'].index(parent_column)
+        return {row[position] for row in processed_data.get(parent_table) or []}
+
+    def report_progress(self, status, message=None):
+        """Pass the current metrics to the progress callback, if there is one."""
+        if not self.on_progress:
+            return
+
+        try:
+            self.on_progress(self.endpoint, {
+                'status': status,
+                'pages': self.metrics['pages'],
+                'records_received': self.metrics['records_received'],
+                'rows_written': self.metrics['rows_written'],
+                'message': message
+            })
+        except Exception as e:
+            logger.warning(f"Progress callback failed for {self.endpoint}: {e}")
+
+    # Running a sync
+
+    def _timed_pages(self, pages):
+        """Pass pages through, adding the time spent waiting for each one to the metrics."""
+        iterator = iter(pages)
+        while True:
+            started = time.perf_counter()
+            try:
+                page = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.metrics['fetch_seconds'] += time.perf_counter() - started
+            self.metrics['pages'] += 1
+            yield page
+
+    def _timed(self, metric, function):
+        """Wrap a page callback so the time spent in it is added to a metric."""
+        def timed(*args):
+            started = time.perf_counter()
+            try:
+                return function(*args)
+            finally:
+                self.metrics[metric] += time.perf_counter() - started
+        return timed
+
+    def resolve_site(self, site):
+        """Get the site to filter by, falling back to the user's default site when the mapping needs one."""
+        site_filter = self.mapping.get('site_filter')
+        if not site_filter:
+            return None
+        if site or site_filter != 'required':
+            return site
+        return get_default_site(self.db_path)
+
+    def run(self, site=None, force_full=False, page_size=None, partition_value=None, include_tasks=None):
+        """
+        Run a full or incremental sync of the endpoint.
+
+        Args:
+            site (str): Site ID to filter by (defaults to the user's default site when required)
+            force_full (bool): Ignore the changedate watermarks
+            page_size (int): Number of records per page
+            partition_value (str): Only sync this partition value (e.g. one work order status)
+            include_tasks (bool): Also sync task records (mappings with a tasks option;
+                None for the mapping's default)
+
+        Returns:
+            dict: {'success', 'endpoint', 'sync_results', 'metrics', 'message'} or {'success': False, 'error'}
+        """
+        if not self.api_key:
+            logger.error("MAXIMO_API_KEY not found in .env file")
+            return {'success': False, 'endpoint': self.endpoint, 'error': 'MAXIMO_API_KEY not configured'}
+
+        if not os.path.exists(self.db_path):
+            logger.error(f"Database file not found: {self.db_path}")
+            logger.error("Please run create_maximo_db.py first")
+            return {'success': False, 'endpoint': self.endpoint, 'error': f'Database file not found: {self.db_path}'}
+
+        site = self.resolve_site(site)
+        if self.mapping.get('site_filter') == 'required' and not site:
+            logger.error("No site specified and no default site found in database")
+            return {'success': False, 'endpoint': self.endpoint, 'error': 'No site specified'}
+        if site:
+            logger.info(f"Using site filter: {site}")
+
+        if force_full:
+            logger.info("Forced full sync requested")
+
+        tasks = self.mapping.get('tasks')
+        if include_tasks is None:
+            include_tasks = bool(tasks and tasks.get('default'))
+        self.include_tasks = bool(include_tasks and tasks)
+        if self.include_tasks:
+            logger.info(f"Including {self.label} tasks")
+
+        # A combined partition is one query for all its values, unless a single value is asked for
+        partition = self.mapping.get('partition')
+        partition_values = [None]
+        if partition:
+            if partition_value and partition_value not in partition['values']:
+                logger.warning(f"Unknown {partition['field']} {partition_value}, syncing all of {partition['values']}")
+                partition_value = None
+
+            if partition_value:
+                partition_values = [partition_value]
+            elif not partition.get('combine'):
+                partition_values = partition['values']
+
+        sync_started = datetime.datetime.now().isoformat()
+        self.metrics = defaultdict(float)
+        self.metrics['pages'] = 0
+        self.metrics['records_received'] = 0
+        self.metrics['records_skipped'] = 0
+        self.metrics['rows_written'] = 0
+        self.metrics['rows_removed'] = 0
+        started = time.perf_counter()
+
+        self.conn = connect(self.db_path)
+        try:
+            self.write(ensure_mapping_tables, self.mapping)
+            self.write(ensure_content_hash_columns, get_mapping_tables(self.mapping))
+            self.write(ensure_search_index, self.mapping)
+            if not self.compile(self.conn.cursor()):
+                return {'success': False, 'endpoint': self.endpoint, 'error': 'Database schema is missing tables'}
+
+            sync_results = new_sync_results()
+            failed = []
+
+            self.write(ensure_checkpoint_table)
+            self.write(ensure_watermark_table)
+            if self.mapping.get('reconcile'):
+                self.write(ensure_tombstone_table)
+            self.bulk_load = self.write(start_bulk_load, list(self.tables))
+
+            # Fetch, process and commit one page at a time
+            for value in partition_values:
+                label = f'{value} {self.label}' if value else self.label
+                if value:
+                    logger.info(f"Fetching {self.label} records with {partition['field']} {value}")
+
+                query_filter = ' and '.join(self.build_filter(value))
+                changed_since = self.get_watermark(site, query_filter, force_full)
+
+                query_params = self.build_query(site, changed_since, page_size, value)
+                resume = self.start_checkpoint(site, query_params)
+
+                # Only a read of every page, without a changedate filter, shows which rows are gone
+                self.full_read = not changed_since
+                self.seen_keys = set() if self.full_read and not resume and self.mapping.get('reconcile') else None
+                self.left_keys = set() if self.reads_leavers(changed_since) else None
+
+                self.pending_pages = []
+                partition_results = sync_pages(
+                    self._timed_pages(self.fetch_pages(query_params, resume)),
+                    self._timed('process_seconds', self.process_page),
+                    self._timed('write_seconds', self.write_page),
+                    label=label,
+                    flush=self._timed('write_seconds', self.flush_pages)
+                )
+
+                if not partition_results:
+                    # The checkpoint stays, so the next run continues from the last committed page
+                    failed.append(value or self.endpoint)
+                    continue
+
+                self.metrics['rows_removed'] += self.write(self.complete_query, site, query_filter, value)
+                merge_sync_results(sync_results, partition_results)
+
+            if self.bulk_load:
+                # An incomplete load keeps its indexes deferred and continues in bulk-load mode next time
+                self.write(finish_bulk_load, list(self.tables), not failed)
+
+            # Rows committed before a failure are searchable too
+            self.write(update_search_index, self.mapping)
+
+            if self.mapping.get('count_table'):
+                record_count = self.conn.execute(f"SELECT COUNT(*) FROM {self.mapping['count_table']}").fetchone()[0]
+            else:
+                record_count = sum(sync_results['total'].values())
+        finally:
+            self.conn.close()
+            self.conn = None
+
+        self.metrics['elapsed_seconds'] = time.perf_counter() - started
+        rows_written = sum(sync_results['total'].values())
+        self.metrics['rows_per_second'] = rows_written / self.metrics['elapsed_seconds'] if self.metrics['elapsed_seconds'] else 0
+        metrics = dict(self.metrics)
+
+        # Only record the sync once everything has been committed
+        if failed:
+            error = f"{self.label.capitalize()} sync incomplete, failed: {', '.join(failed)}"
+            logger.error(error)
+            record_sync_failure(self.db_path, self.endpoint, error)
+            return {'success': False, 'endpoint': self.endpoint, 'error': error,
+                    'sync_results': sync_results, 'metrics': metrics}
+
+        message = self.build_message(sync_results, record_count, metrics)
+        logger.info(message)
+        record_sync_status(self.db_path, self.endpoint, record_count, message, sync_started=sync_started)
+
+        return {
+            'success': True,
+            'endpoint': self.endpoint,
+            'sync_results': sync_results,
+            'metrics': metrics,
+            'record_count': record_count,
+            'message': message
+        }
+
+    def build_message(self, sync_results, record_count, metrics):
+        """Build the sync_status message: record counts followed by the sync metrics."""
+        if self.mapping.get('count_table'):
+            new_records = sum(sync_results['inserted'].values())
+            updated_records = sum(sync_results['updated'].values())
+            unchanged_records = sum(sync_results['unchanged'].values())
+            message = (f"Existing records: {record_count - new_records}, Newly added: {new_records}, "
+                       f"Updated: {updated_records}, Unchanged: {unchanged_records}, Total: {record_count}")
+        else:
+            message = summarize_sync_results(sync_results)
+
+        removed = f", {metrics['rows_removed']} removed" if metrics.get('rows_removed') else ""
+        return (f"{message} ({metrics['pages']} pages, {metrics['records_received']} records received{removed}, "
+                f"{metrics['elapsed_seconds']:.1f}s, {metrics['rows_per_second']:.0f} rows/s)")
+
+def print_summary(result):
+    """Print the per-table counts and metrics of a sync result."""
+    sync_results = result.get('sync_results')
+    if not sync_results:
+        return
+
+    print("\n=== SYNC SUMMARY ===\n")
+    for table in sync_results['total']:
+        print(f"{table}:")
+        print(f"  Total: {sync_results['total'][table]}")
+        print(f"  Inserted: {sync_results['inserted'][table]}")
+        print(f"  Updated: {sync_results['updated'][table]}")
+        print(f"  Unchanged: {sync_results['unchanged'][table]}")
+        print(f"  Errors: {sync_results['errors'][table]}")
+        print()
+
+    metrics = result.get('metrics') or {}
+    if metrics:
+        print(f"Pages: {metrics['pages']}, records received: {metrics['records_received']}, "
+              f"skipped: {metrics['records_skipped']}, local rows removed: {metrics.get('rows_removed', 0)}")
+        print(f"Time: {metrics['elapsed_seconds']:.1f}s (fetch {metrics.get('fetch_seconds', 0):.1f}s, "
+              f"process {metrics.get('process_seconds', 0):.1f}s, write {metrics.get('write_seconds', 0):.1f}s), "
+              f"{metrics['rows_per_second']:.0f} rows/s")
+
+def run_cli(mapping, args=None):
+    """
+    Command line entry point for one endpoint.
+
+    Args:
+        mapping (dict): Endpoint mapping
+        args (list): Command line arguments (defaults to sys.argv)
+
+    Returns:
+        dict: Sync result from SyncEngine.run
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description=f"Synchronize {mapping['endpoint']} data to local database")
+    parser.add_argument('--db-path', type=str, default=DEFAULT_DB_PATH,
+                        help='Path to the SQLite database file')
+    # --site is accepted by every endpoint so callers can pass the same arguments to all of them
+    site_help = {
+        'required': "Site ID to filter by (defaults to user's default site)",
+        'optional': 'Site ID to filter by'
+    }.get(mapping.get('site_filter'), 'Ignored, this endpoint is not filtered by site')
+    parser.add_argument('--site', type=str, default=None, help=site_help)
+    parser.add_argument('--limit', type=int, default=mapping.get('page_size', 100),
+                        help='Number of records to fetch per page')
+    parser.add_argument('--force-full', action='store_true',
+                        help='Force a full sync instead of incremental')
+    parser.add_argument('--shadow', action='store_true',
+                        help='Full sync into a shadow database, swapped in when complete')
+    partition = mapping.get('partition')
+    if partition:
+        parser.add_argument(partition['option'], dest='partition_value', default=None,
+                            help=partition.get('help'))
+    tasks = mapping.get('tasks')
+    if tasks:
+        parser.add_argument(tasks['option'], dest='include_tasks', default=None,
+                            action='store_false' if tasks.get('default') else 'store_true',
+                            help=tasks.get('help'))
+
+    args = parser.parse_args(args)
+    partition_value = getattr(args, 'partition_value', None)
+    if args.shadow and partition_value:
+        # The shadow starts empty: one partition would replace the whole table
+        parser.error(f"--shadow syncs every {partition['field']}, it cannot be combined with {partition['option']}")
+
+    db_path = os.path.expanduser(args.db_path)
+    shadow_path = None
+    if args.shadow and os.path.exists(db_path):
+        tables = get_mapping_tables(mapping)
+        shadow_path = create_shadow(db_path, tables)
+
+    engine = SyncEngine(mapping, shadow_path or db_path)
+    result = engine.run(
+        site=args.site,
+        force_full=args.force_full or bool(shadow_path),
+        page_size=args.limit,
+        partition_value=partition_value,
+        include_tasks=getattr(args, 'include_tasks', None)
+    )
+
+    if shadow_path and result['success']:
+        try:
+            swap_in_shadow(db_path, shadow_path, tables)
+        except Exception as e:
+            result = dict(result, success=False, error=f"Could not swap in the shadow database: {e}")
+    elif shadow_path:
+        discard_shadow(shadow_path)
+
+    if result['success']:
+        print_summary(result)
+        logger.info(f"{mapping['endpoint']} synchronization complete")
+    else:
+        logger.error(f"{mapping['endpoint']} synchronization failed: {result.get('error')}")
+
+    return result
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Persistent history of sync tasks.
+
+The web server keeps only running and recently finished sync tasks in memory.
+Every task is also recorded in the offline database:
+- sync_task: one row per task (endpoint, status, times, rows written, error)
+- sync_task_endpoint: per-endpoint pages, rows, duration and rows/s of a task
+- sync_task_log: the task's messages, so they can be read page by page later
+
+Retention keeps the tables small: only the newest max_tasks tasks younger than
+max_age_days are kept, with at most max_log_lines messages each. Tasks that
+were still running when the server stopped are marked as interrupted the next
+time the history is opened.
+"""
+import sqlite3
+import logging
+import datetime
+from contextlib import contextmanager
+from sync_db import get_database
+
+logger = logging.getLogger('sync_history')
+
+HISTORY_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sync_task (
+    task_id TEXT PRIMARY KEY,
+    endpoint TEXT NOT NULL,
+    status TEXT NOT NULL,
+    username TEXT,
+    start_time TIMESTAMP NOT NULL,
+    end_time TIMESTAMP,
+    duration_seconds REAL,
+    rows_written INTEGER,
+    rows_per_second REAL,
+    error TEXT,
+    last_seq INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_sync_task_start_time ON sync_task (start_time);
+
+CREATE TABLE IF NOT EXISTS sync_task_endpoint (
+    task_id TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    status TEXT NOT NULL,
+    pages INTEGER,
+    records_received INTEGER,
+    rows_written INTEGER,
+    elapsed_seconds REAL,
+    rows_per_second REAL,
+    message TEXT,
+    PRIMARY KEY (task_id, endpoint)
+);
+
+CREATE TABLE IF NOT EXISTS sync_task_log (
+    task_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    level TEXT NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (task_id, seq)
+);
+'''
+
+# Statuses after which a task no longer changes
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+
+TASK_COLUMNS = ['task_id', 'endpoint', 'status', 'username', 'start_time', 'end_time',
+                'duration_seconds', 'rows_written', 'rows_per_second', 'error', 'last_seq']
+
+ENDPOINT_COLUMNS = ['endpoint', 'status', 'pages', 'records_received', 'rows_written',
+                    'elapsed_seconds', 'rows_per_second', 'message']
+
+class SyncTaskHistory:
+    """
+    Record sync tasks, their per-endpoint throughput and their messages.
+
+    Every method borrows a connection from the shared pool (see sync_db), so
+    the history can be used from request threads and the sync pool's reader
+    threads alike.
+    """
+
+    def __init__(self, db_path, max_tasks=200, max_age_days=30, max_log_lines=2000):
+        """
+        Initialize the history and mark tasks left running by a previous server as interrupted.
+
+        Args:
+            db_path (str): Path to the SQLite database
+            max_tasks (int): Number of tasks to keep
+            max_age_days (int): Age after which tasks are removed
+            max_log_lines (int): Messages kept per task (the newest ones)
+        """
+        self.db_path = db_path
+        self.max_tasks = max_tasks
+        self.max_age_days = max_age_days
+        self.max_log_lines = max_log_lines
+
+        with self._connect() as conn:
+            conn.executescript(HISTORY_SCHEMA)
+            placeholders = ', '.join('?' * len(FINISHED_STATUSES))
+            interrupted = conn.execute(
+                f"UPDATE sync_task SET status = 'failed', error = 'Interrupted by a server restart', "
+                f"end_time = ? WHERE status NOT IN ({placeholders})",
+                (datetime.datetime.now().isoformat(),) + FINISHED_STATUSES
+            ).rowcount
+        if interrupted:
+            logger.warning(f"Marked {interrupted} unfinished sync tasks as interrupted")
+
+    @contextmanager
+    def _connect(self, readonly=False):
+        """Borrow a pooled connection for one transaction, committed at the end of the block."""
+        database = get_database(self.db_path)
+        conn = database.read() if readonly else database.write()
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save_task(self, task_id, task, messages=(), endpoints=None):
+        """
+        Record a task's current state and its messages not saved yet.
+
+        Args:
+            task_id (str): Unique ID of the task
+            task (dict): endpoint, status, start_time and optionally username, end_time,
+                duration_seconds, rows_written, rows_per_second, error, last_seq
+            messages (list): New messages ({'seq', 'level', 'text'})
+            endpoints (dict): {endpoint: progress} with the per-endpoint metrics
+        """
+        row = {column: task.get(column) for column in TASK_COLUMNS}
+        row['task_id'] = task_id
+        row['last_seq'] = row['last_seq'] or 0
+
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO sync_task ({', '.join(TASK_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(TASK_COLUMNS))})",
+                [row[column] for column in TASK_COLUMNS]
+            )
+
+            if endpoints:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO sync_task_endpoint (task_id, {', '.join(ENDPOINT_COLUMNS)}) "
+                    f"VALUES (?, {', '.join('?' * len(ENDPOINT_COLUMNS))})",
+                    [[task_id, endpoint] + [progress.get(column) for column in ENDPOINT_COLUMNS[1:]]
+                     for endpoint, progress in endpoints.items()]
+                )
+
+            if messages:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO sync_task_log (task_id, seq, level, text) VALUES (?, ?, ?, ?)",
+                    [(task_id, message['seq'], message['level'], message['text']) for message in messages]
+                )
+                conn.execute("DELETE FROM sync_task_log WHERE task_id = ? AND seq <= ?",
+                             (task_id, messages[-1]['seq'] - self.max_log_lines))
+
+    def get_task(self, task_id):
+        """
+        Get a recorded task with its per-endpoint metrics.
+
+        Returns:
+            dict: The task, or None if it is not in the history
+        """
+        with self._connect(readonly=True) as conn:
+            row = conn.execute("SELECT * FROM sync_task WHERE task_id = ?", (task_id,)).fetchone()
+            if not row:
+                return None
+            task = dict(row)
+            task['endpoints'] = self._get_endpoints(conn, [task_id]).get(task_id, {})
+        return task
+
+    def get_messages(self, task_id, after=0, limit=200):
+        """
+        Get one page of a task's messages.
+
+        Args:
+            task_id (str): Unique ID of the task
+            after (int): Sequence number of the last message of the previous page
+            limit (int): Maximum number of messages
+
+        Returns:
+            list: Messages ({'seq', 'level', 'text'}) in order
+        """
+        with self._connect(readonly=True) as conn:
+            rows = conn.execute(
+                "SELECT seq, level, text FROM sync_task_log WHERE task_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (task_id, after, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_history(self, endpoint=None, limit=50, offset=0):
+        """
+        Get the most recent tasks, newest first.
+
+        Args:
+            endpoint (str): Only tasks started for this endpoint ('all' for full syncs)
+            limit (int): Maximum number of tasks
+            offset (int): Number of tasks to skip
+
+        Returns:
+            list: Tasks with their per-endpoint metrics
+        """
+        where, params = ('WHERE endpoint = ?', [endpoint]) if endpoint else ('', [])
+
+        with self._connect(readonly=True) as conn:
+            tasks = [dict(row) for row in conn.execute(
+                f"SELECT * FROM sync_task {where} ORDER BY start_time DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            )]
+            endpoints = self._get_endpoints(conn, [task['task_id'] for task in tasks])
+
+        for task in tasks:
+            task['endpoints'] = endpoints.get(task['task_id'], {})
+        return tasks
+
+    def prune(self):
+        """Remove tasks beyond the retention limits, with their endpoints and messages."""
+        cutoff = (datetime.datetime.now() - datetime.timedelta(days=self.max_age_days)).isoformat()
+
+        with self._connect() as conn:
+            expired = [row[0] for row in conn.execute(
+                "SELECT task_id FROM sync_task WHERE start_time < ? "
+                "OR task_id NOT IN (SELECT task_id FROM sync_task ORDER BY start_time DESC LIMIT ?)",
+                (cutoff, self.max_tasks)
+            )]
+            for table in ('sync_task_log', 'sync_task_endpoint', 'sync_task'):
+                conn.executemany(f"DELETE FROM {table} WHERE task_id = ?", [(task_id,) for task_id in expired])
+
+        if expired:
+            logger.info(f"Removed {len(expired)} old sync tasks from the history")
+        return len(expired)
+
+    def _get_endpoints(self, conn, task_ids):
+        """Get the per-endpoint metrics of tasks as {task_id: {endpoint: metrics}}."""
+        endpoints = {}
+        if not task_ids:
+            return endpoints
+
+        rows = conn.execute(
+            f"SELECT task_id, {', '.join(ENDPOINT_COLUMNS)} FROM sync_task_endpoint "
+            f"WHERE task_id IN ({', '.join('?' * len(task_ids))})",
+            task_ids
+        )
+        for row in rows:
+            metrics = dict(row)
+            endpoints.setdefault(metrics.pop('task_id'), {})[metrics.pop('endpoint')] = metrics
+        return endpoints
+
+def summarize_task_result(endpoint, result, progress=None):
+    """
+    Get the per-endpoint metrics of a finished sync from its result.
+
+    Args:
+        endpoint (str): Endpoint the task was started for ('all' for a full sync)
+        result (dict): Result of SyncEngine.run or SyncOrchestrator.run
+        progress (dict): Last progress reported for each endpoint
+
+    Returns:
+        dict: {endpoint: metrics} with status, pages, rows and rows/s
+    """
+    results = result.get('results') if endpoint == 'all' else {endpoint: result}
+    endpoints = {name: dict(state) for name, state in (progress or {}).items()}
+
+    for name, endpoint_result in (results or {}).items():
+        metrics = endpoint_result.get('metrics') or {}
+        state = endpoints.setdefault(name, {})
+        state.update({
+            'status': 'completed' if endpoint_result.get('success') else 'failed',
+            'message': endpoint_result.get('message') or endpoint_result.get('error')
+        })
+        for key in ('pages', 'records_received', 'rows_written', 'elapsed_seconds', 'rows_per_second'):
+            if key in metrics:
+                state[key] = metrics[key]
+
+    for state in endpoints.values():
+        state.setdefault('status', 'failed')
+    return endpoints
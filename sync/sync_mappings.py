@@ -0,0 +1,623 @@
+#!/usr/bin/env python3
+"""
+Declarative mappings from Maximo object structures to local SQLite tables.
+
+Each mapping describes one sync endpoint for sync_engine:
+- How to query the object structure (path, parameters, where clause, site filter,
+  whether incremental syncs filter on a changedate watermark, page size)
+- How often an incremental mapping is read in full anyway (full_sync_interval,
+  seconds), so rows that left the query are reconciled
+- How pages are fetched: by following nextPage links, or by page number several
+  at a time once the page count is known (parallel_pages, which needs a stable
+  oslc.orderBy in params)
+- How a partition field is queried: one query per value, or one combined
+  "field in [...]" query (partition.combine)
+- Optional filters a command line switch lifts or adds (tasks: the where clause
+  and skip rule that leave out task records; tasks.default syncs them unless
+  the switch is given)
+- Whether local rows a full read no longer returns are purged or marked deleted
+  (reconcile: 'purge' or 'mark', see sync_reconcile); with a partition, an
+  incremental read is not filtered on it and removes the rows whose records
+  left the partition values the same way
+- Which records to skip
+- Which endpoints must sync first (depends_on): endpoints filtered by site
+  need the user's sites, which come from MXAPIPERUSER
+- An optional full-text search index over the parent table (search: the FTS5
+  table, the integer key used as its rowid and the indexed text fields, see
+  sync_search)
+- The parent table and its child collections: table name, key columns,
+  required fields and the fields copied into each row
+
+Table specs:
+    name           Table written to
+    collection     Collection on the parent record holding the rows (children only)
+    keys           Primary key / unique columns, used for the upsert
+    required       Fields a record must have (defaults to keys)
+    fields         Fields copied from the record, or '*' for every column of the table
+    exclude        Columns never copied when fields is '*'
+    parent_fields  Columns copied from the parent row: {child column: parent column}
+    write          'upsert' (default) or 'replace' (delete the parent's rows, then insert)
+    defaults       Values used when the record has no value for a field
+    constants      Values always written, whatever the record holds
+    transforms     Functions applied to a field value before it is written
+    derived        Extra rows built from each row: [{'table', 'keys', 'fields', 'build'}]
+    children       Child table specs
+    schema         CREATE statements run if the table does not exist yet, so
+                   tables added to a mapping later appear in existing databases
+    columns        Columns added to an existing table if missing: {column: type}
+    indexes        Indexes created on an existing table if missing: {name: columns}
+"""
+
+# Work order statuses synced by default (CAN, CLOSE and history are left in Maximo)
+WODETAIL_STATUSES = ['WAPPR', 'APPR', 'INPRG', 'ASSIGN', 'WMATL']
+
+def as_flag(value):
+    """Store a Maximo boolean as 1/0."""
+    return 1 if value else 0
+
+def as_text(value):
+    """Store a value as text (numeric domain values are compared as strings)."""
+    return None if value is None else str(value)
+
+def build_person_sites(maxuser_row, parent_row):
+    """
+    Build person_site rows from a maxuser's default and insert sites.
+
+    When the default and insert site are the same there is a single row marked as both.
+    """
+    rows = []
+    defsite = maxuser_row.get('defsite')
+    insertsite = maxuser_row.get('insertsite')
+
+    if defsite:
+        rows.append({
+            'personid': parent_row['personid'],
+            'siteid': defsite,
+            'isdefault': 1,
+            'isinsert': 1 if insertsite == defsite else 0
+        })
+
+    if insertsite and insertsite != defsite:
+        rows.append({
+            'personid': parent_row['personid'],
+            'siteid': insertsite,
+            'isdefault': 0,
+            'isinsert': 1
+        })
+
+    return rows
+
+def build_group_links(maxgroup_row, parent_row):
+    """Link a maxgroup to the groupuser it was listed under."""
+    return [{
+        'groupuserid': parent_row['groupuserid'],
+        'maxgroupid': maxgroup_row['maxgroupid']
+    }]
+
+# Child tables added after the first wodetail schema (also in backend/database/wodetail_schema.sql)
+WPMATERIAL_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS wpmaterial (
+    wpitemid INTEGER PRIMARY KEY,
+    wonum TEXT NOT NULL,
+    workorderid INTEGER NOT NULL,
+    siteid TEXT,
+    orgid TEXT,
+    itemnum TEXT,
+    itemsetid TEXT,
+    description TEXT,
+    itemqty REAL,
+    orderunit TEXT,
+    unitcost REAL,
+    linecost REAL,
+    rate REAL,
+    storeloc TEXT,
+    location TEXT,
+    vendor TEXT,
+    directreq INTEGER,
+    requestby TEXT,
+    requiredate TEXT,
+    restype TEXT,
+    restype_description TEXT,
+    linetype TEXT,
+    linetype_description TEXT,
+    conditioncode TEXT,
+    hours REAL,
+    _rowstamp TEXT,
+    _last_sync TIMESTAMP,
+    _sync_status TEXT,
+    FOREIGN KEY (wonum, workorderid) REFERENCES workorder(wonum, workorderid)
+);
+CREATE INDEX IF NOT EXISTS idx_wpmaterial_workorderid ON wpmaterial(workorderid);
+CREATE INDEX IF NOT EXISTS idx_wpmaterial_wonum_siteid ON wpmaterial(wonum, siteid);
+CREATE INDEX IF NOT EXISTS idx_wpmaterial_itemnum ON wpmaterial(itemnum);
+'''
+
+LABTRANS_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS labtrans (
+    labtransid INTEGER PRIMARY KEY,
+    wonum TEXT NOT NULL,
+    workorderid INTEGER NOT NULL,
+    refwo TEXT,
+    siteid TEXT,
+    orgid TEXT,
+    laborcode TEXT,
+    craft TEXT,
+    skilllevel TEXT,
+    taskid INTEGER,
+    laborhrs REAL,
+    regularhrs REAL,
+    premiumpayhours REAL,
+    startdate TEXT,
+    starttime TEXT,
+    finishdate TEXT,
+    finishtime TEXT,
+    transdate TEXT,
+    transtype TEXT,
+    payrate REAL,
+    linecost REAL,
+    vendor TEXT,
+    contractnum TEXT,
+    genapprservreceipt INTEGER,
+    enterby TEXT,
+    _rowstamp TEXT,
+    _last_sync TIMESTAMP,
+    _sync_status TEXT,
+    FOREIGN KEY (wonum, workorderid) REFERENCES workorder(wonum, workorderid)
+);
+CREATE INDEX IF NOT EXISTS idx_labtrans_workorderid ON labtrans(workorderid);
+CREATE INDEX IF NOT EXISTS idx_labtrans_wonum_siteid ON labtrans(wonum, siteid);
+CREATE INDEX IF NOT EXISTS idx_labtrans_laborcode ON labtrans(laborcode);
+'''
+
+WODETAIL = {
+    'endpoint': 'MXAPIWODETAIL',
+    'object_structure': 'mxapiwodetail',
+    'label': 'work order',
+    'description': 'work order data',
+    'page_size': 100,
+    'parallel_pages': 4,
+    'user_context': True,
+    'params': {
+        'lean': '0',
+        # The long description is only returned when selected by name
+        'oslc.select': '*,description_longdescription,wpmaterial{*},labtrans{*}',
+        # Pages are requested by number in parallel, so their order must not change between requests
+        'oslc.orderBy': '+workorderid'
+    },
+    'where': ['historyflag=0', 'istask=0'],
+    'site_filter': 'required',
+    'depends_on': ['peruser'],
+    'incremental': True,
+    # Incremental reads are not filtered on status and purge work orders that left
+    # the synced statuses; deleted ones are only purged by a full read
+    'full_sync_interval': 6 * 3600,
+    'reconcile': 'purge',
+    'partition': {
+        'field': 'status',
+        'values': WODETAIL_STATUSES,
+        'combine': True,
+        'option': '--status',
+        'help': 'Work order status to filter by (defaults to all synced statuses in one query)'
+    },
+    # Tasks are synced with their parents (in the same statuses), for the detail page's task panels
+    'tasks': {
+        'field': 'istask',
+        'where': 'istask=0',
+        'default': True,
+        'option': '--no-tasks',
+        'help': 'Do not sync task work orders (istask=1)'
+    },
+    'search': {
+        'table': 'workorder_search',
+        'key': 'workorderid',
+        'fields': ['description', 'description_longdescription']
+    },
+    'skip_values': {
+        'status': ['CAN', 'CLOSE'],
+        'historyflag': [1, True],
+        'istask': [1, True]
+    },
+    'table': {
+        'name': 'workorder',
+        'keys': ['wonum', 'workorderid'],
+        'fields': [
+            'wonum', 'workorderid', 'description', 'status', 'status_description',
+            'siteid', 'orgid', 'location', 'assetnum', 'parent', 'woclass',
+            'woclass_description', 'worktype', 'wopriority', 'wopriority_description',
+            'reportedby', 'reportdate', 'createdby', 'createdate', 'changedate',
+            'changeby', 'owner', 'assignedownergroup', 'historyflag', 'istask',
+            'taskid', 'estdur', 'estlabhrs', 'estlabcost', 'estmatcost', 'esttoolcost',
+            'estservcost', 'esttotalcost', 'actlabhrs', 'actlabcost', 'actmatcost',
+            'acttoolcost', 'actservcost', 'acttotalcost', 'haschildren',
+            'targstartdate', 'targcompdate', 'actstart', 'actfinish', 'statusdate',
+            'wogroup', 'description_longdescription', '_rowstamp'
+        ],
+        'columns': {'description_longdescription': 'TEXT'},
+        # Offline search: filters by site, status, priority and class, pages by reportdate
+        'indexes': {
+            'idx_workorder_site_reportdate': 'siteid, reportdate, wonum, workorderid',
+            # Covers every filter, so counting the matches never reads the rows
+            'idx_workorder_site_filters': 'siteid, istask, historyflag, status, woclass, wopriority, wonum, workorderid',
+            'idx_workorder_wopriority': 'wopriority',
+            # Rows found in the workorder_search index (rowid = workorderid)
+            'idx_workorder_workorderid': 'workorderid'
+        },
+        'children': [
+            {
+                'name': 'woserviceaddress',
+                'collection': 'woserviceaddress',
+                'keys': ['woserviceaddressid'],
+                'parent_fields': {'wonum': 'wonum', 'workorderid': 'workorderid'},
+                'fields': [
+                    'woserviceaddressid', 'orgid', 'addresscode', 'description',
+                    'addressline1', 'addressline2', 'addressline3', 'city', 'country',
+                    'county', 'stateprovince', 'postalcode', 'langcode', 'hasld',
+                    'addressischanged', '_rowstamp'
+                ]
+            },
+            {
+                'name': 'wolabor',
+                'collection': 'wolabor',
+                'keys': ['wolaborid'],
+                'parent_fields': {'wonum': 'wonum', 'workorderid': 'workorderid'},
+                'fields': [
+                    'wolaborid', 'laborcode', 'laborhrs', 'startdate', 'finishdate',
+                    'transdate', 'regularhrs', 'premiumpayhours', 'labtransid', '_rowstamp'
+                ]
+            },
+            {
+                'name': 'womaterial',
+                'collection': 'womaterial',
+                'keys': ['womaterialid'],
+                'parent_fields': {'wonum': 'wonum', 'workorderid': 'workorderid'},
+                'fields': [
+                    'womaterialid', 'itemnum', 'itemsetid', 'description', 'itemqty',
+                    'unitcost', 'linecost', 'storeloc', 'siteid', 'orgid', '_rowstamp'
+                ]
+            },
+            {
+                'name': 'wotool',
+                'collection': 'wotool',
+                'keys': ['wotoolid'],
+                'parent_fields': {'wonum': 'wonum', 'workorderid': 'workorderid'},
+                'fields': ['wotoolid', 'toolnum', 'toolhrs', 'toolrate', 'toolcost', '_rowstamp']
+            },
+            {
+                # Planned materials; a task's rows hang off the task's own workorder row
+                'name': 'wpmaterial',
+                'collection': 'wpmaterial',
+                'keys': ['wpitemid'],
+                'write': 'replace',
+                'parent_fields': {'workorderid': 'workorderid', 'wonum': 'wonum'},
+                'fields': [
+                    'wpitemid', 'siteid', 'orgid', 'itemnum', 'itemsetid', 'description', 'itemqty',
+                    'orderunit', 'unitcost', 'linecost', 'rate', 'storeloc', 'location', 'vendor',
+                    'directreq', 'requestby', 'requiredate', 'restype', 'restype_description',
+                    'linetype', 'linetype_description', 'conditioncode', 'hours', '_rowstamp'
+                ],
+                'transforms': {'directreq': as_flag},
+                'schema': WPMATERIAL_SCHEMA
+            },
+            {
+                # Actual labor transactions
+                'name': 'labtrans',
+                'collection': 'labtrans',
+                'keys': ['labtransid'],
+                'write': 'replace',
+                'parent_fields': {'workorderid': 'workorderid', 'wonum': 'wonum'},
+                'fields': [
+                    'labtransid', 'refwo', 'siteid', 'orgid', 'laborcode', 'craft', 'skilllevel',
+                    'taskid', 'laborhrs', 'regularhrs', 'premiumpayhours', 'startdate', 'starttime',
+                    'finishdate', 'finishtime', 'transdate', 'transtype', 'payrate', 'linecost',
+                    'vendor', 'contractnum', 'genapprservreceipt', 'enterby', '_rowstamp'
+                ],
+                'transforms': {'genapprservreceipt': as_flag},
+                'schema': LABTRANS_SCHEMA
+            }
+        ]
+    }
+}
+
+ASSETS = {
+    'endpoint': 'MXAPIASSET',
+    'object_structure': 'mxapiasset',
+    'label': 'asset',
+    'description': 'asset data',
+    'page_size': 500,
+    # Older Maximo versions only expose the object structure under /oslc
+    'paths': ['/api/os/mxapiasset', '/oslc/os/mxapiasset'],
+    'params': {
+        'lean': '0',
+        'oslc.select': '*,assetmeter{*},assetspec{*},doclinks{*},failurereport{*}',
+        'oslc.childrenExpand': 'true',
+        'collectioncount': '1',
+        'ignorecollectionref': '0',
+        'relativeuri': '1'
+    },
+    'where': ['status="OPERATING"'],
+    'site_filter': 'required',
+    'depends_on': ['peruser'],
+    'incremental': True,
+    'reconcile': 'purge',
+    'table': {
+        'name': 'assets',
+        'keys': ['assetnum', 'siteid'],
+        'fields': [
+            'assetnum', 'description', 'status', 'siteid', 'orgid', 'location', 'parent',
+            'serialnum', 'changeby', 'changedate', 'disabled', 'assetid', 'assettag',
+            'isrunning', 'moved', 'priority', 'purchaseprice', 'replacecost', 'totalcost',
+            'vendor', 'manufacturer', 'installdate', 'status_description',
+            'type_description', 'type', '_rowstamp'
+        ],
+        'children': [
+            {
+                'name': 'assetmeter',
+                'collection': 'assetmeter',
+                'keys': ['assetnum', 'siteid', 'metername'],
+                'parent_fields': {'assetnum': 'assetnum', 'siteid': 'siteid'},
+                'fields': [
+                    'metername', 'active', 'lastreading', 'lastreadingdate',
+                    'lastreadinginspctr', 'remarks', 'meter_description',
+                    'meter_measureunitid', '_rowstamp'
+                ]
+            },
+            {
+                'name': 'assetspec',
+                'collection': 'assetspec',
+                'keys': ['assetnum', 'siteid', 'assetattrid'],
+                'parent_fields': {'assetnum': 'assetnum', 'siteid': 'siteid'},
+                'fields': [
+                    'assetattrid', 'alnvalue', 'numvalue', 'datevalue', 'changeby',
+                    'changedate', 'assetattribute_description', '_rowstamp'
+                ]
+            },
+            {
+                'name': 'assetdoclinks',
+                'collection': 'doclinks',
+                'keys': ['docinfoid'],
+                'parent_fields': {'assetnum': 'assetnum', 'siteid': 'siteid'},
+                'fields': [
+                    'docinfoid', 'document', 'description', 'createdate', 'changeby',
+                    'ownertable', 'ownerid', 'urltype', 'urlname', '_rowstamp'
+                ]
+            },
+            {
+                'name': 'assetfailure',
+                'collection': 'failurereport',
+                'keys': ['failurereportid'],
+                'parent_fields': {'assetnum': 'assetnum', 'siteid': 'siteid'},
+                'fields': [
+                    'failurereportid', 'failurecode', 'failuredate', 'problemcode',
+                    'causecode', 'remedycode', 'remarks', '_rowstamp'
+                ]
+            }
+        ]
+    }
+}
+
+LOCATIONS = {
+    'endpoint': 'MXAPILOCATIONS',
+    'object_structure': 'mxapilocations',
+    'label': 'location',
+    'description': 'location data',
+    'page_size': 500,
+    'params': {
+        'lean': '0',
+        'oslc.select': '*'
+    },
+    'where': ['status="OPERATING"'],
+    'site_filter': 'required',
+    'depends_on': ['peruser'],
+    'incremental': True,
+    'reconcile': 'purge',
+    # The status row reports how many locations are stored, not how many were written
+    'count_table': 'locations',
+    'table': {
+        'name': 'locations',
+        'keys': ['location', 'siteid'],
+        'fields': [
+            'location', 'description', 'status', 'siteid', 'orgid', 'type',
+            'type_description', 'glaccount', 'changeby', 'changedate', 'disabled',
+            'failurecode', 'locationsid', 'locationuid', 'pluscpmextdate',
+            'pluspcustomer', 'pluspcustomer_description', 'serviceaddress',
+            'startasset', 'starttimermins', 'starttimermins_description', 'systemid',
+            'useinpopr', '_rowstamp'
+        ]
+    }
+}
+
+INVENTORY_CHILD_EXCLUDE = ['_rowstamp']
+
+INVENTORY = {
+    'endpoint': 'MXAPIINVENTORY',
+    'object_structure': 'mxapiinventory',
+    'label': 'inventory',
+    'description': 'inventory data',
+    'page_size': 100,
+    'user_context': True,
+    'params': {
+        'lean': '0',
+        'oslc.select': '*'
+    },
+    'where': ['status="ACTIVE"'],
+    'site_filter': 'optional',
+    'depends_on': ['peruser'],
+    # Always a full read: balance and cost changes are in the child rows and
+    # do not move the inventory record's changedate
+    'incremental': False,
+    'reconcile': 'purge',
+    'keep_values': {
+        'status': ['ACTIVE']
+    },
+    'table': {
+        'name': 'inventory',
+        'keys': ['inventoryid'],
+        'required': ['itemnum', 'siteid', 'location'],
+        'fields': [
+            'itemnum', 'siteid', 'location', 'description', 'status', 'curbal', 'binnum',
+            'lotnum', 'orgid', 'itemsetid', 'issueunit', 'storeloc', 'itemtype',
+            'itemtype_description', 'rotating', 'conditioncode', 'conditioncode_description',
+            'changeby', 'changedate', '_rowstamp', 'inventoryid', 'about', 'asl',
+            'autocalcrop', 'avblbalance', 'benchstock', 'bincnt', 'ccf', 'consignment',
+            'costtype', 'costtype_description', 'curbaltotal', 'deliverytime', 'expiredqty',
+            'hardresissue', 'haschildinvbalance', 'internal', 'invreserveqty',
+            'issue1yrago', 'issue2yrago', 'issue3yrago', 'issueytd', 'lastissuedate',
+            'maxlevel', 'minlevel', 'orderqty', 'orderunit', 'reorder', 'reservedqty',
+            'shippedqty', 'stagedqty', 'status_description', 'statusdate', 'statusiface',
+            'vecatc', 'veccritical', 'vendor'
+        ],
+        'children': [
+            {
+                'name': f'inventory_{collection}',
+                'collection': collection,
+                'keys': [],
+                'write': 'replace',
+                'parent_fields': {'inventoryid': 'inventoryid'},
+                'fields': '*',
+                'exclude': INVENTORY_CHILD_EXCLUDE + [f'inventory_{collection}id']
+            }
+            for collection in ['invbalances', 'invcost', 'itemcondition', 'matrectrans', 'transfercuritem']
+        ]
+    }
+}
+
+PERUSER = {
+    'endpoint': 'MXAPIPERUSER',
+    'object_structure': 'mxapiperuser',
+    'label': 'person',
+    'description': 'person and user data',
+    'page_size': 500,
+    'params': {
+        'lean': '0',
+        'oslc.select': '*'
+    },
+    'where': ['status="ACTIVE"'],
+    'site_filter': None,
+    'incremental': False,
+    'table': {
+        'name': 'person',
+        'keys': ['personid'],
+        'fields': [
+            'personid', 'personuid', 'displayname', 'firstname', 'lastname', 'title',
+            'status', 'status_description', 'statusdate', 'primaryemail', 'primaryphone',
+            'locationorg', 'locationsite', 'location', 'country', 'city', 'stateprovince',
+            'addressline1', 'postalcode', 'department', 'supervisor', 'employeetype',
+            'employeetype_description', 'language', 'timezone', 'timezone_description',
+            '_rowstamp'
+        ],
+        'children': [
+            {
+                'name': 'maxuser',
+                'collection': 'maxuser',
+                'keys': ['maxuserid'],
+                'parent_fields': {'personid': 'personid'},
+                'fields': [
+                    'maxuserid', 'userid', 'status', 'defsite', 'insertsite',
+                    'querywithsite', 'screenreader', 'failedlogins', 'sysuser', 'type',
+                    'type_description', 'loginid', '_rowstamp'
+                ],
+                'derived': [
+                    {'table': 'person_site', 'keys': ['personid', 'siteid'],
+                     'fields': ['personid', 'siteid', 'isdefault', 'isinsert'], 'build': build_person_sites}
+                ],
+                'children': [
+                    {
+                        'name': 'groupuser',
+                        'collection': 'groupuser',
+                        'keys': ['groupuserid'],
+                        'parent_fields': {'maxuserid': 'maxuserid'},
+                        'fields': ['groupuserid', 'groupname', '_rowstamp'],
+                        'children': [
+                            {
+                                'name': 'maxgroup',
+                                'collection': 'maxgroup',
+                                'keys': ['maxgroupid'],
+                                'fields': [
+                                    'maxgroupid', 'groupname', 'description', 'sidenav',
+                                    'authallsites', 'authallstorerooms', 'authallgls',
+                                    'authlaborall', 'authlaborself', 'authlaborcrew',
+                                    'authlaborsuper', 'authpersongroup', 'authallrepfacs',
+                                    'nullrepfac', 'independent', 'pluspauthallcust',
+                                    'pluspauthcustvnd', 'pluspauthgrplst', 'pluspauthperslst',
+                                    'pluspauthnoncust', 'sctemplateid', '_rowstamp'
+                                ],
+                                'derived': [
+                                    {'table': 'groupuser_maxgroup', 'keys': ['groupuserid', 'maxgroupid'],
+                                     'fields': ['groupuserid', 'maxgroupid'], 'build': build_group_links}
+                                ]
+                            }
+                        ]
+                    }
+                ]
+            }
+        ]
+    }
+}
+
+DOMAIN_VALUE_FIELDS = ['value', 'description', 'maxvalue', 'defaults', '_rowstamp']
+
+DOMAIN = {
+    'endpoint': 'MXAPIDOMAIN',
+    'object_structure': 'mxapidomain',
+    'label': 'domain',
+    'description': 'domain data',
+    'page_size': 1000,
+    'timeout': (3.05, 15),
+    'user_context': True,
+    'params': {
+        'lean': '0',
+        'oslc.select': '*'
+    },
+    'where': [],
+    'site_filter': None,
+    'incremental': False,
+    'table': {
+        'name': 'domains',
+        'keys': ['domainid'],
+        'fields': [
+            'domainid', 'domaintype', 'maxtype', 'maxtype_description', 'description',
+            'internal', 'internal_description', 'domaintype_description', 'length',
+            'maxdomainid', 'scale', 'nevercache', '_rowstamp'
+        ],
+        'defaults': {'internal': 0},
+        'transforms': {'nevercache': as_flag},
+        'children': [
+            {
+                'name': 'domain_values',
+                'collection': 'synonymdomain',
+                'keys': ['domainid', 'value'],
+                'parent_fields': {'domainid': 'domainid'},
+                'fields': DOMAIN_VALUE_FIELDS,
+                'transforms': {'defaults': as_flag},
+                'constants': {'internal': 0}
+            },
+            {
+                'name': 'domain_values',
+                'collection': 'alndomain',
+                'keys': ['domainid', 'value'],
+                'parent_fields': {'domainid': 'domainid'},
+                'fields': DOMAIN_VALUE_FIELDS,
+                'constants': {'maxvalue': None, 'defaults': 0, 'internal': 0}
+            },
+            {
+                'name': 'domain_values',
+                'collection': 'numericdomain',
+                'keys': ['domainid', 'value'],
+                'parent_fields': {'domainid': 'domainid'},
+                'fields': DOMAIN_VALUE_FIELDS,
+                'transforms': {'value': as_text},
+                'constants': {'maxvalue': None, 'defaults': 0, 'internal': 0}
+            }
+        ]
+    }
+}
+
+# Every mapping by sync module name (the names used by sync_all and the sync API)
+MAPPINGS = {
+    'peruser': PERUSER,
+    'locations': LOCATIONS,
+    'assets': ASSETS,
+    'domain': DOMAIN,
+    'wodetail': WODETAIL,
+    'inventory': INVENTORY
+}
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Run several endpoint syncs at once.
+
+Endpoints declare the endpoints they depend on in sync_mappings (depends_on).
+The orchestrator:
+1. Starts every endpoint whose dependencies have finished, up to max_workers at a time
+2. Lets the engines fetch and process pages concurrently
+3. Funnels every page write through one SerializedWriter, so a single SQLite
+   connection does all the writing and transactions never contend
+4. Reports per-endpoint progress (status, pages, records, rows written)
+
+A "sync all" therefore takes about as long as its longest dependency chain
+instead of the sum of every endpoint.
+"""
+import time
+import queue
+import sqlite3
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from sync_db import connect
+from sync_engine import SyncEngine
+from sync_mappings import MAPPINGS
+
+logger = logging.getLogger('sync_orchestrator')
+
+# Endpoints in the order they are listed to users
+ENDPOINT_ORDER = ['peruser', 'locations', 'assets', 'domain', 'wodetail', 'inventory']
+
+class SerializedWriter:
+    """
+    One SQLite connection, owned by one thread, that performs every write.
+
+    Callers hand it a function taking the connection; the function runs on the
+    writer thread and its result (or exception) is returned to the caller.
+    """
+
+    def __init__(self, db_path):
+        """
+        Start the writer thread.
+
+        Args:
+            db_path (str): Path to the SQLite database
+        """
+        self.db_path = db_path
+        self._jobs = queue.Queue()
+        self._ready = threading.Event()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='sync-writer', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+        if self._error:
+            raise self._error
+
+    def submit(self, function, *args):
+        """
+        Run function(connection, *args) on the writer thread and wait for it.
+
+        Returns:
+            The function's return value
+
+        Raises:
+            Exception: Whatever the function raised
+        """
+        future = Future()
+        self._jobs.put((future, function, args))
+        return future.result()
+
+    def close(self):
+        """Finish the queued writes, close the connection and stop the thread."""
+        self._jobs.put(None)
+        self._thread.join()
+
+    def _run(self):
+        """Writer thread: run queued write jobs one at a time."""
+        try:
+            conn = connect(self.db_path)
+        except sqlite3.Error as e:
+            self._error = e
+            self._ready.set()
+            return
+
+        self._ready.set()
+
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+
+            future, function, args = job
+            try:
+                future.set_result(function(conn, *args))
+            except Exception as e:
+                future.set_exception(e)
+
+        conn.close()
+
+def get_dependencies(endpoint, endpoints):
+    """Get the dependencies of an endpoint that are part of this run."""
+    return [dependency for dependency in MAPPINGS[endpoint].get('depends_on', []) if dependency in endpoints]
+
+class SyncOrchestrator:
+    """
+    Sync several endpoints concurrently, respecting their dependencies.
+
+    The orchestrator handles:
+    - Ordering endpoints by the depends_on graph in sync_mappings
+    - Running independent endpoints in a thread pool
+    - Sharing one serialized writer connection between the engines
+    - Tracking per-endpoint progress and results
+    """
+
+    def __init__(self, db_path, endpoints=None, force_full=False, site=None, max_workers=4, on_progress=None,
+                 api_key=None, base_url=None, username=None):
+        """
+        Initialize the orchestrator.
+
+        Args:
+            db_path (str): Path to the SQLite database
+            endpoints (list): Endpoints to sync (sync module names, defaults to all)
+            force_full (bool): Ignore the last sync time of every endpoint
+            site: Site ID, or a callable site(endpoint) called when the endpoint starts
+                (so sites can be looked up after peruser has synced)
+            max_workers (int): Maximum number of endpoints syncing at once
+            on_progress (callable): Called as on_progress(endpoint, progress) on every status change or page
+            api_key (str): Maximo API key (defaults to MAXIMO_API_KEY)
+            base_url (str): Maximo base URL (defaults to MAXIMO_BASE_URL)
+            username (str): User sent as the user context (defaults to MAXIMO_USERNAME)
+        """
+        endpoints = endpoints or ENDPOINT_ORDER
+        unknown = [endpoint for endpoint in endpoints if endpoint not in MAPPINGS]
+        if unknown:
+            raise ValueError(f"Unknown endpoints: {', '.join(unknown)}")
+
+        self.db_path = db_path
+        self.endpoints = [endpoint for endpoint in ENDPOINT_ORDER if endpoint in endpoints]
+        self.force_full = force_full
+        self.site = site
+        self.max_workers = max(1, max_workers)
+        self.on_progress = on_progress
+        self.connection = {'api_key': api_key, 'base_url': base_url, 'username': username}
+
+        self.results = {}
+        self.progress = {
+            endpoint: {
+                'status': 'pending',
+                'depends_on': get_dependencies(endpoint, self.endpoints),
+                'pages': 0,
+                'records_received': 0,
+                'rows_written': 0,
+                'message': None
+            }
+            for endpoint in self.endpoints
+        }
+        self._lock = threading.Lock()
+
+    def run(self):
+        """
+        Sync every endpoint.
+
+        Endpoints start as soon as their dependencies have finished. A failed
+        dependency does not stop its dependents; they run against whatever the
+        database already holds.
+
+        Returns:
+            dict: {'success', 'results': {endpoint: result}, 'progress', 'elapsed_seconds'}
+        """
+        started = time.perf_counter()
+        pending = list(self.endpoints)
+        finished = set()
+        running = {}
+
+        writer = SerializedWriter(self.db_path)
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='sync') as pool:
+                while pending or running:
+                    for endpoint in list(pending):
+                        if len(running) >= self.max_workers:
+                            break
+                        if all(dependency in finished for dependency in get_dependencies(endpoint, self.endpoints)):
+                            pending.remove(endpoint)
+                            self._update(endpoint, status='running')
+                            running[pool.submit(self._sync_endpoint, endpoint, writer)] = endpoint
+
+                    if not running:
+                        # Only possible with a dependency cycle
+                        for endpoint in pending:
+                            self._finish(endpoint, {'success': False, 'endpoint': endpoint,
+                                                    'error': 'Dependencies could not be resolved'})
+                        break
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        endpoint = running.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            logger.error(f"Error syncing {endpoint}: {e}")
+                            result = {'success': False, 'endpoint': endpoint, 'error': str(e)}
+                        self._finish(endpoint, result)
+                        finished.add(endpoint)
+        finally:
+            writer.close()
+
+        elapsed = time.perf_counter() - started
+        success = all(result.get('success') for result in self.results.values())
+        logger.info(f"Synced {len(self.results)} endpoints in {elapsed:.1f}s "
+                    f"({sum(1 for result in self.results.values() if result.get('success'))} succeeded)")
+
+        return {
+            'success': success,
+            'results': self.results,
+            'progress': self.get_progress(),
+            'elapsed_seconds': elapsed
+        }
+
+    def get_progress(self):
+        """Get a copy of the per-endpoint progress."""
+        with self._lock:
+            return {endpoint: dict(progress) for endpoint, progress in self.progress.items()}
+
+    def _sync_endpoint(self, endpoint, writer):
+        """Run one endpoint's engine (on a pool thread)."""
+        site = self.site(endpoint) if callable(self.site) else self.site
+        logger.info(f"Starting {endpoint} sync" + (f" for site {site}" if site else ""))
+
+        engine = SyncEngine(MAPPINGS[endpoint], self.db_path, writer=writer,
+                            on_progress=lambda _, progress: self._update(endpoint, **progress),
+                            **self.connection)
+        return engine.run(site=site, force_full=self.force_full)
+
+    def _finish(self, endpoint, result):
+        """Record an endpoint's result and final status."""
+        self.results[endpoint] = result
+        metrics = result.get('metrics') or {}
+        self._update(
+            endpoint,
+            status='completed' if result.get('success') else 'failed',
+            message=result.get('message') if result.get('success') else result.get('error'),
+            elapsed_seconds=metrics.get('elapsed_seconds'),
+            rows_per_second=metrics.get('rows_per_second')
+        )
+
+    def _update(self, endpoint, **changes):
+        """Update an endpoint's progress and pass it to the callback."""
+        with self._lock:
+            progress = self.progress[endpoint]
+            progress.update({key: value for key, value in changes.items() if value is not None or key == 'message'})
+            snapshot = dict(progress)
+
+        if self.on_progress:
+            try:
+                self.on_progress(endpoint, snapshot)
+            except Exception as e:
+                logger.warning(f"Progress callback failed for {endpoint}: {e}")
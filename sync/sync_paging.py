@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Paging helpers shared by the sync scripts.
+
+Maximo OSLC collections are returned one page at a time, with the link to the
+following page in responseInfo.nextPage. The helpers in this module:
+1. Follow every nextPage link as a generator, so each page can be processed
+   and committed before the next one is requested (memory stays flat), or
+   request pages by number several at a time once the page count is known
+2. Merge the per-page sync results into one set of totals
+3. Record the sync_status row once, after the last page has been committed
+"""
+import json
+import logging
+import datetime
+import requests
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from sync_db import connect
+
+logger = logging.getLogger('sync_paging')
+
+# Safety limit so a server that keeps returning the same nextPage link can't loop forever
+MAX_PAGES = 10000
+
+class PageFetchError(Exception):
+    """Raised when a page of an OSLC collection could not be fetched or parsed."""
+
+def get_next_page_url(data):
+    """
+    Get the link to the next page from an OSLC collection response.
+
+    Handles both lean (responseInfo.nextPage.href) and non-lean
+    (oslc:responseInfo.oslc:nextPage.rdf:resource) responses.
+
+    Args:
+        data (dict): JSON response for one page
+
+    Returns:
+        str: URL of the next page, or None if this is the last page
+    """
+    response_info = data.get('responseInfo') or data.get('oslc:responseInfo') or {}
+    next_page = response_info.get('nextPage') or response_info.get('oslc:nextPage')
+
+    if isinstance(next_page, dict):
+        return next_page.get('href') or next_page.get('rdf:resource')
+    if isinstance(next_page, str):
+        return next_page
+
+    return None
+
+def get_total_pages(data, page_size):
+    """
+    Get the number of pages of an OSLC collection from its first page.
+
+    Maximo reports totalPages with every paged response, and totalCount when
+    the query asks for collectioncount=1.
+
+    Args:
+        data (dict): JSON response for one page
+        page_size (int): Records per page the query asked for
+
+    Returns:
+        int: Number of pages, or None if the response does not say
+    """
+    response_info = data.get('responseInfo') or data.get('oslc:responseInfo') or {}
+
+    total_pages = response_info.get('totalPages', response_info.get('oslc:totalPages'))
+    if total_pages is not None:
+        return int(total_pages)
+
+    total_count = response_info.get('totalCount', response_info.get('oslc:totalCount'))
+    if total_count is not None and page_size:
+        return max(1, -(-int(total_count) // int(page_size)))
+
+    return None
+
+def fetch_page(http, url, params, headers, timeout, label, page_number):
+    """
+    Fetch and parse one page of an OSLC collection.
+
+    Returns:
+        dict: JSON response with the records under 'member'
+
+    Raises:
+        PageFetchError: If the page could not be fetched or parsed
+    """
+    try:
+        response = http.get(url, params=params, headers=headers, timeout=timeout)
+    except requests.exceptions.RequestException as e:
+        raise PageFetchError(f"Request for {label} page {page_number} failed: {e}")
+
+    if response.status_code != 200:
+        raise PageFetchError(
+            f"Error fetching {label} page {page_number}. Status code: {response.status_code}. "
+            f"Response: {response.text[:500]}"
+        )
+
+    try:
+        data = response.json()
+    except (json.JSONDecodeError, ValueError) as e:
+        raise PageFetchError(f"Failed to parse {label} page {page_number}: {e}")
+
+    # Standardize the data structure
+    for key in ('member', 'rdfs:member', 'spi:member'):
+        if key in data:
+            data['member'] = data[key]
+            break
+    else:
+        raise PageFetchError(f"No member data found in {label} page {page_number}. Keys: {list(data.keys())}")
+
+    logger.info(f"Found {len(data['member'])} {label} records on page {page_number}")
+    return data
+
+def iter_pages(endpoint, query_params, headers, label='record', timeout=(3.05, 30), http=None, pages_done=0):
+    """
+    Fetch every page of an OSLC collection.
+
+    The first request uses the query parameters; later requests follow the
+    nextPage link returned by Maximo, which already carries the query.
+
+    Args:
+        endpoint (str): Collection URL
+        query_params (dict): Query parameters for the first page
+        headers (dict): Request headers (API key, Accept, ...)
+        label (str): Record type used in log messages
+        timeout (tuple): Connection and read timeout for each request
+        http: Object with a requests-compatible get() (defaults to the requests module)
+        pages_done (int): Pages already synced before endpoint (when resuming from a
+            nextPage link), so page numbers in log messages carry on
+
+    Yields:
+        dict: JSON response for each page, with the records under 'member'
+
+    Raises:
+        PageFetchError: If a page could not be fetched or parsed
+    """
+    http = http or requests
+    url = endpoint
+    params = query_params
+    seen_urls = set()
+    page_number = pages_done
+
+    while url and page_number < MAX_PAGES:
+        page_number += 1
+
+        data = fetch_page(http, url, params, headers, timeout, label, page_number)
+        yield data
+
+        url = get_next_page_url(data)
+        params = None  # The nextPage link already contains the query
+
+        if url in seen_urls:
+            logger.warning(f"nextPage link repeated after {label} page {page_number}, stopping")
+            break
+        seen_urls.add(url)
+
+    if url and page_number >= MAX_PAGES:
+        logger.warning(f"Stopped following {label} pages after {MAX_PAGES} pages")
+
+def iter_pages_parallel(endpoint, query_params, headers, label='record', timeout=(3.05, 30), http=None,
+                        pages_done=0, max_workers=4):
+    """
+    Fetch every page of an OSLC collection, several pages at a time.
+
+    The first page is requested with collectioncount=1 so Maximo reports how
+    many pages there are; the remaining pages are then requested by page
+    number (pageno) up to max_workers at once. Pages are still yielded in
+    order, so they are committed (and checkpointed) one after another. When
+    the total is not reported, the nextPage links are followed as in iter_pages.
+
+    Page numbers only address the same records on every request when the
+    collection has a stable order, so the query must set oslc.orderBy (e.g.
+    on the object's unique id); without it pages can overlap or skip records.
+
+    Args:
+        endpoint (str): Collection URL
+        query_params (dict): Query parameters (without paging)
+        headers (dict): Request headers (API key, Accept, ...)
+        label (str): Record type used in log messages
+        timeout (tuple): Connection and read timeout for each request
+        http: Object with a requests-compatible get() (defaults to the requests module)
+        pages_done (int): Pages already synced, so fetching starts at the page after them
+        max_workers (int): Maximum number of page requests in flight
+
+    Yields:
+        dict: JSON response for each page, with the records under 'member'
+
+    Raises:
+        ValueError: If the query has no oslc.orderBy
+        PageFetchError: If a page could not be fetched or parsed
+    """
+    if not query_params.get('oslc.orderBy'):
+        raise ValueError(f"Parallel paging of {label} records needs a stable oslc.orderBy")
+
+    http = http or requests
+    params = dict(query_params, collectioncount='1')
+
+    def page_params(page_number):
+        return dict(params, pageno=str(page_number)) if page_number > 1 else params
+
+    first_number = pages_done + 1
+    first_page = fetch_page(http, endpoint, page_params(first_number), headers, timeout, label, first_number)
+    yield first_page
+
+    total_pages = get_total_pages(first_page, query_params.get('oslc.pageSize'))
+    if total_pages is None:
+        next_url = get_next_page_url(first_page)
+        if next_url:
+            logger.info(f"Total {label} pages not reported, following nextPage links")
+            yield from iter_pages(next_url, None, headers, label=label, timeout=timeout,
+                                  http=http, pages_done=first_number)
+        return
+
+    total_pages = min(total_pages, MAX_PAGES)
+    if total_pages <= first_number:
+        return
+
+    logger.info(f"Fetching {label} pages {first_number + 1}-{total_pages} "
+                f"with up to {max_workers} requests at a time")
+
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='page')
+    in_flight = deque()
+    next_number = first_number + 1
+    try:
+        while next_number <= total_pages or in_flight:
+            while next_number <= total_pages and len(in_flight) < max_workers:
+                in_flight.append(pool.submit(fetch_page, http, endpoint, page_params(next_number),
+                                             headers, timeout, label, next_number))
+                next_number += 1
+
+            yield in_flight.popleft().result()
+    finally:
+        for future in in_flight:
+            future.cancel()
+        pool.shutdown(wait=True)
+
+def sync_pages(pages, process_page, sync_page, label='record', flush=None):
+    """
+    Process and commit each page before the next one is fetched.
+
+    Args:
+        pages: Iterable of page responses (e.g. from iter_pages)
+        process_page (callable): Turns one page into processed data (tables and records)
+        sync_page (callable): Writes processed data to the database and returns its sync results;
+            results marked pending mean the page is written later, by flush
+        label (str): Record type used in log messages
+        flush (callable): Writes the pages still pending after the last one and returns their sync results
+
+    Returns:
+        dict: Sync results merged over all pages, or None if any page failed
+    """
+    totals = new_sync_results()
+    page_number = 0
+
+    try:
+        for page in pages:
+            page_number += 1
+
+            if not page.get('member'):
+                logger.info(f"No {label} records on page {page_number}")
+                continue
+
+            processed_data = process_page(page)
+            if not processed_data:
+                logger.error(f"Failed to process {label} page {page_number}")
+                return None
+
+            page_results = sync_page(processed_data)
+            if not page_results:
+                logger.error(f"Failed to sync {label} page {page_number} to database")
+                return None
+
+            if page_results.get('pending'):
+                logger.info(f"Processed {label} page {page_number}, waiting for the next bulk transaction")
+                continue
+
+            merge_sync_results(totals, page_results)
+            logger.info(f"Committed {label} page {page_number} ({sum(page_results['total'].values())} records)")
+
+        if flush:
+            flushed = flush()
+            if not flushed:
+                logger.error(f"Failed to sync {label} pages to database")
+                return None
+            merge_sync_results(totals, flushed)
+
+    except PageFetchError as e:
+        logger.error(f"Failed to fetch {label} data: {e}")
+        return None
+
+    logger.info(f"Synced {page_number} {label} page(s), {sum(totals['total'].values())} records")
+    return totals
+
+def new_sync_results():
+    """Create an empty sync results structure (same shape as sync_to_database returns)."""
+    return {
+        'inserted': defaultdict(int),
+        'updated': defaultdict(int),
+        'unchanged': defaultdict(int),
+        'errors': defaultdict(int),
+        'total': defaultdict(int)
+    }
+
+def merge_sync_results(totals, page_results):
+    """Add the counts for one page to the running totals."""
+    for key in ('inserted', 'updated', 'unchanged', 'errors', 'total'):
+        for table, count in page_results.get(key, {}).items():
+            totals[key][table] += count
+    return totals
+
+def summarize_sync_results(sync_results):
+    """Build the sync_status message for a set of sync results."""
+    total_records = sum(sync_results['total'].values())
+    new_records = sum(sync_results['inserted'].values())
+    updated_records = sum(sync_results['updated'].values())
+    unchanged_records = sum(sync_results.get('unchanged', {}).values())
+
+    return (f"Existing records: {total_records - new_records}, Newly added: {new_records}, "
+            f"Updated: {updated_records}, Unchanged: {unchanged_records}, Total: {total_records}")
+
+def record_sync_status(db_path, endpoint, record_count, message, status='success', sync_started=None):
+    """
+    Write the sync_status row for an endpoint.
+
+    Called once all pages are committed, so last_sync is the start of the last
+    complete sync. It is shown to users; incremental syncs start from the
+    changedate watermarks in sync_watermarks instead.
+    """
+    last_sync = sync_started or datetime.datetime.now().isoformat()
+
+    try:
+        conn = connect(db_path)
+        conn.execute(
+            "INSERT OR REPLACE INTO sync_status (endpoint, last_sync, record_count, status, message) VALUES (?, ?, ?, ?, ?)",
+            (endpoint, last_sync, record_count, status, message)
+        )
+        conn.commit()
+        conn.close()
+        logger.info(f"Recorded {status} sync status for {endpoint}: {message}")
+    except Exception as e:
+        logger.error(f"Error recording sync status for {endpoint}: {e}")
+
+def record_sync_failure(db_path, endpoint, message):
+    """
+    Mark an endpoint's sync as failed.
+
+    last_sync and record_count are left as they were, so they still describe
+    the last complete sync.
+    """
+    try:
+        conn = connect(db_path)
+        conn.execute(
+            "INSERT INTO sync_status (endpoint, last_sync, record_count, status, message) VALUES (?, NULL, 0, 'error', ?) "
+            "ON CONFLICT (endpoint) DO UPDATE SET status = excluded.status, message = excluded.message",
+            (endpoint, message)
+        )
+        conn.commit()
+        conn.close()
+        logger.info(f"Recorded error sync status for {endpoint}: {message}")
+    except Exception as e:
+        logger.error(f"Error recording sync status for {endpoint}: {e}")
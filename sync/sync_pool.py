@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Pool of sync worker processes.
+
+Each sync job runs in its own sync_worker.py process:
+- Job parameters are passed explicitly (JSON on stdin), so concurrent jobs never
+  share environment variables or sys.argv
+- Fetching and parsing pages happens outside the web server's process, so it
+  does not compete with web requests for the GIL
+- A job can be cancelled by terminating its process; every committed page has
+  its checkpoint, so the next run of the job resumes where it stopped
+
+The pool runs at most max_workers jobs at once and queues at most max_queued
+more; further submissions are refused with SyncQueueFull. Events from the
+workers (see sync_worker) are passed to on_event(job_id, event) together with
+the pool's own events:
+    {"event": "queued", "position"}
+    {"event": "finished", "returncode", "cancelled", "result"}
+"""
+import os
+import sys
+import json
+import logging
+import threading
+import subprocess
+from collections import deque
+
+logger = logging.getLogger('sync_pool')
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sync_worker.py')
+
+class SyncQueueFull(Exception):
+    """Raised when a job is submitted while the queue of waiting jobs is full."""
+
+class SyncWorkerPool:
+    """
+    Run sync jobs in separate processes with a bounded queue.
+
+    The pool handles:
+    - Starting queued jobs as running jobs finish, up to max_workers at once
+    - Reading each worker's JSON events and passing them to on_event
+    - Cancelling queued jobs and terminating running ones
+    """
+
+    def __init__(self, max_workers=2, max_queued=8, on_event=None, python=None):
+        """
+        Initialize the pool.
+
+        Args:
+            max_workers (int): Maximum number of jobs running at once
+            max_queued (int): Maximum number of jobs waiting to run
+            on_event (callable): Called as on_event(job_id, event) for every job event
+            python (str): Python interpreter for the workers (defaults to this one)
+        """
+        self.max_workers = max(1, max_workers)
+        self.max_queued = max(0, max_queued)
+        self.on_event = on_event
+        self.python = python or sys.executable
+
+        self._pending = deque()
+        self._running = {}
+        self._cancelled = set()
+        self._lock = threading.Lock()
+
+    def submit(self, job_id, job):
+        """
+        Queue a job.
+
+        Args:
+            job_id (str): Unique ID of the job (e.g. the sync task ID)
+            job (dict): Job parameters (see sync_worker)
+
+        Raises:
+            SyncQueueFull: If max_queued jobs are already waiting
+        """
+        with self._lock:
+            if len(self._running) >= self.max_workers and len(self._pending) >= self.max_queued:
+                raise SyncQueueFull(f"{len(self._pending)} sync jobs are already waiting")
+
+            self._pending.append((job_id, job))
+            position = len(self._pending)
+            self._start_ready()
+            queued = any(pending_id == job_id for pending_id, _ in self._pending)
+
+        if queued:
+            self._emit(job_id, {'event': 'queued', 'position': position})
+
+    def cancel(self, job_id):
+        """
+        Cancel a queued or running job.
+
+        Returns:
+            bool: True if the job was queued or running
+        """
+        with self._lock:
+            for index, (pending_id, _) in enumerate(self._pending):
+                if pending_id == job_id:
+                    del self._pending[index]
+                    break
+            else:
+                process = self._running.get(job_id)
+                if not process:
+                    return False
+
+                logger.info(f"Terminating sync job {job_id} (pid {process.pid})")
+                self._cancelled.add(job_id)
+                process.terminate()
+                return True
+
+        self._emit(job_id, {'event': 'finished', 'returncode': None, 'cancelled': True, 'result': None})
+        return True
+
+    def get_state(self):
+        """Get the IDs of the running and queued jobs."""
+        with self._lock:
+            return {
+                'running': list(self._running),
+                'queued': [job_id for job_id, _ in self._pending],
+                'max_workers': self.max_workers,
+                'max_queued': self.max_queued
+            }
+
+    def shutdown(self):
+        """Cancel every queued and running job."""
+        with self._lock:
+            job_ids = [job_id for job_id, _ in self._pending] + list(self._running)
+        for job_id in job_ids:
+            self.cancel(job_id)
+
+    def _start_ready(self):
+        """Start queued jobs while there are free workers (called with the lock held)."""
+        while self._pending and len(self._running) < self.max_workers:
+            job_id, job = self._pending.popleft()
+
+            try:
+                process = subprocess.Popen(
+                    [self.python, WORKER_SCRIPT],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    cwd=os.path.dirname(WORKER_SCRIPT),
+                    text=True,
+                    bufsize=1
+                )
+                process.stdin.write(json.dumps(job))
+                process.stdin.close()
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not start sync job {job_id}: {e}")
+                threading.Thread(target=self._emit, args=(job_id, {
+                    'event': 'finished', 'returncode': None, 'cancelled': False,
+                    'result': {'success': False, 'error': f'Could not start sync worker: {e}'}
+                }), daemon=True).start()
+                continue
+
+            logger.info(f"Started sync job {job_id} (pid {process.pid})")
+            self._running[job_id] = process
+            threading.Thread(target=self._read_events, args=(job_id, process),
+                             name=f'sync-job-{job_id}', daemon=True).start()
+
+    def _read_events(self, job_id, process):
+        """Pass a worker's events on until it exits, then start the next queued job."""
+        result = None
+        for line in process.stdout:
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                event = json.loads(line)
+            except ValueError:
+                # Anything not written as an event (e.g. an interpreter traceback)
+                event = {'event': 'log', 'level': 'error', 'logger': 'sync_worker', 'text': line}
+
+            if event.get('event') == 'result':
+                result = event.get('result')
+            self._emit(job_id, event)
+
+        returncode = process.wait()
+
+        with self._lock:
+            self._running.pop(job_id, None)
+            cancelled = job_id in self._cancelled
+            self._cancelled.discard(job_id)
+            self._start_ready()
+
+        logger.info(f"Sync job {job_id} finished with exit code {returncode}" + (" (cancelled)" if cancelled else ""))
+        self._emit(job_id, {'event': 'finished', 'returncode': returncode, 'cancelled': cancelled, 'result': result})
+
+    def _emit(self, job_id, event):
+        """Pass an event to the callback."""
+        if not self.on_event:
+            return
+        try:
+            self.on_event(job_id, event)
+        except Exception as e:
+            logger.warning(f"Sync event callback failed for {job_id}: {e}")
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Reconciliation of local rows against a complete read of a query.
+
+Upserts alone never remove anything: a work order that is closed or an
+inventory record that is removed in Maximo simply stops being returned, and
+its local row stays forever. After a query has been read to the end (a full
+read, not an incremental one), the sync engine:
+1. Selects the local rows the query covers (its scope: site, partition values, ...)
+2. Finds the rows whose keys were not returned by Maximo
+3. Purges them (with their child rows) or marks them _sync_status='deleted'
+4. Records a tombstone for each one in sync_tombstone
+
+An incremental read of a partitioned mapping is not filtered on the partition
+values, so it also returns the records that left them (e.g. a completed work
+order); their local rows are removed the same way (find_rows).
+
+Tombstones let later consumers (background refresh, offline search) tell a
+row that left the data set from one that was never synced.
+"""
+import json
+import logging
+import datetime
+
+logger = logging.getLogger('sync_reconcile')
+
+# SQLite's default limit on variables per statement
+MAX_VARIABLES = 999
+
+TOMBSTONE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sync_tombstone (
+    table_name TEXT NOT NULL,
+    row_key TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    site TEXT NOT NULL DEFAULT '',
+    action TEXT NOT NULL,
+    detected_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (table_name, row_key)
+)
+'''
+
+def ensure_tombstone_table(conn):
+    """Create the sync_tombstone table in databases created before it existed."""
+    conn.execute(TOMBSTONE_SCHEMA)
+    conn.commit()
+
+def find_missing_rows(cursor, table, key_columns, extra_columns, scope, seen_keys):
+    """
+    Find the local rows in a query's scope whose keys were not received.
+
+    Args:
+        cursor: SQLite cursor
+        table (str): Table to reconcile
+        key_columns (list): Key columns of the table
+        extra_columns (list): Other columns to return (e.g. the ones child rows refer to)
+        scope (list): (SQL condition, parameters) pairs selecting the rows the query covers
+        seen_keys (set): Key tuples received from Maximo
+
+    Returns:
+        list: (rowid, {column: value}) for every missing row
+    """
+    columns = list(key_columns) + [column for column in extra_columns if column not in key_columns]
+    where = ' AND '.join(condition for condition, _ in scope) or '1'
+    params = [param for _, condition_params in scope for param in condition_params]
+
+    cursor.execute(f"SELECT rowid, {', '.join(columns)} FROM {table} WHERE {where}", params)
+
+    missing = []
+    key_count = len(key_columns)
+    for row in cursor.fetchall():
+        if tuple(row[1:key_count + 1]) not in seen_keys:
+            missing.append((row[0], dict(zip(columns, row[1:]))))
+
+    return missing
+
+def find_rows(cursor, table, key_columns, extra_columns, keys):
+    """
+    Find the local rows with the given keys.
+
+    Args:
+        cursor: SQLite cursor
+        table (str): Table to look in
+        key_columns (list): Key columns of the table
+        extra_columns (list): Other columns to return (e.g. the ones child rows refer to)
+        keys (set): Key tuples to find
+
+    Returns:
+        list: (rowid, {column: value}) for every row found
+    """
+    columns = list(key_columns) + [column for column in extra_columns if column not in key_columns]
+    condition = ' AND '.join(f"{column} = ?" for column in key_columns)
+
+    rows = []
+    for key in keys:
+        for row in cursor.execute(f"SELECT rowid, {', '.join(columns)} FROM {table} WHERE {condition}", key):
+            rows.append((row[0], dict(zip(columns, row[1:]))))
+
+    return rows
+
+def remove_rows(cursor, table, rows, children, mode='purge'):
+    """
+    Purge or mark missing rows, together with their child rows when purging.
+
+    Args:
+        cursor: SQLite cursor
+        table (str): Table the rows belong to
+        rows (list): (rowid, {column: value}) from find_missing_rows or find_rows
+        children (list): (child table, {child column: parent column}) for the table's children
+        mode (str): 'purge' deletes the rows, 'mark' sets _sync_status to 'deleted'
+    """
+    rowids = [rowid for rowid, _ in rows]
+    has_content_hash = mode == 'mark' and any(
+        row[1] == '_content_hash' for row in cursor.execute(f"PRAGMA table_info({table})"))
+
+    for start in range(0, len(rowids), MAX_VARIABLES):
+        batch = rowids[start:start + MAX_VARIABLES]
+        placeholders = ', '.join('?' * len(batch))
+        if mode == 'mark':
+            # Clearing the content hash makes the row be written again if Maximo returns it
+            clear_hash = ", _content_hash = NULL" if has_content_hash else ""
+            cursor.execute(f"UPDATE {table} SET _sync_status = 'deleted'{clear_hash} WHERE rowid IN ({placeholders})", batch)
+        else:
+            cursor.execute(f"DELETE FROM {table} WHERE rowid IN ({placeholders})", batch)
+
+    if mode != 'purge':
+        return
+
+    for child_table, parent_fields in children:
+        child_columns = list(parent_fields)
+        condition = ' AND '.join(f"{column} = ?" for column in child_columns)
+        cursor.executemany(
+            f"DELETE FROM {child_table} WHERE {condition}",
+            [tuple(values[parent_fields[column]] for column in child_columns) for _, values in rows]
+        )
+
+def record_tombstones(cursor, endpoint, table, key_columns, rows, site=None, action='purged'):
+    """
+    Record a tombstone for each removed row (the caller commits).
+
+    Args:
+        cursor: SQLite cursor
+        endpoint (str): API endpoint name
+        table (str): Table the rows were removed from
+        key_columns (list): Key columns of the table
+        rows (list): (rowid, {column: value}) from find_missing_rows or find_rows
+        site (str): Site the query was filtered by
+        action (str): 'purged' or 'marked'
+    """
+    detected_at = datetime.datetime.now().isoformat()
+    cursor.executemany(
+        "INSERT INTO sync_tombstone (table_name, row_key, endpoint, site, action, detected_at) "
+        "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (table_name, row_key) DO UPDATE SET "
+        "endpoint = excluded.endpoint, site = excluded.site, action = excluded.action, "
+        "detected_at = excluded.detected_at",
+        [(table, json.dumps({column: values[column] for column in key_columns}, sort_keys=True),
+          endpoint, site or '', action, detected_at) for _, values in rows]
+    )
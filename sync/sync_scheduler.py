@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Background scheduler for incremental syncs.
+
+Keeps the offline database warm without anyone starting a sync. Each schedule
+entry is one endpoint (optionally for one site) with its own interval:
+- Runs are spread with random jitter, so entries with the same interval do not
+  all start at the same moment
+- After a failure (e.g. Maximo unreachable) the entry backs off exponentially,
+  up to max_backoff, and returns to its interval after the next success
+- At most max_concurrent scheduled syncs run at once
+- While is_busy() reports heavy interactive traffic no new sync is started;
+  they start once the traffic drops
+
+The scheduler does not run syncs itself: submit(endpoint, site, on_finished)
+starts one (in the web server, as a sync task in the worker pool) and returns
+False if it could not start now (not logged in, queue full, the same endpoint
+already syncing). The entry is then retried after retry_seconds without
+counting as a failure. on_finished(success) is called when a sync that
+started ends; it is never called for one submit() reported as not started.
+
+request(endpoint, site) asks for a sync outside the schedule (e.g. a reader
+found stale data): the matching entry becomes due now, or a one-off entry is
+added, so the sync still waits for a free slot and for the traffic to drop.
+"""
+import time
+import random
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger('sync_scheduler')
+
+# Default seconds between incremental syncs of each endpoint (inventory is always
+# read in full, see sync_mappings)
+DEFAULT_INTERVALS = {
+    'wodetail': 15 * 60,
+    'inventory': 4 * 3600,
+    'assets': 3 * 3600,
+    'locations': 6 * 3600,
+    'peruser': 6 * 3600,
+    'domain': 24 * 3600
+}
+
+def parse_schedule(text, defaults=None):
+    """
+    Parse a schedule such as "wodetail=900, inventory@KDFAC=3600".
+
+    Args:
+        text (str): Comma-separated endpoint[@site]=seconds entries (empty for the defaults)
+        defaults (dict): {endpoint: seconds} used when text is empty
+
+    Returns:
+        list: Schedule entries ({'endpoint', 'site', 'interval'})
+
+    Raises:
+        ValueError: If an entry is not endpoint[@site]=seconds
+    """
+    if not text or not text.strip():
+        return [{'endpoint': endpoint, 'site': None, 'interval': interval}
+                for endpoint, interval in (defaults or DEFAULT_INTERVALS).items()]
+
+    schedules = []
+    for item in text.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, seconds = item.partition('=')
+        endpoint, _, site = name.strip().partition('@')
+        if not endpoint or not seconds.strip().isdigit():
+            raise ValueError(f"Invalid sync schedule entry '{item}', expected endpoint[@site]=seconds")
+        schedules.append({'endpoint': endpoint, 'site': site or None, 'interval': int(seconds)})
+    return schedules
+
+class TrafficMeter:
+    """Count interactive requests over a sliding window."""
+
+    def __init__(self, window_seconds=60, clock=time.monotonic):
+        self.window_seconds = window_seconds
+        self.clock = clock
+        self._times = deque()
+        self._lock = threading.Lock()
+
+    def record(self):
+        """Count one request."""
+        now = self.clock()
+        with self._lock:
+            self._times.append(now)
+            self._expire(now)
+
+    def count(self):
+        """Get the number of requests in the window."""
+        with self._lock:
+            self._expire(self.clock())
+            return len(self._times)
+
+    def _expire(self, now):
+        while self._times and self._times[0] <= now - self.window_seconds:
+            self._times.popleft()
+
+class SyncScheduler:
+    """
+    Start incremental syncs on per-endpoint intervals in a background thread.
+
+    The scheduler handles:
+    - Jittered intervals and the first run shortly after start
+    - Exponential backoff after failed syncs
+    - The cap on concurrent scheduled syncs
+    - Pausing while interactive traffic is heavy
+    """
+
+    def __init__(self, schedules, submit, max_concurrent=1, jitter=0.1, initial_delay=60,
+                 backoff_base=60, max_backoff=3600, retry_seconds=60, is_busy=None, clock=time.monotonic):
+        """
+        Initialize the scheduler (nothing runs until start()).
+
+        Args:
+            schedules (list): Entries ({'endpoint', 'site', 'interval'}), e.g. from parse_schedule
+            submit (callable): submit(endpoint, site, on_finished) -> bool, see the module docstring
+            max_concurrent (int): Maximum number of scheduled syncs running at once
+            jitter (float): Random spread of every delay, as a fraction of it (0.1 = +/-10%)
+            initial_delay (float): Seconds before the first runs (spread over up to twice this)
+            backoff_base (float): Delay after a first failure, doubled with each further failure
+            max_backoff (float): Longest delay after failures
+            retry_seconds (float): Delay before retrying an entry that could not start or was paused
+            is_busy (callable): Returns True while interactive traffic is too heavy for a sync
+            clock (callable): Monotonic clock in seconds
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.jitter = jitter
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.retry_seconds = retry_seconds
+        self.submit = submit
+        self.is_busy = is_busy
+        self.clock = clock
+
+        now = clock()
+        self.entries = [self._new_entry(schedule['endpoint'], schedule.get('site'), schedule['interval'],
+                                        now + initial_delay * (1 + random.random()))
+                        for schedule in schedules]
+
+        self.paused = False
+        self._stopped = False
+        self._thread = None
+        self._lock = threading.Condition()
+
+    @staticmethod
+    def _new_entry(endpoint, site, interval, next_run):
+        """Build a schedule entry (interval None for a one-off run)."""
+        return {
+            'endpoint': endpoint,
+            'site': site,
+            'interval': interval,
+            'next_run': next_run,
+            'failures': 0,
+            'running': False,
+            'last_run': None,
+            'last_status': None
+        }
+
+    def start(self):
+        """Start the scheduler thread."""
+        with self._lock:
+            if self._thread:
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name='sync-scheduler', daemon=True)
+            self._thread.start()
+
+        logger.info("Sync scheduler started: " + ', '.join(
+            f"{entry['endpoint']}{'@' + entry['site'] if entry['site'] else ''} every {entry['interval']}s"
+            for entry in self.entries))
+
+    def stop(self):
+        """Stop the scheduler thread (running syncs are not affected)."""
+        with self._lock:
+            self._stopped = True
+            thread, self._thread = self._thread, None
+            self._lock.notify_all()
+        if thread:
+            thread.join(5)
+
+    def request(self, endpoint, site=None):
+        """
+        Ask for a sync of an endpoint as soon as a slot is free.
+
+        The entry for the endpoint and site is brought forward to now, unless it
+        is already running or backing off after failures. Without one, a one-off
+        entry is added, removed again once its sync has ended.
+        """
+        now = self.clock()
+        with self._lock:
+            entry = next((entry for entry in self.entries
+                          if entry['endpoint'] == endpoint and entry['site'] == site), None)
+            if entry is None:
+                self.entries.append(self._new_entry(endpoint, site, None, now))
+            elif not entry['running'] and not entry['failures']:
+                entry['next_run'] = min(entry['next_run'], now)
+            self._lock.notify_all()
+
+    def get_state(self):
+        """Get the schedule with each entry's next run, failures and last result."""
+        now = self.clock()
+        with self._lock:
+            return {
+                'running': self._thread is not None,
+                'paused': self.paused,
+                'max_concurrent': self.max_concurrent,
+                'entries': [{
+                    'endpoint': entry['endpoint'],
+                    'site': entry['site'],
+                    'interval': entry['interval'],
+                    'next_run_in': None if entry['running'] else max(0, round(entry['next_run'] - now)),
+                    'failures': entry['failures'],
+                    'in_progress': entry['running'],
+                    'last_status': entry['last_status']
+                } for entry in self.entries]
+            }
+
+    def run_pending(self):
+        """Start the entries that are due now (one pass of the scheduler thread)."""
+        with self._lock:
+            due = self._due_entries()
+
+        for entry in due:
+            self._start(entry)
+
+    def _run(self):
+        """Start due entries until stopped."""
+        while True:
+            with self._lock:
+                if self._stopped:
+                    return
+
+            self.run_pending()
+
+            with self._lock:
+                if self._stopped:
+                    return
+                waits = [entry['next_run'] - self.clock() for entry in self.entries if not entry['running']]
+                self._lock.wait(min(max(0.1, min(waits)), self.retry_seconds) if waits else self.retry_seconds)
+
+    def _due_entries(self):
+        """Get the entries to start now, earliest first (called with the lock held)."""
+        now = self.clock()
+        free = self.max_concurrent - sum(1 for entry in self.entries if entry['running'])
+        due = sorted((entry for entry in self.entries if not entry['running'] and entry['next_run'] <= now),
+                     key=lambda entry: entry['next_run'])
+        if free <= 0 or not due:
+            return []
+
+        busy = bool(self.is_busy and self.is_busy())
+        if busy != self.paused:
+            self.paused = busy
+            logger.info("Heavy interactive traffic, scheduled syncs paused" if busy else "Scheduled syncs resumed")
+        if busy:
+            for entry in due:
+                entry['next_run'] = now + self._spread(self.retry_seconds)
+            return []
+
+        due = due[:free]
+        for entry in due:
+            entry['running'] = True
+        return due
+
+    def _start(self, entry):
+        """Submit one entry's sync."""
+        label = entry['endpoint'] + (f"@{entry['site']}" if entry['site'] else '')
+        try:
+            started = self.submit(entry['endpoint'], entry['site'], lambda success: self._finished(entry, success))
+        except Exception as e:
+            logger.warning(f"Could not start scheduled sync of {label}: {e}")
+            started = False
+
+        if started:
+            logger.info(f"Started scheduled sync of {label}")
+            return
+
+        with self._lock:
+            entry['running'] = False
+            entry['next_run'] = self.clock() + self._spread(self.retry_seconds)
+
+    def _finished(self, entry, success):
+        """Schedule an entry's next run after its sync ended."""
+        with self._lock:
+            entry['running'] = False
+            entry['last_run'] = self.clock()
+            entry['last_status'] = 'completed' if success else 'failed'
+
+            if entry['interval'] is None:
+                # A requested one-off run is not retried; readers ask again if the data stays stale
+                self.entries.remove(entry)
+                self._lock.notify_all()
+                return
+
+            if success:
+                entry['failures'] = 0
+                delay = entry['interval']
+            else:
+                entry['failures'] += 1
+                delay = min(self.max_backoff, self.backoff_base * 2 ** (entry['failures'] - 1))
+                logger.warning(f"Scheduled sync of {entry['endpoint']} failed {entry['failures']} time(s), "
+                               f"retrying in {delay:.0f}s")
+
+            entry['next_run'] = entry['last_run'] + self._spread(delay)
+            self._lock.notify_all()
+
+    def _spread(self, delay):
+        """Add the random jitter to a delay."""
+        return delay * (1 + random.uniform(-self.jitter, self.jitter))
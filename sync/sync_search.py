@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Full-text search index over synced rows.
+
+A mapping with a search spec ({'table', 'key', 'fields'}) gets an FTS5 table
+holding the text fields of its parent table, with the row's integer key as
+the FTS rowid (e.g. workorder_search over workorder description and long
+description, keyed by workorderid). Searches match words in the index and join
+back to the parent table on the key instead of scanning it with LIKE '%x%'.
+
+The index is brought up to date at the end of every sync:
+1. Index rows whose parent row is gone (purged by reconciliation) are deleted
+2. Parent rows whose _last_sync is at or after the newest one indexed (their
+   content changed, see sync_writer's content hash) are indexed again
+
+An empty index is filled from the whole table, so the first sync after the
+index was added indexes everything. When SQLite is built without FTS5 no index
+is created and searches keep using LIKE.
+"""
+import time
+import sqlite3
+import logging
+
+logger = logging.getLogger('sync_search')
+
+def ensure_search_index(conn, mapping):
+    """
+    Create the search index table of a mapping if it does not exist yet.
+
+    Args:
+        conn: SQLite connection
+        mapping (dict): Endpoint mapping (see sync_mappings)
+
+    Returns:
+        bool: True if the index table exists
+    """
+    search = mapping.get('search')
+    if not search:
+        return False
+
+    # Prefix indexes make the "word*" queries of the search box cheap
+    try:
+        conn.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {search['table']} USING fts5("
+            f"{', '.join(search['fields'])}, _last_sync UNINDEXED, "
+            f"tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        conn.commit()
+    except sqlite3.OperationalError as e:
+        logger.warning(f"Could not create the {search['table']} search index, searches use LIKE: {e}")
+        return False
+    return True
+
+def update_search_index(conn, mapping):
+    """
+    Bring the search index of a mapping up to date with its parent table.
+
+    Args:
+        conn: SQLite connection
+        mapping (dict): Endpoint mapping (see sync_mappings)
+
+    Returns:
+        int: Number of rows (re)indexed
+    """
+    search = mapping.get('search')
+    if not search:
+        return 0
+
+    table, key = search['table'], search['key']
+    source = mapping['table']['name']
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+    if not exists:
+        return 0
+
+    source_columns = {row[1] for row in conn.execute(f"PRAGMA table_info({source})")}
+    # Fields not in the local table yet (e.g. a column added to the mapping later) are indexed empty
+    fields = ', '.join(field if field in source_columns else 'NULL' for field in search['fields'])
+    started = time.perf_counter()
+
+    cursor = conn.cursor()
+    try:
+        indexed_through = cursor.execute(f"SELECT MAX(_last_sync) FROM {table}").fetchone()[0]
+        if indexed_through is None:
+            cursor.execute(f"DELETE FROM {table}")
+            changed, params = '1', []
+        else:
+            cursor.execute(f"DELETE FROM {table} WHERE rowid NOT IN (SELECT {key} FROM {source})")
+            changed, params = '_last_sync >= ?', [indexed_through]
+            cursor.execute(f"DELETE FROM {table} WHERE rowid IN (SELECT {key} FROM {source} WHERE {changed})", params)
+
+        cursor.execute(
+            f"INSERT INTO {table} (rowid, {', '.join(search['fields'])}, _last_sync) "
+            f"SELECT {key}, {fields}, _last_sync FROM {source} WHERE {changed}",
+            params
+        )
+        indexed = cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    if indexed:
+        logger.info(f"Indexed {indexed} {source} rows for search in {time.perf_counter() - started:.1f}s")
+    return indexed
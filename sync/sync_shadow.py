@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Full syncs into a shadow database.
+
+A full sync written straight into maximo.db leaves readers looking at parent
+tables that are already refreshed next to child tables that are not, and its
+write transactions compete with them for locks. A shadow sync instead:
+1. Creates maximo.db.shadow with the live database's schema. The tables the
+   sync writes start empty (so the load runs in bulk-load mode, see
+   sync_bulkload); every other table is copied over
+2. Runs the full sync against the shadow file while readers keep using the
+   untouched live database
+3. Copies the local-only tables again (e.g. the sync task history written
+   meanwhile) and renames the shadow file over maximo.db, then the pooled
+   connections are re-opened on the new file (OfflineDatabase.swap_in)
+
+Readers always see one complete snapshot: the old database or the new one.
+A sync that fails leaves the live database untouched and the shadow is removed.
+
+Virtual tables (the FTS5 search indexes, see sync_search) are created from
+their own statement and copied through the tables holding their data.
+
+The swap needs every connection to the database to be closed: it is done by
+the process owning the connection pool (the web server, or the command line
+when no server is running) and is refused while another process has the
+database open.
+"""
+import os
+import re
+import sqlite3
+import logging
+from sync_db import get_database
+
+logger = logging.getLogger('sync_shadow')
+
+SHADOW_SUFFIX = '.shadow'
+
+# Sync bookkeeping written by the engines themselves; kept from the shadow at the swap
+SYNC_STATE_TABLES = ('sync_status', 'sync_watermark', 'sync_checkpoint', 'sync_tombstone', 'sync_deferred_index')
+
+# Tables a virtual table keeps its data in, named <virtual table>_<suffix> (FTS5, FTS4, R*Tree)
+VIRTUAL_TABLE_SUFFIXES = ('_data', '_idx', '_content', '_docsize', '_config',
+                          '_segments', '_segdir', '_stat', '_node', '_rowid', '_parent')
+
+def get_shadow_path(db_path):
+    """Get the path of the shadow database of a database file."""
+    return db_path + SHADOW_SUFFIX
+
+def get_mapping_tables(mapping):
+    """
+    Get every table a sync mapping writes to.
+
+    Args:
+        mapping (dict): Endpoint mapping (see sync_mappings)
+
+    Returns:
+        set: Table names of the parent, its children, their derived rows and the search index
+    """
+    tables = {mapping['search']['table']} if mapping.get('search') else set()
+    specs = [mapping['table']]
+    while specs:
+        spec = specs.pop()
+        tables.add(spec['name'])
+        tables.update(derived['table'] for derived in spec.get('derived', []))
+        specs.extend(spec.get('children', []))
+    return tables
+
+def discard_shadow(shadow_path):
+    """Remove a shadow database and its journal files."""
+    for path in (shadow_path, shadow_path + '-wal', shadow_path + '-shm', shadow_path + '-journal'):
+        if os.path.exists(path):
+            os.remove(path)
+
+def get_schema(cursor, schema='main'):
+    """
+    Get the schema objects of a database, tables first.
+
+    The tables holding a virtual table's data are left out: creating the
+    virtual table creates them.
+
+    Returns:
+        list: (type, name, tbl_name, sql) of every table, index, view and trigger
+    """
+    rows = cursor.execute(
+        f"SELECT type, name, tbl_name, sql FROM {schema}.sqlite_master "
+        f"WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'"
+    ).fetchall()
+    virtual = [row[1] for row in rows if is_virtual(row[3])]
+    rows = [row for row in rows if not any(row[1] in get_data_table_names(name) for name in virtual)]
+    return sorted(rows, key=lambda row: row[0] != 'table')
+
+def is_virtual(sql):
+    """Check whether a CREATE statement creates a virtual table."""
+    return re.match(r'\s*CREATE\s+VIRTUAL\s+TABLE\b', sql, flags=re.IGNORECASE) is not None
+
+def get_data_table_names(virtual_table):
+    """Get the names the tables holding a virtual table's data can have."""
+    return {virtual_table + suffix for suffix in VIRTUAL_TABLE_SUFFIXES}
+
+def copy_table(cursor, name, sql, source, target):
+    """
+    Replace the rows of a table in one attached schema with those of another.
+
+    A virtual table is copied through its data tables, so its index is not built again.
+    """
+    tables = [name]
+    if is_virtual(sql):
+        names = get_data_table_names(name)
+        tables = [row[0] for row in cursor.execute(f"SELECT name FROM {source}.sqlite_master WHERE type = 'table'")
+                  if row[0] in names]
+
+    for table in tables:
+        cursor.execute(f"DELETE FROM {target}.{table}")
+        cursor.execute(f"INSERT INTO {target}.{table} SELECT * FROM {source}.{table}")
+
+def qualify(sql, schema):
+    """Make a CREATE statement create its object in another attached schema."""
+    return re.sub(r'^(\s*CREATE\s+(?:UNIQUE\s+|VIRTUAL\s+)?(?:TABLE|INDEX|VIEW|TRIGGER)\s+(?:IF\s+NOT\s+EXISTS\s+)?)',
+                  rf'\g<1>{schema}.', sql, count=1, flags=re.IGNORECASE)
+
+def create_shadow(db_path, synced_tables):
+    """
+    Create the shadow database for a full sync.
+
+    Args:
+        db_path (str): Path to the live SQLite database
+        synced_tables (set): Tables the sync writes (left empty in the shadow)
+
+    Returns:
+        str: Path of the shadow database
+    """
+    shadow_path = get_shadow_path(db_path)
+    discard_shadow(shadow_path)
+
+    conn = sqlite3.connect(shadow_path)
+    try:
+        conn.execute("ATTACH DATABASE ? AS live", (db_path,))
+        cursor = conn.cursor()
+        copied = 0
+
+        # One transaction: every copied table comes from the same snapshot of the live database
+        cursor.execute("BEGIN")
+        for object_type, name, _, sql in get_schema(cursor, 'live'):
+            cursor.execute(sql)
+            # Checkpoints belong to the live database's own queries
+            if object_type == 'table' and name not in synced_tables and name != 'sync_checkpoint':
+                copy_table(cursor, name, sql, 'live', 'main')
+                copied += 1
+
+        # Planner statistics of the copied tables (the loaded ones are analyzed after the load)
+        if cursor.execute("SELECT 1 FROM live.sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+            cursor.execute("ANALYZE main.sqlite_master")
+            cursor.execute("DELETE FROM main.sqlite_stat1")
+            cursor.execute(f"INSERT INTO main.sqlite_stat1 SELECT * FROM live.sqlite_stat1 "
+                           f"WHERE tbl NOT IN ({', '.join('?' * len(synced_tables))})", list(synced_tables))
+        conn.commit()
+        conn.execute("DETACH DATABASE live")
+    except Exception:
+        conn.close()
+        discard_shadow(shadow_path)
+        raise
+    conn.close()
+
+    logger.info(f"Created shadow database {shadow_path} ({len(synced_tables)} tables to load, {copied} copied)")
+    return shadow_path
+
+def refresh_shadow(conn, shadow_path, synced_tables):
+    """
+    Copy the local-only tables of the live database into the shadow again.
+
+    Called just before the swap, so rows written to the live database while the
+    sync ran (e.g. the sync task history) are not lost.
+
+    Args:
+        conn: Writer connection to the live database
+        shadow_path (str): Path of the shadow database
+        synced_tables (set): Tables the sync wrote (kept from the shadow)
+    """
+    conn.execute("ATTACH DATABASE ? AS shadow", (shadow_path,))
+    try:
+        cursor = conn.cursor()
+        shadow_tables = {row[1] for row in get_schema(cursor, 'shadow') if row[0] == 'table'}
+        skipped = set(synced_tables) | set(SYNC_STATE_TABLES)
+
+        for object_type, name, _, sql in get_schema(cursor):
+            if object_type != 'table' or name in skipped:
+                continue
+            if name not in shadow_tables:
+                cursor.execute(qualify(sql, 'shadow'))
+            copy_table(cursor, name, sql, 'main', 'shadow')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute("DETACH DATABASE shadow")
+
+def swap_in_shadow(db_path, shadow_path, synced_tables, timeout=30):
+    """
+    Replace the live database with a completed shadow database.
+
+    Args:
+        db_path (str): Path to the live SQLite database
+        shadow_path (str): Path of the shadow database
+        synced_tables (set): Tables the sync wrote
+        timeout (float): Seconds to wait for readers of the live database
+
+    Raises:
+        TimeoutError, sqlite3.Error, OSError: If the swap is not possible; the
+            live database is left as it was and the shadow is removed
+    """
+    try:
+        get_database(db_path).swap_in(
+            shadow_path,
+            prepare=lambda conn: refresh_shadow(conn, shadow_path, synced_tables),
+            timeout=timeout
+        )
+    except Exception:
+        discard_shadow(shadow_path)
+        raise
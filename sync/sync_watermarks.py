@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Changedate watermarks for incremental syncs.
+
+A watermark is the highest changedate Maximo returned for one query, keyed by:
+- The endpoint
+- The site the query was filtered by
+- The rest of the query's filter (fixed where clauses and partition value)
+
+The next incremental sync of the same endpoint, site and filter only asks for
+records with changedate >= the watermark. Using the server's own changedate
+instead of the local clock means clock skew between the client and Maximo
+cannot hide changes, and switching sites never reuses another site's
+watermark: the first sync of a new site is a full one.
+
+An incremental read only returns records still matching the query, so rows
+that left it (e.g. a work order deleted in Maximo) are only reconciled by a
+full read; partitioned mappings read changes without the partition filter, so
+records that changed to another value are removed at once (see sync_reconcile).
+Mappings with a full_sync_interval make the next sync of a query a
+full read once its last full read (full_read_at) is older than that.
+"""
+import logging
+import datetime
+
+logger = logging.getLogger('sync_watermarks')
+
+WATERMARK_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sync_watermark (
+    endpoint TEXT NOT NULL,
+    site TEXT NOT NULL DEFAULT '',
+    filter TEXT NOT NULL DEFAULT '',
+    changedate TEXT NOT NULL,
+    updated_at TIMESTAMP NOT NULL,
+    full_read_at TIMESTAMP,
+    PRIMARY KEY (endpoint, site, filter)
+)
+'''
+
+def ensure_watermark_table(conn):
+    """Create the sync_watermark table, or add its full_read_at column, in databases created before them."""
+    conn.execute(WATERMARK_SCHEMA)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(sync_watermark)")]
+    if 'full_read_at' not in columns:
+        conn.execute("ALTER TABLE sync_watermark ADD COLUMN full_read_at TIMESTAMP")
+        logger.info("Added full_read_at column to sync_watermark")
+    conn.commit()
+
+def load_watermark(conn, endpoint, site, query_filter, max_full_read_age=None):
+    """
+    Get the watermark of a query.
+
+    Args:
+        conn: SQLite connection
+        endpoint (str): API endpoint name
+        site (str): Site ID (None for endpoints not filtered by site)
+        query_filter (str): Where clause of the query, without the site and changedate
+        max_full_read_age (float): Seconds after the last full read of the query
+            when the watermark is no longer used (None to always use it)
+
+    Returns:
+        str: Highest changedate received by the last complete sync, or None if the
+        query has never been synced to the end or is due a full read
+    """
+    try:
+        row = conn.execute(
+            "SELECT changedate, full_read_at FROM sync_watermark WHERE endpoint = ? AND site = ? AND filter = ?",
+            (endpoint, site or '', query_filter or '')
+        ).fetchone()
+    except Exception as e:
+        logger.warning(f"Could not read sync watermark for {endpoint}: {e}")
+        return None
+
+    if not row:
+        return None
+    changedate, full_read_at = row
+    if max_full_read_age is not None:
+        due = datetime.datetime.now() - datetime.timedelta(seconds=max_full_read_age)
+        if not full_read_at or datetime.datetime.fromisoformat(full_read_at) < due:
+            logger.info(f"Last full sync of {endpoint} is older than {max_full_read_age}s, performing full sync")
+            return None
+    return changedate
+
+def save_watermark(cursor, endpoint, site, query_filter, changedate, full_read=False):
+    """
+    Move a query's watermark forward (the caller commits).
+
+    The watermark never moves back, so a sync that only saw older records
+    cannot cause changes to be fetched twice forever.
+
+    Args:
+        cursor: SQLite cursor
+        endpoint (str): API endpoint name
+        site (str): Site ID (None for endpoints not filtered by site)
+        query_filter (str): Where clause of the query, without the site and changedate
+        changedate (str): Highest changedate received
+        full_read (bool): The query was read and reconciled without a changedate filter
+    """
+    now = datetime.datetime.now().isoformat()
+    cursor.execute(
+        "INSERT INTO sync_watermark (endpoint, site, filter, changedate, updated_at, full_read_at) "
+        "VALUES (?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (endpoint, site, filter) DO UPDATE SET "
+        "changedate = MAX(changedate, excluded.changedate), updated_at = excluded.updated_at, "
+        "full_read_at = COALESCE(excluded.full_read_at, full_read_at)",
+        (endpoint, site or '', query_filter or '', changedate, now, now if full_read else None)
+    )
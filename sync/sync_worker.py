@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Run one sync job in its own process.
+
+Started by SyncWorkerPool (sync_pool). The job's parameters are read as one
+JSON object from stdin, so nothing is passed through environment variables
+or the command line:
+    endpoint     Sync module name (e.g. 'wodetail') or 'all'
+    db_path      Path to the SQLite database
+    force_full   Ignore the changedate watermarks
+    sites        {endpoint: site ID}; endpoints without one use the default site
+    endpoints    Endpoints to sync when endpoint is 'all' (defaults to every endpoint)
+    include_tasks  Sync task work orders too (true) or not (false); defaults to the mapping's choice
+    shadow       Run a full sync into a shadow database (see sync_shadow); the
+                 result's shadow_path and shadow_tables are swapped in by the caller
+    api_key, base_url, username  Maximo connection (default to the .env values)
+
+Progress is written to stdout as one JSON event per line:
+    {"event": "started", "pid"}
+    {"event": "log", "level", "logger", "text"}
+    {"event": "progress", "endpoint", "progress"}
+    {"event": "result", "result"}
+"""
+import os
+import sys
+import json
+import logging
+import threading
+from sync_engine import SyncEngine
+from sync_mappings import MAPPINGS
+from sync_orchestrator import SyncOrchestrator, ENDPOINT_ORDER
+from sync_shadow import create_shadow, discard_shadow, get_mapping_tables
+
+class EventWriter:
+    """Write events to stdout as JSON lines, one writer at a time."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def __call__(self, event, **fields):
+        line = json.dumps(dict(fields, event=event), default=str)
+        with self._lock:
+            self.stream.write(line + '\n')
+            self.stream.flush()
+
+class EventLogHandler(logging.Handler):
+    """Forward log records to the parent as log events."""
+
+    def __init__(self, emit, level=logging.INFO):
+        super().__init__(level)
+        self.emit_event = emit
+
+    def emit(self, record):
+        try:
+            self.emit_event('log', level=record.levelname.lower(), logger=record.name, text=record.getMessage())
+        except Exception:
+            self.handleError(record)
+
+def run_job(job, emit):
+    """
+    Run a sync job.
+
+    Args:
+        job (dict): Job parameters (see the module docstring)
+        emit (callable): Called as emit(event, **fields) for progress events
+
+    Returns:
+        dict: Result of SyncEngine.run or SyncOrchestrator.run
+    """
+    if job.get('shadow'):
+        return run_shadow_job(job, emit)
+
+    endpoint = job['endpoint']
+    sites = job.get('sites') or {}
+    connection = {
+        'api_key': job.get('api_key'),
+        'base_url': job.get('base_url'),
+        'username': job.get('username')
+    }
+
+    def on_progress(current_endpoint, progress):
+        emit('progress', endpoint=current_endpoint, progress=progress)
+
+    if endpoint == 'all':
+        orchestrator = SyncOrchestrator(
+            job['db_path'],
+            endpoints=job.get('endpoints'),
+            force_full=job.get('force_full', False),
+            site=sites.get,
+            max_workers=job.get('max_workers', 4),
+            on_progress=on_progress,
+            **connection
+        )
+        return orchestrator.run()
+
+    if endpoint not in MAPPINGS:
+        return {'success': False, 'endpoint': endpoint, 'error': f'Unknown endpoint: {endpoint}'}
+
+    engine = SyncEngine(MAPPINGS[endpoint], job['db_path'], on_progress=on_progress, **connection)
+    return engine.run(
+        site=sites.get(endpoint),
+        force_full=job.get('force_full', False),
+        include_tasks=job.get('include_tasks')
+    )
+
+def run_shadow_job(job, emit):
+    """
+    Run a job as a full sync into a shadow database.
+
+    Returns:
+        dict: The sync result, with shadow_path and shadow_tables if it succeeded
+    """
+    endpoint = job['endpoint']
+    endpoints = (job.get('endpoints') or ENDPOINT_ORDER) if endpoint == 'all' else [endpoint]
+    unknown = [name for name in endpoints if name not in MAPPINGS]
+    if unknown:
+        return {'success': False, 'endpoint': endpoint, 'error': f"Unknown endpoint: {', '.join(unknown)}"}
+
+    tables = set()
+    for name in endpoints:
+        tables |= get_mapping_tables(MAPPINGS[name])
+
+    shadow_path = create_shadow(job['db_path'], tables)
+    try:
+        result = run_job(dict(job, db_path=shadow_path, force_full=True, shadow=False), emit)
+    except Exception:
+        discard_shadow(shadow_path)
+        raise
+
+    if not result.get('success'):
+        logging.getLogger('sync_worker').warning("Sync failed, the live database is left unchanged")
+        discard_shadow(shadow_path)
+        return result
+
+    return dict(result, shadow_path=shadow_path, shadow_tables=sorted(tables))
+
+def main():
+    """Read the job from stdin, run it and report the result on stdout."""
+    emit = EventWriter(sys.stdout)
+
+    # stdout carries the events, so every log record goes through them
+    root = logging.getLogger()
+    root.handlers = [EventLogHandler(emit)]
+    root.setLevel(logging.INFO)
+
+    try:
+        job = json.load(sys.stdin)
+    except ValueError as e:
+        emit('result', result={'success': False, 'error': f'Invalid job parameters: {e}'})
+        return 1
+
+    emit('started', pid=os.getpid())
+    try:
+        result = run_job(job, emit)
+    except Exception as e:
+        logging.getLogger('sync_worker').exception(f"Sync job failed: {e}")
+        result = {'success': False, 'endpoint': job.get('endpoint'), 'error': str(e)}
+
+    emit('result', result=result)
+    return 0 if result.get('success') else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
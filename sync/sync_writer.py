@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Bulk database writes shared by the sync scripts.
+
+Instead of a SELECT COUNT(*) plus an UPDATE or INSERT per record, rows are:
+1. Written as tuples with a fixed column order, so each INSERT ... ON
+   CONFLICT DO UPDATE statement is built once per table and column set and reused
+2. Written with executemany in batches
+3. Checked for existing keys with one set-based query per batch, so the
+   inserted/updated counts are still reported
+
+Tables with a _content_hash column also get change detection: each row's hash
+of its normalized values is compared with the stored one and unchanged rows are
+not written at all (counted as unchanged), so a repeated sync of the same data
+does close to no write I/O. Child tables written with replace skip the delete
+and insert of every parent whose rows all hash the same as before.
+"""
+import json
+import sqlite3
+import hashlib
+import logging
+
+logger = logging.getLogger('sync_writer')
+
+# Rows per executemany call
+BATCH_SIZE = 500
+
+# Host parameters per statement (SQLite builds before 3.32 default to 999)
+MAX_VARIABLES = 999
+
+# (table, columns, key_fields) -> SQL text, so statements are only built once
+_upsert_statements = {}
+_insert_statements = {}
+
+CONTENT_HASH_COLUMN = '_content_hash'
+
+# Columns left out of the content hash (they change on every write without the record changing)
+HASH_IGNORED_COLUMNS = ('_last_sync', CONTENT_HASH_COLUMN)
+
+def ensure_content_hash_columns(conn, tables):
+    """
+    Add the _content_hash column to synced tables created before it existed.
+
+    Virtual tables (search indexes) are left as they are.
+
+    Args:
+        conn: SQLite connection
+        tables (iterable): Tables the sync writes to
+    """
+    for table in tables:
+        virtual = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ? AND sql LIKE 'CREATE VIRTUAL%'",
+                               (table,)).fetchone()
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+        if columns and not virtual and CONTENT_HASH_COLUMN not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {CONTENT_HASH_COLUMN} TEXT")
+            logger.info(f"Added {CONTENT_HASH_COLUMN} column to {table}")
+    conn.commit()
+
+def ensure_mapping_tables(conn, mapping):
+    """
+    Bring the tables of a sync mapping up to its specs in databases created earlier.
+
+    Creates missing tables from their specs' schema, adds the specs' columns
+    that are missing and creates their indexes (unless a bulk load deferred them).
+
+    Args:
+        conn: SQLite connection
+        mapping (dict): Endpoint mapping (see sync_mappings)
+    """
+    deferred = set()
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sync_deferred_index'").fetchone():
+        deferred = {row[0] for row in conn.execute("SELECT name FROM sync_deferred_index")}
+
+    specs = [mapping['table']]
+    while specs:
+        spec = specs.pop()
+        specs.extend(spec.get('children', []))
+        table = spec['name']
+
+        if spec.get('schema'):
+            exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+            if not exists:
+                conn.executescript(spec['schema'])
+                logger.info(f"Created {table} table")
+
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+        for column, column_type in spec.get('columns', {}).items():
+            if columns and column not in columns:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+                logger.info(f"Added {column} column to {table}")
+
+        for name, definition in spec.get('indexes', {}).items():
+            if columns and name not in deferred:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({definition})")
+    conn.commit()
+
+def normalize_value(value):
+    """Normalize a column value so the same content always hashes the same (e.g. 5.0 and 5)."""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def content_hash(values):
+    """Hash a row's normalized values."""
+    text = json.dumps([normalize_value(value) for value in values], separators=(',', ':'), default=str)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+def add_content_hashes(columns, rows):
+    """
+    Fill the _content_hash column of row tuples.
+
+    Args:
+        columns (tuple): Column names, in row order (including _content_hash)
+        rows (list): Row tuples
+
+    Returns:
+        list: Row tuples with their content hash
+    """
+    hash_index = columns.index(CONTENT_HASH_COLUMN)
+    hashed = [index for index, column in enumerate(columns) if column not in HASH_IGNORED_COLUMNS]
+
+    return [row[:hash_index] + (content_hash([row[index] for index in hashed]),) + row[hash_index + 1:]
+            for row in map(tuple, rows)]
+
+def build_upsert_sql(table, columns, key_fields):
+    """
+    Build (or reuse) the upsert statement for a table and column set.
+
+    Args:
+        table (str): Table name
+        columns (tuple): Columns being written, in row order
+        key_fields (tuple): Columns of the table's primary key or unique index
+
+    Returns:
+        str: INSERT ... ON CONFLICT (...) DO UPDATE statement
+    """
+    cache_key = (table, columns, key_fields)
+    sql = _upsert_statements.get(cache_key)
+
+    if sql is None:
+        placeholders = ", ".join("?" for _ in columns)
+        update_fields = [column for column in columns if column not in key_fields]
+
+        if update_fields:
+            set_clause = ", ".join(f"{column} = excluded.{column}" for column in update_fields)
+            conflict_action = f"DO UPDATE SET {set_clause}"
+            if CONTENT_HASH_COLUMN in update_fields:
+                # Rows that slipped past the hash check (e.g. repeated in one batch) are not rewritten either
+                conflict_action += f" WHERE {table}.{CONTENT_HASH_COLUMN} IS NOT excluded.{CONTENT_HASH_COLUMN}"
+        else:
+            conflict_action = "DO NOTHING"
+
+        sql = (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) "
+               f"ON CONFLICT ({', '.join(key_fields)}) {conflict_action}")
+        _upsert_statements[cache_key] = sql
+
+    return sql
+
+def build_insert_sql(table, columns):
+    """Build (or reuse) a plain INSERT statement for a table and column set."""
+    cache_key = (table, columns)
+    sql = _insert_statements.get(cache_key)
+
+    if sql is None:
+        placeholders = ", ".join("?" for _ in columns)
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+        _insert_statements[cache_key] = sql
+
+    return sql
+
+def find_existing_keys(cursor, table, key_fields, keys):
+    """
+    Find which keys already exist in a table.
+
+    Args:
+        cursor: SQLite cursor
+        table (str): Table name
+        key_fields (tuple): Key columns
+        keys (list): Key tuples to look for
+
+    Returns:
+        set: Key tuples that are already in the table
+    """
+    return set(find_existing_rows(cursor, table, key_fields, keys))
+
+def find_existing_hashes(cursor, table, key_fields, keys):
+    """
+    Find the stored content hash of keys that already exist in a table.
+
+    Returns:
+        dict: Key tuple -> _content_hash (None for rows written before it existed)
+    """
+    return find_existing_rows(cursor, table, key_fields, keys, CONTENT_HASH_COLUMN)
+
+def find_existing_rows(cursor, table, key_fields, keys, value_column=None):
+    """
+    Look up keys in a table with set-based queries.
+
+    Args:
+        cursor: SQLite cursor
+        table (str): Table name
+        key_fields (tuple): Key columns
+        keys (list): Key tuples to look for
+        value_column (str): Column to return for each key found
+
+    Returns:
+        dict: Key tuple -> value_column value (None without a value_column)
+    """
+    existing = {}
+    keys = list({key for key in keys if None not in key})
+    width = len(key_fields)
+    chunk_size = max(1, MAX_VARIABLES // width)
+
+    for start in range(0, len(keys), chunk_size):
+        chunk = keys[start:start + chunk_size]
+
+        selected = ", ".join(key_fields + ((value_column,) if value_column else ()))
+        if width == 1:
+            placeholders = ", ".join("?" for _ in chunk)
+            sql = f"SELECT {selected} FROM {table} WHERE {key_fields[0]} IN ({placeholders})"
+            params = [key[0] for key in chunk]
+        else:
+            row = "(" + ", ".join("?" for _ in key_fields) + ")"
+            values = ", ".join(row for _ in chunk)
+            sql = f"SELECT {selected} FROM {table} WHERE ({', '.join(key_fields)}) IN (VALUES {values})"
+            params = [value for key in chunk for value in key]
+
+        for row in cursor.execute(sql, params):
+            existing[tuple(row[:width])] = row[width] if value_column else None
+
+    return existing
+
+def _execute_batch(cursor, sql, table, columns, batch):
+    """
+    Run one executemany batch.
+
+    If the batch fails, the rows are retried one at a time so a single bad
+    record only costs that record.
+
+    Returns:
+        list: Indexes of the rows in the batch that were written
+    """
+    try:
+        cursor.executemany(sql, batch)
+        return list(range(len(batch)))
+    except sqlite3.Error as e:
+        logger.warning(f"Batch write to {table} failed ({e}), retrying {len(batch)} rows individually")
+
+    written = []
+    for index, row in enumerate(batch):
+        try:
+            cursor.execute(sql, row)
+            written.append(index)
+        except sqlite3.Error as e:
+            logger.error(f"Error syncing record to {table}: {e}")
+            logger.error(f"Record: {json.dumps(dict(zip(columns, row)), default=str)}")
+
+    return written
+
+def upsert_rows(cursor, table, columns, rows, key_fields, sync_results, batch_size=BATCH_SIZE):
+    """
+    Insert or update row tuples with batched INSERT ... ON CONFLICT DO UPDATE.
+
+    Args:
+        cursor: SQLite cursor (the caller owns the transaction)
+        table (str): Table name
+        columns (tuple): Column names, in row order
+        rows (list): Row tuples
+        key_fields (list): Columns of the table's primary key or unique index
+        sync_results (dict): Sync results to add the inserted/updated/unchanged/errors/total counts to
+        batch_size (int): Rows per executemany call
+    """
+    if not rows:
+        logger.info(f"No data to sync for {table} table")
+        return
+
+    logger.info(f"Syncing {len(rows)} records to {table} table")
+
+    columns = tuple(columns)
+    key_fields = tuple(key_fields)
+    key_indexes = [columns.index(field) for field in key_fields]
+    sql = build_upsert_sql(table, columns, key_fields)
+    seen_keys = set()
+
+    hash_index = columns.index(CONTENT_HASH_COLUMN) if CONTENT_HASH_COLUMN in columns else None
+    if hash_index is not None:
+        rows = add_content_hashes(columns, rows)
+
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        keys = [tuple(row[index] for index in key_indexes) for row in batch]
+        sync_results['total'][table] += len(batch)
+
+        if hash_index is None:
+            existing = find_existing_keys(cursor, table, key_fields, keys)
+        else:
+            # Only rows that are new or whose content changed are written
+            existing = find_existing_hashes(cursor, table, key_fields, keys)
+            changed = [index for index, key in enumerate(keys)
+                       if key not in existing or existing[key] != batch[index][hash_index]]
+            sync_results['unchanged'][table] += len(batch) - len(changed)
+            if not changed:
+                continue
+            if len(changed) < len(batch):
+                batch = [batch[index] for index in changed]
+                keys = [keys[index] for index in changed]
+
+        written = _execute_batch(cursor, sql, table, columns, batch)
+        sync_results['errors'][table] += len(batch) - len(written)
+
+        for index in written:
+            key = keys[index]
+            if None not in key and (key in existing or key in seen_keys):
+                sync_results['updated'][table] += 1
+            else:
+                sync_results['inserted'][table] += 1
+            seen_keys.add(key)
+
+def delete_child_rows(cursor, table, parent_field, parent_ids):
+    """Delete the rows of a child table belonging to the given parents, in chunks."""
+    parent_ids = list(parent_ids)
+    for start in range(0, len(parent_ids), MAX_VARIABLES):
+        chunk = parent_ids[start:start + MAX_VARIABLES]
+        placeholders = ", ".join("?" for _ in chunk)
+        cursor.execute(f"DELETE FROM {table} WHERE {parent_field} IN ({placeholders})", chunk)
+
+def insert_rows(cursor, table, columns, rows, sync_results, batch_size=BATCH_SIZE):
+    """Insert row tuples with batched executemany, counting every written row as inserted."""
+    columns = tuple(columns)
+    sql = build_insert_sql(table, columns)
+
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        written = _execute_batch(cursor, sql, table, columns, batch)
+
+        sync_results['total'][table] += len(batch)
+        sync_results['inserted'][table] += len(written)
+        sync_results['errors'][table] += len(batch) - len(written)
+
+def replace_child_rows(cursor, table, columns, rows, parent_field, sync_results, batch_size=BATCH_SIZE,
+                       parent_ids=None):
+    """
+    Replace the child rows of every parent in rows.
+
+    Existing rows for the parents are deleted in chunks, then the new rows are
+    inserted with executemany.
+
+    Args:
+        cursor: SQLite cursor (the caller owns the transaction)
+        table (str): Child table name
+        columns (tuple): Column names, in row order
+        rows (list): Row tuples
+        parent_field (str): Column holding the parent key
+        sync_results (dict): Sync results to add the counts to
+        batch_size (int): Rows per executemany call
+        parent_ids (iterable): Every parent written with these rows, including
+            parents whose collection is now empty (their stored rows are deleted);
+            defaults to the parents found in rows
+    """
+    rows = rows or []
+    columns = tuple(columns)
+    parent_index = columns.index(parent_field)
+    if parent_ids is None:
+        parent_ids = {row[parent_index] for row in rows}
+    parent_ids = {parent_id for parent_id in parent_ids if parent_id is not None}
+    if not rows and not parent_ids:
+        return
+
+    if rows:
+        logger.info(f"Syncing {len(rows)} records to {table} table")
+
+    if CONTENT_HASH_COLUMN in columns:
+        rows = add_content_hashes(columns, rows)
+        rows, parent_ids = skip_unchanged_children(cursor, table, columns, rows, parent_field, sync_results, parent_ids)
+        if not parent_ids:
+            return
+
+    delete_child_rows(cursor, table, parent_field, parent_ids)
+    insert_rows(cursor, table, columns, rows, sync_results, batch_size)
+
+def skip_unchanged_children(cursor, table, columns, rows, parent_field, sync_results, parent_ids=None):
+    """
+    Leave out the parents whose child rows all hash the same as the stored ones.
+
+    A parent without incoming rows is unchanged only if it has no stored rows either.
+
+    Args:
+        cursor: SQLite cursor
+        table (str): Child table name
+        columns (tuple): Column names, in row order (including _content_hash)
+        rows (list): Row tuples with their content hash
+        parent_field (str): Column holding the parent key
+        sync_results (dict): Sync results to add the total/unchanged counts of skipped rows to
+        parent_ids (iterable): Every parent written, including those without rows
+            (defaults to the parents found in rows)
+
+    Returns:
+        tuple: (rows of the parents whose children changed, set of those parents)
+    """
+    parent_index = columns.index(parent_field)
+    hash_index = columns.index(CONTENT_HASH_COLUMN)
+
+    incoming = {parent_id: [] for parent_id in (parent_ids or [])}
+    for row in rows:
+        incoming.setdefault(row[parent_index], []).append(row[hash_index])
+
+    stored = {}
+    all_parent_ids = list(incoming)
+    for start in range(0, len(all_parent_ids), MAX_VARIABLES):
+        chunk = all_parent_ids[start:start + MAX_VARIABLES]
+        placeholders = ", ".join("?" for _ in chunk)
+        for parent_id, row_hash in cursor.execute(
+            f"SELECT {parent_field}, {CONTENT_HASH_COLUMN} FROM {table} WHERE {parent_field} IN ({placeholders})", chunk
+        ):
+            stored.setdefault(parent_id, []).append(row_hash)
+
+    unchanged = {parent_id for parent_id, hashes in incoming.items()
+                 if None not in stored.get(parent_id, []) and sorted(stored.get(parent_id, [])) == sorted(hashes)}
+
+    skipped = sum(len(incoming[parent_id]) for parent_id in unchanged)
+    if skipped:
+        sync_results['total'][table] += skipped
+        sync_results['unchanged'][table] += skipped
+    changed = set(incoming) - unchanged
+    return [row for row in rows if row[parent_index] in changed], changed
@@ -0,0 +1,135 @@
+"""
+Shared fixtures for the sync tests.
+
+The sync modules import each other by module name, as the sync_*.py scripts
+run from sync/, so that directory is put on the path.
+"""
+import os
+import sys
+import sqlite3
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SYNC_DIR = os.path.join(ROOT_DIR, 'sync')
+for path in (ROOT_DIR, SYNC_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+class FakeResponse:
+    """Just enough of a requests response for sync_paging.fetch_page."""
+
+    def __init__(self, data=None, status_code=200):
+        self.status_code = status_code
+        self._data = data or {}
+        self.text = str(self._data) if status_code == 200 else 'Internal Server Error'
+
+    def json(self):
+        return self._data
+
+class FakeMaximo:
+    """
+    In-memory OSLC collection with a requests-compatible get().
+
+    Pages are served by page number (pageno) or through the nextPage links of
+    the previous page. A changedate>="..." clause in oslc.where only returns
+    the records changed since then, and a status="..." or status in [...]
+    clause the records in those statuses, as Maximo does.
+
+    Attributes:
+        records (list): Records served, in order
+        requests (list): (page number, oslc.where) of every request
+        fail_pages (set): Page numbers that fail once with a 500
+    """
+
+    def __init__(self, records=None):
+        self.records = list(records or [])
+        self.requests = []
+        self.fail_pages = set()
+        self.query = {}
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        if params is not None:
+            self.query = {key: value for key, value in params.items() if key not in ('pageno', 'collectioncount')}
+            page_number = int(params.get('pageno', 1))
+            collection = url
+        else:
+            # Follow a nextPage link
+            page_number = int(parse_qs(urlparse(url).query)['pageno'][0])
+            collection = url.split('?')[0]
+
+        where = self.query.get('oslc.where', '')
+        self.requests.append((page_number, where))
+        if page_number in self.fail_pages:
+            self.fail_pages.discard(page_number)
+            return FakeResponse(status_code=500)
+
+        records = self.records
+        if 'changedate>="' in where:
+            changed_since = where.split('changedate>="')[1].split('"')[0]
+            records = [record for record in records if record['changedate'] >= changed_since]
+        if 'status="' in where:
+            statuses = [where.split('status="')[1].split('"')[0]]
+            records = [record for record in records if record['status'] in statuses]
+        elif 'status in [' in where:
+            statuses = where.split('status in [')[1].split(']')[0].replace('"', '').split(',')
+            records = [record for record in records if record['status'] in statuses]
+
+        page_size = int(self.query.get('oslc.pageSize', 100))
+        start = (page_number - 1) * page_size
+        data = {'member': [dict(record) for record in records[start:start + page_size]], 'responseInfo': {}}
+        if start + page_size < len(records):
+            data['responseInfo']['nextPage'] = {'href': f"{collection}?pageno={page_number + 1}"}
+        return FakeResponse(data)
+
+def make_workorder(wonum, workorderid, description=None, changedate='2026-01-01T00:00:00',
+                   wpmaterial=None, labtrans=None, **fields):
+    """Build a raw MXAPIWODETAIL record with its planned materials and labor transactions."""
+    record = {
+        'wonum': wonum,
+        'workorderid': workorderid,
+        'description': description or f'Work order {wonum}',
+        'status': 'APPR',
+        'siteid': 'S1',
+        'orgid': 'O1',
+        'historyflag': False,
+        'istask': False,
+        'woclass': 'WORKORDER',
+        'changedate': changedate,
+        'wpmaterial': [
+            {'wpitemid': wpitemid, 'itemnum': itemnum, 'itemqty': 1, 'siteid': 'S1', 'orgid': 'O1'}
+            for wpitemid, itemnum in (wpmaterial or [])
+        ],
+        'labtrans': [
+            {'labtransid': labtransid, 'laborcode': laborcode, 'regularhrs': 1.0, 'siteid': 'S1'}
+            for labtransid, laborcode in (labtrans or [])
+        ]
+    }
+    record.update(fields)
+    return record
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Offline database with the work order schema, as create_maximo_db.py sets it up."""
+    path = str(tmp_path / 'maximo.db')
+    conn = sqlite3.connect(path)
+    with open(os.path.join(ROOT_DIR, 'backend', 'database', 'wodetail_schema.sql')) as schema:
+        conn.executescript(schema.read())
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS sync_status (
+        endpoint TEXT PRIMARY KEY,
+        last_sync TIMESTAMP,
+        record_count INTEGER,
+        status TEXT,
+        message TEXT
+    )
+    ''')
+    conn.commit()
+    conn.close()
+    return path
+
+@pytest.fixture
+def maximo():
+    """Fake Maximo serving work orders."""
+    return FakeMaximo()
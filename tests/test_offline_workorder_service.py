@@ -0,0 +1,137 @@
+"""
+Tests for the offline-first work order reads, against work orders synced from a fake Maximo.
+"""
+import pytest
+
+from conftest import make_workorder
+from sync_db import get_database
+from sync_engine import SyncEngine
+from sync_mappings import WODETAIL
+from backend.services.offline_workorder_service import OfflineWorkOrderService
+
+def sync_workorders(db_path, maximo):
+    """Sync the fake Maximo's work orders for site S1."""
+    engine = SyncEngine(WODETAIL, db_path, api_key='test', base_url='http://maximo.test', http=maximo)
+    assert engine.run(site='S1', force_full=True)['success']
+
+@pytest.fixture
+def service(db_path):
+    """Offline work order service over the test database, without background refreshes."""
+    return OfflineWorkOrderService(lambda: get_database(db_path), max_age=3600)
+
+@pytest.fixture
+def workorder_with_tasks(db_path, maximo):
+    """WO1 with tasks T1 (one planned material, one labor transaction) and T2."""
+    maximo.records = [
+        make_workorder('WO1', 1, haschildren=True),
+        make_workorder('T1', 11, status='INPRG', istask=True, parent='WO1', taskid=10,
+                       wpmaterial=[(100, 'I1')], labtrans=[(200, 'BOB')]),
+        make_workorder('T2', 12, istask=True, parent='WO1', taskid=20)
+    ]
+    sync_workorders(db_path, maximo)
+    return maximo
+
+def test_synced_work_order_is_read_locally(service, workorder_with_tasks):
+    workorder = service.get_workorder_by_wonum('WO1', 'S1')
+
+    assert workorder['source'] == 'offline'
+    assert [task['wonum'] for task in service.get_workorder_tasks('WO1', 'S1')] == ['T1', 'T2']
+    assert [material['itemnum'] for material in service.get_task_planned_materials('T1', 'S1')] == ['I1']
+    assert [labor['laborcode'] for labor in service.get_task_labor('T1', 'S1')] == ['BOB']
+
+def test_changed_work_order_is_read_live_until_synced_again(db_path, service, workorder_with_tasks):
+    # e.g. a material was added to task T1 through WO1
+    assert service.mark_dirty('WO1', 'S1') == 3
+
+    assert service.get_workorder_by_wonum('WO1', 'S1') is None
+    assert service.get_workorder_tasks('WO1', 'S1') is None
+    assert service.get_task_planned_materials('T1', 'S1') is None
+    assert service.get_task_labor('T1', 'S1') is None
+    assert service.get_materials_availability('WO1', 'S1') is None
+
+    # The next sync writes the rows again even though Maximo's copy may hash the same
+    workorder_with_tasks.records[1]['wpmaterial'].append({'wpitemid': 101, 'itemnum': 'I2', 'itemqty': 1, 'siteid': 'S1'})
+    sync_workorders(db_path, workorder_with_tasks)
+
+    assert service.get_workorder_by_wonum('WO1', 'S1')['source'] == 'offline'
+    assert [material['itemnum'] for material in service.get_task_planned_materials('T1', 'S1')] == ['I1', 'I2']
+
+def test_status_change_is_applied_locally(db_path, service, workorder_with_tasks):
+    service.mark_dirty('T2', status='INPRG')
+
+    # The task list goes live, searches already list the new status
+    assert service.get_workorder_tasks('WO1', 'S1') is None
+    assert service.get_workorder_by_wonum('WO1', 'S1')['source'] == 'offline'
+    conn = get_database(db_path).read()
+    try:
+        assert conn.execute("SELECT status FROM workorder WHERE wonum = 'T2'").fetchone() == ('INPRG',)
+    finally:
+        conn.close()
+
+def test_unsynced_work_order_is_not_marked(service, workorder_with_tasks):
+    assert service.mark_dirty('NOPE', 'S1') == 0
+    assert service.get_workorder_by_wonum('WO1', 'S1')['source'] == 'offline'
+
+@pytest.fixture
+def dated_workorders(db_path, maximo):
+    """WO1 and WO2 without a report date, then WO3 to WO5 reported on consecutive days."""
+    maximo.records = [make_workorder('WO1', 1), make_workorder('WO2', 2)] + [
+        make_workorder(f'WO{number}', number, reportdate=f'2026-01-0{number}T08:00:00') for number in range(3, 6)
+    ]
+    sync_workorders(db_path, maximo)
+    return maximo
+
+def search_page(service, cursor=None, **criteria):
+    # page stays at 1 like a client that never tracks it: cursors alone drive the navigation
+    result = service.search_workorders(criteria, page=1, page_size=2, site_id='S1', cursor=cursor)
+    return [workorder['wonum'] for workorder in result['workorders']], result
+
+def test_search_pages_forward_and_back_with_cursors(service, dated_workorders):
+    wonums, first = search_page(service)
+    assert wonums == ['WO1', 'WO2']
+    assert (first['has_prev'], first['has_next'], first['prev_cursor']) == (False, True, None)
+    assert first['total_count'] == 5
+
+    # From the rows without a report date into the dated ones
+    wonums, second = search_page(service, first['next_cursor'])
+    assert wonums == ['WO3', 'WO4']
+    assert (second['has_prev'], second['has_next']) == (True, True)
+
+    wonums, last = search_page(service, second['next_cursor'])
+    assert wonums == ['WO5']
+    assert (last['has_prev'], last['has_next'], last['next_cursor']) == (True, False, None)
+
+    wonums, back = search_page(service, last['prev_cursor'])
+    assert wonums == ['WO3', 'WO4']
+    assert (back['has_prev'], back['has_next']) == (True, True)
+
+    # Back across the NULL report dates to the first page
+    wonums, start = search_page(service, back['prev_cursor'])
+    assert wonums == ['WO1', 'WO2']
+    assert (start['has_prev'], start['has_next'], start['prev_cursor']) == (False, True, None)
+
+def test_search_matches_description_word_prefixes(db_path, service, maximo):
+    maximo.records = [make_workorder('WO1', 1, description='Pump leaking'),
+                      make_workorder('WO2', 2, description='Pumping station check'),
+                      make_workorder('WO3', 3, description='Valve repair')]
+    sync_workorders(db_path, maximo)
+
+    # Every word, in any order, as a word or the start of one
+    assert search_page(service, description='leak pump')[0] == ['WO1']
+    assert search_page(service, description='PUMP')[0] == ['WO1', 'WO2']
+    assert search_page(service, description='gasket')[0] == []
+
+def test_search_with_many_matches_gives_the_same_pages(monkeypatch, db_path, service, maximo):
+    maximo.records = [make_workorder(f'WO{number}', number, description=f'Pump check {number}',
+                                     reportdate=f'2026-01-0{number}T08:00:00') for number in range(1, 6)]
+    sync_workorders(db_path, maximo)
+    wonums, first = search_page(service, description='pump')
+    looked_up = [wonums] + [search_page(service, first['next_cursor'], description='pump')[0]]
+
+    # Past the lookup limit the matches are checked while scanning in report date order
+    monkeypatch.setattr('backend.services.offline_workorder_service.SEARCH_LOOKUP_LIMIT', 1)
+    wonums, first = search_page(service, description='pump')
+    scanned = [wonums] + [search_page(service, first['next_cursor'], description='pump')[0]]
+
+    assert looked_up == scanned == [['WO1', 'WO2'], ['WO3', 'WO4']]
+    assert first['total_count'] == 5
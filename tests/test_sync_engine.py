@@ -0,0 +1,221 @@
+"""
+Tests for the sync engine against a fake Maximo, using the work order mapping.
+
+Covers paging, the combined status query, content hash skipping,
+reconciliation with tombstones, checkpoint resume and child row replacement.
+"""
+import sqlite3
+
+import pytest
+
+from conftest import make_workorder
+from sync_engine import SyncEngine
+from sync_mappings import WODETAIL, WODETAIL_STATUSES
+from sync_paging import iter_pages_parallel
+
+def run_sync(db_path, maximo, **kwargs):
+    """Run a work order sync for site S1 against the fake Maximo."""
+    engine = SyncEngine(WODETAIL, db_path, api_key='test', base_url='http://maximo.test', http=maximo)
+    return engine.run(site='S1', **kwargs)
+
+def query(db_path, sql, params=()):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+def stored_workorders(db_path):
+    return [row[0] for row in query(db_path, "SELECT wonum FROM workorder ORDER BY wonum")]
+
+def stored_children(db_path, table, key):
+    return query(db_path, f"SELECT wonum, {key} FROM {table} ORDER BY wonum, {key}")
+
+def test_paging_follows_next_page_links(db_path, maximo):
+    maximo.records = [make_workorder(f'WO{number}', number) for number in range(1, 6)]
+
+    result = run_sync(db_path, maximo, page_size=2)
+
+    assert result['success']
+    assert [page for page, _ in maximo.requests] == [1, 2, 3]
+    assert result['metrics']['pages'] == 3
+    assert stored_workorders(db_path) == ['WO1', 'WO2', 'WO3', 'WO4', 'WO5']
+
+def test_parallel_pages_need_a_stable_order(db_path, maximo):
+    maximo.records = [make_workorder('WO1', 1)]
+
+    assert run_sync(db_path, maximo)['success']
+    assert maximo.query['oslc.orderBy'] == '+workorderid'
+
+    with pytest.raises(ValueError):
+        next(iter_pages_parallel('http://maximo.test/api/os/mxapiwodetail', {'oslc.pageSize': '2'}, {}, http=maximo))
+
+def test_statuses_are_synced_in_one_combined_query(db_path, maximo):
+    maximo.records = [make_workorder('WO1', 1)]
+
+    assert run_sync(db_path, maximo)['success']
+
+    assert len(maximo.requests) == 1
+    where = maximo.requests[0][1]
+    statuses = ','.join(f'"{status}"' for status in WODETAIL_STATUSES)
+    assert where.startswith('siteid="S1"')
+    assert f'status in [{statuses}]' in where
+    # Tasks are synced by default, so only top-level records are not filtered on
+    assert 'istask=0' not in where
+
+def test_single_status_is_its_own_query(db_path, maximo):
+    maximo.records = [make_workorder('WO1', 1)]
+
+    assert run_sync(db_path, maximo, partition_value='INPRG')['success']
+
+    where = maximo.requests[0][1]
+    assert 'status="INPRG"' in where
+    assert 'status in [' not in where
+
+def test_unchanged_rows_are_skipped(db_path, maximo):
+    maximo.records = [make_workorder('WO1', 1, wpmaterial=[(10, 'I1')]), make_workorder('WO2', 2)]
+    assert run_sync(db_path, maximo)['success']
+    first_sync = query(db_path, "SELECT wonum, _last_sync FROM workorder ORDER BY wonum")
+
+    result = run_sync(db_path, maximo, force_full=True)
+
+    assert result['success']
+    assert result['sync_results']['unchanged']['workorder'] == 2
+    assert result['sync_results']['unchanged']['wpmaterial'] == 1
+    assert not result['sync_results']['updated'].get('workorder')
+    assert query(db_path, "SELECT wonum, _last_sync FROM workorder ORDER BY wonum") == first_sync
+
+    maximo.records[1] = make_workorder('WO2', 2, description='Changed')
+    result = run_sync(db_path, maximo, force_full=True)
+
+    assert result['sync_results']['updated']['workorder'] == 1
+    assert result['sync_results']['unchanged']['workorder'] == 1
+    assert query(db_path, "SELECT description FROM workorder WHERE wonum = 'WO2'") == [('Changed',)]
+
+def test_full_read_purges_missing_rows_and_records_tombstones(db_path, maximo):
+    maximo.records = [make_workorder('WO1', 1), make_workorder('WO2', 2, wpmaterial=[(20, 'I2')], labtrans=[(30, 'BOB')])]
+    assert run_sync(db_path, maximo)['success']
+
+    del maximo.records[1]
+    result = run_sync(db_path, maximo, force_full=True)
+
+    assert result['success']
+    assert result['metrics']['rows_removed'] == 1
+    assert stored_workorders(db_path) == ['WO1']
+    assert stored_children(db_path, 'wpmaterial', 'wpitemid') == []
+    assert stored_children(db_path, 'labtrans', 'labtransid') == []
+    tombstones = query(db_path, "SELECT table_name, endpoint, site, action FROM sync_tombstone")
+    assert tombstones == [('workorder', 'MXAPIWODETAIL', 'S1', 'purged')]
+
+def test_incremental_read_does_not_purge(db_path, maximo):
+    maximo.records = [make_workorder('WO1', 1, changedate='2026-01-01T00:00:00'),
+                      make_workorder('WO2', 2, changedate='2026-01-02T00:00:00')]
+    assert run_sync(db_path, maximo)['success']
+
+    # WO2 is no longer returned (e.g. it was deleted), WO1 changed since the watermark
+    maximo.records = [make_workorder('WO1', 1, description='Changed', changedate='2026-01-03T00:00:00')]
+    result = run_sync(db_path, maximo)
+
+    assert result['success']
+    assert 'changedate>="2026-01-02T00:00:00"' in maximo.requests[-1][1]
+    assert stored_workorders(db_path) == ['WO1', 'WO2']
+    assert query(db_path, "SELECT description FROM workorder WHERE wonum = 'WO1'") == [('Changed',)]
+
+def test_incremental_read_purges_work_orders_that_left_the_synced_statuses(db_path, maximo):
+    maximo.records = [make_workorder('WO1', 1), make_workorder('WO2', 2, wpmaterial=[(20, 'I2')]),
+                      make_workorder('WO3', 3)]
+    assert run_sync(db_path, maximo)['success']
+
+    # WO2 was completed and WO3 cancelled (a skipped status) since the watermark
+    maximo.records[1] = make_workorder('WO2', 2, status='COMP', changedate='2026-01-02T00:00:00')
+    maximo.records[2] = make_workorder('WO3', 3, status='CAN', changedate='2026-01-02T00:00:00')
+    result = run_sync(db_path, maximo)
+
+    assert result['success']
+    where = maximo.requests[-1][1]
+    assert 'changedate>="2026-01-01T00:00:00"' in where
+    assert 'status' not in where
+    assert result['metrics']['rows_removed'] == 2
+    assert stored_workorders(db_path) == ['WO1']
+    assert stored_children(db_path, 'wpmaterial', 'wpitemid') == []
+    tombstones = query(db_path, "SELECT table_name, row_key, action FROM sync_tombstone ORDER BY row_key")
+    assert tombstones == [('workorder', '{"wonum": "WO2", "workorderid": 2}', 'purged'),
+                          ('workorder', '{"wonum": "WO3", "workorderid": 3}', 'purged')]
+
+def test_full_read_is_due_after_the_full_sync_interval(db_path, maximo):
+    maximo.records = [make_workorder('WO1', 1), make_workorder('WO2', 2)]
+    assert run_sync(db_path, maximo)['success']
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE sync_watermark SET full_read_at = '2000-01-01T00:00:00'")
+    conn.commit()
+    conn.close()
+
+    del maximo.records[1]
+    assert run_sync(db_path, maximo)['success']
+
+    assert 'changedate' not in maximo.requests[-1][1]
+    assert stored_workorders(db_path) == ['WO1']
+
+def test_interrupted_sync_resumes_from_checkpoint(db_path, maximo):
+    # Past the initial bulk load every page is committed with its checkpoint
+    maximo.records = [make_workorder('WO0', 100)]
+    assert run_sync(db_path, maximo)['success']
+
+    maximo.records = [make_workorder(f'WO{number}', number) for number in range(1, 6)]
+    maximo.fail_pages = {2}
+    result = run_sync(db_path, maximo, page_size=2, force_full=True)
+
+    assert not result['success']
+    assert stored_workorders(db_path) == ['WO0', 'WO1', 'WO2']
+    assert query(db_path, "SELECT page_number FROM sync_checkpoint") == [(1,)]
+
+    maximo.requests.clear()
+    result = run_sync(db_path, maximo, page_size=2, force_full=True)
+
+    assert result['success']
+    assert [page for page, _ in maximo.requests] == [2, 3]
+    assert stored_workorders(db_path) == ['WO0', 'WO1', 'WO2', 'WO3', 'WO4', 'WO5']
+    assert query(db_path, "SELECT COUNT(*) FROM sync_checkpoint") == [(0,)]
+
+def test_resumed_read_does_not_purge(db_path, maximo):
+    maximo.records = [make_workorder(f'WO{number}', number) for number in range(1, 6)]
+    assert run_sync(db_path, maximo, page_size=2)['success']
+
+    maximo.fail_pages = {2}
+    assert not run_sync(db_path, maximo, page_size=2, force_full=True)['success']
+
+    # The resumed read never sees WO1 and WO2 again, so nothing can be reconciled
+    result = run_sync(db_path, maximo, page_size=2, force_full=True)
+
+    assert result['success']
+    assert not result['metrics'].get('rows_removed')
+    assert stored_workorders(db_path) == ['WO1', 'WO2', 'WO3', 'WO4', 'WO5']
+
+def test_child_rows_are_replaced(db_path, maximo):
+    maximo.records = [
+        make_workorder('WO1', 1, wpmaterial=[(10, 'I1'), (11, 'I2')], labtrans=[(30, 'BOB')]),
+        make_workorder('WO2', 2, wpmaterial=[(20, 'I3')], labtrans=[(40, 'ANN')])
+    ]
+    assert run_sync(db_path, maximo)['success']
+    assert stored_children(db_path, 'wpmaterial', 'wpitemid') == [('WO1', 10), ('WO1', 11), ('WO2', 20)]
+
+    maximo.records[0] = make_workorder('WO1', 1, wpmaterial=[(12, 'I4')], labtrans=[(30, 'BOB')])
+    assert run_sync(db_path, maximo, force_full=True)['success']
+
+    assert stored_children(db_path, 'wpmaterial', 'wpitemid') == [('WO1', 12), ('WO2', 20)]
+    assert stored_children(db_path, 'labtrans', 'labtransid') == [('WO1', 30), ('WO2', 40)]
+
+def test_emptied_child_collection_removes_stored_rows(db_path, maximo):
+    maximo.records = [
+        make_workorder('WO1', 1, wpmaterial=[(10, 'I1')], labtrans=[(30, 'BOB')]),
+        make_workorder('WO2', 2, wpmaterial=[(20, 'I3')], labtrans=[(40, 'ANN')])
+    ]
+    assert run_sync(db_path, maximo)['success']
+
+    # WO2's collections come back empty; no other work order on the page has children either
+    maximo.records = [make_workorder('WO1', 1), make_workorder('WO2', 2)]
+    assert run_sync(db_path, maximo, force_full=True)['success']
+
+    assert stored_children(db_path, 'wpmaterial', 'wpitemid') == []
+    assert stored_children(db_path, 'labtrans', 'labtransid') == []
@@ -0,0 +1,179 @@
+"""
+Tests for the background sync scheduler and the traffic meter, on a fake clock.
+"""
+import pytest
+
+from sync_scheduler import SyncScheduler, TrafficMeter
+
+class FakeClock:
+    """Monotonic clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class FakeSubmit:
+    """submit() that records each started sync and its on_finished callback."""
+
+    def __init__(self):
+        self.started = []
+        self.callbacks = {}
+        self.accept = True
+
+    def __call__(self, endpoint, site, on_finished):
+        if not self.accept:
+            return False
+        self.started.append((endpoint, site))
+        self.callbacks[(endpoint, site)] = on_finished
+        return True
+
+    def finish(self, endpoint, success, site=None):
+        self.callbacks.pop((endpoint, site))(success)
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def submit():
+    return FakeSubmit()
+
+def make_scheduler(clock, submit, schedules=(('wodetail', 900),), **kwargs):
+    kwargs.setdefault('jitter', 0)
+    kwargs.setdefault('initial_delay', 0)
+    return SyncScheduler([{'endpoint': endpoint, 'interval': interval} for endpoint, interval in schedules],
+                         submit, clock=clock, **kwargs)
+
+def next_run_in(scheduler, endpoint):
+    return next(entry['next_run_in'] for entry in scheduler.get_state()['entries'] if entry['endpoint'] == endpoint)
+
+def test_first_runs_are_spread_over_the_initial_delay(clock, submit):
+    scheduler = make_scheduler(clock, submit, [('wodetail', 900), ('inventory', 3600)], initial_delay=60)
+
+    for entry in scheduler.get_state()['entries']:
+        assert 60 <= entry['next_run_in'] <= 120
+
+    scheduler.run_pending()
+    assert submit.started == []
+
+    clock.now += 120
+    scheduler.run_pending()
+    assert len(submit.started) == 1
+
+def test_intervals_are_jittered(clock, submit):
+    scheduler = make_scheduler(clock, submit, [(f'endpoint{number}', 1000) for number in range(20)],
+                               jitter=0.1, max_concurrent=20)
+    scheduler.run_pending()
+
+    for endpoint, _ in list(submit.started):
+        submit.finish(endpoint, True)
+
+    delays = [entry['next_run_in'] for entry in scheduler.get_state()['entries']]
+    assert all(900 <= delay <= 1100 for delay in delays)
+    assert len(set(delays)) > 1
+
+def test_failures_back_off_exponentially_up_to_the_limit(clock, submit):
+    scheduler = make_scheduler(clock, submit, backoff_base=60, max_backoff=200)
+
+    delays = []
+    for _ in range(4):
+        scheduler.run_pending()
+        submit.finish('wodetail', False)
+        delays.append(next_run_in(scheduler, 'wodetail'))
+        clock.now += delays[-1]
+
+    assert delays == [60, 120, 200, 200]
+    assert scheduler.get_state()['entries'][0]['failures'] == 4
+
+    scheduler.run_pending()
+    submit.finish('wodetail', True)
+
+    assert scheduler.get_state()['entries'][0]['failures'] == 0
+    assert next_run_in(scheduler, 'wodetail') == 900
+
+def test_sync_that_could_not_start_is_retried_without_backoff(clock, submit):
+    scheduler = make_scheduler(clock, submit, retry_seconds=30)
+    submit.accept = False
+
+    scheduler.run_pending()
+
+    entry = scheduler.get_state()['entries'][0]
+    assert entry['failures'] == 0
+    assert not entry['in_progress']
+    assert entry['next_run_in'] == 30
+
+def test_concurrent_syncs_are_capped(clock, submit):
+    scheduler = make_scheduler(clock, submit, [('wodetail', 900), ('inventory', 3600), ('assets', 3600)],
+                               max_concurrent=2)
+
+    scheduler.run_pending()
+    assert len(submit.started) == 2
+
+    scheduler.run_pending()
+    assert len(submit.started) == 2
+
+    submit.finish(submit.started[0][0], True)
+    scheduler.run_pending()
+    assert len(submit.started) == 3
+
+def test_syncs_pause_while_traffic_is_heavy(clock, submit):
+    busy = [True]
+    scheduler = make_scheduler(clock, submit, retry_seconds=30, is_busy=lambda: busy[0])
+
+    scheduler.run_pending()
+
+    assert submit.started == []
+    assert scheduler.get_state()['paused']
+    assert next_run_in(scheduler, 'wodetail') == 30
+
+    busy[0] = False
+    clock.now += 30
+    scheduler.run_pending()
+
+    assert submit.started == [('wodetail', None)]
+    assert not scheduler.get_state()['paused']
+
+def test_requested_sync_brings_the_entry_forward(clock, submit):
+    scheduler = make_scheduler(clock, submit)
+    scheduler.run_pending()
+    submit.finish('wodetail', True)
+    assert next_run_in(scheduler, 'wodetail') == 900
+
+    scheduler.request('wodetail')
+    scheduler.run_pending()
+
+    assert submit.started == [('wodetail', None), ('wodetail', None)]
+
+def test_requested_sync_without_an_entry_runs_once(clock, submit):
+    busy = [True]
+    scheduler = make_scheduler(clock, submit, initial_delay=600, retry_seconds=30, is_busy=lambda: busy[0])
+
+    # Like a scheduled sync, it waits for the traffic to drop
+    scheduler.request('wodetail', 'S1')
+    scheduler.run_pending()
+    assert submit.started == []
+
+    busy[0] = False
+    clock.now += 30
+    scheduler.run_pending()
+    assert submit.started == [('wodetail', 'S1')]
+
+    submit.finish('wodetail', False, site='S1')
+    assert [(entry['endpoint'], entry['site']) for entry in scheduler.get_state()['entries']] == [('wodetail', None)]
+
+def test_traffic_meter_counts_requests_in_the_window(clock):
+    meter = TrafficMeter(window_seconds=60, clock=clock)
+
+    meter.record()
+    clock.now += 30
+    meter.record()
+    meter.record()
+    assert meter.count() == 3
+
+    clock.now += 30
+    assert meter.count() == 2
+
+    clock.now += 30
+    assert meter.count() == 0